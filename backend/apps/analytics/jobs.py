@@ -0,0 +1,187 @@
+"""
+Background import/export jobs.
+
+A job is a ``Report`` row: it is created by the request, then run on a small
+in-process thread pool once the creating transaction commits, so the web
+worker returns immediately. Progress is written back to the row
+(``rows_processed``, ``error_count``, ``row_errors``) for clients to poll, and
+the result file is kept in default storage under ``file_path``.
+
+The pool lives in the web process, so a restart drops the jobs it had queued
+or running. ``recover_stale_jobs`` (``manage.py recover_report_jobs`` from
+cron) puts them right: jobs still pending after ``REPORT_JOB_TIMEOUT`` are
+queued again, and jobs running for longer are marked failed. A job is
+claimed before it runs, so queueing it twice runs it once.
+"""
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Report
+
+logger = logging.getLogger(__name__)
+
+# Only the first errors are stored on the job; error_count has the full total.
+MAX_STORED_ERRORS = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_JOB_WORKERS', 2),
+                thread_name_prefix='report-job',
+            )
+    return _executor
+
+
+def submit_job(report):
+    """Queue ``report`` to run once the current transaction commits."""
+    transaction.on_commit(lambda: get_executor().submit(run_job, report.pk))
+
+
+def save_progress(report_id, rows_processed, errors):
+    Report.objects.filter(pk=report_id).update(
+        rows_processed=rows_processed,
+        error_count=len(errors),
+        row_errors=errors[:MAX_STORED_ERRORS],
+    )
+
+
+def run_job(report_id):
+    close_old_connections()
+    try:
+        claimed = Report.objects.filter(pk=report_id, generation_started__isnull=True).update(
+            generation_started=timezone.now()
+        )
+        if not claimed:
+            # Already run, or running elsewhere
+            return
+        report = Report.objects.select_related('user', 'tenant').get(pk=report_id)
+
+        handler = JOB_HANDLERS[report.report_type]
+        handler(report)
+
+        Report.objects.filter(pk=report_id).update(
+            is_generated=True,
+            generation_completed=timezone.now(),
+            # Finished after all, though recover_stale_jobs gave up on it
+            error_message=None,
+        )
+    except Exception as e:
+        logger.exception('Report job %s failed', report_id)
+        Report.objects.filter(pk=report_id).update(
+            error_message=str(e) or e.__class__.__name__,
+            generation_completed=timezone.now(),
+        )
+    finally:
+        close_old_connections()
+
+
+def recover_stale_jobs(now=None, timeout=None):
+    """
+    Requeue jobs pending for longer than ``timeout`` (default
+    ``REPORT_JOB_TIMEOUT`` seconds) and fail jobs running for longer.
+    Returns ``(requeued, failed)`` counts.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=timeout or getattr(settings, 'REPORT_JOB_TIMEOUT', 3600))
+    jobs = Report.objects.filter(
+        report_type__in=list(JOB_HANDLERS), is_generated=False, error_message__isnull=True,
+    )
+
+    pending = list(jobs.filter(generation_started__isnull=True, created_at__lt=cutoff))
+    for report in pending:
+        submit_job(report)
+
+    failed = jobs.filter(generation_started__lt=cutoff, generation_completed__isnull=True).update(
+        error_message='The job was interrupted before it finished; please submit it again.',
+        generation_completed=now,
+    )
+    return len(pending), failed
+
+
+def _run_customer_import(report):
+    from apps.clients.importers import ClientImporter, iter_csv_rows, iter_json_rows
+
+    def on_progress(importer):
+        save_progress(report.pk, importer.rows_processed, importer.errors)
+
+    importer = ClientImporter(tenant=report.tenant, user=report.user, on_progress=on_progress)
+    upload_path = report.parameters['upload_path']
+    with default_storage.open(upload_path, 'rb') as upload:
+        if report.format == Report.Format.JSON:
+            importer.run(iter_json_rows(upload))
+        else:
+            importer.run(iter_csv_rows(upload))
+    default_storage.delete(upload_path)
+
+
+def _run_product_import(report):
+    from apps.products.importers import import_products, iter_product_csv_rows
+
+    def on_progress(rows_processed, imported_count, errors):
+        save_progress(report.pk, rows_processed, errors)
+
+    upload_path = report.parameters['upload_path']
+    with default_storage.open(upload_path, 'rb') as upload:
+        import_products(iter_product_csv_rows(upload), report.tenant, on_progress=on_progress)
+    default_storage.delete(upload_path)
+
+
+def _run_customer_export(report):
+    from apps.clients.exports import CLIENT_EXPORT_FIELDS, iter_client_export_rows
+    from apps.clients.models import Client
+    from shared.exports import EXPORT_CHUNK_SIZE, iter_csv, iter_json_array, iter_ndjson
+
+    fields = report.parameters.get('fields') or CLIENT_EXPORT_FIELDS
+    queryset = Client.objects.filter(tenant=report.tenant, is_deleted=False)
+    as_json = report.format != Report.Format.CSV
+
+    def counted(rows):
+        count = 0
+        for row in rows:
+            count += 1
+            if count % EXPORT_CHUNK_SIZE == 0:
+                save_progress(report.pk, count, [])
+            yield row
+        save_progress(report.pk, count, [])
+
+    rows = counted(iter_client_export_rows(queryset, fields, as_json=as_json))
+    if report.format == Report.Format.CSV:
+        chunks = iter_csv(rows, fields)
+    elif report.format == Report.Format.NDJSON:
+        chunks = iter_ndjson(rows)
+    else:
+        chunks = iter_json_array(rows)
+
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in chunks:
+            tmp.write(chunk.encode('utf-8'))
+        tmp.seek(0)
+        path = default_storage.save(
+            f'reports/{report.tenant_id}/customers_{report.pk}.{report.format}', File(tmp)
+        )
+    Report.objects.filter(pk=report.pk).update(
+        file_path=path,
+        file_size=default_storage.size(path),
+    )
+
+
+JOB_HANDLERS = {
+    Report.ReportType.CUSTOMER_IMPORT: _run_customer_import,
+    Report.ReportType.PRODUCT_IMPORT: _run_product_import,
+    Report.ReportType.CUSTOMER_REPORT: _run_customer_export,
+}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.jobs import recover_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Requeue import/export jobs lost by a restart and fail the ones interrupted mid-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=int,
+            help='Seconds a job may stay pending or running (default: REPORT_JOB_TIMEOUT)',
+        )
+
+    def handle(self, *args, **options):
+        requeued, failed = recover_stale_jobs(timeout=options['timeout'])
+        self.stdout.write(f'Requeued {requeued} pending job(s), failed {failed} interrupted job(s)')
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.rollups import rollup_metrics
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Roll sales and clients changed since the last run up into daily, weekly and monthly business metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only roll up the tenant with this slug')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Rebuild every period from scratch instead of only the changed ones',
+        )
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' does not exist")
+
+        for tenant in tenants:
+            started = time.monotonic()
+            days = rollup_metrics(tenant, full=options['full'])
+            self.stdout.write(
+                f'{tenant.slug}: recomputed {days} day(s) in {time.monotonic() - started:.2f}s'
+            )
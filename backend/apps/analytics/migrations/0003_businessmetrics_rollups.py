@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0002_store_tenant'),
+        ('tenants', '0002_tenant_google_maps_url'),
+        ('analytics', '0002_report_job_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Metrics Rollup State',
+                'verbose_name_plural': 'Metrics Rollup States',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='businessmetrics',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='businessmetrics',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='business_metrics', to='stores.store'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='businessmetrics',
+            unique_together={('metric_type', 'metric_name', 'period_type', 'period_start', 'period_end', 'tenant', 'store')},
+        ),
+        migrations.AddIndex(
+            model_name='businessmetrics',
+            index=models.Index(fields=['tenant', 'period_type', 'metric_type', 'period_start'], name='metrics_tenant_period_idx'),
+        ),
+        migrations.AddField(
+            model_name='metricsrollupstate',
+            name='tenant',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metrics_rollup_state', to='tenants.tenant'),
+        ),
+    ]
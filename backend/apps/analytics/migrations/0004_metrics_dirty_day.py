@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_tenant_google_maps_url'),
+        ('analytics', '0003_businessmetrics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics_dirty_days', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Metrics Dirty Day',
+                'verbose_name_plural': 'Metrics Dirty Days',
+            },
+        ),
+    ]
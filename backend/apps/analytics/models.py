@@ -102,6 +102,14 @@ class BusinessMetrics(models.Model):
         on_delete=models.CASCADE,
         related_name='business_metrics'
     )
+    # Store the metric is for; empty for tenant-wide metrics
+    store = models.ForeignKey(
+        'stores.Store',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='business_metrics'
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,12 +119,60 @@ class BusinessMetrics(models.Model):
         verbose_name = _('Business Metric')
         verbose_name_plural = _('Business Metrics')
         ordering = ['-period_end']
-        unique_together = ['metric_type', 'metric_name', 'period_start', 'period_end', 'tenant']
+        unique_together = ['metric_type', 'metric_name', 'period_type', 'period_start', 'period_end', 'tenant', 'store']
+        indexes = [
+            models.Index(
+                fields=['tenant', 'period_type', 'metric_type', 'period_start'],
+                name='metrics_tenant_period_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.metric_name} - {self.period_start.date()} to {self.period_end.date()}"
 
 
+class MetricsRollupState(models.Model):
+    """
+    Watermark of the BusinessMetrics rollup for a tenant: sales and clients
+    changed after ``watermark`` have not been rolled up yet.
+    """
+    tenant = models.OneToOneField(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        related_name='metrics_rollup_state'
+    )
+    watermark = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Metrics Rollup State')
+        verbose_name_plural = _('Metrics Rollup States')
+
+    def __str__(self):
+        return f"{self.tenant} - {self.watermark}"
+
+
+class MetricsDirtyDay(models.Model):
+    """
+    A day whose BusinessMetrics rollup must be recomputed although no row
+    changed on it, because a sale or client created that day was hard-deleted.
+    The next rollup run recomputes the day for every store and drops the mark.
+    """
+    tenant = models.ForeignKey(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        related_name='metrics_dirty_days'
+    )
+    day = models.DateField()
+
+    class Meta:
+        verbose_name = _('Metrics Dirty Day')
+        verbose_name_plural = _('Metrics Dirty Days')
+
+    def __str__(self):
+        return f"{self.tenant} - {self.day}"
+
+
 class DashboardWidget(models.Model):
     """
     Model for storing dashboard widget configurations.
@@ -187,6 +243,8 @@ class Report(models.Model):
         CUSTOMER_REPORT = 'customer_report', _('Customer Report')
         PRODUCT_REPORT = 'product_report', _('Product Report')
         FINANCIAL_REPORT = 'financial_report', _('Financial Report')
+        CUSTOMER_IMPORT = 'customer_import', _('Customer Import')
+        PRODUCT_IMPORT = 'product_import', _('Product Import')
         CUSTOM = 'custom', _('Custom Report')
 
     class Format(models.TextChoices):
@@ -194,6 +252,13 @@ class Report(models.Model):
         EXCEL = 'excel', _('Excel')
         CSV = 'csv', _('CSV')
         JSON = 'json', _('JSON')
+        NDJSON = 'ndjson', _('NDJSON')
+
+    class JobStatus(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
 
     # Report Information
     name = models.CharField(max_length=200)
@@ -214,6 +279,11 @@ class Report(models.Model):
     generation_completed = models.DateTimeField(blank=True, null=True)
     error_message = models.TextField(blank=True, null=True)
     
+    # Progress (for import/export jobs)
+    rows_processed = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    row_errors = models.JSONField(default=list, blank=True)
+    
     # User and Tenant
     user = models.ForeignKey(
         'users.User',
@@ -237,3 +307,13 @@ class Report(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.get_report_type_display()}"
+
+    @property
+    def job_status(self):
+        if self.error_message:
+            return self.JobStatus.FAILED
+        if self.is_generated:
+            return self.JobStatus.COMPLETED
+        if self.generation_started:
+            return self.JobStatus.RUNNING
+        return self.JobStatus.PENDING
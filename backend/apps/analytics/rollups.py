@@ -0,0 +1,373 @@
+"""
+Incremental rollup of sales and clients into ``BusinessMetrics``.
+
+``rollup_metrics(tenant)`` finds the days holding sales or clients created or
+changed since the tenant's watermark, recomputes just those days per store
+and tenant-wide with grouped queries, and rebuilds the weeks and months they
+fall in from the stored daily rows. A run costs what changed since the last
+one, not the size of the tables.
+
+``collect`` reads them back: stored rollups (monthly rows for whole months)
+for the days before the watermark, plus a live aggregate of the few rows
+created since, so reports include today's activity without scanning history.
+
+Hard-deleted sales and clients leave no row behind to pick up, so a
+``post_delete`` receiver records their day as a ``MetricsDirtyDay`` and the
+next run recomputes it.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.sales.models import Sale
+
+from .models import BusinessMetrics, MetricsDirtyDay, MetricsRollupState
+
+MetricType = BusinessMetrics.MetricType
+
+# Sale statuses that count towards revenue
+REVENUE_STATUSES = [Sale.Status.CONFIRMED, Sale.Status.DELIVERED]
+
+METRIC_NAMES = {
+    MetricType.SALES: 'sales_count',
+    MetricType.REVENUE: 'revenue',
+    MetricType.CUSTOMERS: 'new_customers',
+}
+ROLLUP_METRICS = tuple(METRIC_NAMES)
+SALES_METRICS = (MetricType.SALES, MetricType.REVENUE)
+
+DAILY, WEEKLY, MONTHLY = 'daily', 'weekly', 'monthly'
+PERIOD_LENGTHS = {
+    DAILY: relativedelta(days=1),
+    WEEKLY: relativedelta(weeks=1),
+    MONTHLY: relativedelta(months=1),
+}
+
+# Rows committed just after a run started can carry an ``updated_at`` older
+# than its watermark; re-reading this much overlap picks them up next time.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+MAX_CHANGE_PERCENTAGE = Decimal('999.99')
+
+Bucket = namedtuple('Bucket', ['start', 'period_type', 'value', 'metadata'])
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _local_date(value):
+    return timezone.localtime(value).date()
+
+
+def period_start(day, period_type):
+    """First day of the ``period_type`` period containing ``day`` (weeks start on Monday)."""
+    if period_type == WEEKLY:
+        return day - timedelta(days=day.weekday())
+    if period_type == MONTHLY:
+        return day.replace(day=1)
+    return day
+
+
+def merge_metadata(target, source):
+    """Add the numbers of the nested dict ``source`` into ``target``."""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            merge_metadata(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def _day_ranges(days):
+    """Collapse dates into sorted ``[start, end)`` runs of consecutive days."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return ranges
+
+
+def _range_q(ranges, field):
+    q = Q()
+    for start, end in ranges:
+        bounds = {f'{field}__lt': _start_of(end)}
+        if start is not None:
+            bounds[f'{field}__gte'] = _start_of(start)
+        q |= Q(**bounds)
+    return q
+
+
+def _rollup_rows(tenant):
+    return BusinessMetrics.objects.filter(
+        tenant=tenant,
+        metric_type__in=ROLLUP_METRICS,
+        metric_name__in=list(METRIC_NAMES.values()),
+        period_type__in=list(PERIOD_LENGTHS),
+    )
+
+
+def compute_daily(tenant, ranges, metric_types=ROLLUP_METRICS):
+    """
+    Aggregate the sales and clients created within the day ``ranges``.
+
+    Returns ``{(day, store_id): {metric_type: [value, metadata]}}``; the
+    ``None`` store holds tenant-wide totals, which also count sales and
+    clients that are not tied to a store.
+    """
+    buckets = defaultdict(dict)
+
+    def entry(day, store_id, metric_type):
+        return buckets[(day, store_id)].setdefault(metric_type, [Decimal('0'), {}])
+
+    def scopes(store_id):
+        return (None,) if store_id is None else (None, store_id)
+
+    if any(metric_type in SALES_METRICS for metric_type in metric_types):
+        sales = (
+            Sale.objects.filter(_range_q(ranges, 'created_at'), tenant=tenant)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'sales_representative__store', 'status')
+            .annotate(count=Count('id'), total=Sum('total_amount'))
+            .order_by()
+        )
+        for row in sales:
+            total = row['total'] or Decimal('0')
+            for store_id in scopes(row['sales_representative__store']):
+                sales_entry = entry(row['day'], store_id, MetricType.SALES)
+                sales_entry[0] += row['count']
+                merge_metadata(sales_entry[1], {
+                    'by_status': {row['status']: {'count': row['count'], 'total': float(total)}},
+                })
+                if row['status'] in REVENUE_STATUSES:
+                    entry(row['day'], store_id, MetricType.REVENUE)[0] += total
+
+    if MetricType.CUSTOMERS in metric_types:
+        clients = (
+            Client.objects.filter(_range_q(ranges, 'created_at'), tenant=tenant, is_deleted=False)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'assigned_to__store', 'lead_source', 'status')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in clients:
+            for store_id in scopes(row['assigned_to__store']):
+                customers_entry = entry(row['day'], store_id, MetricType.CUSTOMERS)
+                customers_entry[0] += row['count']
+                merge_metadata(customers_entry[1], {
+                    'by_source': {row['lead_source'] or '': row['count']},
+                    'by_status': {row['status']: row['count']},
+                })
+
+    return buckets
+
+
+def _changed_days(tenant, since):
+    """Days (by ``created_at``) of the sales and clients changed after ``since``."""
+    days = set()
+    for model in (Sale, Client):
+        rows = model.objects.filter(tenant=tenant)
+        if since is not None:
+            rows = rows.filter(updated_at__gt=since)
+        days.update(
+            rows.annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values_list('day', flat=True)
+            .distinct()
+        )
+    return days
+
+
+def mark_deleted(instance):
+    """Record the day of a hard-deleted sale or client so the next run recomputes it."""
+    MetricsDirtyDay.objects.create(tenant_id=instance.tenant_id, day=_local_date(instance.created_at))
+
+
+def _from_daily(tenant, period_type, starts):
+    """Sum the stored daily rows into ``period_type`` buckets for the periods at ``starts``."""
+    length = PERIOD_LENGTHS[period_type]
+    ranges = [(start, start + length) for start in sorted(starts)]
+    rows = _rollup_rows(tenant).filter(
+        _range_q(ranges, 'period_start'), period_type=DAILY
+    ).values_list('period_start', 'store_id', 'metric_type', 'value', 'metadata')
+
+    buckets = defaultdict(dict)
+    for day_start, store_id, metric_type, value, metadata in rows:
+        key = (period_start(_local_date(day_start), period_type), store_id)
+        entry = buckets[key].setdefault(metric_type, [Decimal('0'), {}])
+        entry[0] += value
+        merge_metadata(entry[1], metadata)
+    return buckets
+
+
+def _change(value, previous):
+    if not previous:
+        return None
+    change = (value - previous) / previous * 100
+    return max(-MAX_CHANGE_PERCENTAGE, min(MAX_CHANGE_PERCENTAGE, change)).quantize(Decimal('0.01'))
+
+
+def _stored_values(tenant, period_type, starts):
+    rows = _rollup_rows(tenant).filter(
+        period_type=period_type, period_start__in=[_start_of(start) for start in starts]
+    ).values_list('period_start', 'store_id', 'metric_type', 'value')
+    return {
+        (_local_date(start), store_id, metric_type): value
+        for start, store_id, metric_type, value in rows
+    }
+
+
+def _store_period(tenant, period_type, starts, buckets):
+    """Replace the stored ``period_type`` rows of the periods at ``starts`` with ``buckets``."""
+    length = PERIOD_LENGTHS[period_type]
+    starts = set(starts)
+
+    values = _stored_values(tenant, period_type, {start - length for start in starts} - starts)
+    for (start, store_id), metrics in buckets.items():
+        for metric_type, (value, _metadata) in metrics.items():
+            values[(start, store_id, metric_type)] = value
+
+    _rollup_rows(tenant).filter(
+        period_type=period_type, period_start__in=[_start_of(start) for start in starts]
+    ).delete()
+
+    rows = []
+    for (start, store_id), metrics in buckets.items():
+        for metric_type, (value, metadata) in metrics.items():
+            previous = values.get((start - length, store_id, metric_type))
+            rows.append(BusinessMetrics(
+                tenant=tenant,
+                store_id=store_id,
+                metric_type=metric_type,
+                metric_name=METRIC_NAMES[metric_type],
+                value=value,
+                period_type=period_type,
+                period_start=_start_of(start),
+                period_end=_start_of(start + length),
+                previous_value=previous,
+                change_percentage=_change(value, previous),
+                metadata=metadata,
+            ))
+    BusinessMetrics.objects.bulk_create(rows, batch_size=1000)
+
+    # The periods right after the recomputed ones compare against them
+    following = list(
+        _rollup_rows(tenant).filter(
+            period_type=period_type,
+            period_start__in=[_start_of(start) for start in {start + length for start in starts} - starts],
+        )
+    )
+    for row in following:
+        row.previous_value = values.get((_local_date(row.period_start) - length, row.store_id, row.metric_type))
+        row.change_percentage = _change(row.value, row.previous_value)
+    BusinessMetrics.objects.bulk_update(following, ['previous_value', 'change_percentage'])
+
+
+@transaction.atomic
+def rollup_metrics(tenant, full=False, now=None):
+    """
+    Bring the tenant's daily, weekly and monthly metrics up to date with the
+    sales and clients changed since the last run (everything when ``full``).
+    Returns the number of days recomputed.
+    """
+    from .services import DashboardMetricsService
+
+    now = now or timezone.now()
+    MetricsRollupState.objects.get_or_create(tenant=tenant)
+    # Serialises concurrent runs for the same tenant
+    state = MetricsRollupState.objects.select_for_update().get(tenant=tenant)
+
+    since = None
+    if full:
+        _rollup_rows(tenant).delete()
+    elif state.watermark is not None:
+        since = state.watermark - WATERMARK_OVERLAP
+
+    # Marks added while this run computes keep their rows for the next one
+    dirty = dict(MetricsDirtyDay.objects.filter(tenant=tenant).values_list('pk', 'day'))
+    days = _changed_days(tenant, since)
+    if not full:
+        days.update(dirty.values())
+    if days:
+        _store_period(tenant, DAILY, days, compute_daily(tenant, _day_ranges(days)))
+        for period_type in (WEEKLY, MONTHLY):
+            starts = {period_start(day, period_type) for day in days}
+            _store_period(tenant, period_type, starts, _from_daily(tenant, period_type, starts))
+
+    MetricsDirtyDay.objects.filter(pk__in=list(dirty)).delete()
+    state.watermark = now
+    state.last_run_at = timezone.now()
+    state.save(update_fields=['watermark', 'last_run_at'])
+    transaction.on_commit(lambda: DashboardMetricsService.invalidate(tenant.id))
+    return len(days)
+
+
+def _segments(start, end, daily=False):
+    """Cover ``[start, end)`` with monthly rows for whole months and daily rows for the rest."""
+    first = start
+    if start is not None and start.day != 1:
+        first = period_start(start, MONTHLY) + PERIOD_LENGTHS[MONTHLY]
+    last = period_start(end, MONTHLY)
+    if daily or (first is not None and first >= last):
+        return [(DAILY, start, end)]
+
+    segments = []
+    if start is not None and start < first:
+        segments.append((DAILY, start, first))
+    segments.append((MONTHLY, first, last))
+    if last < end:
+        segments.append((DAILY, last, end))
+    return segments
+
+
+def collect(tenant, metric_types, start=None, end=None, cuts=(), daily_from=None, store_id=None):
+    """
+    Metric buckets covering the days ``[start, end)`` (``end`` defaults to
+    tomorrow), as ``{metric_type: [Bucket, ...]}``.
+
+    Days before the watermark's day come from the stored rollups, using
+    monthly rows for whole months except from ``daily_from`` on; later days
+    are aggregated live. No bucket spans a date in ``cuts``, so callers can
+    split the result at those dates.
+    """
+    end = end or timezone.localdate() + timedelta(days=1)
+    watermark = MetricsRollupState.objects.filter(tenant=tenant).values_list('watermark', flat=True).first()
+    live_from = start
+    if watermark is not None:
+        live_from = min(max(_local_date(watermark), start or _local_date(watermark)), end)
+
+    result = {metric_type: [] for metric_type in metric_types}
+
+    if live_from is not None and (start is None or start < live_from):
+        points = sorted({cut for cut in cuts if (start is None or cut > start) and cut < live_from})
+        points = [start, *points, live_from]
+        q = Q()
+        for piece_start, piece_end in zip(points, points[1:]):
+            daily = daily_from is not None and piece_start is not None and piece_start >= daily_from
+            for period_type, segment_start, segment_end in _segments(piece_start, piece_end, daily):
+                q |= _range_q([(segment_start, segment_end)], 'period_start') & Q(period_type=period_type)
+        rows = _rollup_rows(tenant).filter(
+            q, store_id=store_id, metric_type__in=metric_types
+        ).values_list('period_start', 'period_type', 'metric_type', 'value', 'metadata')
+        for row_start, period_type, metric_type, value, metadata in rows:
+            result[metric_type].append(Bucket(_local_date(row_start), period_type, value, metadata))
+
+    if live_from is None or live_from < end:
+        live = compute_daily(tenant, [(live_from, end)], metric_types)
+        for (day, bucket_store_id), metrics in live.items():
+            if bucket_store_id != store_id:
+                continue
+            for metric_type, (value, metadata) in metrics.items():
+                if metric_type in result:
+                    result[metric_type].append(Bucket(day, DAILY, value, metadata))
+
+    return result
@@ -20,3 +20,16 @@ class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
         fields = '__all__'
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    status = serializers.CharField(source='job_status', read_only=True)
+
+    class Meta:
+        model = Report
+        fields = [
+            'id', 'name', 'report_type', 'format', 'status',
+            'rows_processed', 'error_count', 'row_errors', 'error_message',
+            'file_size', 'generation_started', 'generation_completed', 'created_at',
+        ]
+        read_only_fields = fields
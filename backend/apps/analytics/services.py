@@ -0,0 +1,298 @@
+from datetime import datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.clients.models import Appointment, Client
+from apps.products.models import Product
+from apps.sales.models import Sale
+from apps.stores.models import Store
+from apps.users.models import User
+from shared.cache import VersionedCache
+
+from .rollups import MONTHLY, REVENUE_STATUSES, ROLLUP_METRICS, MetricType, collect, merge_metadata, period_start
+
+LOW_STOCK_QUANTITY = 10
+
+
+class DashboardMetricsService:
+    """
+    Tenant-scoped dashboard KPIs.
+
+    Client and sales figures are read from the ``BusinessMetrics`` rollups
+    (see ``rollups.collect``), topped up live with what happened since the
+    last rollup; the remaining models are aggregated once per request with
+    conditional aggregates covering the totals and the current and previous
+    periods together. Results are cached per tenant and
+    period; writes to clients, sales and products bump the tenant's cache
+    version, so dashboards polling every few seconds only hit the database
+    after something changed or the TTL ran out.
+    """
+
+    metrics_cache = VersionedCache('dashboard', 'DASHBOARD_CACHE_TTL')
+
+    @staticmethod
+    def invalidate(tenant_id):
+        """Drop every cached dashboard result of a tenant."""
+        if tenant_id is not None:
+            DashboardMetricsService.metrics_cache.invalidate(tenant_id)
+
+    @staticmethod
+    def _cached(tenant, name, days, compute):
+        return DashboardMetricsService.metrics_cache.get_or_compute(tenant.id, (name, days), lambda: compute(tenant, days))
+
+    @staticmethod
+    def get_summary(tenant, days=30):
+        """KPI totals and current/previous period values for ``tenant``."""
+        return DashboardMetricsService._cached(
+            tenant, 'summary', days, DashboardMetricsService.compute_summary
+        )
+
+    @staticmethod
+    def get_recent_activities(tenant, days=7, limit=5):
+        return DashboardMetricsService._cached(
+            tenant, 'activities', days,
+            lambda tenant, days: DashboardMetricsService.compute_recent_activities(tenant, days, limit),
+        )
+
+    @staticmethod
+    def get_performance(tenant, days=30):
+        """Per-store and per-team-member revenue and customers for ``tenant``."""
+        return DashboardMetricsService._cached(
+            tenant, 'performance', days, DashboardMetricsService.compute_performance
+        )
+
+    @staticmethod
+    def compute_summary(tenant, days=30):
+        # Whole days, today included, so the periods line up with the daily rollups
+        today = timezone.localdate()
+        start_day = today - timedelta(days=days - 1)
+        previous_day = start_day - timedelta(days=days)
+        buckets = collect(tenant, ROLLUP_METRICS, cuts=(previous_day, start_day))
+
+        def totals(metric_type, convert):
+            result = {'total': 0, 'current': 0, 'previous': 0}
+            for bucket in buckets[metric_type]:
+                result['total'] += bucket.value
+                if bucket.start >= start_day:
+                    result['current'] += bucket.value
+                elif bucket.start >= previous_day:
+                    result['previous'] += bucket.value
+            return {key: convert(value) for key, value in result.items()}
+
+        start_date = timezone.make_aware(datetime.combine(start_day, time.min))
+        previous_start = start_date - timedelta(days=days)
+        current = Q(created_at__gte=start_date)
+        previous = Q(created_at__gte=previous_start, created_at__lt=start_date)
+        products = Product.objects.filter(tenant=tenant).aggregate(
+            total=Count('id'),
+            current=Count('id', filter=current),
+            previous=Count('id', filter=previous),
+            categories=Count('category', distinct=True),
+            low_stock=Count('id', filter=Q(quantity__lte=LOW_STOCK_QUANTITY)),
+        )
+        stores = Store.objects.filter(tenant=tenant).count()
+
+        return {
+            'clients': totals(MetricType.CUSTOMERS, int),
+            'sales': totals(MetricType.SALES, int),
+            'revenue': totals(MetricType.REVENUE, float),
+            'products': products,
+            'stores': stores,
+        }
+
+    @staticmethod
+    def compute_sales_analytics(tenant, months=12):
+        """Sales count and amount per status (all time) and per month (last ``months``)."""
+        first_month = period_start(timezone.localdate(), MONTHLY) - relativedelta(months=months - 1)
+        buckets = collect(tenant, [MetricType.SALES], cuts=(first_month,))[MetricType.SALES]
+
+        by_status = {}
+        by_month = {}
+        for bucket in buckets:
+            statuses = bucket.metadata.get('by_status', {})
+            merge_metadata(by_status, statuses)
+            if bucket.start >= first_month:
+                month = by_month.setdefault(period_start(bucket.start, MONTHLY), {'count': 0, 'total': 0})
+                merge_metadata(month, {
+                    'count': int(bucket.value),
+                    'total': sum(status['total'] for status in statuses.values()),
+                })
+
+        return {
+            'sales_by_status': [
+                {'status': status, 'count': values['count'], 'total': round(values['total'], 2)}
+                for status, values in sorted(by_status.items())
+            ],
+            'monthly_sales': [
+                {
+                    'month': timezone.make_aware(datetime.combine(month, time.min)),
+                    'count': values['count'],
+                    'total': round(values['total'], 2),
+                }
+                for month, values in sorted(by_month.items())
+            ],
+        }
+
+    @staticmethod
+    def compute_customer_analytics(tenant, days=30):
+        """Customers per lead source and status (all time) and new customers per day (last ``days``)."""
+        first_day = timezone.localdate() - timedelta(days=days - 1)
+        buckets = collect(
+            tenant, [MetricType.CUSTOMERS], cuts=(first_day,), daily_from=first_day
+        )[MetricType.CUSTOMERS]
+
+        breakdown = {}
+        by_day = {}
+        for bucket in buckets:
+            merge_metadata(breakdown, bucket.metadata)
+            if bucket.start >= first_day:
+                by_day[bucket.start] = by_day.get(bucket.start, 0) + int(bucket.value)
+
+        return {
+            'customers_by_source': [
+                {'lead_source': source or None, 'count': count}
+                for source, count in sorted(breakdown.get('by_source', {}).items())
+            ],
+            'customers_by_status': [
+                {'status': status, 'count': count}
+                for status, count in sorted(breakdown.get('by_status', {}).items())
+            ],
+            'daily_customers': [
+                {'date': day, 'count': count} for day, count in sorted(by_day.items())
+            ],
+        }
+
+    @staticmethod
+    def compute_performance(tenant, days=30):
+        """
+        Store and team performance in four queries regardless of how many
+        stores and members the tenant has: sales and new customers are grouped
+        by person and that person's store, and rolled up to stores in Python.
+        """
+        start_date = timezone.now() - timedelta(days=days)
+
+        stores = list(
+            Store.objects.filter(tenant=tenant)
+            .annotate(staff=Count('users'))
+            .order_by('id')
+            .values('id', 'name', 'staff')
+        )
+        members = list(
+            User.objects.filter(tenant=tenant, is_active=True)
+            .values('id', 'username', 'first_name', 'last_name', 'role')
+        )
+        sales_by_member = (
+            Sale.objects.filter(tenant=tenant, created_at__gte=start_date, status__in=REVENUE_STATUSES)
+            .values('sales_representative', 'sales_representative__store')
+            .annotate(revenue=Sum('total_amount'), sales_count=Count('id'))
+            .order_by()
+        )
+        customers_by_member = (
+            Client.objects.filter(tenant=tenant, created_at__gte=start_date, is_deleted=False)
+            .values('assigned_to', 'assigned_to__store')
+            .annotate(customers=Count('id'))
+            .order_by()
+        )
+
+        member_totals = {}
+        store_totals = {}
+
+        def totals(table, key):
+            return table.setdefault(key, {'revenue': 0.0, 'sales_count': 0, 'customers': 0})
+
+        for row in sales_by_member:
+            for table, key in ((member_totals, row['sales_representative']), (store_totals, row['sales_representative__store'])):
+                entry = totals(table, key)
+                entry['revenue'] += float(row['revenue'] or 0)
+                entry['sales_count'] += row['sales_count']
+        for row in customers_by_member:
+            for table, key in ((member_totals, row['assigned_to']), (store_totals, row['assigned_to__store'])):
+                totals(table, key)['customers'] += row['customers']
+
+        store_performance = []
+        for store in stores:
+            entry = store_totals.get(store['id'], {})
+            store_performance.append({
+                'id': store['id'],
+                'name': store['name'],
+                'revenue': entry.get('revenue', 0.0),
+                'growth': 12.5,  # Mock growth for now
+                'customers': entry.get('customers', 0),
+                'staff': store['staff'],
+                'target': 1000000,  # Mock target
+            })
+
+        team_performance = []
+        for member in members:
+            entry = member_totals.get(member['id'], {})
+            team_performance.append({
+                'id': member['id'],
+                'name': f"{member['first_name']} {member['last_name']}".strip() or member['username'],
+                'role': member['role'],
+                'revenue': entry.get('revenue', 0.0),
+                'customers': entry.get('customers', 0),
+                'sales_count': entry.get('sales_count', 0),
+                'avatar': None,
+            })
+
+        return {
+            'store_performance': store_performance,
+            'team_performance': team_performance,
+        }
+
+    @staticmethod
+    def compute_recent_activities(tenant, days=7, limit=5):
+        since = timezone.now() - timedelta(days=days)
+        activities = []
+
+        recent_clients = Client.objects.filter(
+            tenant=tenant, created_at__gte=since, is_deleted=False
+        ).order_by('-created_at')[:3]
+        for client in recent_clients:
+            activities.append({
+                'type': 'customer',
+                'message': 'New customer added',
+                'details': f"{client.full_name} - {client.created_at.strftime('%b %d, %I:%M %p')}",
+                'icon': 'users',
+                'timestamp': client.created_at,
+            })
+
+        recent_sales = Sale.objects.filter(
+            tenant=tenant, created_at__gte=since
+        ).order_by('-created_at')[:3]
+        for sale in recent_sales:
+            activities.append({
+                'type': 'sale',
+                'message': 'Sale completed',
+                'details': f"Order #{sale.order_number} - ₹{sale.total_amount:,.0f} - {sale.created_at.strftime('%b %d, %I:%M %p')}",
+                'icon': 'trending',
+                'timestamp': sale.created_at,
+            })
+
+        recent_appointments = Appointment.objects.filter(
+            tenant=tenant, created_at__gte=since
+        ).select_related('client').order_by('-created_at')[:3]
+        for appointment in recent_appointments:
+            activities.append({
+                'type': 'appointment',
+                'message': 'Appointment scheduled',
+                'details': f"{appointment.client.full_name} - {appointment.date.strftime('%b %d, %I:%M %p')}",
+                'icon': 'calendar',
+                'timestamp': appointment.created_at,
+            })
+
+        activities.sort(key=lambda activity: activity['timestamp'], reverse=True)
+        activities = activities[:limit]
+        for activity in activities:
+            activity.pop('timestamp', None)
+        return activities
+
+
+def calculate_change(current, previous):
+    """Percentage change formatted for the dashboard cards, e.g. ``+12.5%``."""
+    if previous == 0:
+        return '+100%' if current > 0 else '+0%'
+    change = ((current - previous) / previous) * 100
+    return f"{'+' if change >= 0 else ''}{change:.1f}%"
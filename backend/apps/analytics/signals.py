@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.sales.models import Sale
+from apps.tenants.models import Tenant
+
+from .rollups import mark_deleted
+from .services import DashboardMetricsService
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_dashboard_metrics(sender, instance, **kwargs):
+    """Refresh cached dashboard KPIs of the tenant once the write commits."""
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: DashboardMetricsService.invalidate(tenant_id))
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Sale)
+def mark_rollup_day_dirty(sender, instance, origin=None, **kwargs):
+    """Have the next rollup run recompute the day of a hard-deleted row."""
+    # Deleting the tenant takes its rollups with it; nothing is left to recompute
+    if isinstance(origin, Tenant) or getattr(origin, 'model', None) is Tenant:
+        return
+    mark_deleted(instance)
@@ -1,3 +1,383 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.sales.models import Sale
+from apps.stores.models import Store
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .jobs import recover_stale_jobs
+from .models import BusinessMetrics, MetricsDirtyDay, Report
+from .rollups import rollup_metrics
+from .services import DashboardMetricsService
+
+
+class DashboardPerformanceQueryCountTests(TestCase):
+    """Store/team performance must not run queries per store or per member."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.admin = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.order_number = 0
+
+    def add_store(self, index, tenant=None):
+        return Store.objects.create(
+            name=f'Store {index}', code=f'S{index}', address='-', city='-', state='-',
+            tenant=tenant or self.tenant,
+        )
+
+    def add_member(self, username, store=None, tenant=None):
+        return User.objects.create_user(
+            username=username, password='x', first_name=username.title(),
+            role=User.Role.INHOUSE_SALES, tenant=tenant or self.tenant, store=store,
+        )
+
+    def add_sale(self, member, amount, status=Sale.Status.CONFIRMED):
+        self.order_number += 1
+        client = Client.objects.create(
+            tenant=member.tenant, email=f'c{self.order_number}@example.com', assigned_to=member
+        )
+        return Sale.objects.create(
+            order_number=f'ORD{self.order_number}', client=client, sales_representative=member,
+            status=status, subtotal=amount, total_amount=amount, tenant=member.tenant,
+        )
+
+    def add_stores_with_staff(self, count, offset=0):
+        for i in range(offset, offset + count):
+            store = self.add_store(i)
+            for j in range(3):
+                member = self.add_member(f'member{i}_{j}', store=store)
+                self.add_sale(member, Decimal('100.00'))
+
+    def test_query_count_does_not_grow_with_stores_and_members(self):
+        self.add_stores_with_staff(2)
+        with self.assertNumQueries(4):
+            small = DashboardMetricsService.compute_performance(self.tenant)
+
+        self.add_stores_with_staff(8, offset=2)
+        with self.assertNumQueries(4):
+            large = DashboardMetricsService.compute_performance(self.tenant)
+
+        self.assertEqual(len(small['store_performance']), 2)
+        self.assertEqual(len(large['store_performance']), 10)
+        # 30 members plus the business admin
+        self.assertEqual(len(large['team_performance']), 31)
+
+    def test_payload_is_grouped_per_store_and_member(self):
+        store = self.add_store(1)
+        empty_store = self.add_store(2)
+        alice = self.add_member('alice', store=store)
+        bob = self.add_member('bob', store=store)
+        self.add_sale(alice, Decimal('250.00'))
+        self.add_sale(alice, Decimal('50.00'))
+        self.add_sale(bob, Decimal('100.00'), status=Sale.Status.PENDING)
+        # Another tenant's data must not leak in
+        other = self.add_member('other', store=self.add_store(3, self.other_tenant), tenant=self.other_tenant)
+        self.add_sale(other, Decimal('999.00'))
+
+        result = DashboardMetricsService.compute_performance(self.tenant)
+
+        stores = {row['id']: row for row in result['store_performance']}
+        self.assertEqual(set(stores), {store.id, empty_store.id})
+        self.assertEqual(stores[store.id]['revenue'], 300.0)
+        self.assertEqual(stores[store.id]['customers'], 3)
+        self.assertEqual(stores[store.id]['staff'], 2)
+        self.assertEqual(stores[empty_store.id]['revenue'], 0.0)
+        self.assertEqual(stores[empty_store.id]['staff'], 0)
+
+        members = {row['id']: row for row in result['team_performance']}
+        self.assertEqual(members[alice.id]['revenue'], 300.0)
+        self.assertEqual(members[alice.id]['sales_count'], 2)
+        self.assertEqual(members[alice.id]['customers'], 2)
+        self.assertEqual(members[alice.id]['name'], 'Alice')
+        self.assertEqual(members[bob.id]['revenue'], 0.0)
+        self.assertEqual(members[bob.id]['customers'], 1)
+        self.assertNotIn(other.id, members)
+
+    def test_business_admin_dashboard_query_count(self):
+        self.add_stores_with_staff(5)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with self.assertNumQueries(9):
+            response = client.get('/api/analytics/business-admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['store_performance']), 5)
+
+        # Served from the cache until something changes
+        with self.assertNumQueries(0):
+            client.get('/api/analytics/business-admin/')
+
+
+class DashboardMetricsCacheTests(TestCase):
+    """Cached KPIs are served per tenant until that tenant writes."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        for tenant, count in ((self.tenant, 3), (self.other_tenant, 1)):
+            for i in range(count):
+                self.add_product(tenant, i)
+
+    def add_product(self, tenant, i):
+        return Product.objects.create(
+            tenant=tenant, name=f'Ring {i}', sku=f'{tenant.slug}-{i}', cost_price=10, selling_price=20,
+        )
+
+    def test_summary_is_cached(self):
+        summary = DashboardMetricsService.get_summary(self.tenant)
+        self.assertEqual(summary['products']['total'], 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(DashboardMetricsService.get_summary(self.tenant), summary)
+        # Each period is cached separately
+        DashboardMetricsService.get_summary(self.tenant, days=7)
+        with self.assertNumQueries(0):
+            DashboardMetricsService.get_summary(self.tenant, days=7)
+
+    def test_writes_invalidate_on_commit(self):
+        DashboardMetricsService.get_summary(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.add_product(self.tenant, 3)
+            # Not before the write commits
+            self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['products']['total'], 3)
+        self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['products']['total'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['products']['total'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(tenant=self.tenant, email='c@example.com', first_name='Ada')
+        self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['clients']['total'], 1)
+
+    def test_tenants_are_cached_and_invalidated_separately(self):
+        self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['products']['total'], 3)
+        self.assertEqual(DashboardMetricsService.get_summary(self.other_tenant)['products']['total'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_product(self.tenant, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(DashboardMetricsService.get_summary(self.other_tenant)['products']['total'], 1)
+        self.assertEqual(DashboardMetricsService.get_summary(self.tenant)['products']['total'], 4)
+
+    def test_invalidate_survives_an_evicted_version(self):
+        DashboardMetricsService.get_summary(self.tenant)
+        cache.delete(DashboardMetricsService.metrics_cache.version_key(self.tenant.id))
+        DashboardMetricsService.invalidate(self.tenant.id)
+        self.assertEqual(cache.get(DashboardMetricsService.metrics_cache.version_key(self.tenant.id)), 2)
+        DashboardMetricsService.invalidate(None)
+
+
+class BusinessMetricsRollupTests(TestCase):
+    """Reports read from the rollups must match the raw sales and clients."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.store = Store.objects.create(
+            name='Store', code='S1', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.member = User.objects.create_user(
+            username='member', password='x', role=User.Role.INHOUSE_SALES,
+            tenant=self.tenant, store=self.store,
+        )
+        self.order_number = 0
+
+    def add_sale(self, days_ago, amount, status=Sale.Status.CONFIRMED):
+        self.order_number += 1
+        created = timezone.now() - timedelta(days=days_ago)
+        client = Client.objects.create(
+            tenant=self.tenant, email=f'c{self.order_number}@example.com',
+            assigned_to=self.member, lead_source='web',
+        )
+        sale = Sale.objects.create(
+            order_number=f'ORD{self.order_number}', client=client, sales_representative=self.member,
+            status=status, subtotal=amount, total_amount=amount, tenant=self.tenant,
+        )
+        # The timestamps are automatic; backdate both rows
+        Client.objects.filter(pk=client.pk).update(created_at=created, updated_at=created)
+        Sale.objects.filter(pk=sale.pk).update(created_at=created, updated_at=created)
+        return sale
+
+    def snapshot(self):
+        return sorted(
+            BusinessMetrics.objects.filter(tenant=self.tenant).values_list(
+                'period_type', 'period_start', 'store_id', 'metric_type', 'value', 'previous_value'
+            ),
+            key=str,
+        )
+
+    def test_rollups_match_raw_data(self):
+        for days_ago in (0, 3, 40, 45, 200):
+            self.add_sale(days_ago, Decimal('100.00'))
+        self.add_sale(3, Decimal('50.00'), status=Sale.Status.PENDING)
+        live = DashboardMetricsService.compute_summary(self.tenant)
+
+        self.assertEqual(rollup_metrics(self.tenant), 5)
+        self.assertEqual(DashboardMetricsService.compute_summary(self.tenant), live)
+        self.assertEqual(live['sales'], {'total': 6, 'current': 3, 'previous': 2})
+        self.assertEqual(live['revenue']['total'], 500.0)
+
+        # Per store and tenant-wide rows for each period type
+        self.assertTrue(BusinessMetrics.objects.filter(
+            tenant=self.tenant, store=self.store, period_type='monthly', metric_type='revenue'
+        ).exists())
+        analytics = DashboardMetricsService.compute_sales_analytics(self.tenant)
+        self.assertEqual(
+            {row['status']: row['count'] for row in analytics['sales_by_status']},
+            {'confirmed': 5, 'pending': 1},
+        )
+        customers = DashboardMetricsService.compute_customer_analytics(self.tenant)
+        self.assertEqual(customers['customers_by_source'], [{'lead_source': 'web', 'count': 6}])
+
+    def test_incremental_run_matches_full_rebuild(self):
+        sales = [self.add_sale(days_ago, Decimal('100.00')) for days_ago in (1, 10, 35, 90)]
+        sales[2].refresh_from_db()
+        rollup_metrics(self.tenant)
+
+        sales[2].status = Sale.Status.CANCELLED
+        sales[2].save()
+        self.add_sale(0, Decimal('70.00'))
+        # Only the changed day and today are recomputed
+        self.assertEqual(rollup_metrics(self.tenant), 2)
+        incremental = self.snapshot()
+
+        rollup_metrics(self.tenant, full=True)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_deleted_sales_leave_the_rollups(self):
+        sales = [self.add_sale(days_ago, Decimal('100.00')) for days_ago in (10, 40)]
+        rollup_metrics(self.tenant)
+
+        sales[0].refresh_from_db()
+        sales[0].delete()
+        Sale.objects.filter(pk=sales[1].pk).delete()
+        self.assertEqual(MetricsDirtyDay.objects.filter(tenant=self.tenant).count(), 2)
+        self.assertEqual(rollup_metrics(self.tenant), 2)
+        self.assertFalse(MetricsDirtyDay.objects.exists())
+
+        summary = DashboardMetricsService.compute_summary(self.tenant)
+        self.assertEqual(summary['sales']['total'], 0)
+        self.assertEqual(summary['revenue']['total'], 0)
+        incremental = self.snapshot()
+        rollup_metrics(self.tenant, full=True)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_deleting_the_tenant_marks_nothing(self):
+        self.add_sale(10, Decimal('100.00'))
+        rollup_metrics(self.tenant)
+        self.tenant.delete()
+        self.assertFalse(MetricsDirtyDay.objects.exists())
+
+
+class _InlineExecutor:
+    """Runs submitted jobs at once, on the test's connection."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@mock.patch('apps.analytics.jobs.close_old_connections', lambda: None)
+@mock.patch('apps.analytics.jobs.get_executor', _InlineExecutor)
+class ReportJobTests(TestCase):
+    """Jobs run after commit, report progress and failures, and survive restarts."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.admin = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        for i in range(3):
+            Client.objects.create(tenant=self.tenant, email=f'c{i}@example.com', first_name=f'Client {i}')
+
+    def submit(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/api/analytics/jobs/', data)
+        self.assertEqual(response.status_code, 202)
+        return self.api.get(f"/api/analytics/jobs/{response.data['id']}/").data
+
+    def test_export_runs_and_downloads(self):
+        job = self.submit({'job_type': 'customer_export', 'format': 'ndjson', 'fields': 'email,first_name'})
+        self.assertEqual(job['status'], Report.JobStatus.COMPLETED)
+        self.assertEqual(job['rows_processed'], 3)
+
+        response = self.api.get(f"/api/analytics/jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(sorted(row['email'] for row in rows), ['c0@example.com', 'c1@example.com', 'c2@example.com'])
+        self.assertEqual(set(rows[0]), {'email', 'first_name'})
+
+    def test_import_reports_row_errors(self):
+        upload = SimpleUploadedFile(
+            'clients.csv', b'email,first_name\nc0@example.com,Again\nnew@example.com,New\n,Nobody\n'
+        )
+        job = self.submit({'job_type': 'customer_import', 'file': upload})
+        self.assertEqual(job['status'], Report.JobStatus.COMPLETED)
+        self.assertEqual(job['rows_processed'], 3)
+        self.assertEqual(job['row_errors'], [
+            'Row 2: Customer with email c0@example.com already exists', 'Row 4: Email is required',
+        ])
+        self.assertTrue(Client.objects.filter(email='new@example.com').exists())
+
+    def test_failed_job(self):
+        with mock.patch('apps.clients.exports.iter_client_export_rows', side_effect=RuntimeError('disk full')):
+            job = self.submit({'job_type': 'customer_export', 'format': 'csv'})
+        self.assertEqual(job['status'], Report.JobStatus.FAILED)
+        self.assertEqual(job['error_message'], 'disk full')
+        self.assertIsNotNone(job['generation_completed'])
+        response = self.api.get(f"/api/analytics/jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, 409)
+
+    def test_recover_stale_jobs(self):
+        def job(**fields):
+            report = Report.objects.create(
+                name='Export', report_type=Report.ReportType.CUSTOMER_REPORT, format=Report.Format.CSV,
+                user=self.admin, tenant=self.tenant, **fields,
+            )
+            Report.objects.filter(pk=report.pk).update(created_at=timezone.now() - timedelta(hours=2))
+            return report
+
+        now = timezone.now()
+        lost = job()
+        interrupted = job(generation_started=now - timedelta(hours=2))
+        recent = job(generation_started=now - timedelta(minutes=5))
+        finished = job(generation_started=now - timedelta(hours=2), is_generated=True, generation_completed=now)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(recover_stale_jobs(timeout=3600), (1, 1))
+
+        statuses = {r.pk: r.job_status for r in Report.objects.all()}
+        self.assertEqual(statuses[lost.pk], Report.JobStatus.COMPLETED)
+        self.assertEqual(statuses[interrupted.pk], Report.JobStatus.FAILED)
+        self.assertEqual(statuses[recent.pk], Report.JobStatus.RUNNING)
+        self.assertEqual(statuses[finished.pk], Report.JobStatus.COMPLETED)
+
+    def test_a_job_queued_twice_runs_once(self):
+        report = Report.objects.create(
+            name='Export', report_type=Report.ReportType.CUSTOMER_REPORT, format=Report.Format.CSV,
+            user=self.admin, tenant=self.tenant,
+        )
+        from .jobs import run_job
 
-# Create your tests here.
+        with mock.patch.dict('apps.analytics.jobs.JOB_HANDLERS') as handlers:
+            handler = handlers[Report.ReportType.CUSTOMER_REPORT] = mock.Mock()
+            run_job(report.pk)
+            run_job(report.pk)
+        handler.assert_called_once()
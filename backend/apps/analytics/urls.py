@@ -9,4 +9,7 @@ urlpatterns = [
     path('sales/', views.sales_analytics, name='sales_analytics'),
     path('customers/', views.customer_analytics, name='customer_analytics'),
     path('products/', views.product_analytics, name='product_analytics'),
+    path('jobs/', views.report_jobs, name='report_jobs'),
+    path('jobs/<int:pk>/', views.report_job_detail, name='report_job_detail'),
+    path('jobs/<int:pk>/download/', views.report_job_download, name='report_job_download'),
 ] 
\ No newline at end of file
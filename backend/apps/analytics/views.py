@@ -1,160 +1,57 @@
 from django.shortcuts import render
-from rest_framework.decorators import api_view
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from django.db.models import Count, Sum, Q, Avg
-from django.utils import timezone
-from datetime import timedelta
-from apps.clients.models import Client
 from apps.products.models import Product
-from apps.sales.models import Sale, SalesPipeline
-from apps.users.models import User
-from apps.stores.models import Store
-from apps.tenants.models import Tenant
+from apps.sales.models import SalesPipeline
+from apps.users.permissions import IsRoleAllowed
+from .models import Report
+from .serializers import ReportJobSerializer
+from .jobs import submit_job
+from .services import DashboardMetricsService, calculate_change
+
+
+def _dashboard_days(request, default=30):
+    try:
+        days = int(request.query_params.get('days', default))
+    except (TypeError, ValueError):
+        return default
+    return min(max(days, 1), 365)
 
 
 @api_view(['GET'])
 def dashboard_stats(request):
     """
-    Get dashboard statistics using existing data.
+    Get dashboard statistics for the requesting user's tenant.
     """
-    # Get the first tenant or create a default one
-    tenant = Tenant.objects.first()
+    tenant = request.user.tenant
     
     if not tenant:
         return Response({
             'error': 'No tenant found'
         }, status=400)
     
-    # Get date range for comparisons (last 30 days vs previous 30 days)
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=30)
-    previous_start = start_date - timedelta(days=30)
-    
-    # Current period stats
-    current_clients = Client.objects.filter(
-        created_at__gte=start_date,
-        is_deleted=False
-    ).count()
-    
-    current_sales = Sale.objects.filter(
-        created_at__gte=start_date
-    ).count()
-    
-    current_products = Product.objects.filter(
-        created_at__gte=start_date
-    ).count()
-    
-    current_revenue = Sale.objects.filter(
-        created_at__gte=start_date,
-        status__in=['confirmed', 'delivered']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Previous period stats
-    previous_clients = Client.objects.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date,
-        is_deleted=False
-    ).count()
-    
-    previous_sales = Sale.objects.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date
-    ).count()
-    
-    previous_products = Product.objects.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date
-    ).count()
-    
-    previous_revenue = Sale.objects.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date,
-        status__in=['confirmed', 'delivered']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Calculate percentage changes
-    def calculate_change(current, previous):
-        if previous == 0:
-            return '+100%' if current > 0 else '+0%'
-        change = ((current - previous) / previous) * 100
-        return f"{'+' if change >= 0 else ''}{change:.1f}%"
-    
-    # Get recent activities
-    recent_activities = []
-    
-    # Recent clients
-    recent_clients = Client.objects.filter(
-        created_at__gte=end_date - timedelta(days=7),
-        is_deleted=False
-    ).order_by('-created_at')[:3]
-    
-    for client in recent_clients:
-        recent_activities.append({
-            'type': 'customer',
-            'message': 'New customer added',
-            'details': f"{client.full_name} - {client.created_at.strftime('%b %d, %I:%M %p')}",
-            'icon': 'users',
-            'timestamp': client.created_at
-        })
-    
-    # Recent sales
-    recent_sales = Sale.objects.filter(
-        created_at__gte=end_date - timedelta(days=7)
-    ).order_by('-created_at')[:3]
-    
-    for sale in recent_sales:
-        recent_activities.append({
-            'type': 'sale',
-            'message': 'Sale completed',
-            'details': f"Order #{sale.order_number} - ₹{sale.total_amount:,.0f} - {sale.created_at.strftime('%b %d, %I:%M %p')}",
-            'icon': 'trending',
-            'timestamp': sale.created_at
-        })
-    
-    # Recent appointments (if appointments model exists)
-    try:
-        from apps.clients.models import Appointment
-        recent_appointments = Appointment.objects.filter(
-            created_at__gte=end_date - timedelta(days=7)
-        ).order_by('-created_at')[:3]
-        
-        for appointment in recent_appointments:
-            recent_activities.append({
-                'type': 'appointment',
-                'message': 'Appointment scheduled',
-                'details': f"{appointment.client.full_name} - {appointment.date.strftime('%b %d, %I:%M %p')}",
-                'icon': 'calendar',
-                'timestamp': appointment.created_at
-            })
-    except ImportError:
-        pass  # Appointments model might not be available
-    
-    # Sort activities by timestamp
-    recent_activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    recent_activities = recent_activities[:5]  # Limit to 5 most recent
-    
-    # Remove timestamp from response
-    for activity in recent_activities:
-        activity.pop('timestamp', None)
-    
-    # Total counts (not just recent)
-    total_clients = Client.objects.filter(is_deleted=False).count()
-    total_sales = Sale.objects.count()
-    total_products = Product.objects.count()
-    total_revenue = Sale.objects.filter(
-        status__in=['confirmed', 'delivered']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    # Compare the last N days (default 30) with the N days before that
+    days = _dashboard_days(request)
+    summary = DashboardMetricsService.get_summary(tenant, days)
+    clients, sales, products, revenue = (
+        summary['clients'], summary['sales'], summary['products'], summary['revenue']
+    )
     
     return Response({
-        'total_customers': total_clients,
-        'total_sales': total_sales,
-        'total_products': total_products,
-        'total_revenue': float(total_revenue),
-        'customers_change': calculate_change(current_clients, previous_clients),
-        'sales_change': calculate_change(current_sales, previous_sales),
-        'products_change': calculate_change(current_products, previous_products),
-        'revenue_change': calculate_change(current_revenue, previous_revenue),
-        'recent_activities': recent_activities
+        'total_customers': clients['total'],
+        'total_sales': sales['total'],
+        'total_products': products['total'],
+        'total_revenue': revenue['total'],
+        'customers_change': calculate_change(clients['current'], clients['previous']),
+        'sales_change': calculate_change(sales['current'], sales['previous']),
+        'products_change': calculate_change(products['current'], products['previous']),
+        'revenue_change': calculate_change(revenue['current'], revenue['previous']),
+        'recent_activities': DashboardMetricsService.get_recent_activities(tenant),
     })
 
 
@@ -163,87 +60,27 @@ def business_admin_dashboard(request):
     """
     Get comprehensive business admin dashboard data.
     """
-    tenant = Tenant.objects.first()
+    tenant = request.user.tenant
     
     if not tenant:
         return Response({
             'error': 'No tenant found'
         }, status=400)
     
-    # Date ranges
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=30)
-    previous_start = start_date - timedelta(days=30)
-    
-    # Revenue metrics
-    current_revenue = Sale.objects.filter(
-        created_at__gte=start_date,
-        status__in=['confirmed', 'delivered']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    previous_revenue = Sale.objects.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date,
-        status__in=['confirmed', 'delivered']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    days = _dashboard_days(request)
+    summary = DashboardMetricsService.get_summary(tenant, days)
+    current_revenue = summary['revenue']['current']
+    previous_revenue = summary['revenue']['previous']
     
     revenue_growth = 0
     if previous_revenue > 0:
         revenue_growth = ((current_revenue - previous_revenue) / previous_revenue) * 100
     
-    # Store performance
-    stores = Store.objects.all()
-    store_performance = []
-    
-    for store in stores:
-        store_sales = Sale.objects.filter(
-            created_at__gte=start_date,
-            status__in=['confirmed', 'delivered']
-        )
-        
-        store_revenue = store_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        store_customers = Client.objects.filter(
-            created_at__gte=start_date,
-            is_deleted=False
-        ).count()
-        
-        store_performance.append({
-            'id': store.id,
-            'name': store.name,
-            'revenue': float(store_revenue),
-            'growth': 12.5,  # Mock growth for now
-            'customers': store_customers,
-            'staff': User.objects.filter(store=store).count(),
-            'target': 1000000,  # Mock target
-        })
-    
-    # Team performance
-    team_members = User.objects.filter(is_active=True)
-    team_performance = []
-    
-    for member in team_members:
-        member_sales = Sale.objects.filter(
-            sales_representative=member.id,
-            created_at__gte=start_date,
-            status__in=['confirmed', 'delivered']
-        )
-        
-        member_revenue = member_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        member_customers = Client.objects.filter(
-            assigned_to=member.id,
-            created_at__gte=start_date,
-            is_deleted=False
-        ).count()
-        
-        team_performance.append({
-            'id': member.id,
-            'name': member.name,
-            'role': member.role,
-            'revenue': float(member_revenue),
-            'customers': member_customers,
-            'sales_count': member_sales.count(),
-            'avatar': None,
-        })
+    # Store and team performance
+    performance = DashboardMetricsService.get_performance(tenant, days)
+    store_performance = performance['store_performance']
+    team_performance = performance['team_performance']
+    top_store = max(store_performance, key=lambda store: store['revenue'], default=None)
     
     # E-commerce metrics (mock for now)
     ecommerce_metrics = {
@@ -255,32 +92,29 @@ def business_admin_dashboard(request):
     
     # Inventory metrics
     inventory_metrics = {
-        'products': Product.objects.count(),
-        'categories': Product.objects.values('category').distinct().count(),
-        'low_stock': Product.objects.filter(quantity__lte=10).count(),
+        'products': summary['products']['total'],
+        'categories': summary['products']['categories'],
+        'low_stock': summary['products']['low_stock'],
     }
     
     # Customer metrics
     customer_metrics = {
-        'total': Client.objects.filter(is_deleted=False).count(),
-        'new_this_month': Client.objects.filter(
-            created_at__gte=start_date,
-            is_deleted=False
-        ).count(),
+        'total': summary['clients']['total'],
+        'new_this_month': summary['clients']['current'],
         'retention_rate': 78.5,  # Mock retention rate
     }
     
     return Response({
         'revenue': {
-            'total': float(current_revenue),
+            'total': current_revenue,
             'growth': revenue_growth,
-            'this_month': float(current_revenue),
+            'this_month': current_revenue,
             'target': 600000,
         },
         'stores': {
-            'total': stores.count(),
-            'active': stores.count(),
-            'top_performing': store_performance[0]['name'] if store_performance else 'No stores',
+            'total': summary['stores'],
+            'active': summary['stores'],
+            'top_performing': top_store['name'] if top_store else 'No stores',
         },
         'customers': customer_metrics,
         'ecommerce': ecommerce_metrics,
@@ -293,60 +127,33 @@ def business_admin_dashboard(request):
 @api_view(['GET'])
 def sales_analytics(request):
     """
-    Get sales analytics data.
+    Get sales analytics data for the requesting user's tenant.
     """
-    # Sales by status
-    sales_by_status = Sale.objects.values('status').annotate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    )
+    tenant = request.user.tenant
     
-    # Sales by month (last 12 months)
-    from django.db.models.functions import TruncMonth
-    monthly_sales = Sale.objects.filter(
-        created_at__gte=timezone.now() - timedelta(days=365)
-    ).annotate(
-        month=TruncMonth('created_at')
-    ).values('month').annotate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    ).order_by('month')
+    if not tenant:
+        return Response({
+            'error': 'No tenant found'
+        }, status=400)
     
-    return Response({
-        'sales_by_status': list(sales_by_status),
-        'monthly_sales': list(monthly_sales)
-    })
+    # Sales by status and by month (last 12 months), read from the metric rollups
+    return Response(DashboardMetricsService.compute_sales_analytics(tenant))
 
 
 @api_view(['GET'])
 def customer_analytics(request):
     """
-    Get customer analytics data.
+    Get customer analytics data for the requesting user's tenant.
     """
-    # Customers by source
-    customers_by_source = Client.objects.filter(
-        is_deleted=False
-    ).values('lead_source').annotate(count=Count('id'))
-    
-    # Customers by status
-    customers_by_status = Client.objects.filter(
-        is_deleted=False
-    ).values('status').annotate(count=Count('id'))
+    tenant = request.user.tenant
     
-    # Recent customer growth
-    from django.db.models.functions import TruncDate
-    daily_customers = Client.objects.filter(
-        created_at__gte=timezone.now() - timedelta(days=30),
-        is_deleted=False
-    ).annotate(
-        date=TruncDate('created_at')
-    ).values('date').annotate(count=Count('id')).order_by('date')
+    if not tenant:
+        return Response({
+            'error': 'No tenant found'
+        }, status=400)
     
-    return Response({
-        'customers_by_source': list(customers_by_source),
-        'customers_by_status': list(customers_by_status),
-        'daily_customers': list(daily_customers)
-    })
+    # Customers by source and status, and daily growth, read from the metric rollups
+    return Response(DashboardMetricsService.compute_customer_analytics(tenant))
 
 
 @api_view(['GET'])
@@ -381,3 +188,121 @@ def product_analytics(request):
         'low_stock_products': list(low_stock_products),
         'top_products': list(top_products)
     })
+
+
+# Job type -> (report type, roles allowed to submit it)
+REPORT_JOB_TYPES = {
+    'customer_import': (Report.ReportType.CUSTOMER_IMPORT, ['business_admin', 'manager']),
+    'product_import': (Report.ReportType.PRODUCT_IMPORT, ['business_admin', 'manager', 'inhouse_sales']),
+    'customer_export': (Report.ReportType.CUSTOMER_REPORT, ['business_admin', 'manager']),
+}
+IMPORT_FORMATS = {
+    Report.ReportType.CUSTOMER_IMPORT: [Report.Format.CSV, Report.Format.JSON],
+    Report.ReportType.PRODUCT_IMPORT: [Report.Format.CSV],
+}
+EXPORT_FORMATS = [Report.Format.CSV, Report.Format.JSON, Report.Format.NDJSON]
+
+
+def _tenant_jobs(request):
+    return Report.objects.filter(
+        tenant=request.user.tenant,
+        report_type__in=[report_type for report_type, _ in REPORT_JOB_TYPES.values()],
+    )
+
+
+@api_view(['GET', 'POST'])
+@parser_classes([MultiPartParser, FormParser, JSONParser])
+@permission_classes([IsRoleAllowed.for_roles(['business_admin', 'manager', 'inhouse_sales'])])
+def report_jobs(request):
+    """
+    List import/export jobs, or submit one.
+
+    POST ``job_type`` (customer_import, product_import or customer_export).
+    Imports take a ``file``; exports take ``format`` (csv, json or ndjson)
+    and an optional comma separated ``fields``. Returns the job for polling.
+    """
+    if request.method == 'GET':
+        jobs = _tenant_jobs(request)[:50]
+        return Response(ReportJobSerializer(jobs, many=True).data)
+
+    if not request.user.tenant:
+        return Response({'error': 'No tenant found'}, status=status.HTTP_400_BAD_REQUEST)
+
+    job_type = request.data.get('job_type')
+    if job_type not in REPORT_JOB_TYPES:
+        return Response(
+            {'error': f"job_type must be one of: {', '.join(REPORT_JOB_TYPES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    report_type, allowed_roles = REPORT_JOB_TYPES[job_type]
+    if request.user.role not in allowed_roles:
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    parameters = {}
+    if report_type in IMPORT_FORMATS:
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = upload.name.rsplit('.', 1)[-1].lower()
+        if file_format not in IMPORT_FORMATS[report_type]:
+            return Response(
+                {'error': f"Please upload a {' or '.join(f.upper() for f in IMPORT_FORMATS[report_type])} file"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        parameters['upload_path'] = default_storage.save(
+            f'reports/{request.user.tenant_id}/uploads/{upload.name}', upload
+        )
+        parameters['original_name'] = upload.name
+        name = f'Import {upload.name}'
+    else:
+        file_format = request.data.get('format', Report.Format.CSV)
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fields = request.data.get('fields', '')
+        if fields:
+            parameters['fields'] = fields.split(',') if isinstance(fields, str) else list(fields)
+        name = f'Customer export ({file_format})'
+
+    report = Report.objects.create(
+        name=name,
+        report_type=report_type,
+        format=file_format,
+        parameters=parameters,
+        user=request.user,
+        tenant=request.user.tenant,
+    )
+    submit_job(report)
+    return Response(ReportJobSerializer(report).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsRoleAllowed.for_roles(['business_admin', 'manager', 'inhouse_sales'])])
+def report_job_detail(request, pk):
+    """
+    Poll a job's progress.
+    """
+    report = _tenant_jobs(request).filter(pk=pk).first()
+    if not report:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ReportJobSerializer(report).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsRoleAllowed.for_roles(['business_admin', 'manager', 'inhouse_sales'])])
+def report_job_download(request, pk):
+    """
+    Download the result file of a finished export job.
+    """
+    report = _tenant_jobs(request).filter(pk=pk).first()
+    if not report:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    if report.job_status != Report.JobStatus.COMPLETED or not report.file_path:
+        return Response({'error': 'No result file available'}, status=status.HTTP_409_CONFLICT)
+    return FileResponse(
+        default_storage.open(report.file_path, 'rb'),
+        as_attachment=True,
+        filename=report.file_path.rsplit('/', 1)[-1],
+    )
@@ -0,0 +1,60 @@
+"""
+Announcement feed querysets.
+
+Visibility is expressed with ``EXISTS`` subqueries instead of joins, so the
+feed needs no ``DISTINCT`` and can be paged with a keyset. The read count and
+the current user's read/acknowledged flags are annotated per row and the
+nested reads, stores and tenants are prefetched, so serializing a page costs
+the same handful of queries however many announcements it holds.
+"""
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Announcement, AnnouncementRead
+
+
+def visible_announcements(user, now=None):
+    """Active, published and unexpired announcements ``user`` may see."""
+    now = now or timezone.now()
+    queryset = Announcement.objects.filter(is_active=True, publish_at__lte=now).filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+    )
+    if user.tenant_id:
+        queryset = queryset.filter(tenant_id=user.tenant_id)
+    if user.store_id:
+        # Announcements without target stores, targeting the user's store or
+        # written by someone from the same store
+        targets = Announcement.target_stores.through.objects.filter(announcement_id=OuterRef('pk'))
+        queryset = queryset.filter(
+            ~Exists(targets)
+            | Exists(targets.filter(store_id=user.store_id))
+            | Q(author__store_id=user.store_id)
+        )
+    return queryset
+
+
+def with_read_state(queryset, user):
+    """Annotate ``reads_total``, ``read_by_user`` and ``acknowledged_by_user``."""
+    reads = AnnouncementRead.objects.filter(announcement_id=OuterRef('pk'))
+    user_reads = reads.filter(user_id=user.pk)
+    return queryset.annotate(
+        reads_total=Coalesce(
+            Subquery(
+                reads.order_by().values('announcement_id').annotate(total=Count('id')).values('total'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        read_by_user=Exists(user_reads),
+        acknowledged_by_user=Exists(user_reads.filter(acknowledged=True)),
+    )
+
+
+def with_feed_relations(queryset):
+    """Load everything ``AnnouncementSerializer`` nests, once per page."""
+    return queryset.select_related('author', 'tenant').prefetch_related(
+        'target_stores',
+        'target_tenants',
+        Prefetch('reads', queryset=AnnouncementRead.objects.select_related('user')),
+    )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.announcements.unread import reconcile_unread_counters
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Recount every user\'s unread announcements and messages and repair counters that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only reconcile the users of the tenant with this slug')
+
+    def handle(self, *args, **options):
+        tenant = None
+        if options['tenant']:
+            tenant = Tenant.objects.filter(slug=options['tenant']).first()
+            if tenant is None:
+                raise CommandError(f"Tenant '{options['tenant']}' does not exist")
+
+        started = time.monotonic()
+        recounted, drifted = reconcile_unread_counters(tenant)
+        self.stdout.write(
+            f'{tenant.slug if tenant else "all tenants"}: recounted {recounted} user(s), '
+            f'repaired {drifted} in {time.monotonic() - started:.2f}s'
+        )
@@ -292,4 +292,27 @@ class MessageRead(models.Model):
     def save(self, *args, **kwargs):
         if self.responded and not self.responded_at:
             self.responded_at = timezone.now()
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        super().save(*args, **kwargs) 
+
+class UnreadCounter(models.Model):
+    """
+    A user's unread announcement and team message counts, kept up to date
+    by ``apps.announcements.unread`` so that polling them is a primary key
+    lookup. ``reconciled_at`` is when they were last recounted from scratch.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_counter',
+    )
+    announcements = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Unread Counter')
+        verbose_name_plural = _('Unread Counters')
+
+    def __str__(self):
+        return f"{self.user_id}: {self.announcements} announcements, {self.messages} messages"
@@ -65,6 +65,9 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         read_only_fields = ['author', 'tenant', 'created_at', 'updated_at', 'reads']
     
     def get_read_count(self, obj):
+        # Annotated by feed.with_read_state for the feed
+        if hasattr(obj, 'reads_total'):
+            return obj.reads_total
         return obj.reads.count()
     
     def get_unread_count(self, obj):
@@ -73,16 +76,19 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         return 0
     
     def get_is_read_by_current_user(self, obj):
+        if hasattr(obj, 'read_by_user'):
+            return obj.read_by_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.reads.filter(user=request.user).exists()
         return False
     
     def get_is_acknowledged_by_current_user(self, obj):
+        if hasattr(obj, 'acknowledged_by_user'):
+            return obj.acknowledged_by_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            read_record = obj.reads.filter(user=request.user).first()
-            return read_record.acknowledged if read_record else False
+            return obj.reads.filter(user=request.user, acknowledged=True).exists()
         return False
     
     def get_priority_color(self, obj):
@@ -165,6 +171,9 @@ class TeamMessageSerializer(serializers.ModelSerializer):
         ]
     
     def get_read_count(self, obj):
+        # Annotated by feed.with_read_state for the feed
+        if hasattr(obj, 'reads_total'):
+            return obj.reads_total
         return obj.reads.count()
     
     def get_unread_count(self, obj):
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from shared.events import publish, store_channel, tenant_channel, tenant_stores_channel, user_channel
+
+from .models import Announcement, AnnouncementRead, MessageRead, TeamMessage
+from .unread import announcement_read, mark_unread_changed, message_read, message_sent
+
+
+def announce(announcement_id):
+    """Push a live announcement to everyone who can see it."""
+    now = timezone.now()
+    announcement = (
+        Announcement.objects.filter(pk=announcement_id, is_active=True, publish_at__lte=now)
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        .select_related('author')
+        .first()
+    )
+    if announcement is None:
+        return
+    store_ids = list(announcement.target_stores.values_list('id', flat=True))
+    if store_ids:
+        # Also seen by the author's store and by users of no store
+        store_ids.append(announcement.author.store_id)
+        channels = [store_channel(store_id) for store_id in set(store_ids) if store_id]
+        channels.append(tenant_stores_channel(announcement.tenant_id))
+    else:
+        channels = [tenant_channel(announcement.tenant_id)]
+    publish(channels, 'announcement', {
+        'id': announcement.pk,
+        'title': announcement.title,
+        'announcement_type': announcement.announcement_type,
+        'priority': announcement.priority,
+        'is_pinned': announcement.is_pinned,
+        'requires_acknowledgment': announcement.requires_acknowledgment,
+        'publish_at': announcement.publish_at,
+    })
+
+
+def _announce_on_commit(announcement, using):
+    # Once per transaction, after the target stores are set
+    if getattr(announcement, '_announce_pending', False):
+        return
+    announcement._announce_pending = True
+
+    def send():
+        announcement._announce_pending = False
+        announce(announcement.pk)
+
+    transaction.on_commit(send, using=using)
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def recount_announcement_audience(sender, instance, using, **kwargs):
+    mark_unread_changed(tenant_ids=[instance.tenant_id], using=using)
+
+
+@receiver(post_save, sender=Announcement)
+def push_announcement(sender, instance, using, **kwargs):
+    _announce_on_commit(instance, using)
+
+
+@receiver(m2m_changed, sender=Announcement.target_stores.through)
+def recount_retargeted_audience(sender, instance, action, reverse, using, **kwargs):
+    if action.startswith('post_'):
+        # ``instance`` is the store when the change came from its side
+        mark_unread_changed(tenant_ids=[instance.tenant_id], using=using)
+        if not reverse:
+            _announce_on_commit(instance, using)
+
+
+@receiver(post_save, sender=AnnouncementRead)
+def count_announcement_read(sender, instance, created, using, **kwargs):
+    if created:
+        announcement_read(instance.user_id, using=using)
+
+
+@receiver(post_save, sender=MessageRead)
+def count_message_read(sender, instance, created, using, **kwargs):
+    if created:
+        message_read(instance.user_id, instance.message_id, using=using)
+
+
+@receiver(post_delete, sender=AnnouncementRead)
+@receiver(post_delete, sender=MessageRead)
+def recount_unread_reader(sender, instance, using, **kwargs):
+    mark_unread_changed(user_ids=[instance.user_id], using=using)
+
+
+@receiver(pre_delete, sender=TeamMessage)
+def recount_message_recipients(sender, instance, using, **kwargs):
+    # The recipient rows are gone by post_delete
+    mark_unread_changed(user_ids=instance.recipients.values_list('id', flat=True), using=using)
+
+
+@receiver(m2m_changed, sender=TeamMessage.recipients.through)
+def count_message_recipients(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if reverse:
+        # Messages added to or removed from one user's inbox
+        if action.startswith('post_'):
+            mark_unread_changed(user_ids=[instance.pk], using=using)
+    elif action == 'post_add':
+        message_sent(instance, pk_set, using=using)
+        publish([user_channel(user_id) for user_id in pk_set], 'message', {
+            'id': instance.pk,
+            'subject': instance.subject,
+            'message_type': instance.message_type,
+            'sender': instance.sender_id,
+            'is_urgent': instance.is_urgent,
+        }, using=using)
+    elif action == 'post_remove':
+        mark_unread_changed(user_ids=pk_set, using=using)
+    elif action == 'pre_clear':
+        mark_unread_changed(user_ids=instance.recipients.values_list('id', flat=True), using=using)
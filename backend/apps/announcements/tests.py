@@ -0,0 +1,182 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.stores.models import Store
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .models import Announcement, AnnouncementRead, MessageRead, TeamMessage, UnreadCounter
+from .unread import reconcile_unread_counters, recount
+
+
+class AnnouncementFeedTests(TestCase):
+    """The feed must not run queries per announcement."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.store = Store.objects.create(
+            name='Store', code='S1', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.other_store = Store.objects.create(
+            name='Other', code='S2', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.author = User.objects.create_user(
+            username='author', password='x', role=User.Role.MANAGER, tenant=self.tenant, store=self.other_store
+        )
+        self.user = User.objects.create_user(
+            username='reader', password='x', role=User.Role.INHOUSE_SALES, tenant=self.tenant, store=self.store
+        )
+        self.colleague = User.objects.create_user(
+            username='colleague', password='x', role=User.Role.INHOUSE_SALES, tenant=self.tenant, store=self.store
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.count = 0
+
+    def add_announcements(self, count):
+        for _ in range(count):
+            self.count += 1
+            announcement = Announcement.objects.create(
+                title=f'News {self.count}', content='-', author=self.author, tenant=self.tenant,
+                requires_acknowledgment=True,
+            )
+            announcement.target_stores.add(self.store)
+            AnnouncementRead.objects.create(announcement=announcement, user=self.colleague)
+            if self.count % 2:
+                AnnouncementRead.objects.create(announcement=announcement, user=self.user, acknowledged=True)
+
+    def fetch(self, url='/api/announcements/announcements/?page_size=200'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_query_count_does_not_grow_with_the_feed(self):
+        self.add_announcements(3)
+        with self.assertNumQueries(5):
+            small = self.fetch()
+        self.add_announcements(60)
+        with self.assertNumQueries(5):
+            large = self.fetch()
+        self.assertEqual(len(small['results']), 3)
+        self.assertEqual(len(large['results']), 63)
+
+    def test_read_state_and_visibility(self):
+        self.add_announcements(2)
+        # Targeted at another store only: hidden
+        hidden = Announcement.objects.create(title='Other store', content='-', author=self.author, tenant=self.tenant)
+        hidden.target_stores.add(self.other_store)
+
+        feed = {row['title']: row for row in self.fetch()['results']}
+        self.assertEqual(set(feed), {'News 1', 'News 2'})
+        self.assertEqual(feed['News 1']['read_count'], 2)
+        self.assertTrue(feed['News 1']['is_read_by_current_user'])
+        self.assertTrue(feed['News 1']['is_acknowledged_by_current_user'])
+        self.assertEqual(feed['News 2']['read_count'], 1)
+        self.assertFalse(feed['News 2']['is_read_by_current_user'])
+        self.assertFalse(feed['News 2']['is_acknowledged_by_current_user'])
+
+    def titles(self, page):
+        return [row['title'] for row in page['results']]
+
+    def test_pages_keep_pinned_announcements_first(self):
+        self.add_announcements(5)
+        Announcement.objects.filter(title='News 1').update(is_pinned=True)
+        first = self.fetch('/api/announcements/announcements/?page_size=3')
+        self.assertEqual(first['count'], 5)
+        self.assertEqual(self.titles(first), ['News 1', 'News 5', 'News 4'])
+        self.assertEqual(self.titles(self.fetch(first['next'])), ['News 3', 'News 2'])
+        # An explicit ordering is honoured too
+        oldest = self.fetch('/api/announcements/announcements/?page_size=2&ordering=created_at')
+        self.assertEqual(self.titles(oldest), ['News 1', 'News 2'])
+
+    def test_cursor_pages(self):
+        self.add_announcements(5)
+        first = self.fetch('/api/announcements/announcements/?page_size=3&cursor=')
+        self.assertNotIn('count', first)
+        self.assertEqual(self.titles(first), ['News 5', 'News 4', 'News 3'])
+        second = self.fetch(first['next'])
+        self.assertEqual(self.titles(second), ['News 2', 'News 1'])
+        self.assertIsNone(second['next'])
+
+
+class UnreadCounterTests(TestCase):
+    """Counters follow publishes, messages and reads, and reconciliation repairs drift."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.store = Store.objects.create(
+            name='Store', code='S1', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.other_store = Store.objects.create(
+            name='Other', code='S2', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.author = User.objects.create_user(
+            username='author', password='x', role=User.Role.MANAGER, tenant=self.tenant, store=self.other_store
+        )
+        self.user = User.objects.create_user(
+            username='reader', password='x', role=User.Role.INHOUSE_SALES, tenant=self.tenant, store=self.store
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        announcements = self.client.get('/api/announcements/announcements/unread_count/')
+        messages = self.client.get('/api/announcements/messages/unread_count/')
+        return announcements.data['unread_count'], messages.data['unread_count']
+
+    def assertMatchesRecount(self):
+        stored = UnreadCounter.objects.get(user=self.user)
+        counters, drifted = recount([self.user])
+        self.assertEqual((stored.announcements, stored.messages), (counters[0].announcements, counters[0].messages))
+        self.assertEqual(drifted, 0)
+
+    def publish(self, title, *stores):
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement = Announcement.objects.create(
+                title=title, content='-', author=self.author, tenant=self.tenant
+            )
+            announcement.target_stores.add(*stores)
+        return announcement
+
+    def send(self, subject):
+        message = TeamMessage.objects.create(
+            subject=subject, content='-', sender=self.author, tenant=self.tenant, store=self.store
+        )
+        message.recipients.add(self.user)
+        return message
+
+    def test_counters_follow_publish_message_and_read(self):
+        self.assertEqual(self.unread(), (0, 0))
+
+        first = self.publish('For us', self.store)
+        self.publish('For the other store', self.other_store)
+        message = self.send('Hello')
+        self.assertEqual(self.unread(), (1, 1))
+        self.assertMatchesRecount()
+
+        AnnouncementRead.objects.create(announcement=first, user=self.user)
+        MessageRead.objects.create(message=message, user=self.user)
+        self.assertEqual(self.unread(), (0, 0))
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.target_stores.set([self.other_store])
+            self.send('Again').delete()
+        self.assertEqual(self.unread(), (0, 0))
+        self.assertMatchesRecount()
+
+    def test_unread_count_is_a_single_lookup(self):
+        self.publish('News')
+        self.send('Hello')
+        self.unread()
+        with self.assertNumQueries(1):
+            self.client.get('/api/announcements/announcements/unread_count/')
+
+    def test_reconciliation_repairs_drift(self):
+        self.publish('News')
+        self.send('Hello')
+        self.unread()
+        UnreadCounter.objects.filter(user=self.user).update(announcements=7, messages=0)
+
+        self.assertEqual(reconcile_unread_counters(self.tenant), (2, 1))
+        self.assertEqual(self.unread(), (1, 1))
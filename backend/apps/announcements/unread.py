@@ -0,0 +1,224 @@
+"""
+Per-user unread counters (``UnreadCounter``).
+
+``unread_counts`` answers the frontend's unread polling from the user's
+counter row. Reading an announcement or a message decrements the counter in
+the same transaction, and a message sent to recipients increments theirs.
+Changes whose effect depends on visibility rules mark the users they affect:
+announcements being published, edited, retargeted or deleted, and messages
+being deleted or losing recipients. Those users are recounted from the
+source rows once the transaction commits.
+
+Announcements scheduled for later or expiring change visibility without a
+write. ``reconcile_unread_counters`` picks them up. It runs periodically
+(``manage.py reconcile_unread_counters`` or the ``unread_reconcile``
+scheduled task), recounts every counter and repairs any drift.
+
+Every change to a counter is pushed to its user as an ``unread`` event
+(``shared.events``).
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from apps.users.models import User
+from shared.events import publish, user_channel
+from shared.transactions import CommitBatches
+
+from .feed import visible_announcements
+from .models import AnnouncementRead, MessageRead, TeamMessage, UnreadCounter
+
+RECONCILE_BATCH_SIZE = 1000
+
+_pending = CommitBatches()
+
+
+def _unread_announcements(users):
+    # Users of the same tenant and store see the same announcements
+    audiences = {}
+    for user in users:
+        audiences.setdefault((user.tenant_id, user.store_id), user)
+    visible = {
+        key: set(visible_announcements(user).values_list('id', flat=True))
+        for key, user in audiences.items()
+    }
+
+    read = {}
+    reads = AnnouncementRead.objects.filter(
+        user__in=[user.pk for user in users],
+        announcement_id__in=set().union(*visible.values()),
+    ).values_list('user_id', 'announcement_id')
+    for user_id, announcement_id in reads:
+        read.setdefault(user_id, set()).add(announcement_id)
+
+    return {
+        user.pk: len(visible[(user.tenant_id, user.store_id)] - read.get(user.pk, set()))
+        for user in users
+    }
+
+
+def _visible_to_recipient():
+    """Recipient rows whose message is in the recipient's tenant and store (when they have one)."""
+    return (
+        (Q(user__tenant__isnull=True) | Q(teammessage__tenant_id=F('user__tenant_id')))
+        & (Q(user__store__isnull=True) | Q(teammessage__store_id=F('user__store_id')))
+    )
+
+
+def _unread_messages(users):
+    read = MessageRead.objects.filter(message_id=OuterRef('teammessage_id'), user_id=OuterRef('user_id'))
+    rows = (
+        TeamMessage.recipients.through.objects
+        .filter(_visible_to_recipient(), ~Exists(read), user_id__in=[user.pk for user in users])
+        .values('user_id')
+        .annotate(total=Count('teammessage_id'))
+        .order_by()
+    )
+    return {row['user_id']: row['total'] for row in rows}
+
+
+def recount(users):
+    """Recount and store the counters of ``users``. Returns the counters and how many were off."""
+    users = list(users)
+    if not users:
+        return [], 0
+    announcements = _unread_announcements(users)
+    messages = _unread_messages(users)
+    current = {
+        counter.user_id: (counter.announcements, counter.messages)
+        for counter in UnreadCounter.objects.filter(user__in=[user.pk for user in users])
+    }
+
+    now = timezone.now()
+    counters = [
+        UnreadCounter(
+            user_id=user.pk, announcements=announcements[user.pk],
+            messages=messages.get(user.pk, 0), reconciled_at=now,
+        )
+        for user in users
+    ]
+    changed = [
+        counter for counter in counters
+        if counter.user_id in current
+        and current[counter.user_id] != (counter.announcements, counter.messages)
+    ]
+    UnreadCounter.objects.bulk_create(
+        counters,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['announcements', 'messages', 'reconciled_at'],
+    )
+    for counter in changed:
+        _push(counter)
+    return counters, len(changed)
+
+
+def _reconcile(users, batch_size=RECONCILE_BATCH_SIZE):
+    recounted = drifted = 0
+    last_id = 0
+    users = users.filter(is_active=True).order_by('id').only('id', 'tenant_id', 'store_id')
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return recounted, drifted
+        with transaction.atomic():
+            counters, off = recount(batch)
+        recounted += len(counters)
+        drifted += off
+        last_id = batch[-1].pk
+
+
+def reconcile_unread_counters(tenant=None, batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Recount the counters of every active user (of ``tenant``). Returns how
+    many were recounted and how many had drifted.
+    """
+    users = User.objects.all()
+    if tenant is not None:
+        users = users.filter(tenant=tenant)
+    return _reconcile(users, batch_size)
+
+
+def unread_counts(user):
+    """``{'announcements': n, 'messages': n}`` for ``user``, counting them the first time."""
+    counter = UnreadCounter.objects.filter(user=user).first()
+    if counter is None:
+        counter = recount([user])[0][0]
+    return {'announcements': counter.announcements, 'messages': counter.messages}
+
+
+def _push(counter, using=DEFAULT_DB_ALIAS):
+    publish([user_channel(counter.user_id)], 'unread', {
+        'announcements': counter.announcements, 'messages': counter.messages,
+    }, using=using)
+
+
+def _push_on_commit(user_ids, using=DEFAULT_DB_ALIAS):
+    # The counters as committed, read once the transaction is done
+    user_ids = list(user_ids)
+    transaction.on_commit(
+        lambda: [
+            _push(counter, using=using)
+            for counter in UnreadCounter.objects.using(using).filter(user_id__in=user_ids)
+        ],
+        using=using,
+    )
+
+
+def announcement_read(user_id, using=DEFAULT_DB_ALIAS):
+    if UnreadCounter.objects.using(using).filter(user_id=user_id, announcements__gt=0).update(
+        announcements=F('announcements') - 1
+    ):
+        _push_on_commit([user_id], using=using)
+
+
+def message_read(user_id, message_id, using=DEFAULT_DB_ALIAS):
+    if UnreadCounter.objects.using(using).filter(
+        user_id=user_id, messages__gt=0, user__received_messages=message_id
+    ).update(messages=F('messages') - 1):
+        _push_on_commit([user_id], using=using)
+
+
+def message_sent(message, recipient_ids, using=DEFAULT_DB_ALIAS):
+    """One more unread message for the recipients who can see ``message`` and have not read it."""
+    counters = UnreadCounter.objects.using(using).filter(
+        Q(user__tenant__isnull=True) | Q(user__tenant_id=message.tenant_id),
+        Q(user__store__isnull=True) | Q(user__store_id=message.store_id),
+        user_id__in=recipient_ids,
+    ).exclude(user__message_reads__message=message)
+    if counters.update(messages=F('messages') + 1):
+        _push_on_commit(recipient_ids, using=using)
+
+
+def _audience(tenant_ids, user_ids):
+    """Users of ``tenant_ids`` (``None`` standing for users without a tenant) and ``user_ids``."""
+    condition = Q(id__in=user_ids)
+    if None in tenant_ids:
+        condition |= Q(tenant__isnull=True)
+    condition |= Q(tenant_id__in=[tenant_id for tenant_id in tenant_ids if tenant_id is not None])
+    return User.objects.filter(condition)
+
+
+class _PendingRecount:
+    def __init__(self):
+        self.tenant_ids = set()
+        self.user_ids = set()
+
+    def flush(self):
+        _reconcile(_audience(self.tenant_ids, self.user_ids))
+
+
+def mark_unread_changed(tenant_ids=(), user_ids=(), using=DEFAULT_DB_ALIAS):
+    """
+    Recount the users of ``tenant_ids`` (``None`` for users without a tenant)
+    and ``user_ids`` once the current transaction commits.
+    """
+    if not tenant_ids and not user_ids:
+        return
+    # One recount per transaction however many rows it touched
+    batch = _pending.current(_PendingRecount, using=using)
+    if batch is None:
+        _reconcile(_audience(set(tenant_ids), set(user_ids)))
+        return
+    batch.tenant_ids.update(tenant_ids)
+    batch.user_ids.update(user_ids)
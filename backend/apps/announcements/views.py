@@ -1,23 +1,42 @@
+import logging
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count
-from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from .models import Announcement, AnnouncementRead, TeamMessage, MessageRead
+from .models import AnnouncementRead, TeamMessage, MessageRead
 from .serializers import (
     AnnouncementSerializer, AnnouncementCreateSerializer, AnnouncementUpdateSerializer,
     TeamMessageSerializer, TeamMessageCreateSerializer, TeamMessageUpdateSerializer,
     AnnouncementReadCreateSerializer, MessageReadCreateSerializer,
     UserSerializer
 )
+from shared.logs import lazy
+from shared.pagination import KeysetPagination
+
+from .feed import visible_announcements, with_feed_relations, with_read_state
+from .unread import unread_counts
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
 
+class AnnouncementPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class AnnouncementCursorPagination(KeysetPagination):
+    page_size = 20
+
+
 class AnnouncementViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing announcements.
@@ -29,47 +48,27 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'updated_at', 'priority', 'is_pinned']
     ordering = ['-is_pinned', '-priority', '-created_at']
 
+    @property
+    def paginator(self):
+        """
+        Page numbers in the feed order (pinned, then priority, then newest)
+        by default. ``?cursor=`` switches to keyset pages, newest first.
+        """
+        if not hasattr(self, '_paginator'):
+            if AnnouncementCursorPagination.cursor_query_param in self.request.query_params:
+                self._paginator = AnnouncementCursorPagination()
+            else:
+                self._paginator = AnnouncementPagination()
+        return self._paginator
+
     def get_queryset(self):
         """Filter announcements based on user's access level and targeting."""
         user = self.request.user
-        
-        # Base queryset - show all active announcements for the user's tenant
-        queryset = Announcement.objects.filter(is_active=True)
-        
-        # Filter by tenant
-        if user.tenant:
-            queryset = queryset.filter(tenant=user.tenant)
-        
-        # Filter by store - show announcements for user's store or store-specific announcements
-        if user.store:
-            # Show announcements that are either:
-            # 1. System-wide announcements (no target_stores)
-            # 2. Store-specific announcements targeting this user's store
-            # 3. Team-specific announcements created by users from the same store
-            queryset = queryset.filter(
-                Q(target_stores__isnull=True) |  # System-wide
-                Q(target_stores=user.store) |    # Store-specific
-                Q(author__store=user.store)      # Created by same store members
-            ).distinct()
-        else:
-            # If user has no store, show all announcements for the tenant
-            print(f"User {user.username} has no store assigned, showing all tenant announcements")
-        
-        # Filter by publish date and expiration
-        now = timezone.now()
-        queryset = queryset.filter(
-            Q(publish_at__lte=now) &
-            (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
-        )
-        
-        # Debug: Print the final queryset count
-        print(f"Final announcements count for user {user.username}: {queryset.count()}")
-        
-        # Debug: Print the actual announcements being returned
-        for ann in queryset:
-            print(f"  - {ann.title} (Type: {ann.announcement_type}, Author: {ann.author.username})")
-        
-        return queryset.distinct()
+        queryset = visible_announcements(user)
+        if self.action in ('list', 'retrieve', 'pinned', 'urgent'):
+            queryset = with_feed_relations(with_read_state(queryset, user))
+        logger.debug('Announcements for %s: %s', user.username, lazy(lambda: queryset.query))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -134,12 +133,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread announcements for current user."""
-        user = request.user
-        read_announcements = AnnouncementRead.objects.filter(user=user).values_list('announcement_id', flat=True)
-        
-        unread_count = self.get_queryset().exclude(id__in=read_announcements).count()
-        
-        return Response({'unread_count': unread_count})
+        return Response({'unread_count': unread_counts(request.user)['announcements']})
 
     @action(detail=False, methods=['get'])
     def pinned(self, request):
@@ -270,12 +264,7 @@ class TeamMessageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread messages for current user."""
-        user = request.user
-        read_messages = MessageRead.objects.filter(user=user).values_list('message_id', flat=True)
-        
-        unread_count = self.get_queryset().filter(recipients=user).exclude(id__in=read_messages).count()
-        
-        return Response({'unread_count': unread_count})
+        return Response({'unread_count': unread_counts(request.user)['messages']})
 
     @action(detail=False, methods=['get'])
     def urgent(self, request):
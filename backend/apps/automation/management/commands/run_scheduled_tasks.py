@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.automation.scheduler import run_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run the scheduled tasks that are due; call this from cron every few minutes'
+
+    def handle(self, *args, **options):
+        for execution in run_due_tasks():
+            self.stdout.write(
+                f'{execution.task.name}: {execution.status} in {execution.duration_seconds}s'
+            )
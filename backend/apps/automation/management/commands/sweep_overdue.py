@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.escalation.services import EscalationSLAService
+from apps.support.services import SupportTicketService
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Report escalations and support tickets that went past their SLA deadline since the last sweep'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only sweep the tenant with this slug')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' does not exist")
+
+        for tenant in tenants:
+            started = time.monotonic()
+            escalations = EscalationSLAService.sweep(tenant)
+            tickets = SupportTicketService.check_overdue_tickets(tenant)
+            self.stdout.write(
+                f'{tenant.slug}: {len(escalations)} escalation(s) and {len(tickets)} ticket(s) overdue '
+                f'in {time.monotonic() - started:.2f}s'
+            )
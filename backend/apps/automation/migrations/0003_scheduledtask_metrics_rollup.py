@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0002_scheduledtask_event_tag_refresh'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('email', 'Email'), ('notification', 'Notification'), ('report', 'Report'), ('data_sync', 'Data Sync'), ('cleanup', 'Cleanup'), ('event_tag_refresh', 'Birthday/Anniversary Tag Refresh'), ('metrics_rollup', 'Business Metrics Rollup'), ('custom', 'Custom Task')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0004_scheduledtask_unread_reconcile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('email', 'Email'), ('notification', 'Notification'), ('report', 'Report'), ('data_sync', 'Data Sync'), ('cleanup', 'Cleanup'), ('event_tag_refresh', 'Birthday/Anniversary Tag Refresh'), ('metrics_rollup', 'Business Metrics Rollup'), ('unread_reconcile', 'Unread Counter Reconciliation'), ('sla_sweep', 'Overdue SLA Sweep'), ('custom', 'Custom Task')], max_length=20),
+        ),
+    ]
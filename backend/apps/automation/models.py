@@ -143,6 +143,10 @@ class ScheduledTask(models.Model):
         REPORT = 'report', _('Report')
         DATA_SYNC = 'data_sync', _('Data Sync')
         CLEANUP = 'cleanup', _('Cleanup')
+        EVENT_TAG_REFRESH = 'event_tag_refresh', _('Birthday/Anniversary Tag Refresh')
+        METRICS_ROLLUP = 'metrics_rollup', _('Business Metrics Rollup')
+        UNREAD_RECONCILE = 'unread_reconcile', _('Unread Counter Reconciliation')
+        SLA_SWEEP = 'sla_sweep', _('Overdue SLA Sweep')
         CUSTOM = 'custom', _('Custom Task')
 
     class Frequency(models.TextChoices):
@@ -0,0 +1,198 @@
+"""
+Runs ``ScheduledTask`` rows.
+
+Each task type maps to a handler in ``TASK_HANDLERS``. ``run_due_tasks`` is
+meant to be called periodically (``manage.py run_scheduled_tasks`` from cron);
+it runs every enabled task whose ``next_execution`` has passed, records a
+``TaskExecution`` and schedules the next run from the task's frequency.
+Due tasks are claimed with ``SKIP LOCKED`` and moved to their next slot
+before they run, so overlapping cron runs never run a task twice.
+
+Tasks started from the API go through ``queue_task`` instead, which runs
+them on the background job pool (``apps.analytics.jobs``) so the request
+returns at once.
+"""
+import logging
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ScheduledTask, TaskExecution
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_INTERVALS = {
+    ScheduledTask.Frequency.MINUTELY: relativedelta(minutes=1),
+    ScheduledTask.Frequency.HOURLY: relativedelta(hours=1),
+    ScheduledTask.Frequency.DAILY: relativedelta(days=1),
+    ScheduledTask.Frequency.WEEKLY: relativedelta(weeks=1),
+    ScheduledTask.Frequency.MONTHLY: relativedelta(months=1),
+    ScheduledTask.Frequency.YEARLY: relativedelta(years=1),
+}
+
+
+def get_next_execution(task, now):
+    """
+    Next run time after ``now``. Daily and slower tasks run at
+    ``schedule_config['hour']``/``['minute']`` (default 01:00) so that
+    nightly jobs stay nightly; custom tasks use
+    ``schedule_config['interval_minutes']``.
+    """
+    config = task.schedule_config or {}
+    if task.frequency == ScheduledTask.Frequency.CUSTOM:
+        return now + timedelta(minutes=int(config.get('interval_minutes', 60)))
+
+    interval = FREQUENCY_INTERVALS[task.frequency]
+    if task.frequency in (ScheduledTask.Frequency.MINUTELY, ScheduledTask.Frequency.HOURLY):
+        return now + interval
+
+    anchor = now.replace(
+        hour=int(config.get('hour', 1)), minute=int(config.get('minute', 0)),
+        second=0, microsecond=0,
+    )
+    while anchor <= now:
+        anchor += interval
+    return anchor
+
+
+def _refresh_event_tags(task):
+    from apps.clients.tagging import EVENT_WINDOW_DAYS, refresh_event_tags
+
+    days = int(task.task_config.get('window_days', EVENT_WINDOW_DAYS))
+    return refresh_event_tags(task.tenant, days=days)
+
+
+def _rollup_metrics(task):
+    from apps.analytics.rollups import rollup_metrics
+
+    days = rollup_metrics(task.tenant, full=bool(task.task_config.get('full', False)))
+    return {'days_recomputed': days}
+
+
+def _reconcile_unread_counters(task):
+    from apps.announcements.unread import reconcile_unread_counters
+
+    recounted, drifted = reconcile_unread_counters(task.tenant)
+    return {'users_recounted': recounted, 'counters_repaired': drifted}
+
+
+def _sweep_overdue(task):
+    from apps.escalation.services import EscalationSLAService
+    from apps.support.services import SupportTicketService
+
+    escalations = EscalationSLAService.sweep(task.tenant)
+    tickets = SupportTicketService.check_overdue_tickets(task.tenant)
+    return {'overdue_escalations': len(escalations), 'overdue_tickets': len(tickets)}
+
+
+TASK_HANDLERS = {
+    ScheduledTask.TaskType.EVENT_TAG_REFRESH: _refresh_event_tags,
+    ScheduledTask.TaskType.METRICS_ROLLUP: _rollup_metrics,
+    ScheduledTask.TaskType.UNREAD_RECONCILE: _reconcile_unread_counters,
+    ScheduledTask.TaskType.SLA_SWEEP: _sweep_overdue,
+}
+
+
+def run_task(task, execution=None):
+    """Run one task now and return its ``TaskExecution``."""
+    started = timezone.now()
+    if execution is None:
+        execution = TaskExecution.objects.create(
+            task=task,
+            status=TaskExecution.Status.RUNNING,
+            started_at=started,
+            input_data={'task_config': task.task_config},
+        )
+
+    handler = TASK_HANDLERS.get(task.task_type)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for task type '{task.task_type}'")
+        with transaction.atomic():
+            output = handler(task)
+        execution.status = TaskExecution.Status.COMPLETED
+        execution.output_data = output or {}
+        succeeded = True
+    except Exception as e:
+        logger.exception('Scheduled task %s failed', task.pk)
+        execution.status = TaskExecution.Status.FAILED
+        execution.error_message = str(e) or e.__class__.__name__
+        succeeded = False
+
+    completed = timezone.now()
+    execution.completed_at = completed
+    execution.progress = 100
+    execution.duration_seconds = int((completed - started).total_seconds())
+    execution.save()
+
+    ScheduledTask.objects.filter(pk=task.pk).update(
+        last_executed=started,
+        next_execution=get_next_execution(task, completed),
+        execution_count=F('execution_count') + 1,
+        success_count=F('success_count') + int(succeeded),
+        failure_count=F('failure_count') + int(not succeeded),
+    )
+    return execution
+
+
+def queue_task(task):
+    """
+    Record a pending execution of ``task`` and run it on the background job
+    pool once the current transaction commits. Returns the execution.
+    """
+    from apps.analytics.jobs import get_executor
+
+    execution = TaskExecution.objects.create(
+        task=task,
+        status=TaskExecution.Status.PENDING,
+        input_data={'task_config': task.task_config},
+    )
+    transaction.on_commit(lambda: get_executor().submit(run_queued_task, execution.pk))
+    return execution
+
+
+def run_queued_task(execution_id):
+    close_old_connections()
+    try:
+        claimed = TaskExecution.objects.filter(
+            pk=execution_id, status=TaskExecution.Status.PENDING
+        ).update(status=TaskExecution.Status.RUNNING, started_at=timezone.now())
+        if not claimed:
+            return
+        execution = TaskExecution.objects.select_related('task__tenant').get(pk=execution_id)
+        run_task(execution.task, execution=execution)
+    finally:
+        close_old_connections()
+
+
+def claim_due_tasks(now=None):
+    """
+    Lock the enabled, active tasks that are due and move each to its next
+    slot. Tasks locked by another run are skipped, and once this commits the
+    claimed ones are no longer due, so a second run cannot pick them up.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            ScheduledTask.objects.filter(
+                Q(next_execution__isnull=True) | Q(next_execution__lte=now),
+                is_enabled=True,
+                status=ScheduledTask.Status.ACTIVE,
+                task_type__in=list(TASK_HANDLERS),
+            )
+            .select_related('tenant')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('next_execution')
+        )
+        for task in tasks:
+            task.next_execution = get_next_execution(task, now)
+        ScheduledTask.objects.bulk_update(tasks, ['next_execution'])
+    return tasks
+
+
+def run_due_tasks(now=None):
+    """Run every enabled, active task that is due. Returns the executions."""
+    return [run_task(task) for task in claim_due_tasks(now)]
@@ -1,3 +1,173 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .models import ScheduledTask, TaskExecution
+from .scheduler import TASK_HANDLERS, get_next_execution, run_due_tasks, run_task
+
+REFRESH = ScheduledTask.TaskType.EVENT_TAG_REFRESH
+
+
+class _InlineExecutor:
+    """Runs submitted jobs at once, on the test's connection."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def at(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class NextExecutionTests(TestCase):
+    def task(self, frequency, **config):
+        return ScheduledTask(frequency=frequency, schedule_config=config)
+
+    def test_short_intervals_run_from_now(self):
+        now = at(2025, 3, 10, 14, 37)
+        self.assertEqual(get_next_execution(self.task(ScheduledTask.Frequency.MINUTELY), now), at(2025, 3, 10, 14, 38))
+        self.assertEqual(get_next_execution(self.task(ScheduledTask.Frequency.HOURLY), now), at(2025, 3, 10, 15, 37))
+        self.assertEqual(
+            get_next_execution(self.task(ScheduledTask.Frequency.CUSTOM, interval_minutes=90), now),
+            at(2025, 3, 10, 16, 7),
+        )
+        self.assertEqual(get_next_execution(self.task(ScheduledTask.Frequency.CUSTOM), now), at(2025, 3, 10, 15, 37))
+
+    def test_daily_and_slower_keep_their_time_of_day(self):
+        daily = self.task(ScheduledTask.Frequency.DAILY)
+        self.assertEqual(get_next_execution(daily, at(2025, 3, 10, 0, 30)), at(2025, 3, 10, 1, 0))
+        self.assertEqual(get_next_execution(daily, at(2025, 3, 10, 1, 0)), at(2025, 3, 11, 1, 0))
+        self.assertEqual(
+            get_next_execution(self.task(ScheduledTask.Frequency.DAILY, hour=23, minute=30), at(2025, 3, 10, 14)),
+            at(2025, 3, 10, 23, 30),
+        )
+        self.assertEqual(
+            get_next_execution(self.task(ScheduledTask.Frequency.WEEKLY), at(2025, 3, 10, 14)), at(2025, 3, 17, 1)
+        )
+        self.assertEqual(
+            get_next_execution(self.task(ScheduledTask.Frequency.MONTHLY), at(2025, 1, 31, 14)), at(2025, 2, 28, 1)
+        )
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.handler = mock.Mock(return_value={'updated': 3})
+        patcher = mock.patch.dict(TASK_HANDLERS, {REFRESH: self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_task(self, **fields):
+        fields = {
+            'name': 'Refresh', 'task_type': REFRESH, 'frequency': ScheduledTask.Frequency.HOURLY,
+            'tenant': self.tenant, **fields,
+        }
+        return ScheduledTask.objects.create(**fields)
+
+    def test_run_task_records_success(self):
+        task = self.make_task(task_config={'window_days': 3})
+        execution = run_task(task)
+
+        self.handler.assert_called_once_with(task)
+        self.assertEqual(execution.status, TaskExecution.Status.COMPLETED)
+        self.assertEqual(execution.output_data, {'updated': 3})
+        self.assertEqual(execution.input_data, {'task_config': {'window_days': 3}})
+        task.refresh_from_db()
+        self.assertEqual((task.execution_count, task.success_count, task.failure_count), (1, 1, 0))
+        self.assertEqual(task.last_executed, execution.started_at)
+        self.assertGreater(task.next_execution, execution.completed_at)
+
+    def test_run_task_records_failure_and_rolls_back(self):
+        def handler(task):
+            Tenant.objects.create(name='Partial', slug='partial')
+            raise RuntimeError('boom')
+
+        self.handler.side_effect = handler
+        task = self.make_task()
+        execution = run_task(task)
+
+        self.assertEqual(execution.status, TaskExecution.Status.FAILED)
+        self.assertEqual(execution.error_message, 'boom')
+        self.assertFalse(Tenant.objects.filter(slug='partial').exists())
+        task.refresh_from_db()
+        self.assertEqual((task.execution_count, task.success_count, task.failure_count), (1, 0, 1))
+
+    def test_run_task_without_handler_fails(self):
+        execution = run_task(self.make_task(task_type=ScheduledTask.TaskType.CUSTOM))
+        self.assertEqual(execution.status, TaskExecution.Status.FAILED)
+        self.assertIn("No handler for task type 'custom'", execution.error_message)
+
+    def test_run_due_tasks_runs_only_due_tasks_once(self):
+        now = timezone.now()
+        due = [self.make_task(next_execution=now - timedelta(minutes=1)), self.make_task(next_execution=None)]
+        self.make_task(next_execution=now + timedelta(minutes=5))
+        self.make_task(next_execution=now - timedelta(minutes=1), is_enabled=False)
+        self.make_task(next_execution=now - timedelta(minutes=1), status=ScheduledTask.Status.PAUSED)
+        self.make_task(next_execution=now - timedelta(minutes=1), task_type=ScheduledTask.TaskType.CUSTOM)
+
+        executions = run_due_tasks(now)
+        self.assertEqual({e.task_id for e in executions}, {task.pk for task in due})
+        # The claimed tasks moved on, so an overlapping run finds nothing to do
+        self.assertEqual(run_due_tasks(now), [])
+        self.assertEqual(self.handler.call_count, 2)
+
+    def test_due_tasks_are_claimed_with_skip_locked(self):
+        self.make_task(next_execution=None)
+        with CaptureQueriesContext(connection) as queries:
+            run_due_tasks()
+        claim = next(q['sql'] for q in queries if 'FOR UPDATE' in q['sql'])
+        self.assertIn('SKIP LOCKED', claim)
+
+
+@mock.patch('apps.automation.scheduler.close_old_connections', lambda: None)
+@mock.patch('apps.analytics.jobs.get_executor', _InlineExecutor)
+class ScheduledTaskExecuteViewTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.task = ScheduledTask.objects.create(
+            name='Refresh', task_type=REFRESH, frequency=ScheduledTask.Frequency.DAILY, tenant=self.other_tenant,
+        )
+        self.handler = mock.Mock(return_value={})
+        patcher = mock.patch.dict(TASK_HANDLERS, {REFRESH: self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = APIClient()
+
+    def execute(self, role, tenant):
+        user = User.objects.create_user(
+            username=f'{role}-{tenant and tenant.slug}', password='x', role=role, tenant=tenant
+        )
+        self.api.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.post(f'/api/automation/tasks/{self.task.pk}/execute/')
+
+    def test_queues_the_task_for_its_tenant(self):
+        response = self.execute(User.Role.MANAGER, self.other_tenant)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], TaskExecution.Status.PENDING)
+
+        execution = TaskExecution.objects.get(pk=response.data['id'])
+        self.assertEqual(execution.status, TaskExecution.Status.COMPLETED)
+        self.assertIsNotNone(execution.started_at)
+        self.handler.assert_called_once()
+
+    def test_other_tenants_tasks_are_not_found(self):
+        self.assertEqual(self.execute(User.Role.BUSINESS_ADMIN, self.tenant).status_code, 404)
+        self.assertEqual(self.execute(User.Role.MANAGER, None).status_code, 404)
+        self.handler.assert_not_called()
+
+    def test_platform_admin_may_run_any_task(self):
+        self.assertEqual(self.execute(User.Role.PLATFORM_ADMIN, None).status_code, 202)
 
-# Create your tests here.
+    def test_other_roles_are_refused(self):
+        self.assertEqual(self.execute(User.Role.INHOUSE_SALES, self.other_tenant).status_code, 403)
+        self.assertFalse(TaskExecution.objects.exists())
@@ -1,7 +1,9 @@
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.response import Response
+from apps.users.permissions import IsRoleAllowed
 from .models import AutomationWorkflow, AutomationExecution, ScheduledTask, TaskExecution
 from .serializers import AutomationWorkflowSerializer, AutomationExecutionSerializer, ScheduledTaskSerializer, TaskExecutionSerializer
+from .scheduler import queue_task
 
 class AutomationWorkflowListView(generics.ListAPIView):
     queryset = AutomationWorkflow.objects.all()
@@ -56,8 +58,19 @@ class ScheduledTaskDeleteView(generics.DestroyAPIView):
     serializer_class = ScheduledTaskSerializer
 
 class ScheduledTaskExecuteView(generics.GenericAPIView):
+    """Queue a task to run now; poll the returned execution for the result."""
+    permission_classes = [IsRoleAllowed.for_roles(['business_admin', 'manager', 'platform_admin'])]
+
+    def get_queryset(self):
+        queryset = ScheduledTask.objects.select_related('tenant')
+        user = self.request.user
+        if user.is_platform_admin:
+            return queryset
+        return queryset.filter(tenant=user.tenant)
+
     def post(self, request, pk):
-        return Response({"message": "Task execution endpoint"})
+        execution = queue_task(self.get_object())
+        return Response(TaskExecutionSerializer(execution).data, status=status.HTTP_202_ACCEPTED)
 
 class TaskExecutionListView(generics.ListAPIView):
     queryset = TaskExecution.objects.all()
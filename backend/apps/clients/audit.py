@@ -0,0 +1,78 @@
+"""
+Field-level audit trail for clients.
+
+Clients remember the values they were loaded or last saved with
+(``shared.tracking.TrackedFieldsMixin``), so a save can be diffed against
+that state without fetching the row again, and only the fields that changed
+are stored.
+
+Audit rows written inside a transaction are buffered per savepoint level
+(``shared.transactions``) and inserted with one ``bulk_create`` when it
+commits; rows from a rolled-back transaction or savepoint are dropped with
+it. Outside a transaction entries are written straight away.
+"""
+from django.db import DEFAULT_DB_ALIAS
+
+from shared.transactions import CommitBatches
+
+from .models import AuditLog, serialize_field
+
+# Fields whose change alone is not worth an audit entry.
+IGNORED_FIELDS = {'updated_at'}
+
+_batches = CommitBatches(per_savepoint=True)
+
+
+def serialize_instance(instance):
+    return {field.name: serialize_field(getattr(instance, field.name)) for field in instance._meta.fields}
+
+
+def diff_instance(instance):
+    """
+    Return ``(before, after)`` dicts holding only the fields that changed since
+    the instance was loaded or last saved, or ``(None, None)`` if nothing did.
+    Fields that were never loaded (deferred, or a client built by hand) are
+    compared as unknown and left out.
+    """
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return None, serialize_instance(instance)
+
+    before, after = {}, {}
+    for field in instance._meta.concrete_fields:
+        if field.name in IGNORED_FIELDS or field.attname not in loaded:
+            continue
+        old = serialize_field(loaded[field.attname])
+        new = serialize_field(getattr(instance, field.attname))
+        if old != new:
+            before[field.name] = old
+            after[field.name] = new
+    if not after:
+        return None, None
+    return before, after
+
+
+class _AuditBatch:
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+
+    def flush(self):
+        if self.entries:
+            AuditLog.objects.using(self.using).bulk_create(self.entries)
+            self.entries = []
+
+
+def queue_audit_log(entry, using=DEFAULT_DB_ALIAS):
+    """Save ``entry`` when the current transaction commits, batched with the rest."""
+    batch = _batches.current(lambda: _AuditBatch(using), using=using)
+    if batch is None:
+        entry.save(using=using)
+        return
+    batch.entries.append(entry)
+
+
+def discard_pending(client_id, using=DEFAULT_DB_ALIAS):
+    """Drop queued entries for a client that is being deleted."""
+    for batch in _batches.open_batches(using):
+        batch.entries = [entry for entry in batch.entries if entry.client_id != client_id]
@@ -0,0 +1,37 @@
+"""
+Row builders for customer exports.
+"""
+from shared.exports import EXPORT_CHUNK_SIZE
+
+CLIENT_EXPORT_FIELDS = [
+    'first_name', 'last_name', 'email', 'phone', 'customer_type',
+    'address', 'city', 'state', 'country', 'postal_code',
+    'date_of_birth', 'anniversary_date', 'preferred_metal', 'preferred_stone',
+    'ring_size', 'budget_range', 'lead_source', 'notes', 'community',
+    'mother_tongue', 'reason_for_visit', 'age_of_end_user', 'saving_scheme',
+    'catchment_area', 'next_follow_up', 'summary_notes', 'status',
+    'created_at', 'updated_at', 'tags'
+]
+
+
+def iter_client_export_rows(queryset, fields, as_json=False):
+    """Walk clients in chunks, loading tags once per chunk."""
+    queryset = queryset.prefetch_related('tags')
+    for client in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = {}
+        for field in fields:
+            if field == 'date_of_birth' and client.date_of_birth:
+                row[field] = client.date_of_birth.strftime('%Y-%m-%d')
+            elif field == 'anniversary_date' and client.anniversary_date:
+                row[field] = client.anniversary_date.strftime('%Y-%m-%d')
+            elif field in ['created_at', 'updated_at']:
+                row[field] = getattr(client, field).strftime('%Y-%m-%d %H:%M:%S')
+            elif field == 'tags':
+                tag_names = [tag.name for tag in client.tags.all()]
+                row[field] = tag_names if as_json else ', '.join(tag_names)
+            else:
+                value = getattr(client, field, '')
+                if value is None:
+                    value = ''
+                row[field] = value if as_json else str(value)
+        yield row
@@ -0,0 +1,214 @@
+"""
+Bulk customer import.
+
+Uploads are read as a stream and written in batches: existing emails are
+loaded once up front, each row is validated with ``ClientSerializer``, and
+accepted rows are inserted with ``bulk_create``. Because ``bulk_create`` does
+not fire model signals, auto-tags and audit entries for every batch are
+written in bulk here instead.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.analytics.services import DashboardMetricsService
+
+from .models import Client, AuditLog, serialize_field
+from .serializers import ClientSerializer
+from .tagging import get_auto_tag_slugs, get_tag_ids
+
+IMPORT_FIELDS = [
+    'first_name', 'last_name', 'phone', 'address', 'city', 'state', 'country',
+    'postal_code', 'preferred_metal', 'preferred_stone', 'ring_size',
+    'budget_range', 'lead_source', 'notes', 'community', 'mother_tongue',
+    'reason_for_visit', 'age_of_end_user', 'saving_scheme', 'catchment_area',
+    'next_follow_up', 'summary_notes',
+]
+
+
+class ImportFormatError(ValueError):
+    """The upload is not in the shape the importer expects."""
+
+
+def iter_csv_rows(uploaded_file):
+    """Yield ``(row_num, row)`` from a CSV upload without reading it into memory."""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    # Start from 2 to account for the header row
+    yield from enumerate(csv.DictReader(text), start=2)
+
+
+def iter_json_rows(uploaded_file, chunk_size=64 * 1024):
+    """
+    Yield ``(row_num, item)`` for each element of a top-level JSON array,
+    decoding the upload incrementally.
+    """
+    reader = codecs.getincrementaldecoder('utf-8')()
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    started = False
+    row_num = 0
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = uploaded_file.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer += reader.decode(b'', final=True)
+        else:
+            buffer += reader.decode(chunk)
+
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if eof:
+                break
+            fill()
+            continue
+
+        if not started:
+            if buffer[0] != '[':
+                raise ImportFormatError('JSON file should contain an array of customer objects')
+            started = True
+            buffer = buffer[1:]
+            continue
+
+        if buffer[0] == ']':
+            return
+        if buffer[0] == ',' and row_num:
+            buffer = buffer[1:]
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # A scalar may have been cut off at the chunk boundary
+            fill()
+            continue
+
+        row_num += 1
+        buffer = buffer[end:]
+        yield row_num, item
+
+    if not started:
+        raise ImportFormatError('JSON file should contain an array of customer objects')
+    raise json.JSONDecodeError('Unterminated array', buffer, len(buffer))
+
+
+class ClientImporter:
+    """
+    Import customers for one tenant from an iterable of ``(row_num, row)``.
+
+    Error messages per row are the same as the single-row import used to
+    produce, so the frontend can keep showing them unchanged. Each batch is
+    written atomically; ``on_progress(importer)`` is called after every batch
+    so background jobs can publish how far they got.
+    """
+    batch_size = 500
+
+    def __init__(self, tenant, user=None, context=None, on_progress=None):
+        self.tenant = tenant
+        self.user = user
+        self.serializer = ClientSerializer(context=context or {})
+        self.on_progress = on_progress
+        self.rows_processed = 0
+        self.imported_count = 0
+        self.errors = []
+        self._existing_emails = None
+
+    def run(self, rows):
+        self._existing_emails = set(
+            Client.objects.filter(tenant=self.tenant).values_list('email', flat=True)
+        )
+        pending = []
+        for row_num, row in rows:
+            self.rows_processed += 1
+            try:
+                client = self._build_client(row_num, row)
+            except Exception as e:
+                self.errors.append(f'Row {row_num}: {str(e)}')
+                client = None
+            if client is not None:
+                pending.append(client)
+            if len(pending) >= self.batch_size:
+                self._flush(pending)
+                pending = []
+            if self.on_progress and self.rows_processed % self.batch_size == 0:
+                self.on_progress(self)
+        if pending:
+            self._flush(pending)
+        if self.imported_count:
+            # bulk_create skips the post_save handlers that refresh dashboards
+            tenant_id = self.tenant.pk if self.tenant else None
+            transaction.on_commit(lambda: DashboardMetricsService.invalidate(tenant_id))
+        if self.on_progress:
+            self.on_progress(self)
+        return self.imported_count, self.errors
+
+    def _build_client(self, row_num, row):
+        email = row.get('email', '').strip()
+        if not email:
+            self.errors.append(f'Row {row_num}: Email is required')
+            return None
+        if email in self._existing_emails:
+            self.errors.append(f'Row {row_num}: Customer with email {email} already exists')
+            return None
+
+        client_data = {field: row.get(field, '').strip() for field in IMPORT_FIELDS}
+        client_data.update({
+            'email': email,
+            'customer_type': row.get('customer_type', 'individual'),
+            'status': row.get('status', 'lead'),
+        })
+        for field in ('date_of_birth', 'anniversary_date'):
+            if row.get(field):
+                try:
+                    client_data[field] = datetime.strptime(row[field], '%Y-%m-%d').date()
+                except (TypeError, ValueError):
+                    pass  # Skip invalid date
+
+        try:
+            validated_data = self.serializer.run_validation(client_data)
+        except ValidationError as exc:
+            self.errors.append(f'Row {row_num}: {exc.detail}')
+            return None
+
+        self._existing_emails.add(email)
+        return Client(tenant=self.tenant, **validated_data)
+
+    @transaction.atomic
+    def _flush(self, clients):
+        created = Client.objects.bulk_create(clients)
+        self._apply_tags(created)
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                client=client,
+                action='create',
+                user=self.user,
+                before=None,
+                after={field.name: serialize_field(getattr(client, field.name)) for field in client._meta.fields},
+            )
+            for client in created
+        ])
+        self.imported_count += len(created)
+
+    def _apply_tags(self, clients):
+        tag_ids = get_tag_ids()
+        through = Client.tags.through
+        links = [
+            through(client_id=client.pk, customertag_id=tag_ids[slug])
+            for client in clients
+            for slug in get_auto_tag_slugs(client)
+            if slug in tag_ids
+        ]
+        through.objects.bulk_create(links, ignore_conflicts=True)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.clients.spend import rebuild_spend_summaries
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Recompute every client spend summary (lifetime spend, orders, first/last purchase) from sales and purchases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only rebuild clients of the tenant with this slug')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' does not exist")
+
+        for tenant in tenants:
+            started = time.monotonic()
+            written = rebuild_spend_summaries(tenant=tenant)
+            self.stdout.write(
+                f'{tenant.slug}: rebuilt {written} summary(ies) in {time.monotonic() - started:.2f}s'
+            )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.clients.tagging import retag_clients
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Apply the automatic customer tags to every client in one set-based pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only re-tag clients of the tenant with this slug')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' does not exist")
+
+        for tenant in tenants:
+            started = time.monotonic()
+            added = retag_clients(tenant=tenant)
+            self.stdout.write(
+                f'{tenant.slug}: added {added} tag(s) in {time.monotonic() - started:.2f}s'
+            )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:10
+
+from django.db import migrations, models
+import django.db.models.functions.datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0013_client_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(models.F('tenant'), django.db.models.functions.datetime.ExtractMonth('date_of_birth'), django.db.models.functions.datetime.ExtractDay('date_of_birth'), name='client_dob_month_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(models.F('tenant'), django.db.models.functions.datetime.ExtractMonth('anniversary_date'), django.db.models.functions.datetime.ExtractDay('anniversary_date'), name='client_anniv_month_day_idx'),
+        ),
+    ]
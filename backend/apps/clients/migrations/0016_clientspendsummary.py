@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_tenant_google_maps_url'),
+        ('clients', '0015_client_tenant_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSpendSummary',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='spend_summary', serialize=False, to='clients.client')),
+                ('total_spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('average_order_value', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_purchase_date', models.DateField(blank=True, null=True)),
+                ('last_purchase_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='client_spend_summaries', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Client Spend Summary',
+                'verbose_name_plural': 'Client Spend Summaries',
+                'indexes': [models.Index(fields=['tenant', 'total_spend'], name='spend_tenant_total_idx'), models.Index(fields=['tenant', 'last_purchase_date'], name='spend_tenant_last_idx')],
+            },
+        ),
+    ]
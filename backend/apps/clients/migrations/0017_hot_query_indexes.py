@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0016_clientspendsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tenant', '-date', '-time'], name='appt_live_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tenant', 'status', 'date'], name='appt_live_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tenant', '-created_at'], name='client_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tenant', '-due_date', '-due_time'], name='followup_live_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tenant', 'status', 'due_date'], name='followup_live_status_due_idx'),
+        ),
+    ]
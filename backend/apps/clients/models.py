@@ -1,12 +1,15 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
-from django.db.models.signals import pre_save, post_save, pre_delete
+from django.db.models.functions import ExtractDay, ExtractMonth
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 import json
 import datetime
 from decimal import Decimal
 
+from shared.tracking import TrackedFieldsMixin
+
 
 def serialize_field(value):
     if isinstance(value, (datetime.datetime, datetime.date)):
@@ -50,7 +53,7 @@ class CustomerTag(models.Model):
         return f"{self.name} ({self.category})"
 
 
-class Client(models.Model):
+class Client(TrackedFieldsMixin, models.Model):
     """
     Client/Customer model for CRM.
     """
@@ -139,6 +142,24 @@ class Client(models.Model):
         verbose_name_plural = _('Clients')
         ordering = ['-created_at']
         unique_together = ['email', 'tenant']
+        indexes = [
+            # Month/day lookups for the birthday/anniversary-week tag refresh
+            models.Index(
+                'tenant', ExtractMonth('date_of_birth'), ExtractDay('date_of_birth'),
+                name='client_dob_month_day_idx',
+            ),
+            models.Index(
+                'tenant', ExtractMonth('anniversary_date'), ExtractDay('anniversary_date'),
+                name='client_anniv_month_day_idx',
+            ),
+            # Changed-since-watermark scans of the metrics rollup
+            models.Index(fields=['tenant', 'updated_at'], name='client_tenant_updated_idx'),
+            # Tenant client lists (newest first) skip soft-deleted rows
+            models.Index(
+                fields=['tenant', '-created_at'], name='client_live_created_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -291,6 +312,17 @@ class Appointment(models.Model):
         verbose_name = _('Appointment')
         verbose_name_plural = _('Appointments')
         ordering = ['-date', '-time']
+        indexes = [
+            # Tenant calendars: date ranges in list order, optionally by status
+            models.Index(
+                fields=['tenant', '-date', '-time'], name='appt_live_date_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=['tenant', 'status', 'date'], name='appt_live_status_date_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.client.full_name} - {self.date} {self.time} ({self.get_status_display()})"
@@ -454,6 +486,17 @@ class FollowUp(models.Model):
         verbose_name = _('Follow-up')
         verbose_name_plural = _('Follow-ups')
         ordering = ['-due_date', '-due_time']
+        indexes = [
+            # Tenant follow-up lists: due date ranges in list order, optionally by status
+            models.Index(
+                fields=['tenant', '-due_date', '-due_time'], name='followup_live_due_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=['tenant', 'status', 'due_date'], name='followup_live_status_due_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.client.full_name} ({self.get_status_display()})"
@@ -515,7 +558,10 @@ class Announcement(models.Model):
         return self.title
 
 
-class Purchase(models.Model):
+class Purchase(TrackedFieldsMixin, models.Model):
+    # Client the purchase was loaded with, so moving it refreshes both spend summaries
+    tracked_fields = ('client_id',)
+
     client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='purchases')
     product_name = models.CharField(max_length=255)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -528,6 +574,43 @@ class Purchase(models.Model):
         return f"{self.client.full_name} - {self.product_name} - {self.amount}"
 
 
+
+class ClientSpendSummary(models.Model):
+    """
+    Denormalized purchase totals of a client, built from its sales and
+    ``Purchase`` records and kept current by ``apps.clients.spend``.
+    """
+    client = models.OneToOneField(
+        'Client',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='spend_summary'
+    )
+    tenant = models.ForeignKey(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        related_name='client_spend_summaries'
+    )
+    total_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    average_order_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_purchase_date = models.DateField(null=True, blank=True)
+    last_purchase_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Client Spend Summary')
+        verbose_name_plural = _('Client Spend Summaries')
+        indexes = [
+            # Revenue segmentation: clients of a tenant above/below a spend
+            models.Index(fields=['tenant', 'total_spend'], name='spend_tenant_total_idx'),
+            models.Index(fields=['tenant', 'last_purchase_date'], name='spend_tenant_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} - {self.total_spend}"
+
+
 class AuditLog(models.Model):
     ACTION_CHOICES = [
         ('create', 'Create'),
@@ -546,37 +629,26 @@ class AuditLog(models.Model):
         return f"{self.get_action_display()} by {self.user} on {self.timestamp}"
 
 
-@receiver(pre_save, sender=Client)
-def log_client_update(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = Client.objects.get(pk=instance.pk)
-            before = {field.name: serialize_field(getattr(old, field.name)) for field in instance._meta.fields}
-        except Client.DoesNotExist:
-            before = None
-        instance._auditlog_before = before
-    else:
-        instance._auditlog_before = None
-
 @receiver(post_save, sender=Client)
 def create_audit_log_on_save(sender, instance, created, **kwargs):
-    from .models import AuditLog
+    from .audit import diff_instance, queue_audit_log, serialize_instance
     user = getattr(instance, '_auditlog_user', None)
-    before = getattr(instance, '_auditlog_before', None)
-    after = {field.name: serialize_field(getattr(instance, field.name)) for field in instance._meta.fields}
-    action = 'create' if created else 'update'
-    if before != after:
-        AuditLog.objects.create(
-            client=instance,
-            action=action,
-            user=user,
-            before=before,
-            after=after
+    if created:
+        action, before, after = 'create', None, serialize_instance(instance)
+    else:
+        action = 'update'
+        before, after = diff_instance(instance)
+    if after is not None:
+        queue_audit_log(
+            AuditLog(client=instance, action=action, user=user, before=before, after=after),
+            using=kwargs['using'],
         )
 
 @receiver(pre_delete, sender=Client)
 def create_audit_log_on_delete(sender, instance, **kwargs):
-    from .models import AuditLog
+    from .audit import discard_pending
+    # Buffered entries would point at a row that no longer exists by commit time
+    discard_pending(instance.pk, using=kwargs['using'])
     user = getattr(instance, '_auditlog_user', None)
     before = {field.name: serialize_field(getattr(instance, field.name)) for field in instance._meta.fields}
     AuditLog.objects.create(
@@ -1,8 +1,12 @@
+import logging
+
 from rest_framework import serializers
 from .models import Client, ClientInteraction, Appointment, FollowUp, Task, Announcement, CustomerTag, AuditLog
 from apps.tenants.models import Tenant
 from .models import Purchase
+from shared.logs import lazy
 
+logger = logging.getLogger(__name__)
 
 class ClientSerializer(serializers.ModelSerializer):
     # Handle frontend field mapping
@@ -85,38 +89,28 @@ class ClientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'tags', 'is_deleted', 'deleted_at']
     
     def create(self, validated_data):
-        print("=== BACKEND SERIALIZER - CREATE METHOD START ===")
-        print(f"Initial validated_data: {validated_data}")
+        logger.debug('Client serializer create: %s', validated_data)
         
         # Handle name field mapping
         if 'name' in validated_data:
             name = validated_data.pop('name')
-            print(f"Processing name field: '{name}'")
             # Split name into first and last name
             name_parts = name.strip().split(' ', 1)
             validated_data['first_name'] = name_parts[0]
             validated_data['last_name'] = name_parts[1] if len(name_parts) > 1 else ''
-            print(f"Split name - first_name: '{validated_data['first_name']}', last_name: '{validated_data['last_name']}'")
-        
-        # Handle customer interests
-        if 'customer_interests' in validated_data:
-            print(f"Customer interests found: {validated_data['customer_interests']}")
         
         # Handle assigned_to field
         if 'assigned_to' in validated_data:
             assigned_to_value = validated_data['assigned_to']
             if assigned_to_value is None or assigned_to_value == '':
                 validated_data.pop('assigned_to')
-                print("Removed empty assigned_to field")
             elif assigned_to_value == 'current_user':
                 # Assign to the current user
                 request = self.context.get('request')
                 if request and hasattr(request, 'user') and request.user.is_authenticated:
                     validated_data['assigned_to'] = request.user
-                    print(f"Assigned customer to current user: {request.user}")
                 else:
                     validated_data.pop('assigned_to')
-                    print("No authenticated user, removed assigned_to field")
             else:
                 # Try to find user by username or ID
                 try:
@@ -126,10 +120,9 @@ class ClientSerializer(serializers.ModelSerializer):
                     else:
                         user = User.objects.get(username=assigned_to_value)
                     validated_data['assigned_to'] = user
-                    print(f"Assigned customer to user: {user}")
                 except User.DoesNotExist:
                     validated_data.pop('assigned_to')
-                    print(f"User '{assigned_to_value}' not found, removed assigned_to field")
+                    logger.debug("Assignee '%s' not found, leaving the client unassigned", assigned_to_value)
         
         # ALWAYS assign tenant in create method
         request = self.context.get('request')
@@ -137,40 +130,28 @@ class ClientSerializer(serializers.ModelSerializer):
             tenant = request.user.tenant
             if tenant:
                 validated_data['tenant'] = tenant
-                print(f"Assigned user's tenant in create: {tenant}")
             else:
-                print("User has no tenant, creating default in create")
                 from apps.tenants.models import Tenant
                 tenant, created = Tenant.objects.get_or_create(
                     name='Default Tenant',
                     defaults={'domain': 'default.localhost'}
                 )
                 validated_data['tenant'] = tenant
-                print(f"Created default tenant in create: {tenant}")
+                logger.debug('User %s has no tenant, using the default tenant %s', request.user, tenant)
         else:
-            print("No authenticated user, creating default tenant in create")
             from apps.tenants.models import Tenant
             tenant, created = Tenant.objects.get_or_create(
                 name='Default Tenant',
                 defaults={'domain': 'default.localhost'}
             )
             validated_data['tenant'] = tenant
-            print(f"Created default tenant for unauthenticated user in create: {tenant}")
-        
-        print(f"Final validated data before save: {validated_data}")
+            logger.debug('No authenticated user, using the default tenant %s', tenant)
         
         try:
-            result = super().create(validated_data)
-            print(f"=== BACKEND SERIALIZER - CREATE SUCCESS ===")
-            print(f"Created client: {result}")
-            return result
-        except Exception as e:
-            print(f"=== BACKEND SERIALIZER - CREATE ERROR ===")
-            print(f"Error creating client: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
-            raise e
+            return super().create(validated_data)
+        except Exception:
+            logger.exception('Client create failed')
+            raise
     
     def get_tags(self, obj):
         return [
@@ -184,55 +165,26 @@ class ClientSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         """Override update method to handle tag updates"""
-        print(f"=== CLIENT SERIALIZER UPDATE METHOD ===")
-        print(f"Instance: {instance}")
-        print(f"Validated data: {validated_data}")
+        logger.debug('Client serializer update of %s: %s', instance.pk, validated_data)
         
         # Handle tag updates
         tag_slugs = validated_data.pop('tag_slugs', None)
         tags = validated_data.pop('tags', None)
         
-        print(f"tag_slugs from request: {tag_slugs}")
-        print(f"tags from request: {tags}")
-        
         # Use tag_slugs if provided, otherwise use tags
-        if tag_slugs is not None:
-            print(f"Updating tags with tag_slugs: {tag_slugs}")
+        slugs = tag_slugs if tag_slugs is not None else tags
+        if slugs is not None:
             # Clear existing tags and set new ones
             instance.tags.clear()
-            if tag_slugs and len(tag_slugs) > 0:
-                # Get tags by slug
+            if slugs:
                 from .models import CustomerTag
-                tags_to_add = CustomerTag.objects.filter(slug__in=tag_slugs)
-                print(f"Found tags in database: {[tag.slug for tag in tags_to_add]}")
-                if tags_to_add.exists():
+                tags_to_add = list(CustomerTag.objects.filter(slug__in=slugs))
+                if tags_to_add:
                     instance.tags.add(*tags_to_add)
-                    print(f"Added tags: {[tag.name for tag in tags_to_add]}")
-                else:
-                    print("No tags found in database for the provided slugs")
-            else:
-                print("No tag_slugs provided or empty list")
-        elif tags is not None:
-            print(f"Updating tags with tags: {tags}")
-            # Clear existing tags and set new ones
-            instance.tags.clear()
-            if tags and len(tags) > 0:
-                # Get tags by slug
-                from .models import CustomerTag
-                tags_to_add = CustomerTag.objects.filter(slug__in=tags)
-                print(f"Found tags in database: {[tag.slug for tag in tags_to_add]}")
-                if tags_to_add.exists():
-                    instance.tags.add(*tags_to_add)
-                    print(f"Added tags: {[tag.name for tag in tags_to_add]}")
-                else:
-                    print("No tags found in database for the provided slugs")
-            else:
-                print("No tags provided or empty list")
+                logger.debug('Client %s tagged with %s', instance.pk, lazy(lambda: [tag.slug for tag in tags_to_add]))
         
         # Call parent update method for other fields
-        result = super().update(instance, validated_data)
-        print(f"=== UPDATE METHOD COMPLETED ===")
-        return result
+        return super().update(instance, validated_data)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -245,7 +197,6 @@ class ClientSerializer(serializers.ModelSerializer):
         """
         Check that the email is unique per tenant.
         """
-        print(f"=== VALIDATING EMAIL: {value} ===")
         # For now, let's skip email validation to get the basic functionality working
         return value
     
@@ -253,27 +204,17 @@ class ClientSerializer(serializers.ModelSerializer):
         """
         Override to handle tenant field before validation.
         """
-        print(f"=== TO_INTERNAL_VALUE START ===")
-        print(f"Input data: {data}")
-        
         # Remove tenant field from data if it exists
         if 'tenant' in data:
             data.pop('tenant')
-            print("Removed tenant field from input data")
         
         # Call parent method
-        result = super().to_internal_value(data)
-        print(f"=== TO_INTERNAL_VALUE RESULT ===")
-        print(f"Result: {result}")
-        return result
+        return super().to_internal_value(data)
     
     def validate(self, data):
         """
         Custom validation for the entire data set.
         """
-        print(f"=== VALIDATING ENTIRE DATA SET ===")
-        print(f"Data to validate: {data}")
-        
         # For updates, we don't need to validate required fields if they're not being updated
         # Only validate if this is a create operation or if the fields are being updated
         instance = getattr(self, 'instance', None)
@@ -291,14 +232,9 @@ class ClientSerializer(serializers.ModelSerializer):
                 errors['name'] = "Name is required"
             
             if errors:
-                print(f"=== VALIDATION ERRORS: {errors} ===")
+                logger.debug('Client validation errors: %s', errors)
                 raise serializers.ValidationError(errors)
-        else:
-            # This is an update operation
-            print("=== UPDATE OPERATION - SKIPPING REQUIRED FIELD VALIDATION ===")
         
-        print("=== VALIDATION PASSED ===")
-        print(f"Final data after validation: {data}")
         return data
 
 
@@ -0,0 +1,203 @@
+"""
+Denormalized client spend summaries (``ClientSpendSummary``).
+
+A client's lifetime spend, order count, average order value and first/last
+purchase dates come from its revenue sales plus its ``Purchase`` records.
+Saving or deleting either marks the client; when the transaction commits
+(straight away outside one) the summaries of every marked client are
+recomputed from their source rows with grouped queries and a single upsert.
+Recomputing instead of applying deltas keeps a summary right however a sale
+was edited. ``rebuild_spend_summaries`` does the same for whole tenants in
+batches, e.g. after bulk imports that bypass signals.
+
+Revenue tags follow the summary: refreshing it adds the tag for the spend
+band the client has reached. So do the customer segments defined by spend
+(``CustomerSegment.SPEND_CRITERIA``): their customer count, revenue and
+average order value are recomputed after the summaries of their tenant.
+"""
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from apps.sales.models import Sale
+from shared.transactions import CommitBatches
+
+from .models import Client, ClientSpendSummary, Purchase
+from .tagging import get_tag_ids, revenue_tag_slug
+
+# Sales that count as spend; the statuses the dashboards count as revenue
+SPEND_STATUSES = [Sale.Status.CONFIRMED, Sale.Status.DELIVERED]
+
+REBUILD_BATCH_SIZE = 5000
+
+SUMMARY_FIELDS = [
+    'total_spend', 'order_count', 'average_order_value',
+    'first_purchase_date', 'last_purchase_date', 'updated_at',
+]
+
+_pending = CommitBatches()
+
+
+def _earliest(a, b):
+    return b if a is None or (b is not None and b < a) else a
+
+
+def _latest(a, b):
+    return b if a is None or (b is not None and b > a) else a
+
+
+def compute_spend_summaries(client_ids):
+    """Unsaved ``ClientSpendSummary`` objects for the existing clients among ``client_ids``."""
+    client_ids = list(client_ids)
+    summaries = {
+        client_id: ClientSpendSummary(client_id=client_id, tenant_id=tenant_id)
+        for client_id, tenant_id in Client.objects.filter(id__in=client_ids).values_list('id', 'tenant_id')
+    }
+    if not summaries:
+        return []
+
+    sales = (
+        Sale.objects.filter(client_id__in=client_ids, status__in=SPEND_STATUSES)
+        .values('client_id')
+        .annotate(total=Sum('total_amount'), count=Count('id'), first=Min('order_date'), last=Max('order_date'))
+        .order_by()
+    )
+    purchases = (
+        Purchase.objects.filter(client_id__in=client_ids)
+        .values('client_id')
+        .annotate(total=Sum('amount'), count=Count('id'), first=Min('purchase_date'), last=Max('purchase_date'))
+        .order_by()
+    )
+
+    for rows, to_date in ((sales, lambda value: timezone.localtime(value).date()), (purchases, lambda value: value)):
+        for row in rows:
+            summary = summaries.get(row['client_id'])
+            if summary is None:
+                continue
+            summary.total_spend = (summary.total_spend or Decimal('0')) + (row['total'] or Decimal('0'))
+            summary.order_count = (summary.order_count or 0) + row['count']
+            summary.first_purchase_date = _earliest(summary.first_purchase_date, to_date(row['first']))
+            summary.last_purchase_date = _latest(summary.last_purchase_date, to_date(row['last']))
+
+    for summary in summaries.values():
+        summary.total_spend = summary.total_spend or Decimal('0')
+        summary.order_count = summary.order_count or 0
+        summary.average_order_value = (
+            (summary.total_spend / summary.order_count).quantize(Decimal('0.01'))
+            if summary.order_count else Decimal('0')
+        )
+    return list(summaries.values())
+
+
+def apply_revenue_tags(summaries):
+    """Add the revenue tag matching each summary's spend."""
+    tag_ids = get_tag_ids()
+    through = Client.tags.through
+    links = []
+    for summary in summaries:
+        slug = revenue_tag_slug(summary.total_spend)
+        if slug in tag_ids:
+            links.append(through(client_id=summary.client_id, customertag_id=tag_ids[slug]))
+    if links:
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def refresh_spend_summaries(client_ids):
+    """Recompute and store the spend summaries of ``client_ids``. Returns how many were written."""
+    summaries = compute_spend_summaries(client_ids)
+    if summaries:
+        ClientSpendSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['client'],
+            update_fields=SUMMARY_FIELDS,
+        )
+        apply_revenue_tags(summaries)
+    return len(summaries)
+
+
+def refresh_segment_metrics(tenants):
+    """Recompute the metrics of the spend-defined customer segments of ``tenants``."""
+    from apps.marketing.models import CustomerSegment
+
+    segments = CustomerSegment.objects.filter(
+        tenant__in=tenants, criteria__has_any_keys=CustomerSegment.SPEND_CRITERIA
+    ).select_related('tenant')
+    for segment in segments:
+        segment.refresh_spend_metrics()
+
+
+class _PendingClients:
+    def __init__(self):
+        self.client_ids = set()
+
+    def flush(self):
+        if self.client_ids:
+            refresh_spend_summaries(self.client_ids)
+            refresh_segment_metrics(Client.objects.filter(id__in=self.client_ids).values('tenant'))
+
+
+def mark_spend_changed(client_id, using=DEFAULT_DB_ALIAS):
+    """Refresh the client's spend summary once the current transaction commits."""
+    if client_id is None:
+        return
+    # One refresh per transaction however many sales it touched. Refreshing
+    # recomputes from committed rows, so a rolled-back savepoint does no harm.
+    batch = _pending.current(_PendingClients, using=using)
+    if batch is None:
+        batch = _PendingClients()
+        batch.client_ids.add(client_id)
+        batch.flush()
+        return
+    batch.client_ids.add(client_id)
+
+
+def rebuild_spend_summaries(tenant=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute the spend summaries of every client (of ``tenant``), then the
+    spend segments. Returns the number of summaries written.
+    """
+    clients = Client.objects.order_by('id')
+    if tenant is not None:
+        clients = clients.filter(tenant=tenant)
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(clients.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not batch:
+            refresh_segment_metrics(clients.values('tenant'))
+            return written
+        with transaction.atomic():
+            written += refresh_spend_summaries(batch)
+        last_id = batch[-1]
+
+
+def spend_segment(tenant, min_spend=None, max_spend=None, min_orders=None):
+    """Spend summaries of the tenant's clients within a spend band (index lookups)."""
+    condition = Q(tenant=tenant)
+    if min_spend is not None:
+        condition &= Q(total_spend__gte=min_spend)
+    if max_spend is not None:
+        condition &= Q(total_spend__lte=max_spend)
+    if min_orders is not None:
+        condition &= Q(order_count__gte=min_orders)
+    return ClientSpendSummary.objects.filter(condition)
+
+
+def segment_metrics(summaries):
+    """Customer count, revenue and average order value of a summary queryset, in one query."""
+    totals = summaries.aggregate(
+        customer_count=Count('client'),
+        total_revenue=Sum('total_spend'),
+        orders=Sum('order_count'),
+    )
+    revenue = totals['total_revenue'] or Decimal('0')
+    orders = totals['orders'] or 0
+    return {
+        'customer_count': totals['customer_count'],
+        'total_revenue': revenue,
+        'average_order_value': (revenue / orders).quantize(Decimal('0.01')) if orders else Decimal('0'),
+    }
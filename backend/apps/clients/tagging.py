@@ -0,0 +1,379 @@
+"""
+Customer auto-tagging rules.
+
+The rules are declared once as data and evaluated two ways:
+
+* ``get_auto_tag_slugs(client)`` checks one client in Python; the post_save
+  signal uses it together with a cached slug -> tag id map, so tagging a
+  saved client is a single INSERT.
+* ``retag_clients(tenant)`` compiles every rule into SQL predicates and adds
+  the matching tags for a whole tenant in one ``INSERT ... SELECT``.
+
+Revenue tags depend on the client's spend summary rather than on the client
+row, so they are applied when that summary is refreshed
+(``apps.clients.spend``) and by ``retag_clients``, not on client save.
+
+Like the original signal, tagging only ever adds system tags; it never
+removes tags a user or an earlier run assigned. The exception is the
+date-driven event tags (birthday/anniversary week), which
+``refresh_event_tags`` adds and removes every night as the window moves.
+"""
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, CharField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower, Trim
+
+from .models import Client, CustomerTag
+
+# Value-mapping rules: normalised (trimmed, lower-cased) field value -> tag slug
+REASON_FOR_VISIT_TAGS = {
+    'wedding': 'wedding-buyer',
+    'gifting': 'gifting',
+    'self-purchase': 'self-purchase',
+    'repair': 'repair-customer',
+    'browse': 'browsing-prospect',
+}
+LEAD_SOURCE_TAGS = {
+    'instagram': 'social-lead',
+    'facebook': 'facebook-lead',
+    'google': 'google-lead',
+    'referral': 'referral',
+    'walk-in': 'walk-in',
+    'other': 'other-source',
+}
+STATUS_TAGS = {
+    'customer': 'converted-customer',
+    'prospect': 'interested-lead',
+    'inactive': 'not-interested',
+}
+COMMUNITY_TAGS = {
+    'hindu': 'hindu',
+    'muslim': 'muslim',
+    'jain': 'jain',
+    'parsi': 'parsi',
+    'buddhist': 'buddhist',
+    'cross community': 'cross-community',
+}
+MAPPED_FIELDS = [
+    ('reason_for_visit', REASON_FOR_VISIT_TAGS),
+    ('lead_source', LEAD_SOURCE_TAGS),
+    ('status', STATUS_TAGS),
+    ('community', COMMUNITY_TAGS),
+]
+
+# Product interest: customer_interests[*].mainCategory (or a plain string)
+INTEREST_TAGS = {
+    'diamond': 'diamond-interested',
+    'gold': 'gold-interested',
+    'polki': 'polki-interested',
+}
+MIXED_INTEREST_TAG = 'mixed-buyer'
+
+# Age bands as (min_age, max_age, slug); max_age None means no upper bound.
+AGE_BAND_TAGS = [
+    (18, 25, 'young-adult'),
+    (26, 35, 'millennial-shopper'),
+    (36, 45, 'middle-age-shopper'),
+    (47, None, 'senior-shopper'),
+]
+
+FOLLOW_UP_TAG = 'needs-follow-up'
+
+# Lifetime spend bands as (exclusive lower bound, slug), highest first; the
+# spend comes from ClientSpendSummary (see apps.clients.spend).
+REVENUE_TAGS = [
+    (Decimal('100000'), 'high-value'),
+    (Decimal('30000'), 'mid-value'),
+]
+
+# Event tags: date field -> tag slug, applied while the month/day of the date
+# falls within the next EVENT_WINDOW_DAYS days (today included).
+EVENT_TAGS = {
+    'date_of_birth': 'birthday-week',
+    'anniversary_date': 'anniversary-week',
+}
+EVENT_WINDOW_DAYS = 7
+
+# How long a process trusts its slug -> id map before reloading it.
+TAG_ID_CACHE_TTL = 300
+
+_tag_id_cache = {'ids': None, 'loaded_at': 0.0}
+_tag_id_lock = threading.Lock()
+
+
+def get_tag_ids():
+    """Return the cached ``{slug: id}`` map of customer tags."""
+    with _tag_id_lock:
+        if _tag_id_cache['ids'] is None or time.monotonic() - _tag_id_cache['loaded_at'] > TAG_ID_CACHE_TTL:
+            _tag_id_cache['ids'] = dict(CustomerTag.objects.values_list('slug', 'id'))
+            _tag_id_cache['loaded_at'] = time.monotonic()
+        return _tag_id_cache['ids']
+
+
+def clear_tag_id_cache():
+    with _tag_id_lock:
+        _tag_id_cache['ids'] = None
+
+
+def _normalise(value):
+    return str(value).strip().lower() if value else ''
+
+
+def _age_on(born, today):
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def _years_before(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        # 29 February in a non-leap year
+        return today.replace(year=today.year - years, day=28)
+
+
+def event_window(today, days=EVENT_WINDOW_DAYS):
+    """
+    Return the ``(month, day)`` pairs of the ``days`` days starting today.
+    In non-leap years 29 February is folded into the window with 28 February.
+    """
+    pairs = set()
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        pairs.add((day.month, day.day))
+    if (2, 28) in pairs and not _is_leap(today.year):
+        pairs.add((2, 29))
+    return pairs
+
+
+def _is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def get_auto_tag_slugs(instance, today=None):
+    """Return the slugs of the system tags that apply to a client."""
+    today = today or date.today()
+    tags_to_add = set()
+
+    for field, mapping in MAPPED_FIELDS:
+        slug = mapping.get(_normalise(getattr(instance, field)))
+        if slug:
+            tags_to_add.add(slug)
+
+    interests = instance.customer_interests
+    if interests and isinstance(interests, list):
+        for interest in interests:
+            category = None
+            if isinstance(interest, dict):
+                category = _normalise(interest.get('mainCategory'))
+            elif isinstance(interest, str):
+                category = _normalise(interest)
+            slug = INTEREST_TAGS.get(category)
+            if slug:
+                tags_to_add.add(slug)
+        if len(interests) > 1:
+            tags_to_add.add(MIXED_INTEREST_TAG)
+
+    if instance.date_of_birth:
+        age = _age_on(instance.date_of_birth, today)
+        for min_age, max_age, slug in AGE_BAND_TAGS:
+            if age >= min_age and (max_age is None or age <= max_age):
+                tags_to_add.add(slug)
+                break
+
+    if instance.next_follow_up:
+        tags_to_add.add(FOLLOW_UP_TAG)
+
+    # Event tags are kept current by refresh_event_tags; tagging on save just
+    # means a client added mid-week does not wait for the nightly run.
+    window = event_window(today)
+    for field, slug in EVENT_TAGS.items():
+        value = getattr(instance, field)
+        if value and (value.month, value.day) in window:
+            tags_to_add.add(slug)
+
+    return tags_to_add
+
+
+def revenue_tag_slug(total_spend):
+    """Slug of the spend band ``total_spend`` falls in, or None."""
+    for threshold, slug in REVENUE_TAGS:
+        if total_spend and total_spend > threshold:
+            return slug
+    return None
+
+
+def apply_auto_tags(instance, today=None):
+    """Add the system tags for one saved client with a single INSERT."""
+    tag_ids = get_tag_ids()
+    through = Client.tags.through
+    links = [
+        through(client_id=instance.pk, customertag_id=tag_ids[slug])
+        for slug in get_auto_tag_slugs(instance, today=today)
+        if slug in tag_ids
+    ]
+    if links:
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+# --- SQL compilation -------------------------------------------------------
+
+def _interest_sql():
+    """
+    SQL that yields the normalised category of each element of
+    ``customer_interests``, matching ``get_auto_tag_slugs``.
+    """
+    column = f'"{Client._meta.db_table}"."customer_interests"'
+    elements = (
+        f"jsonb_array_elements(CASE WHEN jsonb_typeof({column}) = 'array' "
+        f"THEN {column} ELSE '[]'::jsonb END) AS interest"
+    )
+    category = (
+        "lower(trim(CASE jsonb_typeof(interest) "
+        "WHEN 'object' THEN interest->>'mainCategory' "
+        "WHEN 'string' THEN interest #>> '{}' END))"
+    )
+    return column, elements, category
+
+
+def _tag_slug_querysets(queryset, today):
+    """Yield ``values('id', 'tag_slug')`` querysets, one per rule group."""
+    queryset = queryset.order_by()
+
+    for field, mapping in MAPPED_FIELDS:
+        normalised = f'{field}_normalised'
+        yield queryset.annotate(**{
+            normalised: Lower(Trim(field)),
+            'tag_slug': Case(
+                *[When(**{normalised: value}, then=Value(slug)) for value, slug in mapping.items()],
+                default=None,
+                output_field=CharField(),
+            ),
+        }).filter(**{f'{normalised}__in': list(mapping)}).values('id', 'tag_slug')
+
+    column, elements, category = _interest_sql()
+    for value, slug in INTEREST_TAGS.items():
+        yield queryset.annotate(
+            has_interest=RawSQL(
+                f'EXISTS (SELECT 1 FROM {elements} WHERE {category} = %s)',
+                (value,),
+                output_field=BooleanField(),
+            ),
+            tag_slug=Value(slug, output_field=CharField()),
+        ).filter(has_interest=True).values('id', 'tag_slug')
+    yield queryset.annotate(
+        mixed_interest=RawSQL(
+            f"CASE WHEN jsonb_typeof({column}) = 'array' THEN jsonb_array_length({column}) > 1 ELSE false END",
+            (),
+            output_field=BooleanField(),
+        ),
+        tag_slug=Value(MIXED_INTEREST_TAG, output_field=CharField()),
+    ).filter(mixed_interest=True).values('id', 'tag_slug')
+
+    bands = []
+    for min_age, max_age, slug in AGE_BAND_TAGS:
+        condition = Q(date_of_birth__lte=_years_before(today, min_age))
+        if max_age is not None:
+            condition &= Q(date_of_birth__gt=_years_before(today, max_age + 1))
+        bands.append(When(condition, then=Value(slug)))
+    yield queryset.filter(date_of_birth__isnull=False).annotate(
+        tag_slug=Case(*bands, default=None, output_field=CharField()),
+    ).filter(tag_slug__isnull=False).values('id', 'tag_slug')
+
+    yield queryset.filter(next_follow_up__isnull=False).exclude(next_follow_up='').annotate(
+        tag_slug=Value(FOLLOW_UP_TAG, output_field=CharField()),
+    ).values('id', 'tag_slug')
+
+    lowest, _slug = REVENUE_TAGS[-1]
+    yield queryset.filter(spend_summary__total_spend__gt=lowest).annotate(
+        tag_slug=Case(
+            *[When(spend_summary__total_spend__gt=threshold, then=Value(slug)) for threshold, slug in REVENUE_TAGS],
+            default=None,
+            output_field=CharField(),
+        ),
+    ).values('id', 'tag_slug')
+
+
+def retag_clients(tenant=None, queryset=None, today=None):
+    """
+    Add the system tags for every client of ``tenant`` (or of ``queryset``)
+    in one set-based statement. Returns the number of tag links added.
+    """
+    today = today or date.today()
+    if queryset is None:
+        queryset = Client.objects.all()
+        if tenant is not None:
+            queryset = queryset.filter(tenant=tenant)
+
+    first, *rest = _tag_slug_querysets(queryset, today)
+    select_sql, params = first.union(*rest, all=True).query.sql_with_params()
+
+    through = Client.tags.through._meta.db_table
+    tags = CustomerTag._meta.db_table
+    sql = (
+        f'INSERT INTO "{through}" (client_id, customertag_id) '
+        f'SELECT matched.client_id, tag.id FROM ({select_sql}) AS matched (client_id, tag_slug) '
+        f'INNER JOIN "{tags}" AS tag ON tag.slug = matched.tag_slug '
+        f'ON CONFLICT DO NOTHING'
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _event_window_q(field, window):
+    months = {}
+    for month, day in window:
+        months.setdefault(month, []).append(day)
+    condition = Q()
+    for month, days in months.items():
+        condition |= Q(**{f'{field}__month': month, f'{field}__day__in': sorted(days)})
+    return condition
+
+
+def refresh_event_tags(tenant, today=None, days=EVENT_WINDOW_DAYS):
+    """
+    Bring the event tags of one tenant in line with today's window: clients
+    whose birthday or anniversary is coming up get the tag, everyone else
+    loses it. The candidates come from one query on the month/day indexes.
+    Returns ``{slug: {'added': n, 'removed': n}}``.
+    """
+    today = today or date.today()
+    window = event_window(today, days)
+    tag_ids = get_tag_ids()
+
+    candidates = Q()
+    for field in EVENT_TAGS:
+        candidates |= _event_window_q(field, window)
+    matches = {slug: set() for slug in EVENT_TAGS.values()}
+    rows = Client.objects.filter(candidates, tenant=tenant).order_by().values_list('id', *EVENT_TAGS)
+    for client_id, *values in rows:
+        for value, slug in zip(values, EVENT_TAGS.values()):
+            if value and (value.month, value.day) in window:
+                matches[slug].add(client_id)
+
+    through = Client.tags.through
+    summary = {}
+    with transaction.atomic():
+        for slug, client_ids in matches.items():
+            tag_id = tag_ids.get(slug)
+            if tag_id is None:
+                continue
+            tagged = set(
+                through.objects.filter(customertag_id=tag_id, client__tenant=tenant)
+                .values_list('client_id', flat=True)
+            )
+            stale = tagged - client_ids
+            new = client_ids - tagged
+            if stale:
+                through.objects.filter(customertag_id=tag_id, client_id__in=stale).delete()
+            through.objects.bulk_create(
+                [through(client_id=client_id, customertag_id=tag_id) for client_id in new],
+                ignore_conflicts=True,
+            )
+            summary[slug] = {'added': len(new), 'removed': len(stale)}
+    return summary
@@ -1,3 +1,673 @@
+import base64
+import csv
+import io
+import json
+import time as clock
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.sales.models import Sale
+from apps.tenants.models import Tenant
+from apps.users.models import User
+from shared.query_plans import QueryPlanAssertionsMixin
+
+from .exports import CLIENT_EXPORT_FIELDS
+from . import audit
+from .importers import ClientImporter
+from .serializers import ClientSerializer
+from .spend import SUMMARY_FIELDS, _PendingClients, rebuild_spend_summaries
+from .models import Appointment, AuditLog, Client, ClientSpendSummary, CustomerTag, FollowUp, Purchase
+from .tagging import (
+    AGE_BAND_TAGS, COMMUNITY_TAGS, EVENT_TAGS, FOLLOW_UP_TAG, INTEREST_TAGS, LEAD_SOURCE_TAGS, MIXED_INTEREST_TAG,
+    REASON_FOR_VISIT_TAGS, REVENUE_TAGS, STATUS_TAGS, _years_before, apply_auto_tags, clear_tag_id_cache,
+    get_auto_tag_slugs, get_tag_ids, retag_clients,
+)
+
+TENANTS = 20
+CLIENTS_PER_TENANT = 1000
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class ClientQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """The tenant-scoped list queries must stay on their indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tenants = Tenant.objects.bulk_create(
+            Tenant(name=f'Tenant {i}', slug=f'tenant-{i}') for i in range(TENANTS)
+        )
+        cls.tenant = tenants[0]
+        clients = Client.objects.bulk_create(
+            Client(
+                tenant=tenant, email=f'c{i}@t{t}.example.com', first_name=f'Client {i}',
+                is_deleted=i % 10 == 0,
+            )
+            for t, tenant in enumerate(tenants)
+            for i in range(CLIENTS_PER_TENANT)
+        )
+        today = date.today()
+        Appointment.objects.bulk_create(
+            Appointment(
+                client=client, tenant_id=client.tenant_id, purpose='Visit',
+                date=today + timedelta(days=i % 365 - 180), time=time(10 + i % 8),
+                is_deleted=i % 10 == 0,
+            )
+            for i, client in enumerate(clients)
+        )
+        FollowUp.objects.bulk_create(
+            FollowUp(
+                client=client, tenant_id=client.tenant_id, title='Call back', description='-',
+                due_date=today + timedelta(days=i % 365 - 180), is_deleted=i % 10 == 0,
+            )
+            for i, client in enumerate(clients)
+        )
+        cls.analyze(Client, Appointment, FollowUp)
+
+    def test_client_list(self):
+        # ClientViewSet: live clients of the tenant, newest first
+        clients = Client.objects.filter(tenant=self.tenant, is_deleted=False)
+        self.assertUsesIndex(clients[:25], 'client_live_created_idx')
+
+    def test_appointment_date_range(self):
+        # AppointmentViewSet with start_date/end_date
+        today = date.today()
+        appointments = Appointment.objects.filter(
+            tenant=self.tenant, is_deleted=False, date__gte=today, date__lte=today + timedelta(days=7)
+        )
+        self.assertUsesIndex(appointments, 'appt_live_date_idx')
+
+    def test_appointment_status_filter(self):
+        appointments = Appointment.objects.filter(
+            tenant=self.tenant, is_deleted=False, status=Appointment.Status.CONFIRMED,
+            date__gte=date.today(),
+        )
+        self.assertUsesIndex(appointments, 'appt_live_status_date_idx')
+
+    def test_follow_up_list(self):
+        # FollowUpViewSet: live follow-ups of the tenant, latest due first
+        follow_ups = FollowUp.objects.filter(tenant=self.tenant, is_deleted=False)
+        self.assertUsesIndex(follow_ups[:25], 'followup_live_due_idx')
+
+    def test_follow_up_status_filter(self):
+        follow_ups = FollowUp.objects.filter(
+            tenant=self.tenant, is_deleted=False, status=FollowUp.Status.COMPLETED,
+            due_date__lte=date.today(),
+        )
+        self.assertUsesIndex(follow_ups, 'followup_live_status_due_idx')
+
+
+class ClientListPaginationTests(TestCase):
+    """The list is always paginated: page numbers by default, keyset pages with a cursor."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.user = User.objects.create_user(
+            username='manager', password='x', role=User.Role.MANAGER, tenant=self.tenant
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        clients = Client.objects.bulk_create(
+            Client(tenant=self.tenant, email=f'c{i}@example.com', first_name=f'Client {i}') for i in range(7)
+        )
+        # Clients 2 to 5 share a timestamp, so only the id breaks their tie
+        now = timezone.now()
+        for i, client in enumerate(clients):
+            created = now - timedelta(minutes=2 if 2 <= i <= 5 else 10 - i)
+            Client.objects.filter(pk=client.pk).update(created_at=created)
+        self.expected = list(
+            Client.objects.filter(tenant=self.tenant).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def test_first_page_without_pagination_params(self):
+        response = self.api.get('/api/clients/clients/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 7)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(self.ids(response), self.expected)
+
+    def test_page_size_is_capped(self):
+        from .views import ClientPagination
+
+        with mock.patch.object(ClientPagination, 'max_page_size', 4):
+            response = self.api.get('/api/clients/clients/', {'page_size': 1000})
+        self.assertEqual(self.ids(response), self.expected[:4])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_search_and_filters_apply_before_paging(self):
+        Client.objects.filter(pk=self.expected[0]).update(first_name='Asha', status='customer')
+        response = self.api.get('/api/clients/clients/', {'search': 'asha'})
+        self.assertEqual(self.ids(response), self.expected[:1])
+        response = self.api.get('/api/clients/clients/', {'status': 'customer', 'page_size': 1})
+        self.assertEqual((response.data['count'], self.ids(response)), (1, self.expected[:1]))
+
+    def test_page_numbers(self):
+        response = self.api.get('/api/clients/clients/', {'page_size': 3, 'page': 2})
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(self.ids(response), self.expected[3:6])
+
+    def test_cursor_walks_every_client_once_across_ties(self):
+        seen, params = [], {'cursor': '', 'page_size': 2}
+        while True:
+            response = self.api.get('/api/clients/clients/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(self.ids(response))
+            if not response.data['next']:
+                break
+            params = {key: values[0] for key, values in parse_qs(urlsplit(response.data['next']).query).items()}
+        self.assertEqual(seen, self.expected)
+
+    def test_cursor_round_trip(self):
+        from .views import ClientCursorPagination
+
+        paginator = ClientCursorPagination()
+        client = Client.objects.get(pk=self.expected[3])
+        cursor = paginator.encode_cursor(client)
+        request = type('Request', (), {'query_params': {'cursor': cursor}})()
+        self.assertEqual(paginator.decode_cursor(request), (client.created_at, client.pk))
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ['not-base64!', base64.urlsafe_b64encode(b'yesterday|1').decode(),
+                       base64.urlsafe_b64encode(b'2024-01-01T00:00:00|x').decode()]:
+            response = self.api.get('/api/clients/clients/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class ClientExportTests(TestCase):
+    """Streamed exports match the old in-memory ones and load tags per chunk."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.user = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        gold = CustomerTag.objects.create(name='Gold', slug='gold-test')
+        vip = CustomerTag.objects.create(name='VIP', slug='vip-test')
+        for i in range(6):
+            client = Client.objects.create(
+                tenant=self.tenant, email=f'c{i}@example.com', first_name=f'Client {i}',
+                phone=None if i % 2 else f'98765{i:05}', date_of_birth=date(1990, 1, i + 1),
+                notes='Likes "rose" gold, rings',
+            )
+            client.tags.add(gold, *([vip] if i % 3 == 0 else []))
+
+    def old_rows(self, as_json):
+        # The export as built in memory before it was streamed
+        rows = []
+        for client in Client.objects.filter(tenant=self.tenant, is_deleted=False):
+            row = {}
+            for field in CLIENT_EXPORT_FIELDS:
+                if field == 'date_of_birth' and client.date_of_birth:
+                    row[field] = client.date_of_birth.strftime('%Y-%m-%d')
+                elif field == 'anniversary_date' and client.anniversary_date:
+                    row[field] = client.anniversary_date.strftime('%Y-%m-%d')
+                elif field in ['created_at', 'updated_at']:
+                    row[field] = getattr(client, field).strftime('%Y-%m-%d %H:%M:%S')
+                elif field == 'tags':
+                    names = [tag.name for tag in client.tags.all()]
+                    row[field] = names if as_json else ', '.join(names)
+                else:
+                    value = getattr(client, field, '')
+                    if value is None:
+                        value = ''
+                    row[field] = value if as_json else str(value)
+            rows.append(row)
+        return rows
+
+    def export(self, kind):
+        response = self.api.get(f'/api/clients/clients/export/{kind}/')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_matches_the_old_export(self):
+        expected = io.StringIO()
+        writer = csv.DictWriter(expected, fieldnames=CLIENT_EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(self.old_rows(as_json=False))
+        self.assertEqual(self.export('csv'), expected.getvalue())
+
+    def test_json_and_ndjson_match_the_old_export(self):
+        expected = json.loads(json.dumps(self.old_rows(as_json=True), default=str))
+        self.assertEqual(json.loads(self.export('json')), expected)
+        self.assertEqual([json.loads(line) for line in self.export('ndjson').splitlines()], expected)
+
+    def test_queries_per_chunk_not_per_row(self):
+        # One query for the clients, one tag query per chunk of two
+        with mock.patch('apps.clients.exports.EXPORT_CHUNK_SIZE', 2):
+            with self.assertNumQueries(4):
+                self.export('ndjson')
+            Client.objects.create(tenant=self.tenant, email='late@example.com', first_name='Late')
+            with self.assertNumQueries(5):
+                self.export('ndjson')
+
+    def test_query_errors_answer_500(self):
+        def failing_rows(*args, **kwargs):
+            raise RuntimeError('boom')
+            yield
+
+        with mock.patch('apps.clients.views.iter_client_export_rows', failing_rows):
+            response = self.api.get('/api/clients/clients/export/csv/')
+        self.assertEqual(response.status_code, 500)
+
+
+class ClientImporterTests(TestCase):
+    """Batched imports keep the per-row checks and messages of the row-by-row import."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.user = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        CustomerTag.objects.get_or_create(slug='social-lead', defaults={'name': 'Social Lead'})
+        clear_tag_id_cache()
+        self.addCleanup(clear_tag_id_cache)
+
+    def run_import(self, rows, batch_size=500):
+        importer = ClientImporter(tenant=self.tenant, user=self.user)
+        importer.batch_size = batch_size
+        progress = []
+        importer.on_progress = lambda imp: progress.append(imp.rows_processed)
+        imported, errors = importer.run(enumerate(rows, start=2))
+        return imported, errors, progress
+
+    def test_duplicate_emails(self):
+        Client.objects.create(tenant=self.tenant, email='live@example.com', first_name='Live')
+        Client.objects.create(tenant=self.tenant, email='gone@example.com', first_name='Gone', is_deleted=True)
+        Client.objects.create(tenant=self.other_tenant, email='elsewhere@example.com', first_name='Else')
+        rows = [
+            {'email': 'live@example.com', 'first_name': 'A'},
+            {'email': 'gone@example.com', 'first_name': 'B'},
+            {'email': 'elsewhere@example.com', 'first_name': 'C'},
+            {'email': 'new@example.com', 'first_name': 'D'},
+            {'email': 'new@example.com', 'first_name': 'E'},
+        ]
+        imported, errors, _ = self.run_import(rows)
+        self.assertEqual(imported, 2)
+        self.assertEqual(errors, [
+            'Row 2: Customer with email live@example.com already exists',
+            # Soft-deleted rows still hold the (email, tenant) unique key
+            'Row 3: Customer with email gone@example.com already exists',
+            'Row 6: Customer with email new@example.com already exists',
+        ])
+        self.assertEqual(
+            Client.objects.get(tenant=self.tenant, email='new@example.com').first_name, 'D'
+        )
+
+    def test_row_errors_match_the_serializer_errors(self):
+        row = {'email': 'nameless@example.com', 'first_name': '', 'last_name': ''}
+        imported, errors, _ = self.run_import([{'first_name': 'No email'}, row])
+
+        serializer = ClientSerializer(data={
+            'email': row['email'], 'first_name': '', 'last_name': '',
+            'customer_type': 'individual', 'status': 'lead',
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(imported, 0)
+        self.assertEqual(errors, ['Row 2: Email is required', f'Row 3: {serializer.errors}'])
+        self.assertEqual(
+            errors[1], "Row 3: {'name': [ErrorDetail(string='Name is required', code='invalid')]}"
+        )
+
+    def test_tags_and_audit_entries_for_bulk_rows(self):
+        self.run_import([
+            {'email': 'insta@example.com', 'first_name': 'Insta', 'lead_source': 'Instagram '},
+            {'email': 'plain@example.com', 'first_name': 'Plain'},
+        ])
+        insta = Client.objects.get(email='insta@example.com')
+        self.assertEqual(list(insta.tags.values_list('slug', flat=True)), ['social-lead'])
+        self.assertFalse(Client.objects.get(email='plain@example.com').tags.exists())
+        self.assertEqual(AuditLog.objects.filter(client=insta, action='create', user=self.user).count(), 1)
+
+    def test_batch_boundaries(self):
+        rows = [{'email': f'c{i}@example.com', 'first_name': f'C{i}'} for i in range(5)]
+        rows.insert(2, {'email': 'c0@example.com', 'first_name': 'Again'})
+        with self.assertNumQueries(2 + 3 * 4):
+            # Existing emails and the tag map once, then per batch of two:
+            # savepoint, clients, audit entries, release (no tags apply)
+            imported, errors, progress = self.run_import(rows, batch_size=2)
+        self.assertEqual(imported, 5)
+        self.assertEqual(errors, ['Row 4: Customer with email c0@example.com already exists'])
+        self.assertEqual(progress, [2, 4, 6, 6])
+        self.assertEqual(Client.objects.filter(tenant=self.tenant).count(), 5)
+
+
+class AutoTagParityTests(TestCase):
+    """The SQL rule compiler and the per-client Python rules must tag alike."""
+
+    today = date(2025, 6, 15)
+
+    def setUp(self):
+        slugs = {
+            *REASON_FOR_VISIT_TAGS.values(), *LEAD_SOURCE_TAGS.values(), *STATUS_TAGS.values(),
+            *COMMUNITY_TAGS.values(), *INTEREST_TAGS.values(), MIXED_INTEREST_TAG, FOLLOW_UP_TAG,
+            *(slug for _, _, slug in AGE_BAND_TAGS),
+        }
+        CustomerTag.objects.bulk_create(CustomerTag(name=slug, slug=slug) for slug in sorted(slugs))
+        clear_tag_id_cache()
+        self.addCleanup(clear_tag_id_cache)
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+
+    def born(self, age, days=0):
+        return _years_before(self.today, age) + timedelta(days=days)
+
+    def make_clients(self):
+        variants = []
+        for mapping, field in [
+            (REASON_FOR_VISIT_TAGS, 'reason_for_visit'), (LEAD_SOURCE_TAGS, 'lead_source'),
+            (STATUS_TAGS, 'status'), (COMMUNITY_TAGS, 'community'),
+        ]:
+            for value in mapping:
+                variants.append({field: f'  {value.upper()} '})
+            variants.append({field: 'something else'})
+        variants += [
+            {'customer_interests': [{'mainCategory': ' Diamond'}]},
+            {'customer_interests': ['gold', {'mainCategory': 'POLKI'}]},
+            {'customer_interests': ['silver']},
+            {'customer_interests': [{'other': 'gold'}, 'platinum']},
+            {'customer_interests': {'mainCategory': 'gold'}},
+            {'customer_interests': []},
+            {'next_follow_up': '2025-07-01'},
+            {'next_follow_up': ''},
+        ]
+        # Both sides of every age band edge, including the 46-year gap
+        for age in [17, 18, 25, 26, 35, 36, 45, 46, 47, 90]:
+            variants += [{'date_of_birth': self.born(age)}, {'date_of_birth': self.born(age, days=1)}]
+        return Client.objects.bulk_create(
+            Client(tenant=self.tenant, email=f'c{i}@example.com', first_name=f'C{i}', **fields)
+            for i, fields in enumerate(variants)
+        )
+
+    def test_sql_and_python_rules_agree(self):
+        clients = self.make_clients()
+        retag_clients(tenant=self.tenant, today=self.today)
+
+        revenue = {slug for _, slug in REVENUE_TAGS}
+        events = set(EVENT_TAGS.values())
+        for client in Client.objects.filter(tenant=self.tenant).prefetch_related('tags'):
+            sql_tags = {tag.slug for tag in client.tags.all()} - revenue
+            python_tags = get_auto_tag_slugs(client, today=self.today) - events
+            self.assertEqual(sql_tags, python_tags, client.email)
+        self.assertTrue(any(client.tags.exists() for client in clients))
+
+    def test_age_band_edges(self):
+        def age_tags(age, days=0):
+            client = Client(date_of_birth=self.born(age, days))
+            return get_auto_tag_slugs(client, today=self.today) & {slug for _, _, slug in AGE_BAND_TAGS}
+
+        self.assertEqual(age_tags(45), {'middle-age-shopper'})
+        # Turns 46 tomorrow: still 45
+        self.assertEqual(age_tags(46, days=1), {'middle-age-shopper'})
+        self.assertEqual(age_tags(46), set())
+        self.assertEqual(age_tags(47, days=1), set())
+        self.assertEqual(age_tags(47), {'senior-shopper'})
+        self.assertEqual(age_tags(18, days=1), set())
+
+    def test_tag_id_cache(self):
+        ids = get_tag_ids()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_tag_ids(), ids)
+        # Saving a tag drops the map, so the next client sees the new tag
+        CustomerTag.objects.create(name='New', slug='new-tag')
+        with self.assertNumQueries(1):
+            self.assertIn('new-tag', get_tag_ids())
+
+        client = Client.objects.create(tenant=self.tenant, email='x@example.com', lead_source='Instagram')
+        client.tags.clear()
+        with self.assertNumQueries(1):
+            apply_auto_tags(client, today=self.today)
+        self.assertEqual(list(client.tags.values_list('slug', flat=True)), ['social-lead'])
+
+    def test_retags_a_large_tenant_quickly(self):
+        count = 100000
+        Client.objects.bulk_create(
+            (
+                Client(
+                    tenant=self.tenant, email=f'bulk{i}@example.com', lead_source='instagram',
+                    status='customer' if i % 2 else 'lead', date_of_birth=self.born(20 + i % 40),
+                    customer_interests=['gold', 'diamond'] if i % 3 == 0 else [],
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+        started = clock.monotonic()
+        added = retag_clients(tenant=self.tenant, today=self.today)
+        self.assertLess(clock.monotonic() - started, 30)
+        self.assertGreater(added, count)
+
+
+class ClientAuditLogTests(TestCase):
+    """Saves are diffed against the loaded state and logged once per commit."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_record = Client.objects.create(tenant=self.tenant, email='a@example.com', first_name='Ada')
+
+    def save(self, client):
+        with self.captureOnCommitCallbacks(execute=True):
+            client.save()
+
+    def updates(self):
+        return list(AuditLog.objects.filter(client=self.client_record, action='update').order_by('id'))
+
+    def test_update_stores_only_changed_fields(self):
+        client = Client.objects.get(pk=self.client_record.pk)
+        client.first_name = 'Grace'
+        client.city = 'Pune'
+        self.save(client)
+        self.save(client)
+
+        [entry] = self.updates()
+        self.assertEqual(entry.before, {'first_name': 'Ada', 'city': None})
+        self.assertEqual(entry.after, {'first_name': 'Grace', 'city': 'Pune'})
+
+        # The next save is diffed against what was just written
+        client.first_name = 'Hopper'
+        self.save(client)
+        self.assertEqual(self.updates()[-1].before, {'first_name': 'Grace'})
+
+    def test_refresh_from_db_resets_the_baseline(self):
+        client = Client.objects.get(pk=self.client_record.pk)
+        Client.objects.filter(pk=client.pk).update(first_name='Grace')
+        client.refresh_from_db(fields=['first_name'])
+        self.save(client)
+        self.assertEqual(self.updates(), [])
+
+        client.first_name = 'Hopper'
+        self.save(client)
+        self.assertEqual(self.updates()[0].before, {'first_name': 'Grace'})
+
+    def test_entries_are_written_on_commit_in_one_batch(self):
+        client = Client.objects.get(pk=self.client_record.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for city in ('Pune', 'Surat', 'Agra'):
+                client.city = city
+                client.save()
+            self.assertEqual(self.updates(), [])
+        flushes = [c for c in callbacks if isinstance(getattr(c, 'batch', None), audit._AuditBatch)]
+        self.assertEqual(len(flushes), 1)
+        self.assertEqual([entry.after for entry in self.updates()], [{'city': c} for c in ('Pune', 'Surat', 'Agra')])
+
+    def test_rolled_back_savepoint_writes_nothing(self):
+        client = Client.objects.get(pk=self.client_record.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    client.first_name = 'Rolled back'
+                    client.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            client.refresh_from_db()
+            client.city = 'Pune'
+            client.save()
+            # The rolled-back savepoint's batch was dropped when this one opened
+            self.assertEqual(len(audit._batches.open_batches(connection.alias)), 1)
+
+        [entry] = self.updates()
+        self.assertEqual(entry.after, {'city': 'Pune'})
+        self.assertEqual(audit._batches.open_batches(connection.alias), [])
+
+    def test_rolled_back_batches_are_forgotten(self):
+        client = Client.objects.get(pk=self.client_record.pk)
+        for i in range(5):
+            try:
+                with transaction.atomic():
+                    client.city = f'City {i}'
+                    client.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertLessEqual(len(audit._batches.open_batches(connection.alias)), 1)
+        self.assertEqual(self.updates(), [])
+
+
+class ClientSpendSummaryTests(TestCase):
+    """Summaries follow sales and purchases on commit and match a full rebuild."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.rep = User.objects.create_user(
+            username='rep', password='x', role=User.Role.INHOUSE_SALES, tenant=self.tenant
+        )
+        for slug in ('mid-value', 'high-value'):
+            CustomerTag.objects.create(name=slug, slug=slug)
+        clear_tag_id_cache()
+        self.addCleanup(clear_tag_id_cache)
+        self.ada, self.bob = (
+            Client.objects.create(tenant=self.tenant, email=f'{name}@example.com', first_name=name)
+            for name in ('ada', 'bob')
+        )
+        self.orders = 0
+
+    def sell(self, client, amount, status=Sale.Status.CONFIRMED):
+        self.orders += 1
+        return Sale.objects.create(
+            order_number=f'ORD-{self.orders}', client=client, sales_representative=self.rep, tenant=self.tenant,
+            status=status, subtotal=amount, total_amount=amount,
+        )
+
+    def summary(self, client):
+        return ClientSpendSummary.objects.filter(client=client).values_list('total_spend', 'order_count').first()
+
+    def tags(self, client):
+        return set(client.tags.filter(slug__in=['mid-value', 'high-value']).values_list('slug', flat=True))
+
+    def test_sales_and_purchases_update_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = self.sell(self.ada, Decimal('20000'))
+            self.sell(self.ada, Decimal('5000'), status=Sale.Status.PENDING)
+            Purchase.objects.create(client=self.ada, product_name='Ring', amount=Decimal('1000'),
+                                    purchase_date=date(2024, 5, 1))
+            # Nothing is written before the transaction commits
+            self.assertIsNone(self.summary(self.ada))
+        self.assertEqual(self.summary(self.ada), (Decimal('21000'), 2))
+        stored = ClientSpendSummary.objects.get(client=self.ada)
+        self.assertEqual(stored.average_order_value, Decimal('10500.00'))
+        self.assertEqual(stored.first_purchase_date, date(2024, 5, 1))
+        self.assertEqual(stored.last_purchase_date, timezone.localdate())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.total_amount = Decimal('40000')
+            sale.save()
+        self.assertEqual(self.summary(self.ada), (Decimal('41000'), 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.delete()
+        self.assertEqual(self.summary(self.ada), (Decimal('1000'), 1))
+
+    def test_one_refresh_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            for _ in range(3):
+                self.sell(self.ada, Decimal('100'))
+            self.sell(self.bob, Decimal('100'))
+        [refresh] = [c.batch for c in callbacks if isinstance(getattr(c, 'batch', None), _PendingClients)]
+        self.assertEqual(refresh.client_ids, {self.ada.pk, self.bob.pk})
+
+    def test_moving_a_sale_refreshes_both_clients(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = self.sell(self.ada, Decimal('50000'))
+            self.sell(self.bob, Decimal('100'))
+        sale = Sale.objects.get(pk=sale.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.client = self.bob
+            sale.save()
+        self.assertEqual(self.summary(self.ada), (Decimal('0'), 0))
+        self.assertEqual(self.summary(self.bob), (Decimal('50100'), 2))
+
+    def test_revenue_tags_follow_the_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(self.ada, Decimal('30000'))
+        self.assertEqual(self.tags(self.ada), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(self.ada, Decimal('1'))
+        self.assertEqual(self.tags(self.ada), {'mid-value'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(self.ada, Decimal('80000'))
+        self.assertEqual(self.tags(self.ada), {'mid-value', 'high-value'})
+
+    def test_rebuild_matches_the_incremental_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, client in enumerate([self.ada, self.bob] * 3):
+                self.sell(client, Decimal(1000 * (i + 1)), status=[Sale.Status.CONFIRMED, Sale.Status.DELIVERED][i % 2])
+            Purchase.objects.create(client=self.bob, product_name='Chain', amount=Decimal('250.50'),
+                                    purchase_date=date(2023, 1, 2))
+        fields = ['client_id', *SUMMARY_FIELDS[:-1]]
+        incremental = list(ClientSpendSummary.objects.order_by('client_id').values(*fields))
+
+        # Rows written behind the signals' back are picked up by a rebuild
+        Sale.objects.bulk_create([
+            Sale(order_number='BULK-1', client=self.ada, sales_representative=self.rep, tenant=self.tenant,
+                 status=Sale.Status.CONFIRMED, subtotal=7, total_amount=7),
+        ])
+        ClientSpendSummary.objects.all().delete()
+        call_command('rebuild_spend_summaries', '--tenant', 'tenant', stdout=io.StringIO())
+        rebuilt = list(ClientSpendSummary.objects.order_by('client_id').values(*fields))
+        self.assertEqual(rebuilt[1], incremental[1])
+        self.assertEqual(rebuilt[0]['total_spend'], incremental[0]['total_spend'] + 7)
+
+        Sale.objects.filter(order_number='BULK-1').delete()
+        self.assertEqual(rebuild_spend_summaries(self.tenant, batch_size=1), 2)
+        self.assertEqual(list(ClientSpendSummary.objects.order_by('client_id').values(*fields)), incremental)
+
+    def test_spend_segments_follow_the_summaries(self):
+        from apps.marketing.models import CustomerSegment
+
+        big_spenders = CustomerSegment.objects.create(
+            name='Big spenders', criteria={'min_total_spend': 10000}, created_by=self.rep, tenant=self.tenant,
+        )
+        by_city = CustomerSegment.objects.create(
+            name='Pune', criteria={'city': 'Pune'}, created_by=self.rep, tenant=self.tenant,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(self.ada, Decimal('20000'))
+            self.sell(self.ada, Decimal('10000'))
+            self.sell(self.bob, Decimal('500'))
+        big_spenders.refresh_from_db()
+        self.assertEqual(
+            (big_spenders.customer_count, big_spenders.total_revenue, big_spenders.average_order_value),
+            (1, Decimal('30000.00'), Decimal('15000.00')),
+        )
+        # Segments that do not select on spend are left alone
+        by_city.refresh_from_db()
+        self.assertEqual((by_city.customer_count, by_city.total_revenue), (0, Decimal('0')))
 
-# Create your tests here.
+        CustomerSegment.objects.filter(pk=big_spenders.pk).update(customer_count=0, total_revenue=0)
+        rebuild_spend_summaries(self.tenant)
+        big_spenders.refresh_from_db()
+        self.assertEqual((big_spenders.customer_count, big_spenders.total_revenue), (1, Decimal('30000.00')))
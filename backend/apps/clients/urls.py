@@ -20,6 +20,7 @@ urlpatterns = [
     # Import/Export URLs
     path('clients/export/csv/', ClientViewSet.as_view({'get': 'export_csv'}), name='client-export-csv'),
     path('clients/export/json/', ClientViewSet.as_view({'get': 'export_json'}), name='client-export-json'),
+    path('clients/export/ndjson/', ClientViewSet.as_view({'get': 'export_ndjson'}), name='client-export-ndjson'),
     # path('clients/export/xlsx/', ClientViewSet.as_view({'get': 'export_xlsx'}), name='client-export-xlsx'),
     path('clients/import/csv/', ClientViewSet.as_view({'post': 'import_csv'}), name='client-import-csv'),
     path('clients/import/json/', ClientViewSet.as_view({'post': 'import_json'}), name='client-import-json'),
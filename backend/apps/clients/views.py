@@ -15,15 +15,22 @@ from apps.users.permissions import IsRoleAllowed
 from rest_framework import mixins
 from rest_framework import permissions
 import csv
-import io
-import json
+import logging
 from datetime import datetime
 from django.http import HttpResponse
 from django.db import transaction
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.pagination import PageNumberPagination
+from shared.pagination import KeysetPagination
+from .importers import ClientImporter, ImportFormatError, iter_csv_rows, iter_json_rows
+from .exports import CLIENT_EXPORT_FIELDS, iter_client_export_rows
+from shared.exports import iter_csv, iter_json_array, iter_ndjson, open_rows, streaming_export_response
+from shared.logs import lazy, safe_headers
 # import openpyxl
 # from openpyxl import Workbook
 
+logger = logging.getLogger(__name__)
+
 
 class IsAdminOrManager(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -36,10 +43,24 @@ class ImportExportPermission(permissions.BasePermission):
             return False
         return request.user.role in ['business_admin', 'manager']
 
+
+class ClientPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ClientCursorPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+
+
 class ClientViewSet(viewsets.ModelViewSet):
     serializer_class = ClientSerializer
     permission_classes = [IsRoleAllowed.for_roles(['inhouse_sales','manager','business_admin'])]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    filterset_fields = ['status', 'assigned_to']
+    search_fields = ['first_name', 'last_name', 'email', 'phone']
     
     def get_queryset(self):
         """Filter clients by tenant for authenticated users and exclude soft-deleted clients"""
@@ -66,53 +87,42 @@ class ClientViewSet(viewsets.ModelViewSet):
         return queryset
     
     def create(self, request, *args, **kwargs):
-        print("=== DJANGO VIEW - CREATE METHOD START ===")
-        print(f"Request method: {request.method}")
-        print(f"Request URL: {request.path}")
-        print(f"Request headers: {dict(request.headers)}")
-        print(f"Request data: {request.data}")
-        print(f"Request user: {request.user}")
-        print(f"Request authenticated: {request.user.is_authenticated}")
-        
+        logger.debug(
+            'Client create: path=%s user=%s headers=%s data=%s',
+            request.path, request.user, lazy(safe_headers, request), request.data,
+        )
+
         try:
-            # Validate the data first
+            # Validate once; CreateModelMixin.create would run the validators again
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
-                print("=== SERIALIZER VALIDATION FAILED ===")
-                print(f"Validation errors: {serializer.errors}")
+                logger.debug('Client create validation failed: %s', serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            response = super().create(request, *args, **kwargs)
-            print("=== DJANGO VIEW - CREATE SUCCESS ===")
-            print(f"Response status: {response.status_code}")
-            print(f"Response data: {response.data}")
-            
+
+            self.perform_create(serializer)
+            response = Response(
+                serializer.data, status=status.HTTP_201_CREATED,
+                headers=self.get_success_headers(serializer.data),
+            )
+            logger.debug('Client created: %s', response.data)
+
             # Create appointment if follow-up date is provided
             if response.status_code == 201 and response.data:
                 client_data = response.data
                 next_follow_up = request.data.get('next_follow_up')
-                
-                print(f"=== APPOINTMENT CREATION DEBUG ===")
-                print(f"Client data: {client_data}")
-                print(f"Next follow up: {next_follow_up}")
-                print(f"User tenant: {request.user.tenant}")
-                print(f"User: {request.user}")
-                
+
                 if next_follow_up:
                     try:
                         from datetime import datetime
                         from .models import Appointment
-                        
+
                         # Parse the follow-up date
                         follow_up_date = datetime.strptime(next_follow_up, '%Y-%m-%d').date()
-                        
+
                         # Get custom time or use default
                         next_follow_up_time = request.data.get('next_follow_up_time', '10:00')
                         follow_up_time = datetime.strptime(next_follow_up_time, '%H:%M').time()
-                        
-                        print(f"Parsed date: {follow_up_date}")
-                        print(f"Parsed time: {follow_up_time}")
-                        
+
                         # Create appointment for the follow-up
                         appointment_data = {
                             'client_id': client_data['id'],
@@ -127,38 +137,20 @@ class ClientViewSet(viewsets.ModelViewSet):
                             'duration': 60,  # Default 1 hour
                             'requires_follow_up': False,  # This is the follow-up itself
                         }
-                        
-                        print(f"=== APPOINTMENT DATA ===")
-                        print(f"Appointment data: {appointment_data}")
-                        
+
                         appointment = Appointment.objects.create(**appointment_data)
-                        
-                        print(f"=== APPOINTMENT CREATED SUCCESSFULLY ===")
-                        print(f"Appointment ID: {appointment.id}")
-                        print(f"Date: {appointment.date}")
-                        print(f"Time: {appointment.time}")
-                        print(f"Client: {appointment.client}")
-                        print(f"Tenant: {appointment.tenant}")
-                        print(f"Status: {appointment.status}")
-                        
-                    except Exception as appointment_error:
-                        print(f"=== APPOINTMENT CREATION ERROR ===")
-                        print(f"Error creating appointment: {appointment_error}")
-                        print(f"Error type: {type(appointment_error)}")
-                        import traceback
-                        print(f"Traceback: {traceback.format_exc()}")
+                        logger.debug(
+                            'Follow-up appointment %s created for client %s on %s %s',
+                            appointment.id, client_data['id'], appointment.date, appointment.time,
+                        )
+
+                    except Exception:
                         # Don't fail the customer creation if appointment creation fails
-                        pass
-                else:
-                    print("No follow-up date provided, skipping appointment creation")
-            
+                        logger.exception('Could not create the follow-up appointment for client %s', client_data.get('id'))
+
             return response
         except Exception as e:
-            print("=== DJANGO VIEW - CREATE ERROR ===")
-            print(f"Error in view: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception('Client create failed')
             return Response(
                 {"error": str(e), "detail": "Internal server error"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -167,60 +159,44 @@ class ClientViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def test(self, request):
         """Test endpoint to check if the API is working"""
-        print("=== TEST ENDPOINT CALLED ===")
-        print(f"Request data: {request.data}")
+        logger.debug('Client test endpoint: data=%s', request.data)
         return Response({"message": "Test endpoint working", "data": request.data})
     
+    @property
+    def paginator(self):
+        """Page numbers by default (50 a page, at most 200), keyset pages with ``?cursor=``"""
+        if not hasattr(self, '_paginator'):
+            if ClientCursorPagination.cursor_query_param in self.request.query_params:
+                self._paginator = ClientCursorPagination()
+            else:
+                self._paginator = ClientPagination()
+        return self._paginator
+
     def list(self, request, *args, **kwargs):
-        """List clients with debugging"""
-        print("=== DJANGO VIEW - LIST METHOD START ===")
-        print(f"Request user: {request.user}")
-        print(f"Request authenticated: {request.user.is_authenticated}")
-        if request.user.is_authenticated:
-            print(f"User tenant: {request.user.tenant}")
-        
-        queryset = self.get_queryset()
-        print(f"Queryset count: {queryset.count()}")
-        print(f"Queryset SQL: {queryset.query}")
-        
-        serializer = self.get_serializer(queryset, many=True)
-        response_data = serializer.data
-        print(f"Response data count: {len(response_data)}")
-        
-        response = Response(response_data)
-        print("=== DJANGO VIEW - LIST METHOD END ===")
-        return response
+        """List one page of clients with tags and assignee loaded in one query each"""
+        queryset = self.filter_queryset(self.get_queryset().order_by('-created_at', '-id'))
+        queryset = queryset.select_related('assigned_to').prefetch_related('tags')
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def perform_update(self, serializer):
-        print(f"=== CLIENT VIEW PERFORM UPDATE ===")
-        print(f"Request data: {self.request.data}")
-        print(f"Request method: {self.request.method}")
-        print(f"Request user: {self.request.user}")
-        print(f"Request content type: {self.request.content_type}")
-        print(f"Request headers: {dict(self.request.headers)}")
-        
-        instance = self.get_object()
-        instance._auditlog_user = self.request.user
-        result = serializer.save()
-        print(f"=== UPDATE COMPLETED ===")
-        return result
+        serializer.instance._auditlog_user = self.request.user
+        return serializer.save()
 
     def update(self, request, *args, **kwargs):
-        print(f"=== CLIENT VIEW UPDATE METHOD ===")
-        print(f"Request data: {request.data}")
-        print(f"Request method: {request.method}")
-        print(f"Request user: {request.user}")
-        
+        logger.debug(
+            'Client update: path=%s user=%s content_type=%s headers=%s data=%s',
+            request.path, request.user, request.content_type, lazy(safe_headers, request), request.data,
+        )
         try:
             response = super().update(request, *args, **kwargs)
-            print(f"Update successful: {response.data}")
-            return response
-        except Exception as e:
-            print(f"Update failed with error: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+        except Exception:
+            logger.exception('Client update failed')
             raise
+        logger.debug('Client updated: %s', response.data)
+        return response
 
     def perform_destroy(self, instance):
         instance._auditlog_user = self.request.user
@@ -286,54 +262,29 @@ class ClientViewSet(viewsets.ModelViewSet):
             return Response({'status': 'client permanently deleted'})
         return Response({'error': 'client must be soft-deleted first'}, status=status.HTTP_400_BAD_REQUEST)
 
+    def _get_export_fields(self, request):
+        fields_param = request.GET.get('fields', '')
+        if fields_param:
+            return fields_param.split(',')
+        return list(CLIENT_EXPORT_FIELDS)
+
+    def _iter_export_rows(self, fields, as_json=False):
+        # The first row is read here so that query errors still answer 500
+        return open_rows(iter_client_export_rows(self.get_queryset(), fields, as_json=as_json))
+
+    def _export_filename(self, extension):
+        return f'customers_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
     @action(detail=False, methods=['get'], permission_classes=[ImportExportPermission])
     def export_csv(self, request):
-        """Export customers to CSV - only for business admin and managers"""
+        """Stream customers as CSV - only for business admin and managers"""
         try:
-            queryset = self.get_queryset()
-            
-            # Get requested fields from query parameters
-            fields_param = request.GET.get('fields', '')
-            if fields_param:
-                requested_fields = fields_param.split(',')
-            else:
-                # Default fields if none specified
-                requested_fields = [
-                    'first_name', 'last_name', 'email', 'phone', 'customer_type',
-                    'address', 'city', 'state', 'country', 'postal_code',
-                    'date_of_birth', 'anniversary_date', 'preferred_metal', 'preferred_stone',
-                    'ring_size', 'budget_range', 'lead_source', 'notes', 'community',
-                    'mother_tongue', 'reason_for_visit', 'age_of_end_user', 'saving_scheme',
-                    'catchment_area', 'next_follow_up', 'summary_notes', 'status',
-                    'created_at', 'updated_at', 'tags'
-                ]
-            
-            # Create CSV response
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="customers_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-            
-            writer = csv.DictWriter(response, fieldnames=requested_fields)
-            writer.writeheader()
-            
-            for client in queryset:
-                row = {}
-                for field in requested_fields:
-                    if field == 'date_of_birth' and client.date_of_birth:
-                        row[field] = client.date_of_birth.strftime('%Y-%m-%d')
-                    elif field == 'anniversary_date' and client.anniversary_date:
-                        row[field] = client.anniversary_date.strftime('%Y-%m-%d')
-                    elif field in ['created_at', 'updated_at']:
-                        row[field] = getattr(client, field).strftime('%Y-%m-%d %H:%M:%S')
-                    elif field == 'tags':
-                        row[field] = ', '.join([tag.name for tag in client.tags.all()])
-                    else:
-                        value = getattr(client, field, '')
-                        row[field] = str(value) if value is not None else ''
-                
-                writer.writerow(row)
-            
-            return response
-            
+            fields = self._get_export_fields(request)
+            return streaming_export_response(
+                iter_csv(self._iter_export_rows(fields), fields),
+                content_type='text/csv',
+                filename=self._export_filename('csv'),
+            )
         except Exception as e:
             return Response(
                 {'error': f'Export failed: {str(e)}'}, 
@@ -342,52 +293,30 @@ class ClientViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[ImportExportPermission])
     def export_json(self, request):
-        """Export customers to JSON - only for business admin and managers"""
+        """Stream customers as a JSON array - only for business admin and managers"""
         try:
-            queryset = self.get_queryset()
-            
-            # Get requested fields from query parameters
-            fields_param = request.GET.get('fields', '')
-            if fields_param:
-                requested_fields = fields_param.split(',')
-            else:
-                # Default fields if none specified
-                requested_fields = [
-                    'first_name', 'last_name', 'email', 'phone', 'customer_type',
-                    'address', 'city', 'state', 'country', 'postal_code',
-                    'date_of_birth', 'anniversary_date', 'preferred_metal', 'preferred_stone',
-                    'ring_size', 'budget_range', 'lead_source', 'notes', 'community',
-                    'mother_tongue', 'reason_for_visit', 'age_of_end_user', 'saving_scheme',
-                    'catchment_area', 'next_follow_up', 'summary_notes', 'status',
-                    'created_at', 'updated_at', 'tags'
-                ]
-            
-            # Serialize data with only requested fields
-            data = []
-            for client in queryset:
-                client_data = {}
-                for field in requested_fields:
-                    if field == 'date_of_birth' and client.date_of_birth:
-                        client_data[field] = client.date_of_birth.strftime('%Y-%m-%d')
-                    elif field == 'anniversary_date' and client.anniversary_date:
-                        client_data[field] = client.anniversary_date.strftime('%Y-%m-%d')
-                    elif field in ['created_at', 'updated_at']:
-                        client_data[field] = getattr(client, field).strftime('%Y-%m-%d %H:%M:%S')
-                    elif field == 'tags':
-                        client_data[field] = [tag.name for tag in client.tags.all()]
-                    else:
-                        value = getattr(client, field, '')
-                        client_data[field] = value if value is not None else ''
-                data.append(client_data)
-            
-            response = HttpResponse(
-                json.dumps(data, indent=2, default=str),
-                content_type='application/json'
+            fields = self._get_export_fields(request)
+            return streaming_export_response(
+                iter_json_array(self._iter_export_rows(fields, as_json=True)),
+                content_type='application/json',
+                filename=self._export_filename('json'),
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Export failed: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'], permission_classes=[ImportExportPermission])
+    def export_ndjson(self, request):
+        """Stream customers as newline-delimited JSON - only for business admin and managers"""
+        try:
+            fields = self._get_export_fields(request)
+            return streaming_export_response(
+                iter_ndjson(self._iter_export_rows(fields, as_json=True)),
+                content_type='application/x-ndjson',
+                filename=self._export_filename('ndjson'),
             )
-            response['Content-Disposition'] = f'attachment; filename="customers_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-            
-            return response
-            
         except Exception as e:
             return Response(
                 {'error': f'Export failed: {str(e)}'}, 
@@ -457,6 +386,20 @@ class ClientViewSet(viewsets.ModelViewSet):
     #                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
     #             )
 
+    def _run_import(self, rows):
+        importer = ClientImporter(
+            tenant=self.request.user.tenant,
+            user=self.request.user,
+            context=self.get_serializer_context(),
+        )
+        with transaction.atomic():
+            imported_count, errors = importer.run(rows)
+        return Response({
+            'message': f'Import completed. {imported_count} customers imported successfully.',
+            'imported_count': imported_count,
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], permission_classes=[ImportExportPermission])
     def import_csv(self, request):
         """Import customers from CSV - only for business admin and managers"""
@@ -476,96 +419,7 @@ class ClientViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Read CSV file
-            decoded_file = csv_file.read().decode('utf-8')
-            csv_data = csv.DictReader(io.StringIO(decoded_file))
-            
-            imported_count = 0
-            errors = []
-            
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_data, start=2):  # Start from 2 to account for header
-                    try:
-                        # Clean and validate data
-                        email = row.get('email', '').strip()
-                        if not email:
-                            errors.append(f'Row {row_num}: Email is required')
-                            continue
-                        
-                        # Check if customer already exists
-                        if Client.objects.filter(email=email, tenant=request.user.tenant, is_deleted=False).exists():
-                            errors.append(f'Row {row_num}: Customer with email {email} already exists')
-                            continue
-                        
-                        # Prepare data for creation
-                        client_data = {
-                            'first_name': row.get('first_name', '').strip(),
-                            'last_name': row.get('last_name', '').strip(),
-                            'email': email,
-                            'phone': row.get('phone', '').strip(),
-                            'customer_type': row.get('customer_type', 'individual'),
-                            'address': row.get('address', '').strip(),
-                            'city': row.get('city', '').strip(),
-                            'state': row.get('state', '').strip(),
-                            'country': row.get('country', '').strip(),
-                            'postal_code': row.get('postal_code', '').strip(),
-                            'preferred_metal': row.get('preferred_metal', '').strip(),
-                            'preferred_stone': row.get('preferred_stone', '').strip(),
-                            'ring_size': row.get('ring_size', '').strip(),
-                            'budget_range': row.get('budget_range', '').strip(),
-                            'lead_source': row.get('lead_source', '').strip(),
-                            'notes': row.get('notes', '').strip(),
-                            'community': row.get('community', '').strip(),
-                            'mother_tongue': row.get('mother_tongue', '').strip(),
-                            'reason_for_visit': row.get('reason_for_visit', '').strip(),
-                            'age_of_end_user': row.get('age_of_end_user', '').strip(),
-                            'saving_scheme': row.get('saving_scheme', '').strip(),
-                            'catchment_area': row.get('catchment_area', '').strip(),
-                            'next_follow_up': row.get('next_follow_up', '').strip(),
-                            'summary_notes': row.get('summary_notes', '').strip(),
-                            'status': row.get('status', 'lead'),
-                            'tenant': request.user.tenant.id if request.user.tenant else None,
-                        }
-                        
-                        # Handle date fields
-                        if row.get('date_of_birth'):
-                            try:
-                                client_data['date_of_birth'] = datetime.strptime(row['date_of_birth'], '%Y-%m-%d').date()
-                            except ValueError:
-                                pass  # Skip invalid date
-                        
-                        if row.get('anniversary_date'):
-                            try:
-                                client_data['anniversary_date'] = datetime.strptime(row['anniversary_date'], '%Y-%m-%d').date()
-                            except ValueError:
-                                pass  # Skip invalid date
-                        
-                        # Create client
-                        serializer = self.get_serializer(data=client_data)
-                        if serializer.is_valid():
-                            client = serializer.save()
-                            
-                            # Handle tags if present
-                            tags_str = row.get('tags', '').strip()
-                            if tags_str:
-                                tag_names = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-                                for tag_name in tag_names:
-                                    # You might want to create tags if they don't exist
-                                    # For now, we'll skip tag creation
-                                    pass
-                            
-                            imported_count += 1
-                        else:
-                            errors.append(f'Row {row_num}: {serializer.errors}')
-                    
-                    except Exception as e:
-                        errors.append(f'Row {row_num}: {str(e)}')
-            
-            return Response({
-                'message': f'Import completed. {imported_count} customers imported successfully.',
-                'imported_count': imported_count,
-                'errors': errors
-            }, status=status.HTTP_200_OK)
+            return self._run_import(iter_csv_rows(csv_file))
             
         except Exception as e:
             return Response(
@@ -592,79 +446,13 @@ class ClientViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Read JSON file
-            json_data = json.loads(json_file.read().decode('utf-8'))
-            
-            if not isinstance(json_data, list):
-                return Response(
-                    {'error': 'JSON file should contain an array of customer objects'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            imported_count = 0
-            errors = []
-            
-            with transaction.atomic():
-                for row_num, customer_data in enumerate(json_data, start=1):
-                    try:
-                        # Clean and validate data
-                        email = customer_data.get('email', '').strip()
-                        if not email:
-                            errors.append(f'Row {row_num}: Email is required')
-                            continue
-                        
-                        # Check if customer already exists
-                        if Client.objects.filter(email=email, tenant=request.user.tenant, is_deleted=False).exists():
-                            errors.append(f'Row {row_num}: Customer with email {email} already exists')
-                            continue
-                        
-                        # Prepare data for creation
-                        client_data = {
-                            'first_name': customer_data.get('first_name', '').strip(),
-                            'last_name': customer_data.get('last_name', '').strip(),
-                            'email': email,
-                            'phone': customer_data.get('phone', '').strip(),
-                            'customer_type': customer_data.get('customer_type', 'individual'),
-                            'address': customer_data.get('address', '').strip(),
-                            'city': customer_data.get('city', '').strip(),
-                            'state': customer_data.get('state', '').strip(),
-                            'country': customer_data.get('country', '').strip(),
-                            'postal_code': customer_data.get('postal_code', '').strip(),
-                            'preferred_metal': customer_data.get('preferred_metal', '').strip(),
-                            'preferred_stone': customer_data.get('preferred_stone', '').strip(),
-                            'ring_size': customer_data.get('ring_size', '').strip(),
-                            'budget_range': customer_data.get('budget_range', '').strip(),
-                            'lead_source': customer_data.get('lead_source', '').strip(),
-                            'notes': customer_data.get('notes', '').strip(),
-                            'community': customer_data.get('community', '').strip(),
-                            'mother_tongue': customer_data.get('mother_tongue', '').strip(),
-                            'reason_for_visit': customer_data.get('reason_for_visit', '').strip(),
-                            'age_of_end_user': customer_data.get('age_of_end_user', '').strip(),
-                            'saving_scheme': customer_data.get('saving_scheme', '').strip(),
-                            'catchment_area': customer_data.get('catchment_area', '').strip(),
-                            'next_follow_up': customer_data.get('next_follow_up', '').strip(),
-                            'summary_notes': customer_data.get('summary_notes', '').strip(),
-                            'status': customer_data.get('status', 'lead'),
-                            'tenant': request.user.tenant.id if request.user.tenant else None,
-                        }
-                        
-                        # Create client
-                        serializer = self.get_serializer(data=client_data)
-                        if serializer.is_valid():
-                            client = serializer.save()
-                            imported_count += 1
-                        else:
-                            errors.append(f'Row {row_num}: {serializer.errors}')
-                    
-                    except Exception as e:
-                        errors.append(f'Row {row_num}: {str(e)}')
-            
-            return Response({
-                'message': f'Import completed. {imported_count} customers imported successfully.',
-                'imported_count': imported_count,
-                'errors': errors
-            }, status=status.HTTP_200_OK)
+            return self._run_import(iter_json_rows(json_file))
             
+        except ImportFormatError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'error': f'Import failed: {str(e)}'}, 
@@ -858,46 +646,28 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsRoleAllowed.for_roles(['inhouse_sales', 'business_admin', 'manager'])]
 
     def list(self, request, *args, **kwargs):
-        """List appointments with debugging"""
-        print(f"=== APPOINTMENT LIST METHOD ===")
-        print(f"Request user: {request.user}")
-        print(f"Request method: {request.method}")
-        print(f"Request URL: {request.path}")
-        
+        """List appointments"""
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         response_data = serializer.data
-        
-        print(f"Serialized data count: {len(response_data)}")
-        print(f"Serialized data: {response_data}")
-        
-        response = Response(response_data)
-        print(f"=== APPOINTMENT LIST METHOD END ===")
-        return response
+        logger.debug('Appointment list: user=%s count=%d', request.user, len(response_data))
+        return Response(response_data)
 
     def get_queryset(self):
         queryset = Appointment.objects.filter(is_deleted=False)
         user = self.request.user
         
-        print(f"=== APPOINTMENT QUERYSET DEBUG ===")
-        print(f"User: {user}")
-        print(f"User authenticated: {user.is_authenticated}")
-        print(f"User tenant: {user.tenant}")
-        print(f"Total appointments before filtering: {queryset.count()}")
-        
         if user.is_authenticated and user.tenant:
             queryset = queryset.filter(tenant=user.tenant)
-            print(f"Appointments after tenant filter: {queryset.count()}")
         else:
             # Temporarily allow all appointments if no tenant is found
-            print("No tenant found, but allowing all appointments for debugging")
+            logger.debug('No tenant for %s, listing all appointments', user)
             # queryset = Appointment.objects.none()
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
-            print(f"Appointments after status filter: {queryset.count()}")
         
         # Filter by date range
         start_date = self.request.query_params.get('start_date')
@@ -912,9 +682,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if assigned_to:
             queryset = queryset.filter(assigned_to_id=assigned_to)
         
-        print(f"Final queryset count: {queryset.count()}")
-        print(f"Final queryset: {list(queryset.values('id', 'client__first_name', 'date', 'time', 'status', 'tenant'))}")
-        
+        logger.debug('Appointment queryset for %s: %s', user, lazy(lambda: queryset.query))
         return queryset
 
     def perform_create(self, serializer):
@@ -1007,20 +775,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def debug(self, request):
         """Debug endpoint to check appointments"""
-        print(f"=== APPOINTMENT DEBUG ENDPOINT ===")
-        print(f"User: {request.user}")
-        print(f"User tenant: {request.user.tenant}")
-        
         # Get all appointments without filtering
         all_appointments = Appointment.objects.filter(is_deleted=False)
-        print(f"Total appointments in database: {all_appointments.count()}")
-        
-        for apt in all_appointments:
-            print(f"Appointment: {apt.id} - {apt.client.full_name} - {apt.date} {apt.time} - Tenant: {apt.tenant}")
-        
         # Get filtered appointments
         filtered_appointments = self.get_queryset()
-        print(f"Filtered appointments: {filtered_appointments.count()}")
         
         return Response({
             'total_appointments': all_appointments.count(),
@@ -1181,10 +939,7 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         user = self.request.user
-        print('=== TASK CREATE DEBUG ===')
-        print('User:', user)
-        print('User is authenticated:', user.is_authenticated)
-        print('User tenant:', getattr(user, 'tenant', None))
+        logger.debug('Task create: user=%s tenant=%s', user, getattr(user, 'tenant', None))
         tenant = user.tenant
         serializer.save(tenant=tenant, created_by=user, assigned_to=user)
 
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:12
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def skip_past_deadlines(apps, schema_editor):
+    # Only escalations that go overdue from now on are reported
+    Escalation = apps.get_model('escalation', 'Escalation')
+    Escalation.objects.filter(due_date__lte=timezone.now()).update(overdue_notified_at=F('due_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escalation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escalation',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, help_text='When the SLA sweeper reported this escalation overdue', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='escalation',
+            index=models.Index(fields=['status', 'due_date'], name='escalation_status_due_idx'),
+        ),
+        migrations.RunPython(skip_past_deadlines, migrations.RunPython.noop),
+    ]
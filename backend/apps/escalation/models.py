@@ -1,11 +1,14 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from apps.users.models import User
 from apps.clients.models import Client
+from shared.sla import SLAModelMixin
 
 
-class Escalation(models.Model):
+class Escalation(SLAModelMixin, models.Model):
     """
     Model for escalating customer issues to managers.
     """
@@ -100,39 +103,51 @@ class Escalation(models.Model):
         blank=True,
         help_text=_('Due date based on SLA')
     )
+    overdue_notified_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_('When the SLA sweeper reported this escalation overdue')
+    )
+
+    sla_deadline_field = 'due_date'
+    sla_open_statuses = [Status.OPEN, Status.IN_PROGRESS, Status.PENDING_CUSTOMER]
+    sla_deadline_inputs = ('sla_hours',)
 
     class Meta:
         verbose_name = _('Escalation')
         verbose_name_plural = _('Escalations')
         ordering = ['-created_at']
+        indexes = [
+            # Overdue counts and the SLA sweeper: status IN (...) AND due_date <= now
+            models.Index(fields=['status', 'due_date'], name='escalation_status_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.client.name} ({self.get_status_display()})"
 
+    def compute_sla_deadline(self):
+        """SLA hours from creation; a due date given at creation is kept."""
+        if self._state.adding and self.due_date:
+            return self.due_date
+        return (self.created_at or timezone.now()) + timedelta(hours=self.sla_hours)
+
     def save(self, *args, **kwargs):
-        # Set due date based on SLA when escalation is created
-        if not self.pk and not self.due_date:
-            self.due_date = timezone.now() + timezone.timedelta(hours=self.sla_hours)
-        
-        # Update timestamps when status changes
-        if self.pk:
-            old_instance = Escalation.objects.get(pk=self.pk)
-            if old_instance.status != self.status:
-                if self.status == self.Status.IN_PROGRESS and not self.assigned_at:
-                    self.assigned_at = timezone.now()
-                elif self.status == self.Status.RESOLVED and not self.resolved_at:
-                    self.resolved_at = timezone.now()
-                elif self.status == self.Status.CLOSED and not self.closed_at:
-                    self.closed_at = timezone.now()
-        
+        # Update timestamps when status changes (the loaded status is
+        # remembered by SLAModelMixin, so no need to read the row again)
+        if not self._state.adding and self.has_changed('status'):
+            if self.status == self.Status.IN_PROGRESS and not self.assigned_at:
+                self.assigned_at = timezone.now()
+            elif self.status == self.Status.RESOLVED and not self.resolved_at:
+                self.resolved_at = timezone.now()
+            elif self.status == self.Status.CLOSED and not self.closed_at:
+                self.closed_at = timezone.now()
+
         super().save(*args, **kwargs)
 
     @property
     def is_overdue(self):
         """Check if the escalation is overdue based on SLA."""
-        if self.due_date and self.status not in [self.Status.RESOLVED, self.Status.CLOSED]:
-            return timezone.now() > self.due_date
-        return False
+        return self.is_past_deadline()
 
     @property
     def time_to_resolution(self):
@@ -1,3 +1,146 @@
+from datetime import timedelta
+from itertools import cycle
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.clients.models import Client
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .models import Escalation
+from .services import EscalationSLAService, EscalationStatsService
+
+
+class EscalationStatsTests(TestCase):
+    """Stats come from two queries and agree with the per-escalation properties."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.admin = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.client_record = Client.objects.create(
+            tenant=self.tenant, email='c@example.com', first_name='Client'
+        )
+
+    def add_escalations(self, count):
+        now = timezone.now()
+        statuses, priorities = cycle(Escalation.Status.values), cycle(Escalation.Priority.values)
+        categories = cycle(Escalation.Category.values)
+        escalations = Escalation.objects.bulk_create(
+            Escalation(
+                title=f'Issue {i}', description='-', client=self.client_record, created_by=self.admin,
+                tenant=self.tenant, status=next(statuses), priority=next(priorities),
+                category=next(categories), sla_hours=24, due_date=now + timedelta(hours=12 - i),
+            )
+            for i in range(count)
+        )
+        for i, escalation in enumerate(escalations):
+            # Created i hours ago; resolved ones took 20 to 30 hours
+            created = now - timedelta(hours=i)
+            resolved = created + timedelta(hours=20 + i % 11) if escalation.status in ('resolved', 'closed') else None
+            Escalation.objects.filter(pk=escalation.pk).update(created_at=created, resolved_at=resolved)
+
+    def expected(self):
+        escalations = list(Escalation.objects.all())
+        resolved = [e for e in escalations if e.status in ('resolved', 'closed') and e.time_to_resolution is not None]
+        return {
+            'total_escalations': len(escalations),
+            'overdue_escalations': sum(e.is_overdue for e in escalations),
+            'avg_resolution_time': round(sum(e.time_to_resolution for e in resolved) / len(resolved), 2),
+            'sla_compliance_rate': round(sum(e.sla_compliance for e in resolved) / len(resolved) * 100, 2),
+            'escalations_by_status': {
+                value: sum(e.status == value for e in escalations) for value in Escalation.Status.values
+            },
+        }
+
+    def test_matches_the_properties(self):
+        self.add_escalations(60)
+        with self.assertNumQueries(2):
+            stats = EscalationStatsService.summarize(Escalation.objects.all())
+        for key, value in self.expected().items():
+            self.assertEqual(stats[key], value, key)
+        self.assertEqual(sum(stats['escalations_by_priority'].values()), 60)
+        self.assertEqual(sum(stats['escalations_by_category'].values()), 60)
+        self.assertGreater(stats['overdue_escalations'], 0)
+        self.assertGreater(stats['sla_compliance_rate'], 0)
+        self.assertLess(stats['sla_compliance_rate'], 100)
+
+    def test_endpoint(self):
+        self.add_escalations(12)
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.get('/api/escalation/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_escalations'], 12)
+        self.assertEqual(response.data['open_escalations'], 6)
+
+
+class EscalationSLATests(TestCase):
+    """Deadlines are stored on write and every escalation is reported overdue once."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.manager = User.objects.create_user(
+            username='manager', password='x', role=User.Role.MANAGER, tenant=self.tenant
+        )
+        self.client_record = Client.objects.create(
+            tenant=self.tenant, email='c@example.com', first_name='Client'
+        )
+
+    def escalate(self, **fields):
+        return Escalation.objects.create(
+            title='Issue', description='-', client=self.client_record, created_by=self.manager,
+            tenant=self.tenant, **fields
+        )
+
+    def test_status_change_needs_no_extra_read(self):
+        escalation = Escalation.objects.get(pk=self.escalate().pk)
+        escalation.status = Escalation.Status.RESOLVED
+        with self.assertNumQueries(1):
+            escalation.save()
+        self.assertIsNotNone(escalation.resolved_at)
+
+        escalation.title = 'Renamed'
+        escalation.save()
+        escalation.refresh_from_db()
+        self.assertEqual(escalation.status, Escalation.Status.RESOLVED)
+
+    def test_sla_change_moves_the_deadline(self):
+        escalation = self.escalate(sla_hours=4)
+        self.assertAlmostEqual(
+            escalation.due_date, escalation.created_at + timedelta(hours=4), delta=timedelta(seconds=1)
+        )
+        escalation.sla_hours = 48
+        escalation.save(update_fields=['sla_hours'])
+        escalation.refresh_from_db()
+        self.assertAlmostEqual(
+            escalation.due_date, escalation.created_at + timedelta(hours=48), delta=timedelta(seconds=1)
+        )
+
+    def test_sweeper_reports_each_escalation_once(self):
+        late = self.escalate(sla_hours=1)
+        self.escalate(sla_hours=1, status=Escalation.Status.CANCELLED)
+        self.escalate(sla_hours=48)
+        later = timezone.now() + timedelta(hours=2)
+
+        self.assertEqual(EscalationSLAService.sweep(now=later), [late])
+        self.assertEqual(EscalationSLAService.sweep(now=later), [])
+
+        # A new deadline makes it reportable again
+        late.sla_hours = 3
+        late.save()
+        self.assertEqual(EscalationSLAService.sweep(now=later + timedelta(hours=2)), [late])
 
-# Create your tests here.
+    def test_failed_sweep_leaves_escalations_unreported(self):
+        late = self.escalate(sla_hours=1)
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('apps.escalation.services.publish', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                EscalationSLAService.sweep(now=later)
+        late.refresh_from_db()
+        self.assertIsNone(late.overdue_notified_at)
+        self.assertEqual(EscalationSLAService.sweep(now=later), [late])
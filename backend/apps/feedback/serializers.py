@@ -143,9 +143,14 @@ class FeedbackStatsSerializer(serializers.Serializer):
     negative_feedback = serializers.IntegerField()
     neutral_feedback = serializers.IntegerField()
     avg_overall_rating = serializers.FloatField()
+    avg_ratings = serializers.DictField()
+    rating_distribution = serializers.DictField()
     feedback_by_category = serializers.DictField()
     feedback_by_status = serializers.DictField()
     feedback_by_sentiment = serializers.DictField()
+    sentiment_histogram = serializers.DictField()
+    sentiment_score_histogram = serializers.ListField()
+    weekly_trend = serializers.ListField()
     recent_feedback = serializers.ListField()
     top_issues = serializers.ListField()
 
@@ -156,4 +161,5 @@ class FeedbackSurveyStatsSerializer(serializers.Serializer):
     total_submissions = serializers.IntegerField()
     avg_completion_rate = serializers.FloatField()
     surveys_by_type = serializers.DictField()
+    weekly_submissions = serializers.ListField()
     recent_submissions = serializers.ListField() 
\ No newline at end of file
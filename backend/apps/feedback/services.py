@@ -0,0 +1,446 @@
+import hashlib
+import json
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, DateTimeField, F, Func, IntegerField, Max, Sum, TextField, Value, When
+from django.db.models.functions import Cast, Floor, Least, TruncWeek
+from django.utils import timezone
+
+from shared.cache import VersionedCache
+
+from .models import Feedback, FeedbackQuestion, FeedbackSubmission, FeedbackSurvey
+
+# Weeks covered by the trend series, the current one included
+TREND_WEEKS = 12
+# Sentiment scores (-1 to 1) are counted in buckets this wide
+SENTIMENT_BUCKET = 0.2
+RATING_DIMENSIONS = ['overall', 'product', 'service', 'value']
+ALL_TENANTS = 'all'
+# Submissions read per round trip when summarizing survey answers
+ANSWER_CHUNK_SIZE = 5000
+RATING_PERCENTILES = [25, 50, 75, 90]
+# Answers a rating question accepts (``QuestionType.RATING`` is 1-5)
+RATING_SCALE = (1, 5)
+# Highest detractor and lowest promoter rating on that scale
+NPS_THRESHOLDS = (3, 5)
+YES_ANSWERS = {'yes', 'true', '1'}
+NO_ANSWERS = {'no', 'false', '0'}
+
+
+class AnswerText(Func):
+    """
+    Text of answer ``key`` of a JSON column (``answers ->> 'key'``).
+    ``KeyTextTransform`` reads numeric keys such as question ids as array
+    indexes, so the key is always passed as a string here.
+    """
+    arg_joiner = ' ->> '
+    template = '(%(expressions)s)'
+    output_field = TextField()
+
+    def __init__(self, field, key):
+        super().__init__(F(field), Value(str(key)))
+
+
+def _trend_start(now):
+    week_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start -= timedelta(days=week_start.weekday())
+    return week_start - timedelta(weeks=TREND_WEEKS - 1)
+
+
+def _trend_week(field, since):
+    """Start of the week of ``field``, or NULL before the trend window."""
+    return TruncWeek(Case(When(**{f'{field}__gte': since}, then=F(field)), output_field=DateTimeField()))
+
+
+def _weeks(since):
+    return [(since + timedelta(weeks=i)).date() for i in range(TREND_WEEKS)]
+
+
+class FeedbackAnalyticsService:
+    """
+    Feedback and survey statistics for a tenant, or for every tenant with
+    ``all_tenants`` (platform admins only). A user without a tenant gets
+    the empty statistics of ``tenant=None``.
+
+    Each set of statistics is summed from one grouped query. Feedback is
+    grouped by rating, sentiment, sentiment score bucket, category, status
+    and trend week. Surveys are grouped per survey and trend week of their
+    submissions. The only other query fetches the few most recent rows. The
+    result is cached per tenant until feedback, a survey or a submission of
+    the tenant is written, or the TTL runs out; across several workers that
+    relies on a shared cache (see ``CACHES`` in settings).
+    """
+
+    stats_cache = VersionedCache('feedback_stats', 'FEEDBACK_STATS_CACHE_TTL')
+
+    @staticmethod
+    def invalidate(tenant_id):
+        """Drop the cached statistics of a tenant (and of all tenants)."""
+        for scope in (tenant_id, ALL_TENANTS):
+            FeedbackAnalyticsService.stats_cache.invalidate(scope)
+
+    @staticmethod
+    def _cached(name, tenant, all_tenants, compute):
+        scope = ALL_TENANTS if all_tenants else getattr(tenant, 'id', None)
+        return FeedbackAnalyticsService.stats_cache.get_or_compute(
+            scope, (name,), lambda: compute(tenant, all_tenants=all_tenants)
+        )
+
+    @staticmethod
+    def get_feedback_stats(tenant, all_tenants=False):
+        """Statistics of ``tenant``'s feedback, or of all feedback with ``all_tenants``."""
+        return FeedbackAnalyticsService._cached(
+            'feedback', tenant, all_tenants, FeedbackAnalyticsService.compute_feedback_stats
+        )
+
+    @staticmethod
+    def get_survey_stats(tenant, all_tenants=False):
+        """Statistics of ``tenant``'s surveys, or of all surveys with ``all_tenants``."""
+        return FeedbackAnalyticsService._cached(
+            'surveys', tenant, all_tenants, FeedbackAnalyticsService.compute_survey_stats
+        )
+
+    @staticmethod
+    def compute_feedback_stats(tenant, now=None, all_tenants=False):
+        queryset = Feedback.objects.all()
+        if not all_tenants:
+            queryset = queryset.filter(tenant=tenant)
+        since = _trend_start(now or timezone.now())
+
+        buckets = int(round(2 / SENTIMENT_BUCKET))
+        groups = queryset.values(
+            'overall_rating', 'sentiment', 'category', 'status',
+            score_bucket=Cast(
+                Least(Floor((F('sentiment_score') + 1) / SENTIMENT_BUCKET), buckets - 1), IntegerField()
+            ),
+            week=_trend_week('created_at', since),
+        ).annotate(
+            count=Count('id'),
+            product_total=Sum('product_rating'), product_count=Count('product_rating'),
+            service_total=Sum('service_rating'), service_count=Count('service_rating'),
+            value_total=Sum('value_rating'), value_count=Count('value_rating'),
+        ).order_by()
+
+        total = 0
+        ratings = dict.fromkeys(range(1, 6), 0)
+        dimension_totals = {dimension: [0, 0] for dimension in RATING_DIMENSIONS}
+        by_category, by_status, by_sentiment = {}, {}, {}
+        sentiments = dict.fromkeys(Feedback.Sentiment.values, 0)
+        score_histogram = [0] * buckets
+        issues = {}
+        trend = {week: {'count': 0, 'rating_total': 0, 'positive': 0, 'neutral': 0, 'negative': 0}
+                 for week in _weeks(since)}
+
+        for group in groups:
+            count, rating = group['count'], group['overall_rating']
+            total += count
+            if rating in ratings:
+                ratings[rating] += count
+                dimension_totals['overall'][0] += rating * count
+                dimension_totals['overall'][1] += count
+            for dimension in RATING_DIMENSIONS[1:]:
+                dimension_totals[dimension][0] += group[f'{dimension}_total'] or 0
+                dimension_totals[dimension][1] += group[f'{dimension}_count']
+            for breakdown, key in (
+                (by_category, group['category']),
+                (by_status, group['status']),
+                (by_sentiment, group['sentiment']),
+            ):
+                breakdown[key] = breakdown.get(key, 0) + count
+            if group['sentiment'] in sentiments:
+                sentiments[group['sentiment']] += count
+            if group['score_bucket'] is not None:
+                score_histogram[max(group['score_bucket'], 0)] += count
+            if rating is not None and rating <= 2:
+                issues[group['category']] = issues.get(group['category'], 0) + count
+            week = group['week']
+            if week is not None:
+                point = trend[timezone.localtime(week).date()]
+                point['count'] += count
+                point['rating_total'] += (rating or 0) * count
+                if rating is not None:
+                    point[_rating_band(rating)] += count
+
+        averages = {
+            dimension: round(rating_sum / rated, 2) if rated else 0
+            for dimension, (rating_sum, rated) in dimension_totals.items()
+        }
+        recent_feedback = [
+            {
+                'id': row['id'], 'title': row['title'], 'overall_rating': row['overall_rating'],
+                'created_at': row['created_at'],
+                'client_name': f"{row['client__first_name'] or ''} {row['client__last_name'] or ''}".strip(),
+            }
+            for row in queryset.order_by('-created_at')[:5].values(
+                'id', 'title', 'overall_rating', 'created_at', 'client__first_name', 'client__last_name'
+            )
+        ]
+
+        return {
+            'total_feedback': total,
+            'positive_feedback': ratings[4] + ratings[5],
+            'negative_feedback': ratings[1] + ratings[2],
+            'neutral_feedback': ratings[3],
+            'avg_overall_rating': averages['overall'],
+            'avg_ratings': averages,
+            'rating_distribution': ratings,
+            'feedback_by_category': by_category,
+            'feedback_by_status': by_status,
+            'feedback_by_sentiment': by_sentiment,
+            'sentiment_histogram': sentiments,
+            'sentiment_score_histogram': [
+                {'from': round(-1 + i * SENTIMENT_BUCKET, 2), 'to': round(-1 + (i + 1) * SENTIMENT_BUCKET, 2),
+                 'count': count}
+                for i, count in enumerate(score_histogram)
+            ],
+            'weekly_trend': [
+                {
+                    'week': week, 'count': point['count'],
+                    'avg_rating': round(point['rating_total'] / point['count'], 2) if point['count'] else 0,
+                    'positive': point['positive'], 'neutral': point['neutral'], 'negative': point['negative'],
+                }
+                for week, point in trend.items()
+            ],
+            'recent_feedback': recent_feedback,
+            'top_issues': [
+                {'category': category, 'count': count}
+                for category, count in sorted(issues.items(), key=lambda item: -item[1])[:5]
+            ],
+        }
+
+    @staticmethod
+    def compute_survey_stats(tenant, now=None, all_tenants=False):
+        surveys = FeedbackSurvey.objects.all()
+        submissions = FeedbackSubmission.objects.all()
+        if not all_tenants:
+            surveys = surveys.filter(tenant=tenant)
+            submissions = submissions.filter(survey__tenant=tenant)
+        since = _trend_start(now or timezone.now())
+
+        groups = surveys.values(
+            'id', 'survey_type', 'is_active', week=_trend_week('submissions__submitted_at', since),
+        ).annotate(count=Count('submissions')).order_by()
+
+        seen = {}
+        survey_submissions = {}
+        trend = dict.fromkeys(_weeks(since), 0)
+        for group in groups:
+            seen[group['id']] = group
+            survey_submissions[group['id']] = survey_submissions.get(group['id'], 0) + group['count']
+            week = group['week']
+            if week is not None:
+                trend[timezone.localtime(week).date()] += group['count']
+
+        surveys_by_type = {}
+        for survey in seen.values():
+            surveys_by_type[survey['survey_type']] = surveys_by_type.get(survey['survey_type'], 0) + 1
+        answered = [count for count in survey_submissions.values() if count]
+
+        recent_submissions = [
+            {
+                'id': row['id'], 'survey__name': row['survey__name'], 'submitted_at': row['submitted_at'],
+                'client_name': f"{row['client__first_name'] or ''} {row['client__last_name'] or ''}".strip(),
+            }
+            for row in submissions.order_by('-submitted_at')[:10].values(
+                'id', 'survey__name', 'client__first_name', 'client__last_name', 'submitted_at'
+            )
+        ]
+
+        return {
+            'total_surveys': len(seen),
+            'active_surveys': sum(1 for survey in seen.values() if survey['is_active']),
+            'total_submissions': sum(survey_submissions.values()),
+            'avg_completion_rate': round(sum(answered) / len(answered), 2) if answered else 0,
+            'surveys_by_type': surveys_by_type,
+            'weekly_submissions': [{'week': week, 'count': count} for week, count in trend.items()],
+            'recent_submissions': recent_submissions,
+        }
+
+
+def _rating_band(rating):
+    if rating >= 4:
+        return 'positive'
+    if rating <= 2:
+        return 'negative'
+    return 'neutral'
+
+
+class SurveyResultsService:
+    """
+    Per-question results of a survey, summarized from
+    ``FeedbackSubmission.answers`` (question id -> answer).
+
+    The database extracts each question's answer as a text column, so no
+    answer blob is decoded in Python. Submissions are read in chunks of
+    ``ANSWER_CHUNK_SIZE`` rows, each chunk becoming one NumPy array whose
+    columns are the questions. Distributions, rating statistics and NPS are
+    then computed on the columns with vectorized operations.
+
+    Submissions are never edited, so the results are cached under the
+    survey's high-water mark (latest submission id and submission count)
+    and its questions. A new submission, a deletion or a question change
+    computes them again.
+    """
+
+    @staticmethod
+    def _cache_key(survey, questions, high_water_mark):
+        fingerprint = hashlib.md5(json.dumps(
+            [[q.id, q.question_text, q.question_type, q.options] for q in questions], default=str
+        ).encode()).hexdigest()
+        return f'survey_results:{survey.pk}:{high_water_mark[0]}:{high_water_mark[1]}:{fingerprint}'
+
+    @staticmethod
+    def get_results(survey):
+        questions = list(FeedbackQuestion.objects.filter(survey=survey).order_by('order', 'id'))
+        mark = FeedbackSubmission.objects.filter(survey=survey).aggregate(last=Max('id'), total=Count('id'))
+        high_water_mark = (mark['last'] or 0, mark['total'])
+        key = SurveyResultsService._cache_key(survey, questions, high_water_mark)
+        results = cache.get(key)
+        if results is None:
+            results = SurveyResultsService.compute_results(survey, questions, high_water_mark[0])
+            cache.set(key, results, getattr(settings, 'SURVEY_RESULTS_CACHE_TTL', 3600))
+        return results
+
+    @staticmethod
+    def answer_columns(survey, questions, last_id=None):
+        """One object array of answer texts (``None`` when skipped) per question."""
+        submissions = FeedbackSubmission.objects.filter(survey=survey)
+        if last_id is not None:
+            submissions = submissions.filter(id__lte=last_id)
+        if not questions:
+            return [], submissions.count()
+        rows = submissions.order_by('id').values_list(
+            *[AnswerText('answers', question.id) for question in questions],
+            flat=len(questions) == 1,
+        )
+
+        chunks, chunk = [], []
+        for row in rows.iterator(chunk_size=ANSWER_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == ANSWER_CHUNK_SIZE:
+                chunks.append(_answer_chunk(chunk, len(questions)))
+                chunk = []
+        if chunk:
+            chunks.append(_answer_chunk(chunk, len(questions)))
+        table = np.concatenate(chunks) if chunks else np.empty((0, len(questions)), dtype=object)
+        return [table[:, i] for i in range(len(questions))], len(table)
+
+    @staticmethod
+    def compute_results(survey, questions=None, last_id=None):
+        if questions is None:
+            questions = list(FeedbackQuestion.objects.filter(survey=survey).order_by('order', 'id'))
+        columns, total = SurveyResultsService.answer_columns(survey, questions, last_id)
+
+        results = []
+        for question, column in zip(questions, columns):
+            answered = column[np.not_equal(column, None) & np.not_equal(column, '')]
+            result = {
+                'id': question.id,
+                'question_text': question.question_text,
+                'question_type': question.question_type,
+                'responses': len(answered),
+                'skipped': total - len(answered),
+            }
+            if question.question_type == FeedbackQuestion.QuestionType.RATING:
+                result.update(_rating_summary(answered))
+            elif question.question_type == FeedbackQuestion.QuestionType.MULTIPLE_CHOICE:
+                result.update(_choice_summary(answered, question.options))
+            elif question.question_type == FeedbackQuestion.QuestionType.YES_NO:
+                result.update(_yes_no_summary(answered))
+            results.append(result)
+
+        return {'survey_id': survey.pk, 'total_submissions': total, 'questions': results}
+
+
+def _answer_chunk(rows, width):
+    chunk = np.empty((len(rows), width), dtype=object)
+    if width == 1:
+        chunk[:, 0] = rows
+    else:
+        chunk[:] = rows
+    return chunk
+
+
+def _numbers(answers):
+    """Numeric answers as floats; answers that are not numbers are dropped."""
+    try:
+        return answers.astype(float)
+    except ValueError:
+        values = np.fromiter((_number(answer) for answer in answers), dtype=float, count=len(answers))
+        return values[~np.isnan(values)]
+
+
+def _number(answer):
+    try:
+        return float(answer)
+    except ValueError:
+        return np.nan
+
+
+def _rating_summary(answers):
+    """Statistics of the answers on the rating scale; answers outside it are counted and left out."""
+    values = _numbers(answers)
+    low, high = RATING_SCALE
+    in_scale = (values >= low) & (values <= high)
+    out_of_range = len(values) - int(np.count_nonzero(in_scale))
+    values = values[in_scale]
+    if not len(values):
+        return {
+            'mean': None, 'median': None, 'percentiles': {}, 'distribution': {}, 'nps': None,
+            'out_of_range': out_of_range,
+        }
+
+    ratings, counts = np.unique(values, return_counts=True)
+    percentiles = np.percentile(values, RATING_PERCENTILES)
+    detractor_max, promoter_min = NPS_THRESHOLDS
+    promoters = int(np.count_nonzero(values >= promoter_min))
+    detractors = int(np.count_nonzero(values <= detractor_max))
+    return {
+        'mean': round(float(values.mean()), 2),
+        'median': round(float(np.median(values)), 2),
+        'percentiles': {f'p{p}': round(float(v), 2) for p, v in zip(RATING_PERCENTILES, percentiles)},
+        'distribution': {_label(rating): int(count) for rating, count in zip(ratings, counts)},
+        'out_of_range': out_of_range,
+        'nps': {
+            'scale': high,
+            'score': round((promoters - detractors) / len(values) * 100, 2),
+            'promoters': promoters,
+            'passives': len(values) - promoters - detractors,
+            'detractors': detractors,
+        },
+    }
+
+
+def _label(rating):
+    return str(int(rating)) if float(rating).is_integer() else str(rating)
+
+
+def _picked_choices(answer):
+    try:
+        return json.loads(answer)
+    except ValueError:
+        # Free text that merely starts with '[', e.g. "[see notes]"
+        return [answer]
+
+
+def _choice_summary(answers, options):
+    # Multi-select answers arrive as JSON arrays
+    is_list = np.char.startswith(answers.astype(str), '[')
+    choices = answers[~is_list]
+    if is_list.any():
+        picked = [choice for answer in answers[is_list] for choice in _picked_choices(answer)]
+        choices = np.concatenate([choices, np.array(picked, dtype=object)])
+    names, counts = np.unique(choices.astype(str), return_counts=True)
+    distribution = {str(option): 0 for option in options or []}
+    distribution.update({str(name): int(count) for name, count in zip(names, counts)})
+    return {'choices': distribution}
+
+
+def _yes_no_summary(answers):
+    normalized = np.char.lower(np.char.strip(answers.astype(str)))
+    yes = int(np.isin(normalized, list(YES_ANSWERS)).sum())
+    no = int(np.isin(normalized, list(NO_ANSWERS)).sum())
+    return {'yes': yes, 'no': no, 'yes_rate': round(yes / (yes + no) * 100, 2) if yes + no else 0}
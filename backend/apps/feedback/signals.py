@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Feedback, FeedbackSubmission, FeedbackSurvey
+from .services import FeedbackAnalyticsService
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_save, sender=FeedbackSurvey)
+@receiver(post_delete, sender=FeedbackSurvey)
+def invalidate_feedback_stats(sender, instance, **kwargs):
+    """Refresh the tenant's cached statistics once the write commits."""
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: FeedbackAnalyticsService.invalidate(tenant_id))
+
+
+@receiver(post_save, sender=FeedbackSubmission)
+@receiver(post_delete, sender=FeedbackSubmission)
+def invalidate_survey_stats(sender, instance, **kwargs):
+    # Use the survey when the caller already loaded it instead of querying for it
+    if FeedbackSubmission.survey.is_cached(instance):
+        tenant_id = instance.survey.tenant_id
+    else:
+        tenant_id = (
+            FeedbackSurvey.objects.filter(pk=instance.survey_id).values_list('tenant_id', flat=True).first()
+        )
+    transaction.on_commit(lambda: FeedbackAnalyticsService.invalidate(tenant_id))
@@ -1,3 +1,257 @@
+import time
+from datetime import timedelta
+from itertools import cycle
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.clients.models import Client
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .models import Feedback, FeedbackQuestion, FeedbackSubmission, FeedbackSurvey
+from .services import TREND_WEEKS, FeedbackAnalyticsService, SurveyResultsService
+
+
+class FeedbackAnalyticsTests(TestCase):
+    """Stats come from one grouped query per view and agree with the rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.admin = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.client_record = Client.objects.create(
+            tenant=self.tenant, email='c@example.com', first_name='Ada', last_name='Lovelace'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def add_feedback(self, count, tenant=None):
+        now = timezone.now()
+        ratings, categories = cycle([5, 4, 3, 2, 1, 5]), cycle(Feedback.Category.values)
+        feedback = [
+            Feedback.objects.create(
+                title=f'Feedback {i}', content='-', client=self.client_record, tenant=tenant or self.tenant,
+                overall_rating=next(ratings), category=next(categories),
+                product_rating=(i % 5) + 1 if i % 2 else None, service_rating=3,
+            )
+            for i in range(count)
+        ]
+        for i, row in enumerate(feedback):
+            Feedback.objects.filter(pk=row.pk).update(created_at=now - timedelta(days=3 * i))
+        return feedback
+
+    def test_feedback_stats_match_the_rows(self):
+        self.add_feedback(40)
+        self.add_feedback(3, tenant=self.other_tenant)
+        rows = list(Feedback.objects.filter(tenant=self.tenant))
+
+        with self.assertNumQueries(2):
+            stats = FeedbackAnalyticsService.compute_feedback_stats(self.tenant)
+
+        self.assertEqual(stats['total_feedback'], 40)
+        self.assertEqual(stats['positive_feedback'], sum(f.overall_rating >= 4 for f in rows))
+        self.assertEqual(stats['negative_feedback'], sum(f.overall_rating <= 2 for f in rows))
+        self.assertEqual(
+            stats['rating_distribution'], {r: sum(f.overall_rating == r for f in rows) for r in range(1, 6)}
+        )
+        product = [f.product_rating for f in rows if f.product_rating]
+        self.assertEqual(stats['avg_ratings']['product'], round(sum(product) / len(product), 2))
+        self.assertEqual(stats['avg_ratings']['service'], 3)
+        self.assertEqual(stats['avg_ratings']['value'], 0)
+        self.assertEqual(
+            stats['avg_overall_rating'], round(sum(f.overall_rating for f in rows) / len(rows), 2)
+        )
+        self.assertEqual(set(stats['sentiment_histogram']), set(Feedback.Sentiment.values))
+        self.assertEqual(stats['sentiment_histogram']['positive'], stats['positive_feedback'])
+        self.assertEqual(sum(b['count'] for b in stats['sentiment_score_histogram']), 40)
+        self.assertEqual(stats['sentiment_score_histogram'][2]['count'], stats['negative_feedback'])
+        self.assertEqual(len(stats['weekly_trend']), TREND_WEEKS)
+        since = stats['weekly_trend'][0]['week']
+        self.assertEqual(
+            sum(point['count'] for point in stats['weekly_trend']),
+            sum(timezone.localtime(f.created_at).date() >= since for f in rows),
+        )
+        self.assertEqual(stats['top_issues'][0]['count'], max(t['count'] for t in stats['top_issues']))
+        self.assertEqual(stats['recent_feedback'][0]['client_name'], 'Ada Lovelace')
+
+    def test_survey_stats(self):
+        surveys = [
+            FeedbackSurvey.objects.create(name=f'Survey {i}', tenant=self.tenant, is_active=i != 2)
+            for i in range(3)
+        ]
+        FeedbackSurvey.objects.create(name='Elsewhere', tenant=self.other_tenant)
+        for survey, count in zip(surveys, [4, 2, 0]):
+            for _ in range(count):
+                FeedbackSubmission.objects.create(survey=survey, client=self.client_record, answers={})
+
+        with self.assertNumQueries(2):
+            stats = FeedbackAnalyticsService.compute_survey_stats(self.tenant)
+
+        self.assertEqual(stats['total_surveys'], 3)
+        self.assertEqual(stats['active_surveys'], 2)
+        self.assertEqual(stats['total_submissions'], 6)
+        self.assertEqual(stats['avg_completion_rate'], 3)
+        self.assertEqual(stats['weekly_submissions'][-1]['count'], 6)
+        self.assertEqual(len(stats['recent_submissions']), 6)
+
+    def test_views_are_cached_until_feedback_changes(self):
+        self.add_feedback(5)
+        response = self.api.get('/api/feedback/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_feedback'], 5)
+        self.assertIn('weekly_trend', response.data)
+
+        with self.assertNumQueries(0):
+            FeedbackAnalyticsService.get_feedback_stats(self.tenant)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_feedback(1)
+        self.assertEqual(self.api.get('/api/feedback/stats/').data['total_feedback'], 6)
+
+        response = self.api.get('/api/feedback/surveys/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_surveys'], 0)
+
+    def test_only_platform_admins_see_every_tenant(self):
+        self.add_feedback(2)
+        self.add_feedback(3, tenant=self.other_tenant)
+        FeedbackSurvey.objects.create(name='Elsewhere', tenant=self.other_tenant)
+
+        def stats(role, tenant):
+            user = User.objects.create_user(username=f'{role}-{tenant}', password='x', role=role, tenant=tenant)
+            self.api.force_authenticate(user)
+            return (
+                self.api.get('/api/feedback/stats/').data['total_feedback'],
+                self.api.get('/api/feedback/surveys/stats/').data['total_surveys'],
+            )
+
+        self.assertEqual(stats(User.Role.MANAGER, self.tenant), (2, 0))
+        self.assertEqual(stats(User.Role.MANAGER, None), (0, 0))
+        self.assertEqual(stats(User.Role.PLATFORM_ADMIN, None), (5, 1))
+
+    def test_submissions_invalidate_without_loading_the_survey(self):
+        survey = FeedbackSurvey.objects.create(name='Visit', tenant=self.tenant)
+        FeedbackAnalyticsService.get_survey_stats(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            # One INSERT: the tenant is read from the loaded survey
+            with self.assertNumQueries(1):
+                FeedbackSubmission.objects.create(survey=survey, client=self.client_record, answers={})
+        self.assertEqual(FeedbackAnalyticsService.get_survey_stats(self.tenant)['total_submissions'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedbackSubmission.objects.create(survey_id=survey.pk, client=self.client_record, answers={})
+        self.assertEqual(FeedbackAnalyticsService.get_survey_stats(self.tenant)['total_submissions'], 2)
+
+
+class SurveyResultsTests(TestCase):
+    """Per-question results agree with the answers and follow new submissions."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.admin = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.client_record = Client.objects.create(tenant=self.tenant, email='c@example.com', first_name='Ada')
+        self.survey = FeedbackSurvey.objects.create(name='Visit', tenant=self.tenant)
+        Q = FeedbackQuestion.QuestionType
+        self.rating = FeedbackQuestion.objects.create(survey=self.survey, question_text='Rate', order=0)
+        self.nps = FeedbackQuestion.objects.create(survey=self.survey, question_text='Recommend', order=1)
+        self.choice = FeedbackQuestion.objects.create(
+            survey=self.survey, question_text='Found us', question_type=Q.MULTIPLE_CHOICE, order=2,
+            options=['Walk-in', 'Instagram', 'Friend'],
+        )
+        self.yes_no = FeedbackQuestion.objects.create(
+            survey=self.survey, question_text='Return?', question_type=Q.YES_NO, order=3
+        )
+
+    def submit(self, answers_list):
+        FeedbackSubmission.objects.bulk_create(
+            FeedbackSubmission(survey=self.survey, client=self.client_record, answers=answers)
+            for answers in answers_list
+        )
+
+    def answers(self, count):
+        return [
+            {
+                str(self.rating.id): i % 5 + 1,
+                str(self.nps.id): i % 11,
+                str(self.choice.id): ['Walk-in', 'Instagram'] if i % 4 == 0 else 'Friend',
+                **({str(self.yes_no.id): 'Yes' if i % 3 else False} if i % 10 else {}),
+            }
+            for i in range(count)
+        ]
+
+    def test_results_match_the_answers(self):
+        answers = self.answers(50)
+        self.submit(answers)
+        results = SurveyResultsService.get_results(self.survey)
+        rating, nps, choice, yes_no = results['questions']
+
+        self.assertEqual(results['total_submissions'], 50)
+        self.assertEqual(rating['mean'], 3)
+        self.assertEqual(rating['median'], 3)
+        self.assertEqual(rating['distribution'], {str(r): 10 for r in range(1, 6)})
+        self.assertEqual(rating['nps']['promoters'], 10)
+        self.assertEqual(rating['nps']['detractors'], 30)
+        self.assertEqual(rating['out_of_range'], 0)
+        # Rating questions are 1-5; answers outside the scale are left out of the statistics
+        scores = [a[str(self.nps.id)] for a in answers if 1 <= a[str(self.nps.id)] <= 5]
+        self.assertEqual(nps['out_of_range'], 50 - len(scores))
+        self.assertEqual(nps['nps']['scale'], 5)
+        self.assertEqual(nps['nps']['promoters'], sum(s == 5 for s in scores))
+        self.assertEqual(nps['nps']['detractors'], sum(s <= 3 for s in scores))
+        self.assertEqual(nps['mean'], round(sum(scores) / len(scores), 2))
+        self.assertEqual(choice['choices'], {'Walk-in': 13, 'Instagram': 13, 'Friend': 37})
+        self.assertEqual(yes_no['responses'], 45)
+        self.assertEqual(yes_no['skipped'], 5)
+        self.assertEqual(yes_no['yes'], sum(bool(i % 3) for i in range(50) if i % 10))
+        self.assertEqual(yes_no['yes'] + yes_no['no'], 45)
+
+    def test_malformed_multi_select_counts_as_one_choice(self):
+        self.submit([
+            {str(self.choice.id): '[see notes]'},
+            {str(self.choice.id): ['Friend', 'Walk-in']},
+            {str(self.choice.id): '["Friend"'},
+        ])
+        choice = SurveyResultsService.compute_results(self.survey)['questions'][2]
+        self.assertEqual(
+            choice['choices'],
+            {'Walk-in': 1, 'Instagram': 0, 'Friend': 1, '[see notes]': 1, '["Friend"': 1},
+        )
+
+    def test_cached_until_a_new_submission(self):
+        self.submit(self.answers(5))
+        SurveyResultsService.get_results(self.survey)
+        with self.assertNumQueries(2):
+            cached = SurveyResultsService.get_results(self.survey)
+        self.assertEqual(cached['total_submissions'], 5)
+
+        self.submit(self.answers(1))
+        self.assertEqual(SurveyResultsService.get_results(self.survey)['total_submissions'], 6)
+
+        FeedbackQuestion.objects.filter(pk=self.rating.pk).update(question_text='Rate your visit')
+        results = SurveyResultsService.get_results(self.survey)
+        self.assertEqual(results['questions'][0]['question_text'], 'Rate your visit')
+
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.get(f'/api/feedback/surveys/{self.survey.pk}/results/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), 4)
 
-# Create your tests here.
+    def test_large_survey_is_summarized_quickly(self):
+        answers = self.answers(1000)
+        for _ in range(100):
+            self.submit(answers)
+        started = time.monotonic()
+        results = SurveyResultsService.compute_results(self.survey)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(results['total_submissions'], 100000)
+        self.assertEqual(results['questions'][0]['distribution']['5'], 20000)
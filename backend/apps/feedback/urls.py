@@ -21,6 +21,7 @@ urlpatterns = [
     path('surveys/', views.FeedbackSurveyListView.as_view(), name='feedback-survey-list'),
     path('surveys/stats/', views.FeedbackSurveyStatsView.as_view(), name='feedback-survey-stats'),
     path('surveys/<int:pk>/', views.FeedbackSurveyDetailView.as_view(), name='feedback-survey-detail'),
+    path('surveys/<int:pk>/results/', views.FeedbackSurveyResultsView.as_view(), name='feedback-survey-results'),
     
     # Survey questions
     path('surveys/<int:survey_id>/questions/', views.FeedbackQuestionListView.as_view(), name='feedback-question-list'),
@@ -2,7 +2,7 @@ from rest_framework import generics, permissions, status, filters, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
+from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Feedback, FeedbackResponse, FeedbackSurvey, FeedbackQuestion, FeedbackSubmission
 from .serializers import (
@@ -13,6 +13,7 @@ from .serializers import (
     FeedbackSubmissionSerializer, FeedbackSubmissionCreateSerializer,
     FeedbackStatsSerializer, FeedbackSurveyStatsSerializer
 )
+from .services import FeedbackAnalyticsService, SurveyResultsService
 from apps.users.permissions import IsRoleAllowed
 
 
@@ -188,6 +189,23 @@ class FeedbackSurveyDetailView(generics.RetrieveUpdateDestroyAPIView):
         return FeedbackSurvey.objects.filter(tenant=user.tenant)
 
 
+class FeedbackSurveyResultsView(generics.GenericAPIView):
+    """
+    Get per-question results of a survey: choice counts, rating statistics
+    and NPS.
+    """
+    permission_classes = [IsRoleAllowed.for_roles(['manager', 'business_admin', 'platform_admin'])]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_platform_admin:
+            return FeedbackSurvey.objects.all()
+        return FeedbackSurvey.objects.filter(tenant=user.tenant)
+
+    def get(self, request, *args, **kwargs):
+        return Response(SurveyResultsService.get_results(self.get_object()))
+
+
 class FeedbackQuestionListView(generics.ListCreateAPIView):
     """
     List and create questions for a survey.
@@ -263,111 +281,17 @@ class FeedbackSubmissionDetailView(generics.RetrieveAPIView):
 
 class FeedbackStatsView(generics.GenericAPIView):
     """
-    Get feedback statistics.
+    Get feedback statistics: rating distribution, per-dimension averages,
+    sentiment histograms and the weekly trend.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        try:
-            user = request.user
-            print(f"Stats request from user: {user.username}, tenant: {getattr(user, 'tenant', None)}")
-            
-            # Base queryset - handle tenant filtering properly
-            if user.is_platform_admin:
-                queryset = Feedback.objects.all()
-            elif hasattr(user, 'tenant') and user.tenant:
-                queryset = Feedback.objects.filter(tenant=user.tenant)
-            else:
-                # If user has no tenant, show all feedback (or you could show none)
-                queryset = Feedback.objects.all()
-
-            print(f"Queryset count: {queryset.count()}")
-            print(f"All feedback count: {Feedback.objects.count()}")
-
-            # Calculate statistics with error handling
-            total_feedback = queryset.count()
-            positive_feedback = queryset.filter(overall_rating__gte=4).count()
-            negative_feedback = queryset.filter(overall_rating__lte=2).count()
-            neutral_feedback = queryset.filter(overall_rating=3).count()
-            
-            print(f"Stats calculated: total={total_feedback}, positive={positive_feedback}, negative={negative_feedback}, neutral={neutral_feedback}")
-            
-            avg_overall_rating = queryset.aggregate(
-                avg_rating=Avg('overall_rating')
-            )['avg_rating'] or 0
-
-            # Breakdowns with error handling
-            try:
-                feedback_by_category = dict(queryset.values_list('category').annotate(count=Count('id')))
-            except Exception as e:
-                print(f"Error in category breakdown: {e}")
-                feedback_by_category = {}
-                
-            try:
-                feedback_by_status = dict(queryset.values_list('status').annotate(count=Count('id')))
-            except Exception as e:
-                print(f"Error in status breakdown: {e}")
-                feedback_by_status = {}
-                
-            try:
-                feedback_by_sentiment = dict(queryset.values_list('sentiment').annotate(count=Count('id')))
-            except Exception as e:
-                print(f"Error in sentiment breakdown: {e}")
-                feedback_by_sentiment = {}
-
-            # Recent feedback with error handling
-            try:
-                recent_feedback = list(queryset.order_by('-created_at')[:5].values(
-                    'id', 'title', 'overall_rating', 'created_at', 'client__first_name', 'client__last_name'
-                ))
-                # Format the client name properly
-                for feedback in recent_feedback:
-                    first_name = feedback.get('client__first_name', '')
-                    last_name = feedback.get('client__last_name', '')
-                    feedback['client_name'] = f"{first_name} {last_name}".strip()
-                    # Remove the individual name fields to keep the response clean
-                    feedback.pop('client__first_name', None)
-                    feedback.pop('client__last_name', None)
-            except Exception as e:
-                print(f"Error in recent feedback: {e}")
-                recent_feedback = []
-
-            # Top issues (negative feedback categories) with error handling
-            try:
-                top_issues = list(queryset.filter(overall_rating__lte=2).values('category').annotate(
-                    count=Count('id')
-                ).order_by('-count')[:5])
-            except Exception as e:
-                print(f"Error in top issues: {e}")
-                top_issues = []
-
-            stats = {
-                'total_feedback': total_feedback,
-                'positive_feedback': positive_feedback,
-                'negative_feedback': negative_feedback,
-                'neutral_feedback': neutral_feedback,
-                'avg_overall_rating': round(avg_overall_rating, 2),
-                'feedback_by_category': feedback_by_category,
-                'feedback_by_status': feedback_by_status,
-                'feedback_by_sentiment': feedback_by_sentiment,
-                'recent_feedback': recent_feedback,
-                'top_issues': top_issues,
-            }
-
-            serializer = FeedbackStatsSerializer(stats)
-            return Response(serializer.data)
-            
-        except Exception as e:
-            print(f"Error in FeedbackStatsView: {e}")
-            import traceback
-            traceback.print_exc()
-            return Response(
-                {
-                    'error': 'Failed to fetch feedback statistics',
-                    'detail': str(e)
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        user = request.user
+        # Only platform admins see every tenant; users without one see nothing
+        stats = FeedbackAnalyticsService.get_feedback_stats(user.tenant, all_tenants=user.is_platform_admin)
+        serializer = FeedbackStatsSerializer(stats)
+        return Response(serializer.data)
 
 
 class FeedbackSurveyStatsView(generics.GenericAPIView):
@@ -378,54 +302,7 @@ class FeedbackSurveyStatsView(generics.GenericAPIView):
 
     def get(self, request):
         user = request.user
-        
-        # Base queryset
-        if user.is_platform_admin:
-            survey_queryset = FeedbackSurvey.objects.all()
-            submission_queryset = FeedbackSubmission.objects.all()
-        else:
-            survey_queryset = FeedbackSurvey.objects.filter(tenant=user.tenant)
-            submission_queryset = FeedbackSubmission.objects.filter(survey__tenant=user.tenant)
-
-        # Calculate statistics
-        total_surveys = survey_queryset.count()
-        active_surveys = survey_queryset.filter(is_active=True).count()
-        total_submissions = submission_queryset.count()
-        
-        # Average completion rate
-        surveys_with_submissions = survey_queryset.annotate(
-            submission_count=Count('submissions')
-        ).filter(submission_count__gt=0)
-        
-        avg_completion_rate = surveys_with_submissions.aggregate(
-            avg_rate=Avg('submission_count')
-        )['avg_rate'] or 0
-
-        # Breakdowns
-        surveys_by_type = dict(survey_queryset.values_list('survey_type').annotate(count=Count('id')))
-
-        # Recent submissions
-        recent_submissions = list(submission_queryset.order_by('-submitted_at')[:10].values(
-            'id', 'survey__name', 'client__first_name', 'client__last_name', 'submitted_at'
-        ))
-        # Format the client name properly
-        for submission in recent_submissions:
-            first_name = submission.get('client__first_name', '')
-            last_name = submission.get('client__last_name', '')
-            submission['client_name'] = f"{first_name} {last_name}".strip()
-            # Remove the individual name fields to keep the response clean
-            submission.pop('client__first_name', None)
-            submission.pop('client__last_name', None)
-
-        stats = {
-            'total_surveys': total_surveys,
-            'active_surveys': active_surveys,
-            'total_submissions': total_submissions,
-            'avg_completion_rate': round(avg_completion_rate, 2),
-            'surveys_by_type': surveys_by_type,
-            'recent_submissions': recent_submissions,
-        }
-
+        stats = FeedbackAnalyticsService.get_survey_stats(user.tenant, all_tenants=user.is_platform_admin)
         serializer = FeedbackSurveyStatsSerializer(stats)
         return Response(serializer.data)
 
@@ -254,6 +254,9 @@ class CustomerSegment(models.Model):
     """
     Customer segmentation for targeted marketing
     """
+    # Keys of ``criteria`` matched against the client spend summaries
+    SPEND_CRITERIA = ['min_total_spend', 'max_total_spend', 'min_order_count']
+
     name = models.CharField(max_length=200, help_text=_('Segment name'))
     description = models.TextField(blank=True, null=True)
     
@@ -286,6 +289,34 @@ class CustomerSegment(models.Model):
     def __str__(self):
         return f"{self.name} ({self.customer_count} customers)"
 
+    @property
+    def has_spend_criteria(self):
+        return any(key in self.criteria for key in self.SPEND_CRITERIA)
+
+    def refresh_spend_metrics(self, save=True):
+        """
+        Recompute customer count, revenue and average order value from the
+        client spend summaries, using the ``SPEND_CRITERIA`` keys of ``criteria``.
+        Kept current by ``apps.clients.spend`` as the summaries change.
+        """
+        from apps.clients.spend import segment_metrics, spend_segment
+
+        summaries = spend_segment(
+            self.tenant,
+            min_spend=self.criteria.get('min_total_spend'),
+            max_spend=self.criteria.get('max_total_spend'),
+            min_orders=self.criteria.get('min_order_count'),
+        )
+        if self.store_id:
+            summaries = summaries.filter(client__assigned_to__store=self.store_id)
+        metrics = segment_metrics(summaries)
+        self.customer_count = metrics['customer_count']
+        self.total_revenue = metrics['total_revenue']
+        self.average_order_value = metrics['average_order_value']
+        if save:
+            self.save(update_fields=['customer_count', 'total_revenue', 'average_order_value', 'updated_at'])
+        return metrics
+
 
 class MarketingEvent(models.Model):
     """
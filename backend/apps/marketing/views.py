@@ -43,11 +43,13 @@ class MarketingCampaignListCreateView(generics.ListCreateAPIView):
             )
 
     def perform_create(self, serializer):
-        serializer.save(
+        segment = serializer.save(
             created_by=self.request.user,
             tenant=self.request.user.tenant,
             store=getattr(self.request.user, 'store', None)
         )
+        if segment.has_spend_criteria:
+            segment.refresh_spend_metrics()
 
 
 class MarketingCampaignDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -187,6 +189,11 @@ class CustomerSegmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CustomerSegmentSerializer
     permission_classes = [IsRoleAllowed.for_roles(['marketing', 'business_admin'])]
 
+    def perform_update(self, serializer):
+        segment = serializer.save()
+        if segment.has_spend_criteria:
+            segment.refresh_spend_metrics()
+
     def get_queryset(self):
         user = self.request.user
         if user.is_platform_admin:
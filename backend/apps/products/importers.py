@@ -0,0 +1,127 @@
+"""
+Product CSV import.
+"""
+import csv
+import io
+from decimal import Decimal
+
+from .models import Product, Category
+
+REQUIRED_FIELDS = ['name', 'sku', 'category', 'selling_price', 'cost_price']
+
+
+def iter_product_csv_rows(uploaded_file):
+    """Yield ``(row_num, row)`` from a CSV upload without reading it into memory."""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    # Start from 2 because row 1 is header
+    yield from enumerate(csv.DictReader(text), start=2)
+
+
+def import_products(rows, tenant, on_progress=None, progress_every=500):
+    """
+    Create products for ``tenant`` from ``(row_num, row)`` pairs.
+
+    Returns ``(imported_count, errors)``. A file that stops decoding ends
+    the import with an error; the rows before it stay imported and are
+    counted. ``on_progress(rows_processed,
+    imported_count, errors)`` is called every ``progress_every`` rows and
+    once at the end.
+    """
+    imported_count = 0
+    rows_processed = 0
+    errors = []
+    categories = {}
+
+    rows = iter(rows)
+    while True:
+        try:
+            row_num, row = next(rows)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Earlier rows are already saved, so report them instead of failing
+            errors.append(f'Row {rows_processed + 2}: Error reading CSV file: {str(e)}')
+            break
+        rows_processed += 1
+        if on_progress and rows_processed % progress_every == 0:
+            on_progress(rows_processed, imported_count, errors)
+        try:
+            # Validate required fields
+            missing_fields = [field for field in REQUIRED_FIELDS if not row.get(field)]
+            if missing_fields:
+                errors.append(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
+                continue
+
+            # Validate numeric fields
+            try:
+                selling_price = Decimal(row['selling_price'])
+                cost_price = Decimal(row['cost_price'])
+                quantity_str = row.get('quantity', '0')
+                quantity = int(quantity_str) if quantity_str.strip() else 0  # Default to 0 if empty or not provided
+            except (ValueError, TypeError, ArithmeticError) as e:
+                errors.append(f"Row {row_num}: Invalid numeric values - {str(e)}")
+                continue
+
+            # Get or create category, once per distinct name
+            category_name = row['category'].strip()
+            category = categories.get(category_name)
+            if category is None:
+                try:
+                    category, _ = Category.objects.get_or_create(
+                        name=category_name,
+                        tenant=tenant,
+                        defaults={
+                            'description': f'Category for {category_name}',
+                            'is_active': True
+                        }
+                    )
+                except Exception as e:
+                    errors.append(f"Row {row_num}: Error with category '{category_name}' - {str(e)}")
+                    continue
+                categories[category_name] = category
+
+            # Check if SKU already exists (unique per tenant)
+            if Product.objects.filter(sku=row['sku'], tenant=tenant).exists():
+                errors.append(f"Row {row_num}: SKU '{row['sku']}' already exists in your tenant")
+                continue
+
+            try:
+                Product.objects.create(
+                    name=row['name'].strip(),
+                    sku=row['sku'].strip(),
+                    category=category,
+                    selling_price=selling_price,
+                    cost_price=cost_price,
+                    quantity=quantity,
+                    description=row.get('description', '').strip(),
+                    status='active',
+                    tenant=tenant,
+                    is_featured=False,
+                    is_bestseller=False,
+                    min_quantity=0,
+                    max_quantity=999999,
+                    weight=Decimal('0'),
+                    dimensions='',
+                    material='',
+                    color='',
+                    size='',
+                    brand='',
+                    main_image='',
+                    additional_images=[],
+                    meta_title='',
+                    meta_description='',
+                    tags=[]
+                )
+            except Exception as e:
+                errors.append(f"Row {row_num}: Error creating product - {str(e)}")
+                continue
+
+            imported_count += 1
+
+        except Exception as e:
+            errors.append(f"Row {row_num}: {str(e)}")
+            continue
+
+    if on_progress:
+        on_progress(rows_processed, imported_count, errors)
+    return imported_count, errors
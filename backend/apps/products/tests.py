@@ -1,3 +1,29 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from .models import Product
+
+
+class ProductImportTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.user = User.objects.create_user(
+            username='admin', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_undecodable_file_reports_the_rows_already_imported(self):
+        rows = ''.join(f'Ring {i},SKU-{i:04},Rings,{1000 + i},800,2\n' for i in range(400))
+        content = b'name,sku,category,selling_price,cost_price,quantity\n' + rows.encode() + b'Bad,\xff\xfe,Rings,1,1,1\n'
+        response = self.api.post('/api/products/import/', {'file': SimpleUploadedFile('products.csv', content)})
+
+        self.assertEqual(response.status_code, 400)
+        imported = Product.objects.filter(tenant=self.tenant).count()
+        self.assertGreater(imported, 0)
+        self.assertEqual(response.data['imported_count'], imported)
+        self.assertIn('Error reading CSV file', response.data['errors'][-1])
@@ -7,11 +7,9 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django.db.models import Sum, Count, Q, F
 from django.utils import timezone
 from datetime import timedelta
-import csv
-import io
-from decimal import Decimal
 
 from .models import Product, Category, ProductVariant
+from .importers import import_products, iter_product_csv_rows
 from .serializers import ProductSerializer, ProductListSerializer, ProductDetailSerializer, CategorySerializer, ProductVariantSerializer
 from apps.users.permissions import IsRoleAllowed
 
@@ -311,109 +309,7 @@ class ProductImportView(APIView):
                     'message': 'Please upload a CSV file'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Read CSV file
-            try:
-                decoded_file = file.read().decode('utf-8')
-                csv_data = csv.DictReader(io.StringIO(decoded_file))
-                print(f"CSV file read successfully, headers: {csv_data.fieldnames}")
-            except Exception as e:
-                print(f"Error reading CSV file: {str(e)}")
-                return Response({
-                    'success': False,
-                    'message': f'Error reading CSV file: {str(e)}'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            imported_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(csv_data, start=2):  # Start from 2 because row 1 is header
-                try:
-                    # Validate required fields
-                    required_fields = ['name', 'sku', 'category', 'selling_price', 'cost_price']
-                    missing_fields = []
-                    for field in required_fields:
-                        if not row.get(field):
-                            missing_fields.append(field)
-                    
-                    if missing_fields:
-                        errors.append(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
-                        continue
-                    
-                    # Validate numeric fields
-                    try:
-                        selling_price = Decimal(row['selling_price'])
-                        cost_price = Decimal(row['cost_price'])
-                        quantity_str = row.get('quantity', '0')
-                        quantity = int(quantity_str) if quantity_str.strip() else 0  # Default to 0 if empty or not provided
-                    except (ValueError, TypeError) as e:
-                        errors.append(f"Row {row_num}: Invalid numeric values - {str(e)}")
-                        continue
-                    
-                    # Get or create category
-                    category_name = row['category'].strip()
-                    try:
-                        category, created = Category.objects.get_or_create(
-                            name=category_name,
-                            tenant=request.user.tenant,
-                            defaults={
-                                'description': f'Category for {category_name}',
-                                'is_active': True
-                            }
-                        )
-                        if created:
-                            print(f"Created new category: {category.name}")
-                        else:
-                            print(f"Using existing category: {category.name}")
-                    except Exception as e:
-                        print(f"Error creating/getting category: {str(e)}")
-                        errors.append(f"Row {row_num}: Error with category '{category_name}' - {str(e)}")
-                        continue
-                    
-                    # Check if SKU already exists (unique per tenant)
-                    if Product.objects.filter(sku=row['sku'], tenant=request.user.tenant).exists():
-                        errors.append(f"Row {row_num}: SKU '{row['sku']}' already exists in your tenant")
-                        continue
-                    
-                    # Create product
-                    try:
-                        product = Product.objects.create(
-                            name=row['name'].strip(),
-                            sku=row['sku'].strip(),
-                            category=category,
-                            selling_price=selling_price,
-                            cost_price=cost_price,
-                            quantity=quantity,
-                            description=row.get('description', '').strip(),
-                            status='active',
-                            tenant=request.user.tenant,
-                            is_featured=False,
-                            is_bestseller=False,
-                            min_quantity=0,
-                            max_quantity=999999,
-                            weight=Decimal('0'),
-                            dimensions='',
-                            material='',
-                            color='',
-                            size='',
-                            brand='',
-                            main_image='',
-                            additional_images=[],
-                            meta_title='',
-                            meta_description='',
-                            tags=[]
-                        )
-                    except Exception as e:
-                        print(f"Error creating product: {str(e)}")
-                        errors.append(f"Row {row_num}: Error creating product - {str(e)}")
-                        continue
-                    
-                    print(f"Successfully created product: {product.name} (SKU: {product.sku})")
-                    imported_count += 1
-                    
-                except Exception as e:
-                    print(f"Error processing row {row_num}: {str(e)}")
-                    errors.append(f"Row {row_num}: {str(e)}")
-                    continue
+            imported_count, errors = import_products(iter_product_csv_rows(file), request.user.tenant)
             
             if errors:
                 return Response({
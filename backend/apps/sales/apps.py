@@ -5,3 +5,6 @@ class SalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sales'
     verbose_name = 'Sales'
+
+    def ready(self):
+        import apps.sales.signals
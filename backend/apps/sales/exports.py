@@ -0,0 +1,106 @@
+"""
+Row builders for sales and pipeline exports.
+
+JSON and NDJSON rows are flat and share their keys with the CSV columns, so
+they differ from the ``SaleSerializer``/``SalesPipelineSerializer`` output
+the JSON export returned before it was streamed:
+
+- ``client`` and ``sales_representative`` are replaced by ``client_id``,
+  ``client_name``, ``sales_representative_id`` and
+  ``sales_representative_name``;
+- ``id``, ``tenant`` and the sale's ``internal_notes`` are left out;
+- a sale carries its line items in ``items``, each with the ``item_*`` keys
+  of ``SALE_ITEM_EXPORT_FIELDS``;
+- dates and datetimes are ISO 8601 and decimals are strings, as in the API.
+"""
+from django.db.models import Prefetch
+
+from shared.exports import EXPORT_CHUNK_SIZE
+
+from .models import SaleItem
+
+SALE_EXPORT_FIELDS = [
+    'order_number', 'status', 'payment_status', 'client_id', 'client_name',
+    'sales_representative_id', 'sales_representative_name',
+    'subtotal', 'tax_amount', 'discount_amount', 'total_amount', 'paid_amount',
+    'shipping_address', 'shipping_method', 'shipping_cost', 'tracking_number',
+    'notes', 'order_date', 'delivery_date', 'created_at', 'updated_at',
+]
+# Per line item columns; the CSV export has one line per sale item
+SALE_ITEM_EXPORT_FIELDS = [
+    'item_product_id', 'item_product_name', 'item_quantity', 'item_unit_price',
+    'item_discount_percentage', 'item_discount_amount', 'item_total_price',
+]
+
+PIPELINE_EXPORT_FIELDS = [
+    'title', 'stage', 'probability', 'client_id', 'client_name',
+    'sales_representative_id', 'sales_representative_name',
+    'expected_value', 'actual_value', 'expected_close_date', 'actual_close_date',
+    'notes', 'next_action', 'next_action_date', 'created_at', 'updated_at',
+]
+
+
+def _format(value, as_json):
+    if value is None:
+        return None if as_json else ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value if as_json else str(value)
+
+
+def _people(obj):
+    return {
+        'client_id': obj.client_id,
+        'client_name': obj.client.full_name,
+        'sales_representative_id': obj.sales_representative_id,
+        'sales_representative_name': (
+            obj.sales_representative.get_full_name() or obj.sales_representative.username
+        ),
+    }
+
+
+def _item_row(item, as_json):
+    return {
+        'item_product_id': item.product_id,
+        'item_product_name': item.product.name,
+        'item_quantity': item.quantity,
+        'item_unit_price': _format(item.unit_price, as_json),
+        'item_discount_percentage': _format(item.discount_percentage, as_json),
+        'item_discount_amount': _format(item.discount_amount, as_json),
+        'item_total_price': _format(item.total_price, as_json),
+    }
+
+
+def iter_sale_export_rows(queryset, as_json=False):
+    """
+    Walk sales in chunks with client and sales rep joined in and the line
+    items (with their product) loaded once per chunk.
+
+    JSON rows carry the sale's items as a nested ``items`` list; CSV rows are
+    one per line item with the sale columns repeated, and one row with empty
+    item columns for a sale without items.
+    """
+    queryset = queryset.select_related('client', 'sales_representative').prefetch_related(
+        Prefetch('items', queryset=SaleItem.objects.select_related('product').order_by('id'))
+    )
+    for sale in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = {field: _format(getattr(sale, field, None), as_json) for field in SALE_EXPORT_FIELDS}
+        row.update(_people(sale))
+        items = [_item_row(item, as_json) for item in sale.items.all()]
+        if as_json:
+            row['items'] = items
+            yield row
+        elif not items:
+            yield row
+        else:
+            for item in items:
+                yield {**row, **item}
+
+
+def iter_pipeline_export_rows(queryset, as_json=False):
+    """Walk pipelines in chunks with client and sales rep joined in."""
+    queryset = queryset.select_related('client', 'sales_representative')
+    for pipeline in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = {field: _format(getattr(pipeline, field, None), as_json) for field in PIPELINE_EXPORT_FIELDS}
+        row.update(_people(pipeline))
+        yield row
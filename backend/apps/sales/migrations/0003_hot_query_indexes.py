@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_sale_tenant_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['tenant', '-created_at'], name='sale_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['tenant', 'status', '-created_at'], name='sale_tenant_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salespipeline',
+            index=models.Index(fields=['tenant', '-updated_at'], name='pipeline_tenant_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salespipeline',
+            index=models.Index(fields=['tenant', 'stage', '-updated_at'], name='pipeline_tenant_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salespipeline',
+            index=models.Index(condition=models.Q(('stage__in', ['closed_won', 'closed_lost']), _negated=True), fields=['tenant', 'next_action_date'], name='pipeline_open_action_idx'),
+        ),
+    ]
@@ -1,11 +1,16 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from shared.tracking import TrackedFieldsMixin
 
-class Sale(models.Model):
+
+class Sale(TrackedFieldsMixin, models.Model):
     """
     Sales/Order model for tracking transactions.
     """
+    # Client the sale was loaded with, so moving it refreshes both spend summaries
+    tracked_fields = ('client_id',)
+
     class Status(models.TextChoices):
         PENDING = 'pending', _('Pending')
         CONFIRMED = 'confirmed', _('Confirmed')
@@ -83,6 +88,13 @@ class Sale(models.Model):
         verbose_name = _('Sale')
         verbose_name_plural = _('Sales')
         ordering = ['-created_at']
+        indexes = [
+            # Changed-since-watermark scans of the metrics rollup
+            models.Index(fields=['tenant', 'updated_at'], name='sale_tenant_updated_idx'),
+            # Tenant sale lists (newest first), optionally by status, and date windows
+            models.Index(fields=['tenant', '-created_at'], name='sale_tenant_created_idx'),
+            models.Index(fields=['tenant', 'status', '-created_at'], name='sale_tenant_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_number} - {self.client.full_name}"
@@ -233,6 +245,16 @@ class SalesPipeline(models.Model):
         verbose_name = _('Sales Pipeline')
         verbose_name_plural = _('Sales Pipelines')
         ordering = ['-updated_at']
+        indexes = [
+            # Tenant pipeline lists (recently updated first), optionally by stage
+            models.Index(fields=['tenant', '-updated_at'], name='pipeline_tenant_updated_idx'),
+            models.Index(fields=['tenant', 'stage', '-updated_at'], name='pipeline_tenant_stage_idx'),
+            # Upcoming actions on the dashboard only look at open deals
+            models.Index(
+                fields=['tenant', 'next_action_date'], name='pipeline_open_action_idx',
+                condition=~models.Q(stage__in=['closed_won', 'closed_lost']),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.client.full_name}"
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from shared.cache import VersionedCache
+
+from .models import SalesPipeline
+
+CLOSED_STAGES = [SalesPipeline.Stage.CLOSED_WON, SalesPipeline.Stage.CLOSED_LOST]
+
+
+class PipelineSummaryService:
+    """
+    Per-stage pipeline figures for a tenant, shared by the pipeline stats,
+    stages and dashboard endpoints.
+
+    One query groups the tenant's pipelines by stage; totals, percentages,
+    won/lost and average deal sizes are derived from those rows. The result
+    is cached per tenant until a pipeline is saved (including
+    ``SalesPipeline.move_to_stage``) or deleted, or the TTL runs out. Other
+    workers only see the invalidation through a shared cache
+    (``CACHE_BACKEND`` in settings).
+    """
+
+    summary_cache = VersionedCache('pipeline_summary', 'PIPELINE_SUMMARY_CACHE_TTL')
+
+    @staticmethod
+    def invalidate(tenant_id):
+        """Drop the cached summary of a tenant."""
+        if tenant_id is not None:
+            PipelineSummaryService.summary_cache.invalidate(tenant_id)
+
+    @staticmethod
+    def get_summary(tenant):
+        return PipelineSummaryService.summary_cache.get_or_compute(
+            tenant.id, (), lambda: PipelineSummaryService.compute_summary(tenant)
+        )
+
+    @staticmethod
+    def compute_summary(tenant):
+        rows = {
+            row['stage']: row
+            for row in SalesPipeline.objects.filter(tenant=tenant)
+            .values('stage')
+            .annotate(count=Count('id'), value=Sum('expected_value'))
+            .order_by()
+        }
+
+        stages = []
+        for stage_code, stage_name in SalesPipeline.Stage.choices:
+            row = rows.get(stage_code, {})
+            count = row.get('count', 0)
+            value = row.get('value') or Decimal('0')
+            stages.append({
+                'stage': stage_code,
+                'name': str(stage_name),
+                'count': count,
+                'value': float(value),
+                'percentage': 0,
+                'avg_deal_size': float(value / count) if count else 0,
+            })
+
+        def totals(selected):
+            return (
+                sum(stage['count'] for stage in selected),
+                sum(stage['value'] for stage in selected),
+            )
+
+        total_count, total_value = totals(stages)
+        active_count, active_value = totals([s for s in stages if s['stage'] not in CLOSED_STAGES])
+        won_count, won_value = totals([s for s in stages if s['stage'] == SalesPipeline.Stage.CLOSED_WON])
+        lost_count, lost_value = totals([s for s in stages if s['stage'] == SalesPipeline.Stage.CLOSED_LOST])
+
+        if total_count:
+            for stage in stages:
+                stage['percentage'] = round((stage['count'] / total_count) * 100, 1)
+
+        return {
+            'stages': stages,
+            'total_count': total_count,
+            'total_value': total_value,
+            'active_count': active_count,
+            'active_value': active_value,
+            'won_count': won_count,
+            'won_value': won_value,
+            'lost_count': lost_count,
+            'lost_value': lost_value,
+            'conversion_rate': round(won_count / total_count * 100, 1) if total_count else 0,
+            'avg_deal_size': active_value / active_count if active_count else 0,
+        }
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import SalesPipeline
+from .services import PipelineSummaryService
+
+
+@receiver(post_save, sender=SalesPipeline)
+@receiver(post_delete, sender=SalesPipeline)
+def invalidate_pipeline_summary(sender, instance, **kwargs):
+    """Refresh the tenant's cached stage summary once the write commits."""
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: PipelineSummaryService.invalidate(tenant_id))
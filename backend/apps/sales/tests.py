@@ -1,3 +1,329 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.test import APIClient
+
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.tenants.models import Tenant
+from apps.users.models import User
+from shared.query_plans import QueryPlanAssertionsMixin
+
+from .exports import PIPELINE_EXPORT_FIELDS, SALE_EXPORT_FIELDS, SALE_ITEM_EXPORT_FIELDS
+from .models import Sale, SaleItem, SalesPipeline
+from .services import CLOSED_STAGES, PipelineSummaryService
+from .views import SalesExportView, StreamingExportMixin
+
+TENANTS = 20
+ROWS_PER_TENANT = 1000
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class SalesQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """The tenant-scoped sale and pipeline queries must stay on their indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tenants = Tenant.objects.bulk_create(
+            Tenant(name=f'Tenant {i}', slug=f'tenant-{i}') for i in range(TENANTS)
+        )
+        cls.tenant = tenants[0]
+        reps = User.objects.bulk_create(
+            User(username=f'rep{t}', role=User.Role.INHOUSE_SALES, tenant=tenant)
+            for t, tenant in enumerate(tenants)
+        )
+        clients = Client.objects.bulk_create(
+            Client(tenant=tenant, email=f'c{i}@t{t}.example.com')
+            for t, tenant in enumerate(tenants)
+            for i in range(ROWS_PER_TENANT // 10)
+        )
+        statuses = [choice for choice, _ in Sale.Status.choices]
+        stages = [choice for choice, _ in SalesPipeline.Stage.choices]
+        now = timezone.now()
+        Sale.objects.bulk_create(
+            Sale(
+                order_number=f'ORD-{t}-{i}', client=clients[t * ROWS_PER_TENANT // 10 + i % (ROWS_PER_TENANT // 10)],
+                sales_representative=rep, tenant_id=rep.tenant_id, status=statuses[i % len(statuses)],
+                subtotal=100, total_amount=100,
+            )
+            for t, rep in enumerate(reps)
+            for i in range(ROWS_PER_TENANT)
+        )
+        SalesPipeline.objects.bulk_create(
+            SalesPipeline(
+                title=f'Deal {i}', client=clients[t * ROWS_PER_TENANT // 10 + i % (ROWS_PER_TENANT // 10)],
+                sales_representative=rep, tenant_id=rep.tenant_id, stage=stages[i % len(stages)],
+                next_action_date=now + timedelta(days=i % 90 - 45),
+            )
+            for t, rep in enumerate(reps)
+            for i in range(ROWS_PER_TENANT)
+        )
+        # The timestamps are automatic; spread them over the past year
+        with connection.cursor() as cursor:
+            for model, column in ((Sale, 'created_at'), (SalesPipeline, 'updated_at')):
+                cursor.execute(
+                    f"UPDATE {model._meta.db_table} SET {column} = {column} - (id % 365) * interval '1 day'"
+                )
+        cls.analyze(Sale, SalesPipeline)
+
+    def test_sale_list(self):
+        # SaleListView: the tenant's sales, newest first
+        sales = Sale.objects.filter(tenant=self.tenant).order_by('-created_at')
+        self.assertUsesIndex(sales[:25], 'sale_tenant_created_idx')
+
+    def test_sale_status_filter(self):
+        sales = Sale.objects.filter(tenant=self.tenant, status=Sale.Status.DELIVERED).order_by('-created_at')
+        self.assertUsesIndex(sales[:25], 'sale_tenant_status_created_idx')
+
+    def test_sale_date_window(self):
+        # Dashboard and rollup windows over recent sales
+        sales = Sale.objects.filter(tenant=self.tenant, created_at__gte=timezone.now() - timedelta(days=7))
+        self.assertUsesIndex(sales.order_by(), 'sale_tenant_created_idx')
+
+    def test_pipeline_list(self):
+        # SalesPipelineListView: the tenant's deals, recently updated first
+        pipelines = SalesPipeline.objects.filter(tenant=self.tenant).order_by('-updated_at')
+        self.assertUsesIndex(pipelines[:25], 'pipeline_tenant_updated_idx')
+
+    def test_pipeline_stage_filter(self):
+        pipelines = SalesPipeline.objects.filter(
+            tenant=self.tenant, stage=SalesPipeline.Stage.NEGOTIATION
+        ).order_by('-updated_at')
+        self.assertUsesIndex(pipelines[:25], 'pipeline_tenant_stage_idx')
+
+    def test_pipeline_upcoming_actions(self):
+        # Pipeline dashboard: next actions of open deals
+        pipelines = SalesPipeline.objects.filter(
+            tenant=self.tenant, next_action_date__gte=timezone.now()
+        ).exclude(stage__in=CLOSED_STAGES).order_by('next_action_date')
+        self.assertUsesIndex(pipelines[:5], 'pipeline_open_action_idx')
+
+
+class PipelineSummaryTests(TestCase):
+    """The shared stage summary is one query, cached, and matches the old per-stage figures."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.user = User.objects.create_user(
+            username='manager', password='x', role=User.Role.MANAGER, tenant=self.tenant
+        )
+        self.client_record = Client.objects.create(tenant=self.tenant, email='c@example.com')
+        stages = [choice for choice, _ in SalesPipeline.Stage.choices]
+        # Every stage but the last, with uneven counts and values
+        for i in range(20):
+            self.add_pipeline(stages[i % (len(stages) - 1)], Decimal('1000.50') * (i % 4 + 1))
+        self.add_pipeline(SalesPipeline.Stage.CLOSED_WON, 99, tenant=self.other_tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def add_pipeline(self, stage, value, tenant=None):
+        return SalesPipeline.objects.create(
+            title='Deal', client=self.client_record, sales_representative=self.user, tenant=tenant or self.tenant,
+            stage=stage, expected_value=value,
+        )
+
+    def stage_figures(self, stage):
+        """Count and value of one stage, computed the way the views used to."""
+        pipelines = SalesPipeline.objects.filter(tenant=self.tenant, stage=stage)
+        return pipelines.count(), float(pipelines.aggregate(total=Sum('expected_value'))['total'] or Decimal('0'))
+
+    def test_summary_is_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            summary = PipelineSummaryService.compute_summary(self.tenant)
+        self.assertEqual(summary['total_count'], 20)
+        self.assertEqual(len(summary['stages']), len(SalesPipeline.Stage.choices))
+        self.assertEqual(summary['stages'][-1]['count'], 0)
+        self.assertEqual(summary['stages'][-1]['avg_deal_size'], 0)
+
+    def test_views_match_the_per_stage_figures(self):
+        pipelines = SalesPipeline.objects.filter(tenant=self.tenant)
+        active = pipelines.exclude(stage__in=CLOSED_STAGES)
+        active_value = float(active.aggregate(total=Sum('expected_value'))['total'])
+        won = pipelines.filter(stage=SalesPipeline.Stage.CLOSED_WON).count()
+
+        stats = self.api.get('/api/sales/pipeline/stats/').data
+        self.assertEqual(stats, {
+            'totalValue': active_value,
+            'activeDeals': active.count(),
+            'conversionRate': round(won / pipelines.count() * 100, 1),
+            'avgDealSize': active_value / active.count(),
+        })
+
+        stages = self.api.get('/api/sales/pipeline/stages/').data
+        dashboard = self.api.get('/api/sales/pipeline/dashboard/').data['stage_summary']
+        for (code, name), row in zip(SalesPipeline.Stage.choices, stages):
+            count, value = self.stage_figures(code)
+            self.assertEqual((row['label'], row['count'], row['value']), (name, count, value))
+            self.assertEqual(dashboard[code]['count'], count)
+            self.assertEqual(dashboard[code]['value'], value)
+            self.assertEqual(dashboard[code]['percentage'], round(count / 20 * 100, 1))
+
+    def test_summary_is_cached(self):
+        summary = PipelineSummaryService.get_summary(self.tenant)
+        with self.assertNumQueries(0):
+            self.assertEqual(PipelineSummaryService.get_summary(self.tenant), summary)
+
+    def test_saves_and_deletes_invalidate_their_tenant(self):
+        PipelineSummaryService.get_summary(self.tenant)
+        other = PipelineSummaryService.get_summary(self.other_tenant)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pipeline = self.add_pipeline(SalesPipeline.Stage.LEAD, 10)
+        self.assertEqual(PipelineSummaryService.get_summary(self.tenant)['total_count'], 21)
+        with self.assertNumQueries(0):
+            self.assertEqual(PipelineSummaryService.get_summary(self.other_tenant), other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pipeline.move_to_stage(SalesPipeline.Stage.CLOSED_LOST)
+        self.assertEqual(PipelineSummaryService.get_summary(self.tenant)['lost_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pipeline.delete()
+        self.assertEqual(PipelineSummaryService.get_summary(self.tenant)['lost_count'], 0)
+
+
+class SalesExportTests(TestCase):
+    """Sales and pipeline exports stream every format with a fixed number of queries."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.other_tenant = Tenant.objects.create(name='Other', slug='other')
+        self.user = User.objects.create_user(
+            username='rep', password='x', role=User.Role.MANAGER, tenant=self.tenant,
+            first_name='Rita', last_name='Rep',
+        )
+        self.client_record = Client.objects.create(
+            tenant=self.tenant, email='c@example.com', first_name='Ada', last_name='Lovelace'
+        )
+        self.ring = Product.objects.create(
+            tenant=self.tenant, name='Ring', sku='R-1', cost_price=10, selling_price=20
+        )
+        self.sales = [self.add_sale(i, status) for i, status in enumerate(['pending', 'confirmed', 'pending'])]
+        for sale, quantities in zip(self.sales, [(1, 2), (3,), ()]):
+            for quantity in quantities:
+                SaleItem.objects.create(sale=sale, product=self.ring, quantity=quantity, unit_price=Decimal('20.50'))
+        self.add_sale(9, 'pending', tenant=self.other_tenant)
+        for stage in ('lead', 'lead', 'closed_won'):
+            SalesPipeline.objects.create(
+                title=f'Deal {stage}', client=self.client_record, sales_representative=self.user,
+                tenant=self.tenant, stage=stage, expected_value=500,
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def add_sale(self, i, status, tenant=None):
+        return Sale.objects.create(
+            order_number=f'ORD-{i}', client=self.client_record, sales_representative=self.user,
+            tenant=tenant or self.tenant, status=status, subtotal=100, total_amount='118.00',
+            notes='Engraved, "AL"' if i == 0 else None,
+        )
+
+    def url(self, name):
+        return '/api/sales/export/' if name == 'sales' else '/api/sales/pipeline/export/'
+
+    def export(self, name, **params):
+        response = self.api.get(self.url(name), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_sales_csv_has_a_line_per_item(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('sales', format='csv'))))
+        self.assertEqual(list(rows[0]), SALE_EXPORT_FIELDS + SALE_ITEM_EXPORT_FIELDS)
+        self.assertEqual([row['order_number'] for row in rows], ['ORD-2', 'ORD-1', 'ORD-0', 'ORD-0'])
+        self.assertEqual([row['item_quantity'] for row in rows], ['', '3', '1', '2'])
+        self.assertEqual(rows[3]['item_total_price'], '41.00')
+        self.assertEqual(rows[2]['notes'], 'Engraved, "AL"')
+        self.assertEqual(rows[0]['notes'], '')
+        self.assertEqual(rows[0]['client_name'], 'Ada Lovelace')
+        self.assertEqual(rows[0]['sales_representative_name'], 'Rita Rep')
+        self.assertEqual(rows[0]['created_at'], self.sales[2].created_at.isoformat())
+
+    def test_sales_json_and_ndjson_nest_the_items(self):
+        rows = json.loads(self.export('sales', format='json'))
+        self.assertEqual(rows, [json.loads(line) for line in self.export('sales', format='ndjson').splitlines()])
+        self.assertEqual(json.loads(self.export('sales')), rows)
+
+        self.assertEqual(list(rows[0]), SALE_EXPORT_FIELDS + ['items'])
+        self.assertEqual([len(row['items']) for row in rows], [0, 1, 2])
+        self.assertEqual(list(rows[2]['items'][0]), SALE_ITEM_EXPORT_FIELDS)
+        self.assertEqual(rows[2]['items'][1]['item_total_price'], '41.00')
+        self.assertEqual(rows[0]['total_amount'], '118.00')
+        self.assertEqual(rows[0]['client_id'], self.client_record.pk)
+        self.assertIsNone(rows[0]['notes'])
+
+    def test_pipeline_formats(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('pipeline', format='csv'))))
+        self.assertEqual(list(rows[0]), PIPELINE_EXPORT_FIELDS)
+        self.assertEqual(len(rows), 3)
+        data = json.loads(self.export('pipeline', format='json'))
+        self.assertEqual([row['title'] for row in data], [row['title'] for row in rows])
+        self.assertEqual(data[0]['expected_value'], '500.00')
+        self.assertEqual(data[0]['sales_representative_id'], self.user.pk)
+
+    def test_filters(self):
+        now = timezone.now()
+        Sale.objects.filter(pk=self.sales[0].pk).update(created_at=now - timedelta(days=10))
+        Sale.objects.filter(pk=self.sales[1].pk).update(created_at=now - timedelta(days=5))
+
+        def orders(**params):
+            return [row['order_number'] for row in json.loads(self.export('sales', **params))]
+
+        day = lambda days: timezone.localdate(now - timedelta(days=days)).isoformat()
+        self.assertEqual(orders(status='pending'), ['ORD-2', 'ORD-0'])
+        self.assertEqual(orders(start_date=day(5)), ['ORD-2', 'ORD-1'])
+        self.assertEqual(orders(end_date=day(5)), ['ORD-1', 'ORD-0'])
+        self.assertEqual(orders(start_date=day(10), end_date=day(10)), ['ORD-0'])
+        self.assertEqual(orders(start_date=day(5), status='pending'), ['ORD-2'])
+
+        stages = [row['stage'] for row in json.loads(self.export('pipeline', stage='lead'))]
+        self.assertEqual(stages, ['lead', 'lead'])
+
+        for name, params in [
+            ('sales', {'status': 'nope'}), ('sales', {'start_date': '2025-13-01'}),
+            ('sales', {'format': 'xml'}), ('pipeline', {'stage': 'nope'}), ('pipeline', {'end_date': 'x'}),
+        ]:
+            self.assertEqual(self.api.get(self.url(name), params).status_code, 400)
+
+    def test_queries_per_chunk_not_per_row(self):
+        # One query for the sales and one item query per chunk of two
+        with mock.patch('apps.sales.exports.EXPORT_CHUNK_SIZE', 2):
+            with self.assertNumQueries(3):
+                self.export('sales', format='csv')
+            self.add_sale(3, 'pending')
+            with self.assertNumQueries(3):
+                self.export('sales', format='csv')
+            self.add_sale(4, 'pending')
+            with self.assertNumQueries(4):
+                self.export('sales', format='csv')
+            with self.assertNumQueries(1):
+                self.export('pipeline', format='csv')
+
+    def test_query_errors_answer_500(self):
+        def failing_rows(*args, **kwargs):
+            raise RuntimeError('boom')
+            yield
+
+        api = APIClient(raise_request_exception=False)
+        api.force_authenticate(self.user)
+        with mock.patch.object(SalesExportView, 'export_rows', staticmethod(failing_rows)):
+            response = api.get(self.url('sales'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 500)
 
-# Create your tests here.
+    def test_export_views_must_name_their_rows(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'IncompleteExportView must set export_rows'):
+            class IncompleteExportView(StreamingExportMixin, generics.GenericAPIView):
+                export_name = 'incomplete'
+                export_fields = SALE_EXPORT_FIELDS
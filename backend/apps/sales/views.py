@@ -2,12 +2,19 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Avg, Q
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Avg, Q
 from django.utils import timezone
-from datetime import datetime, timedelta
-from decimal import Decimal
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+from shared.exports import iter_csv, iter_json_array, iter_ndjson, open_rows, streaming_export_response
+from .exports import (
+    PIPELINE_EXPORT_FIELDS, SALE_EXPORT_FIELDS, SALE_ITEM_EXPORT_FIELDS,
+    iter_pipeline_export_rows, iter_sale_export_rows,
+)
 from .models import Sale, SaleItem, SalesPipeline
 from .serializers import SaleSerializer, SaleItemSerializer, SalesPipelineSerializer
+from .services import PipelineSummaryService
 
 
 class SaleListView(generics.ListAPIView):
@@ -210,32 +217,13 @@ class PipelineStatsView(generics.GenericAPIView):
     
     def get(self, request):
         try:
-            tenant = request.user.tenant
-            
-            # Get all pipelines for the tenant
-            pipelines = SalesPipeline.objects.filter(tenant=tenant)
-            
-            # Calculate statistics
-            active_pipelines = pipelines.exclude(
-                stage__in=[SalesPipeline.Stage.CLOSED_WON, SalesPipeline.Stage.CLOSED_LOST]
-            )
-            
-            total_value = active_pipelines.aggregate(
-                total=Sum('expected_value')
-            )['total'] or Decimal('0')
-            
-            active_deals = active_pipelines.count()
-            total_deals = pipelines.count()
-            won_deals = pipelines.filter(stage=SalesPipeline.Stage.CLOSED_WON).count()
-            
-            conversion_rate = (won_deals / total_deals * 100) if total_deals > 0 else 0
-            avg_deal_size = (total_value / active_deals) if active_deals > 0 else 0
+            summary = PipelineSummaryService.get_summary(request.user.tenant)
             
             return Response({
-                'totalValue': float(total_value),
-                'activeDeals': active_deals,
-                'conversionRate': round(conversion_rate, 1),
-                'avgDealSize': float(avg_deal_size),
+                'totalValue': summary['active_value'],
+                'activeDeals': summary['active_count'],
+                'conversionRate': summary['conversion_rate'],
+                'avgDealSize': summary['avg_deal_size'],
             })
         except Exception as e:
             print(f"Error in PipelineStatsView: {str(e)}")
@@ -251,26 +239,17 @@ class PipelineStagesView(generics.GenericAPIView):
     
     def get(self, request):
         try:
-            tenant = request.user.tenant
+            summary = PipelineSummaryService.get_summary(request.user.tenant)
             
-            stages_data = []
-            for stage_code, stage_name in SalesPipeline.Stage.choices:
-                pipelines = SalesPipeline.objects.filter(
-                    tenant=tenant,
-                    stage=stage_code
-                )
-                
-                count = pipelines.count()
-                value = pipelines.aggregate(
-                    total=Sum('expected_value')
-                )['total'] or Decimal('0')
-                
-                stages_data.append({
-                    'label': stage_name,
-                    'value': float(value),
-                    'count': count,
-                    'color': self.get_stage_color(stage_code)
-                })
+            stages_data = [
+                {
+                    'label': stage['name'],
+                    'value': stage['value'],
+                    'count': stage['count'],
+                    'color': self.get_stage_color(stage['stage'])
+                }
+                for stage in summary['stages']
+            ]
             
             return Response(stages_data)
         except Exception as e:
@@ -303,35 +282,21 @@ class PipelineDashboardView(generics.GenericAPIView):
             tenant = request.user.tenant
             
             # Pipeline summary by stage
-            stage_summary = {}
-            for stage_code, stage_name in SalesPipeline.Stage.choices:
-                pipelines = SalesPipeline.objects.filter(
-                    tenant=tenant,
-                    stage=stage_code
-                )
-                
-                count = pipelines.count()
-                value = pipelines.aggregate(
-                    total=Sum('expected_value')
-                )['total'] or Decimal('0')
-                
-                stage_summary[stage_code] = {
-                    'name': stage_name,
-                    'count': count,
-                    'value': float(value),
-                    'percentage': 0  # Will be calculated below
+            summary = PipelineSummaryService.get_summary(tenant)
+            stage_summary = {
+                stage['stage']: {
+                    'name': stage['name'],
+                    'count': stage['count'],
+                    'value': stage['value'],
+                    'percentage': stage['percentage'],
                 }
-            
-            # Calculate percentages
-            total_pipelines = sum(stage['count'] for stage in stage_summary.values())
-            if total_pipelines > 0:
-                for stage in stage_summary.values():
-                    stage['percentage'] = round((stage['count'] / total_pipelines) * 100, 1)
+                for stage in summary['stages']
+            }
             
             # Recent activities
             recent_pipelines = SalesPipeline.objects.filter(
                 tenant=tenant
-            ).order_by('-updated_at')[:10]
+            ).select_related('client', 'sales_representative').order_by('-updated_at')[:10]
             
             # Upcoming actions - filter out closed pipelines
             upcoming_actions = SalesPipeline.objects.filter(
@@ -339,7 +304,7 @@ class PipelineDashboardView(generics.GenericAPIView):
                 next_action_date__gte=timezone.now()
             ).exclude(
                 stage__in=[SalesPipeline.Stage.CLOSED_WON, SalesPipeline.Stage.CLOSED_LOST]
-            ).order_by('next_action_date')[:5]
+            ).select_related('client', 'sales_representative').order_by('next_action_date')[:5]
             
             return Response({
                 'stage_summary': stage_summary,
@@ -354,60 +319,110 @@ class PipelineDashboardView(generics.GenericAPIView):
             )
 
 
-class SalesExportView(generics.GenericAPIView):
-    """Export sales data"""
-    permission_classes = [IsAuthenticated]
-    
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'json': (iter_json_array, 'application/json'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+class StreamingExportMixin:
+    """
+    Shared filtering and streaming for the sales and pipeline exports.
+    Views set ``export_name``, ``export_fields`` (the CSV columns) and
+    ``export_rows``, a function of ``(queryset, as_json)`` yielding the rows.
+    """
+    export_name = None
+    export_fields = None
+    export_rows = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in ('export_name', 'export_fields', 'export_rows') if getattr(cls, name) is None]
+        if missing:
+            raise ImproperlyConfigured(f'{cls.__name__} must set {", ".join(missing)}')
+
+    def filter_export_queryset(self, queryset):
+        """Apply ``start_date``/``end_date`` (YYYY-MM-DD, inclusive); raises ValueError."""
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        if start_date:
+            day = parse_date(start_date)
+            if day is None:
+                raise ValueError('Invalid start_date, expected YYYY-MM-DD')
+            queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(day, time.min)))
+        if end_date:
+            day = parse_date(end_date)
+            if day is None:
+                raise ValueError('Invalid end_date, expected YYYY-MM-DD')
+            next_day = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+            queryset = queryset.filter(created_at__lt=next_day)
+        return queryset
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``?format=csv`` names the export format, not a DRF renderer; error
+        # responses fall back to the default renderer instead of a 404.
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
-        """Export sales data in various formats"""
+        """Stream the export as CSV, JSON or NDJSON (``?format=``, default json)"""
         format_type = request.query_params.get('format', 'json')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        queryset = Sale.objects.filter(tenant=request.user.tenant)
-        
-        # Apply date filters if provided
-        if start_date and end_date:
-            queryset = queryset.filter(
-                created_at__date__range=[start_date, end_date]
-            )
-        
-        if format_type == 'json':
-            serializer = SaleSerializer(queryset, many=True)
-            return Response(serializer.data)
-        elif format_type == 'csv':
-            # TODO: Implement CSV export
-            return Response({'message': 'CSV export not implemented yet'})
-        else:
+        if format_type not in EXPORT_FORMATS:
             return Response(
                 {'error': 'Unsupported format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            queryset = self.filter_export_queryset(self.get_queryset())
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        writer, content_type = EXPORT_FORMATS[format_type]
+        as_json = format_type != 'csv'
+        rows = open_rows(self.export_rows(queryset, as_json=as_json))
+        chunks = writer(rows) if as_json else writer(rows, self.export_fields)
+        return streaming_export_response(
+            chunks,
+            content_type=content_type,
+            filename=f'{self.export_name}_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{format_type}',
+        )
+
+
+class SalesExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Export sales data, one CSV line per sale item"""
+    permission_classes = [IsAuthenticated]
+    export_name = 'sales'
+    export_fields = SALE_EXPORT_FIELDS + SALE_ITEM_EXPORT_FIELDS
+    export_rows = staticmethod(iter_sale_export_rows)
+    
+    def get_queryset(self):
+        return Sale.objects.filter(tenant=self.request.user.tenant)
+    
+    def filter_export_queryset(self, queryset):
+        queryset = super().filter_export_queryset(queryset)
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            if status_filter not in Sale.Status.values:
+                raise ValueError('Invalid status')
+            queryset = queryset.filter(status=status_filter)
+        return queryset
 
 
-class PipelineExportView(generics.GenericAPIView):
+class PipelineExportView(StreamingExportMixin, generics.GenericAPIView):
     """Export pipeline data"""
     permission_classes = [IsAuthenticated]
+    export_name = 'pipeline'
+    export_fields = PIPELINE_EXPORT_FIELDS
+    export_rows = staticmethod(iter_pipeline_export_rows)
     
-    def get(self, request):
-        """Export pipeline data in various formats"""
-        format_type = request.query_params.get('format', 'json')
-        stage_filter = request.query_params.get('stage')
-        
-        queryset = SalesPipeline.objects.filter(tenant=request.user.tenant)
-        
-        # Apply stage filter if provided
+    def get_queryset(self):
+        return SalesPipeline.objects.filter(tenant=self.request.user.tenant)
+    
+    def filter_export_queryset(self, queryset):
+        queryset = super().filter_export_queryset(queryset)
+        stage_filter = self.request.query_params.get('stage')
         if stage_filter:
+            if stage_filter not in SalesPipeline.Stage.values:
+                raise ValueError('Invalid stage')
             queryset = queryset.filter(stage=stage_filter)
-        
-        if format_type == 'json':
-            serializer = SalesPipelineSerializer(queryset, many=True)
-            return Response(serializer.data)
-        elif format_type == 'csv':
-            # TODO: Implement CSV export
-            return Response({'message': 'CSV export not implemented yet'})
-        else:
-            return Response(
-                {'error': 'Unsupported format'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return queryset
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+RESPONSE_HOURS = {'critical': 4, 'high': 8, 'medium': 24, 'low': 48}
+
+
+def backfill_response_due_at(apps, schema_editor):
+    SupportTicket = apps.get_model('support', 'SupportTicket')
+    for priority, hours in RESPONSE_HOURS.items():
+        SupportTicket.objects.filter(priority=priority).update(
+            response_due_at=F('created_at') + timedelta(hours=hours)
+        )
+    # Tickets already overdue were reported by the old per-call check
+    SupportTicket.objects.filter(response_due_at__lte=timezone.now()).update(
+        overdue_notified_at=F('response_due_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportticket',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, help_text='When the SLA sweeper reported this ticket overdue', null=True),
+        ),
+        migrations.AddField(
+            model_name='supportticket',
+            name='response_due_at',
+            field=models.DateTimeField(blank=True, help_text='When a platform admin should have picked the ticket up', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['status', 'response_due_at'], name='ticket_status_response_due_idx'),
+        ),
+        migrations.RunPython(backfill_response_due_at, migrations.RunPython.noop),
+    ]
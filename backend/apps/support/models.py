@@ -1,12 +1,16 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from shared.sla import SLAModelMixin
+
 User = get_user_model()
 
 
-class SupportTicket(models.Model):
+class SupportTicket(SLAModelMixin, models.Model):
     """
     Support ticket model for handling business admin issues and platform admin responses.
     """
@@ -23,6 +27,14 @@ class SupportTicket(models.Model):
         CLOSED = 'closed', _('Closed')
         REOPENED = 'reopened', _('Reopened')
 
+    # Hours a ticket may wait for a platform admin, by priority
+    RESPONSE_HOURS = {
+        Priority.CRITICAL: 4,
+        Priority.HIGH: 8,
+        Priority.MEDIUM: 24,
+        Priority.LOW: 48,
+    }
+
     class Category(models.TextChoices):
         TECHNICAL = 'technical', _('Technical Issue')
         BILLING = 'billing', _('Billing & Subscription')
@@ -87,10 +99,26 @@ class SupportTicket(models.Model):
     callback_phone = models.CharField(max_length=15, blank=True, null=True)
     callback_preferred_time = models.CharField(max_length=100, blank=True, null=True)
 
+    # SLA
+    response_due_at = models.DateTimeField(
+        null=True, blank=True, help_text=_('When a platform admin should have picked the ticket up')
+    )
+    overdue_notified_at = models.DateTimeField(
+        null=True, blank=True, help_text=_('When the SLA sweeper reported this ticket overdue')
+    )
+
+    sla_deadline_field = 'response_due_at'
+    sla_open_statuses = [Status.OPEN, Status.IN_PROGRESS]
+    sla_deadline_inputs = ('priority',)
+
     class Meta:
         verbose_name = _('Support Ticket')
         verbose_name_plural = _('Support Tickets')
         ordering = ['-created_at']
+        indexes = [
+            # The SLA sweeper: status IN (...) AND response_due_at <= now
+            models.Index(fields=['status', 'response_due_at'], name='ticket_status_response_due_idx'),
+        ]
 
     def __str__(self):
         return f"#{self.ticket_id} - {self.title}"
@@ -119,6 +147,9 @@ class SupportTicket(models.Model):
         
         super().save(*args, **kwargs)
 
+    def compute_sla_deadline(self):
+        return (self.created_at or timezone.now()) + timedelta(hours=self.RESPONSE_HOURS.get(self.priority, 24))
+
     @property
     def is_open(self):
         return self.status in [self.Status.OPEN, self.Status.IN_PROGRESS, self.Status.REOPENED]
@@ -1,7 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .models import SupportTicket, SupportNotification
-from django.db import models
+from apps.tenants.models import Tenant
+from django.db import models, transaction
+
+from shared.notifications import create_notifications, fan_out
+from shared.sla import claim_overdue
 
 User = get_user_model()
 
@@ -11,19 +15,22 @@ class SupportTicketService:
     Service class for support ticket business logic and notifications.
     """
     
+    @staticmethod
+    def platform_admin_ids():
+        """Ids of every platform admin, the recipients of ticket-wide notifications"""
+        return list(User.objects.filter(role='platform_admin').values_list('id', flat=True))
+
     @staticmethod
     def notify_platform_admins(ticket):
         """Send notification to all platform admins about new ticket"""
-        platform_admins = User.objects.filter(role='platform_admin')
-        
-        for admin in platform_admins:
-            SupportNotification.objects.create(
-                ticket=ticket,
-                recipient=admin,
-                notification_type=SupportNotification.NotificationType.TICKET_CREATED,
-                title=f"New Support Ticket: {ticket.ticket_id}",
-                message=f"New {ticket.priority} priority ticket from {ticket.tenant.name}: {ticket.title}"
-            )
+        fan_out(
+            SupportNotification,
+            SupportTicketService.platform_admin_ids(),
+            ticket=ticket,
+            notification_type=SupportNotification.NotificationType.TICKET_CREATED,
+            title=f"New Support Ticket: {ticket.ticket_id}",
+            message=f"New {ticket.priority} priority ticket from {ticket.tenant.name}: {ticket.title}"
+        )
     
     @staticmethod
     def notify_ticket_resolved(ticket):
@@ -61,16 +68,14 @@ class SupportTicketService:
     @staticmethod
     def notify_ticket_reopened(ticket):
         """Notify platform admins when ticket is reopened"""
-        platform_admins = User.objects.filter(role='platform_admin')
-        
-        for admin in platform_admins:
-            SupportNotification.objects.create(
-                ticket=ticket,
-                recipient=admin,
-                notification_type=SupportNotification.NotificationType.TICKET_REOPENED,
-                title=f"Ticket Reopened: {ticket.ticket_id}",
-                message=f"Support ticket #{ticket.ticket_id} has been reopened by {ticket.created_by.get_full_name()}. Issue persists."
-            )
+        fan_out(
+            SupportNotification,
+            SupportTicketService.platform_admin_ids(),
+            ticket=ticket,
+            notification_type=SupportNotification.NotificationType.TICKET_REOPENED,
+            title=f"Ticket Reopened: {ticket.ticket_id}",
+            message=f"Support ticket #{ticket.ticket_id} has been reopened by {ticket.created_by.get_full_name()}. Issue persists."
+        )
     
     @staticmethod
     def notify_message_received(ticket, message, specific_recipient=None):
@@ -86,30 +91,26 @@ class SupportTicketService:
             )
         else:
             # Notify all platform admins
-            platform_admins = User.objects.filter(role='platform_admin')
-            
-            for admin in platform_admins:
-                SupportNotification.objects.create(
-                    ticket=ticket,
-                    recipient=admin,
-                    notification_type=SupportNotification.NotificationType.MESSAGE_RECEIVED,
-                    title=f"New Message: {ticket.ticket_id}",
-                    message=f"New message from {message.sender.get_full_name()}: {message.content[:100]}..."
-                )
+            fan_out(
+                SupportNotification,
+                SupportTicketService.platform_admin_ids(),
+                ticket=ticket,
+                notification_type=SupportNotification.NotificationType.MESSAGE_RECEIVED,
+                title=f"New Message: {ticket.ticket_id}",
+                message=f"New message from {message.sender.get_full_name()}: {message.content[:100]}..."
+            )
     
     @staticmethod
     def notify_callback_requested(ticket):
         """Notify platform admins about callback request"""
-        platform_admins = User.objects.filter(role='platform_admin')
-        
-        for admin in platform_admins:
-            SupportNotification.objects.create(
-                ticket=ticket,
-                recipient=admin,
-                notification_type=SupportNotification.NotificationType.CALLBACK_REQUESTED,
-                title=f"Callback Requested: {ticket.ticket_id}",
-                message=f"Business admin {ticket.created_by.get_full_name()} has requested a callback for ticket #{ticket.ticket_id}. Phone: {ticket.callback_phone}, Preferred time: {ticket.callback_preferred_time}"
-            )
+        fan_out(
+            SupportNotification,
+            SupportTicketService.platform_admin_ids(),
+            ticket=ticket,
+            notification_type=SupportNotification.NotificationType.CALLBACK_REQUESTED,
+            title=f"Callback Requested: {ticket.ticket_id}",
+            message=f"Business admin {ticket.created_by.get_full_name()} has requested a callback for ticket #{ticket.ticket_id}. Phone: {ticket.callback_phone}, Preferred time: {ticket.callback_preferred_time}"
+        )
     
     @staticmethod
     def auto_assign_ticket(ticket):
@@ -134,46 +135,37 @@ class SupportTicketService:
         return None
     
     @staticmethod
-    def check_overdue_tickets():
-        """Check for overdue tickets and send notifications"""
-        from datetime import timedelta
-        
-        # Define response time limits based on priority
-        time_limits = {
-            'critical': 4,
-            'high': 8,
-            'medium': 24,
-            'low': 48
-        }
-        
-        now = timezone.now()
+    def check_overdue_tickets(tenant=None, now=None):
+        """
+        Notify platform admins of unassigned tickets that went past their
+        response deadline since the last check; each ticket is reported once
+        """
+        tenant_ids = [tenant.pk] if tenant is not None else Tenant.objects.values_list('id', flat=True)
         overdue_tickets = []
-        
-        for priority, hours in time_limits.items():
-            limit_time = now - timedelta(hours=hours)
-            
-            overdue = SupportTicket.objects.filter(
-                priority=priority,
-                status__in=['open', 'in_progress'],
-                created_at__lt=limit_time,
-                assigned_to__isnull=True  # Only unassigned tickets
-            )
-            
-            overdue_tickets.extend(list(overdue))
-        
-        # Send notifications for overdue tickets
-        for ticket in overdue_tickets:
-            platform_admins = User.objects.filter(role='platform_admin')
-            
-            for admin in platform_admins:
-                SupportNotification.objects.create(
-                    ticket=ticket,
-                    recipient=admin,
-                    notification_type=SupportNotification.NotificationType.TICKET_UPDATED,
-                    title=f"Overdue Ticket: {ticket.ticket_id}",
-                    message=f"Support ticket #{ticket.ticket_id} is overdue for {ticket.priority} priority issue. Please assign and respond."
+        admin_ids = None
+        for tenant_id in tenant_ids:
+            # The reported stamp commits with the notifications or not at all
+            with transaction.atomic():
+                tickets = claim_overdue(
+                    SupportTicket.objects.filter(tenant_id=tenant_id, assigned_to__isnull=True), now=now
                 )
-        
+                if not tickets:
+                    continue
+                if admin_ids is None:
+                    admin_ids = SupportTicketService.platform_admin_ids()
+                create_notifications(SupportNotification, [
+                    SupportNotification(
+                        ticket=ticket,
+                        recipient_id=admin_id,
+                        notification_type=SupportNotification.NotificationType.TICKET_UPDATED,
+                        title=f"Overdue Ticket: {ticket.ticket_id}",
+                        message=f"Support ticket #{ticket.ticket_id} is overdue for {ticket.priority} priority issue. Please assign and respond."
+                    )
+                    for ticket in tickets
+                    for admin_id in admin_ids
+                ])
+            overdue_tickets.extend(tickets)
+
         return overdue_tickets
     
     @staticmethod
@@ -0,0 +1,18 @@
+from shared.notifications import push_new_notifications
+
+from .models import SupportNotification
+
+
+def notification_event(notification):
+    return {
+        'source': 'support',
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'ticket': notification.ticket_id,
+        'created_at': notification.created_at,
+    }
+
+
+push_notifications = push_new_notifications(SupportNotification, notification_event)
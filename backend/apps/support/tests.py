@@ -0,0 +1,116 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import models
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import isolate_apps
+from django.utils import timezone
+
+from apps.tenants.models import Tenant
+from apps.users.models import User
+from shared.notifications import notifications_created
+from shared.sla import SLAModelMixin
+
+from .models import SupportNotification, SupportTicket
+from .services import SupportTicketService
+
+
+class NotificationFanOutTests(TestCase):
+    """Notifications to every platform admin are written in one go."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.owner = User.objects.create_user(
+            username='owner', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.admins = [
+            User.objects.create_user(username=f'admin{i}', password='x', role=User.Role.PLATFORM_ADMIN)
+            for i in range(3)
+        ]
+        self.written = []
+        notifications_created.connect(self.record, sender=SupportNotification)
+        self.addCleanup(notifications_created.disconnect, self.record, sender=SupportNotification)
+
+    def record(self, sender, instances, **kwargs):
+        self.written.append(len(instances))
+
+    def ticket(self, priority=SupportTicket.Priority.MEDIUM):
+        return SupportTicket.objects.create(
+            title='Broken', summary='-', priority=priority, created_by=self.owner, tenant=self.tenant
+        )
+
+    def test_new_ticket_notifies_every_admin_with_one_insert(self):
+        ticket = self.ticket()
+        with self.assertNumQueries(2):
+            SupportTicketService.notify_platform_admins(ticket)
+        self.assertEqual(
+            set(SupportNotification.objects.filter(ticket=ticket).values_list('recipient_id', flat=True)),
+            {admin.pk for admin in self.admins},
+        )
+        self.assertEqual(self.written, [3])
+
+    def test_new_notifications_are_pushed_to_their_recipients(self):
+        ticket = self.ticket()
+        with mock.patch('shared.notifications.publish') as publish:
+            SupportTicketService.notify_platform_admins(ticket)
+            SupportNotification.objects.create(
+                recipient=self.owner, ticket=ticket, title='Reply', message='-', notification_type='ticket_updated'
+            )
+        channels = sorted(call.args[0][0] for call in publish.call_args_list)
+        self.assertEqual(channels, sorted(f'user:{user.pk}' for user in [*self.admins, self.owner]))
+        self.assertEqual({call.args[2]['ticket'] for call in publish.call_args_list}, {ticket.pk})
+        self.assertEqual({call.args[2]['source'] for call in publish.call_args_list}, {'support'})
+
+    def test_overdue_tickets_are_reported_once(self):
+        for _ in range(4):
+            self.ticket(SupportTicket.Priority.CRITICAL)
+        self.ticket(SupportTicket.Priority.LOW)
+        later = timezone.now() + timedelta(hours=5)
+
+        # Tenants, then per tenant one range query and its stamp, the admins
+        # and one insert, in one savepoint with the claim's own inside it
+        with self.assertNumQueries(9):
+            overdue = SupportTicketService.check_overdue_tickets(now=later)
+        self.assertEqual(len(overdue), 4)
+        self.assertEqual(
+            SupportNotification.objects.filter(
+                notification_type=SupportNotification.NotificationType.TICKET_UPDATED
+            ).count(),
+            12,
+        )
+        self.assertEqual(self.written, [12])
+        self.assertEqual(SupportTicketService.check_overdue_tickets(now=later), [])
+
+    def test_failed_notifications_leave_tickets_unreported(self):
+        self.ticket(SupportTicket.Priority.CRITICAL)
+        later = timezone.now() + timedelta(hours=5)
+        with mock.patch('apps.support.services.create_notifications', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                SupportTicketService.check_overdue_tickets(now=later)
+        self.assertFalse(SupportTicket.objects.filter(overdue_notified_at__isnull=False).exists())
+        self.assertEqual(len(SupportTicketService.check_overdue_tickets(now=later)), 1)
+
+    def test_priority_change_moves_the_deadline(self):
+        ticket = self.ticket(SupportTicket.Priority.LOW)
+        self.assertAlmostEqual(
+            ticket.response_due_at, ticket.created_at + timedelta(hours=48), delta=timedelta(seconds=1)
+        )
+        ticket = SupportTicket.objects.get(pk=ticket.pk)
+        ticket.priority = SupportTicket.Priority.HIGH
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertAlmostEqual(
+            ticket.response_due_at, ticket.created_at + timedelta(hours=8), delta=timedelta(seconds=1)
+        )
+
+
+class SLAModelCheckTests(SimpleTestCase):
+    @isolate_apps('apps.support')
+    def test_models_without_a_deadline_rule_fail_the_checks(self):
+        class Undated(SLAModelMixin, models.Model):
+            status = models.CharField(max_length=20)
+            due_date = models.DateTimeField(null=True)
+            overdue_notified_at = models.DateTimeField(null=True)
+
+        self.assertEqual([error.id for error in Undated.check()], ['shared.E001'])
+        self.assertEqual(SupportTicket.check(), [])
@@ -1,3 +1,5 @@
+import logging
+
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -26,6 +28,9 @@ from django.shortcuts import render
 from django.db.models import Q
 from .models import User
 from .serializers import UserSerializer
+from shared.logs import lazy
+
+logger = logging.getLogger(__name__)
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -162,8 +167,8 @@ class UserCreateView(generics.CreateAPIView):
                 if not created_user.is_active:
                     created_user.is_active = True
                     created_user.save()
-            except Exception as e:
-                print('Could not set user as active:', e)
+            except Exception:
+                logger.exception('Could not set user %s as active', response.data['id'])
         return response
 
 
@@ -220,13 +225,11 @@ class TeamMemberListView(generics.ListCreateAPIView):
 
     def create(self, request, *args, **kwargs):
         """Override create method to add debugging and better error handling."""
+        logger.debug('Team member create: %s', request.data)
         try:
-            print(f"TeamMemberListView.create called with data: {request.data}")
             return super().create(request, *args, **kwargs)
-        except Exception as e:
-            print(f"Error in TeamMemberListView.create: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception('Team member create failed')
             raise
 
     def get_queryset(self):
@@ -234,48 +237,36 @@ class TeamMemberListView(generics.ListCreateAPIView):
         user = self.request.user
         queryset = TeamMember.objects.all()
 
-        print(f"TeamMemberListView.get_queryset - User: {user.username}, Role: {user.role}, Tenant: {user.tenant}, Store: {user.store}")
-        print(f"Request headers: {dict(self.request.headers)}")
-
         if user.is_platform_admin:
-            print("User is platform admin - showing all team members")
             pass
         elif user.is_business_admin and user.tenant:
-            print(f"User is business admin - filtering by tenant: {user.tenant}")
             queryset = queryset.filter(user__tenant=user.tenant)
         elif user.is_manager and user.tenant and user.store:
             # Managers can see all team members in their store
-            print(f"User is manager - filtering by tenant: {user.tenant} and store: {user.store}")
             queryset = queryset.filter(user__tenant=user.tenant, user__store=user.store)
         elif user.is_manager and user.tenant:
             # Managers without specific store can see all team members in their tenant
-            print(f"User is manager without store - filtering by tenant: {user.tenant}")
             queryset = queryset.filter(user__tenant=user.tenant)
         elif user.role == 'tele_caller' and user.tenant and user.store:
-            print(f"User is tele_caller - filtering by tenant: {user.tenant} and store: {user.store}")
             queryset = queryset.filter(user__tenant=user.tenant, user__store=user.store, user__role='tele_caller')
         else:
-            print(f"User is other role - showing only self")
             queryset = queryset.filter(user=user)
 
         store_id = self.request.query_params.get('store')
         if store_id:
-            print(f"Additional store filter: {store_id}")
             queryset = queryset.filter(user__store_id=store_id)
 
-        print(f"Final queryset count: {queryset.count()}")
-        
-        # Print the actual team members being returned
-        for tm in queryset[:5]:  # Show first 5 for debugging
-            print(f"  - {tm.user.get_full_name()} ({tm.user.username}) - Role: {tm.user.role}")
-        
+        logger.debug(
+            'Team members for %s (role=%s, tenant=%s, store=%s): %s',
+            user.username, user.role, user.tenant_id, user.store_id, lazy(lambda: queryset.query),
+        )
         return queryset
 
 
     def perform_create(self, serializer):
         """Set tenant for new team members."""
         user = self.request.user
-        print(f"TeamMemberListView.perform_create for user: {user.username}, role: {user.role}")
+        logger.debug('Team member create by %s (role=%s)', user.username, user.role)
 
         # Restrict manager to only create certain roles
         if user.role == 'manager':
@@ -293,7 +284,7 @@ class TeamMemberListView(generics.ListCreateAPIView):
                     pass
 
         team_member = serializer.save()
-        print(f"Team member created successfully: {team_member.id}")
+        logger.debug('Team member %s created', team_member.id)
         
         # Update manager if provided
         manager_id = self.request.data.get('manager')
@@ -303,8 +294,7 @@ class TeamMemberListView(generics.ListCreateAPIView):
                 team_member.manager = manager
                 team_member.save()
             except TeamMember.DoesNotExist:
-                print(f"Manager with ID {manager_id} not found")
-                pass
+                logger.debug('Manager %s not found for team member %s', manager_id, team_member.id)
         
         # Log activity
         TeamMemberActivity.objects.create(
@@ -323,18 +313,16 @@ class TeamMemberCreateView(generics.CreateAPIView):
 
     def create(self, request, *args, **kwargs):
         """Override create method to add debugging and better error handling."""
+        logger.debug('Team member create: %s', request.data)
         try:
-            print(f"Creating team member with data: {request.data}")
             return super().create(request, *args, **kwargs)
-        except Exception as e:
-            print(f"Error creating team member: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception('Team member create failed')
             raise
 
     def perform_create(self, serializer):
         user = self.request.user
-        print(f"Performing create for user: {user.username}, role: {user.role}")
+        logger.debug('Team member create by %s (role=%s)', user.username, user.role)
 
         # Restrict manager to only create certain roles
         if user.role == 'manager':
@@ -352,7 +340,7 @@ class TeamMemberCreateView(generics.CreateAPIView):
                     pass
 
         team_member = serializer.save()
-        print(f"Team member created successfully: {team_member.id}")
+        logger.debug('Team member %s created', team_member.id)
         
         # Update manager if provided
         manager_id = self.request.data.get('manager')
@@ -362,8 +350,7 @@ class TeamMemberCreateView(generics.CreateAPIView):
                 team_member.manager = manager
                 team_member.save()
             except TeamMember.DoesNotExist:
-                print(f"Manager with ID {manager_id} not found")
-                pass
+                logger.debug('Manager %s not found for team member %s', manager_id, team_member.id)
 
 
 class TeamMemberUpdateView(generics.UpdateAPIView):
@@ -428,24 +415,21 @@ class TeamMemberUpdateView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         """Override update method to return proper response."""
         try:
-            print(f"Update request data: {request.data}")
             partial = kwargs.pop('partial', False)
             instance = self.get_object()
-            print(f"Updating team member: {instance.id}, user: {instance.user.id}")
+            logger.debug('Team member %s update: %s', instance.id, request.data)
             
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             serializer.is_valid(raise_exception=True)
             self.perform_update(serializer)
             
-            print(f"Update successful for team member: {instance.id}")
-            
             return Response({
                 'success': True,
                 'message': 'Team member updated successfully',
                 'data': serializer.data
             }, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Update error: {e}")
+            logger.warning('Team member update failed: %s', e)
             return Response({
                 'success': False,
                 'message': str(e)
@@ -568,8 +552,8 @@ class TeamMemberDetailView(generics.RetrieveUpdateDestroyAPIView):
         """Override update method to add debugging."""
         try:
             return super().update(request, *args, **kwargs)
-        except Exception as e:
-            print(f"Update error: {e}")
+        except Exception:
+            logger.exception('Team member update failed')
             raise
 
     def perform_destroy(self, instance):
@@ -774,24 +758,15 @@ class MessagingUsersView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        print(f"[MessagingUsersView] Current user: {user.username}, tenant: {user.tenant}")
-        
         queryset = User.objects.filter(is_active=True)
-        print(f"[MessagingUsersView] Initial queryset count: {queryset.count()}")
         
         # Filter by tenant
-        if user.tenant:
-            queryset = queryset.filter(tenant=user.tenant)
-            print(f"[MessagingUsersView] After tenant filter count: {queryset.count()}")
+        if user.tenant_id:
+            queryset = queryset.filter(tenant_id=user.tenant_id)
         
         # Exclude the current user from the list
         queryset = queryset.exclude(id=user.id)
-        print(f"[MessagingUsersView] After excluding current user count: {queryset.count()}")
-        
-        # Print some sample users
-        sample_users = list(queryset[:3].values('username', 'first_name', 'last_name', 'role'))
-        print(f"[MessagingUsersView] Sample users: {sample_users}")
-        
+        logger.debug('Messaging users for %s (tenant=%s): %s', user.username, user.tenant_id, lazy(lambda: queryset.query))
         return queryset
     
     def get_serializer_class(self):
@@ -916,7 +891,7 @@ def login_view(request):
     username = request.data.get('username')
     password = request.data.get('password')
     
-    print(f"Login attempt - Username: {username}, Password: {password}")
+    logger.debug('Login attempt for %s', username)
     
     if not username or not password:
         return Response({
@@ -925,36 +900,34 @@ def login_view(request):
     
     # Try to authenticate
     user = authenticate(username=username, password=password)
-    print(f"Authenticate result: {user}")
     
     if user is None:
         # If authentication fails, try to find user and check demo passwords
         try:
             user = User.objects.get(username=username)
-            print(f"Found user: {user.username}, checking demo passwords")
             
             # Check multiple demo passwords
             demo_passwords = ['demo123', 'password123', 'admin123']
             if password in demo_passwords:
-                print(f"Demo password accepted: {password}")
+                logger.info('Demo password accepted for %s', user.username)
             else:
-                print(f"Demo password rejected. Expected one of: {demo_passwords}, Got: {password}")
+                logger.info('Login failed for %s', username)
                 return Response({
                     'error': 'Invalid credentials'
                 }, status=status.HTTP_401_UNAUTHORIZED)
         except User.DoesNotExist:
-            print(f"User not found: {username}")
+            logger.info('Login failed for unknown user %s', username)
             return Response({
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
     
     if not user.is_active:
-        print(f"User is inactive: {user.username}")
+        logger.info('Login refused for inactive user %s', user.username)
         return Response({
             'error': 'User account is disabled'
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    print(f"Login successful for user: {user.username}")
+    logger.debug('Login successful for %s', user.username)
     # Generate tokens
     refresh = RefreshToken.for_user(user)
     
@@ -1073,31 +1046,24 @@ def team_members_list(request):
     from .serializers import TeamMemberListSerializer
     user = request.user
     
-    print(f"team_members_list - User: {user.username}, Role: {user.role}, Tenant: {user.tenant}, Store: {user.store}")
-    
     # Filter team members based on user's role, tenant, and store
     if user.is_platform_admin:
         # Platform admin can see all team members
-        print("User is platform admin - showing all team members")
         team_members = TeamMember.objects.filter(user__is_active=True)
     elif user.is_business_admin and user.tenant:
         # Business admin can only see team members from their tenant
-        print(f"User is business admin - filtering by tenant: {user.tenant}")
         team_members = TeamMember.objects.filter(user__is_active=True, user__tenant=user.tenant)
     elif user.is_manager and user.tenant and user.store:
         # Manager can see all team members in their store
-        print(f"User is manager - filtering by tenant: {user.tenant} and store: {user.store}")
         team_members = TeamMember.objects.filter(user__is_active=True, user__tenant=user.tenant, user__store=user.store)
     elif user.is_manager and user.tenant:
         # Manager without specific store can see all team members in their tenant
-        print(f"User is manager without store - filtering by tenant: {user.tenant}")
         team_members = TeamMember.objects.filter(user__is_active=True, user__tenant=user.tenant)
     else:
         # Other users can only see themselves
-        print(f"User is other role - showing only self")
         team_members = TeamMember.objects.filter(user__is_active=True, user=user)
     
-    print(f"Found {team_members.count()} team members")
+    logger.debug('Team members for %s (role=%s): %s', user.username, user.role, lazy(lambda: team_members.query))
     serializer = TeamMemberListSerializer(team_members, many=True)
     return Response(serializer.data)
 
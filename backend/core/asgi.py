@@ -2,6 +2,12 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The Docker image serves it with gunicorn's uvicorn workers
+(``gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker``), which
+the server-sent event stream at ``/api/events/`` needs: each open stream
+waits on the event loop instead of holding a worker, which WSGI cannot do.
+For local development run ``uvicorn core.asgi:application --reload``;
+``runserver`` is WSGI and answers 501 on the stream.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,240 @@
+"""
+Per-request performance metrics.
+
+``RequestMetricsMiddleware`` times every request and, through a database
+execute wrapper, counts its queries and the time spent in them; serializer
+time is what the request spent producing DRF ``serializer.data``. The figures
+are aggregated per resolved URL name into fixed-bucket histograms plus a
+bounded window of recent samples for percentiles, served by the metrics
+endpoint. Requests over ``REQUEST_QUERY_BUDGET`` queries or
+``REQUEST_LATENCY_BUDGET_MS`` milliseconds are logged as warnings.
+
+Metrics are kept in process memory, so each worker reports its own traffic
+since it started; nothing is written per request beyond a lock-protected
+update of a few counters.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; the last bucket is open ended
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+QUERY_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+PERCENTILES = [50, 90, 95, 99]
+
+UNRESOLVED = '<unresolved>'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestTimer:
+    """Query count and DB, serializer and total time of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def _timed_data(data):
+    def wrapper(serializer):
+        timer = _current.get()
+        if timer is None or timer._serializer_depth:
+            # Nested serializers are part of the outermost one's time
+            return data.fget(serializer)
+        timer._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            timer._serializer_depth -= 1
+            timer.serializer_time += time.perf_counter() - started
+    return property(wrapper)
+
+
+_serializer_lock = threading.Lock()
+
+
+def _instrument_serializers():
+    # Serializer.data and ListSerializer.data both go through BaseSerializer.data
+    with _serializer_lock:
+        if not getattr(BaseSerializer, '_request_metrics_timed', False):
+            BaseSerializer.data = _timed_data(BaseSerializer.data)
+            BaseSerializer._request_metrics_timed = True
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        cumulative = 0
+        buckets = {}
+        for label, count in zip(labels, self.counts):
+            cumulative += count
+            buckets[label] = cumulative
+        return buckets
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RouteStats:
+    FIELDS = ['latency_ms', 'db_ms', 'serializer_ms', 'queries']
+
+    def __init__(self, sample_size):
+        self.count = 0
+        self.errors = 0
+        self.over_budget = 0
+        self.totals = dict.fromkeys(self.FIELDS, 0.0)
+        self.maximums = dict.fromkeys(self.FIELDS, 0.0)
+        self.samples = {field: deque(maxlen=sample_size) for field in self.FIELDS}
+        self.latency_histogram = Histogram(LATENCY_BUCKETS_MS)
+        self.query_histogram = Histogram(QUERY_BUCKETS)
+
+    def observe(self, sample, status_code, over_budget):
+        self.count += 1
+        self.errors += status_code >= 500
+        self.over_budget += over_budget
+        for field, value in sample.items():
+            self.totals[field] += value
+            self.maximums[field] = max(self.maximums[field], value)
+            self.samples[field].append(value)
+        self.latency_histogram.observe(sample['latency_ms'])
+        self.query_histogram.observe(sample['queries'])
+
+    def as_dict(self):
+        result = {'count': self.count, 'errors': self.errors, 'over_budget': self.over_budget}
+        for field in self.FIELDS:
+            values = sorted(self.samples[field])
+            result[field] = {
+                'mean': round(self.totals[field] / self.count, 2) if self.count else None,
+                'max': round(self.maximums[field], 2),
+                **{f'p{pct}': round(percentile(values, pct), 2) if values else None for pct in PERCENTILES},
+            }
+        result['latency_ms']['histogram'] = self.latency_histogram.as_dict()
+        result['queries']['histogram'] = self.query_histogram.as_dict()
+        return result
+
+
+class MetricsRegistry:
+    """Thread-safe per-route statistics of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.started_at = time.time()
+
+    def observe(self, route, sample, status_code, over_budget=False):
+        sample_size = getattr(settings, 'REQUEST_METRICS_SAMPLE_SIZE', 1000)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats(sample_size)
+            stats.observe(sample, status_code, over_budget)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: stats.as_dict() for route, stats in sorted(self._routes.items())}
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at),
+            'routes': routes,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match._func_path
+
+
+class RequestMetricsMiddleware:
+    """Record query count and latencies of every request (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrument_serializers()
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            with connections['default'].execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, timer)
+        return response
+
+    @staticmethod
+    def record(request, response, timer):
+        route = _route(request)
+        sample = {
+            'latency_ms': timer.elapsed * 1000,
+            'db_ms': timer.db_time * 1000,
+            'serializer_ms': timer.serializer_time * 1000,
+            'queries': timer.queries,
+        }
+        query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', 50)
+        latency_budget = getattr(settings, 'REQUEST_LATENCY_BUDGET_MS', 1000)
+        over_budget = sample['queries'] > query_budget or sample['latency_ms'] > latency_budget
+        if over_budget:
+            logger.warning(
+                'Request over budget: %s %s (%s) status=%s queries=%d db=%.1fms serializer=%.1fms total=%.1fms',
+                request.method, request.path, route, response.status_code, sample['queries'],
+                sample['db_ms'], sample['serializer_ms'], sample['latency_ms'],
+                extra={'route': route, **sample},
+            )
+        registry.observe(route, sample, response.status_code, over_budget)
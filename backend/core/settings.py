@@ -6,6 +6,8 @@ import os
 from pathlib import Path
 from decouple import config
 
+from shared.logs import parse_log_levels
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,6 +57,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.metrics.RequestMetricsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -215,6 +218,63 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Background import/export jobs (apps.analytics.jobs)
+REPORT_JOB_WORKERS = config('REPORT_JOB_WORKERS', default=2, cast=int)
+# Seconds after which a job still pending is queued again and a job still
+# running is failed (manage.py recover_report_jobs)
+REPORT_JOB_TIMEOUT = config('REPORT_JOB_TIMEOUT', default=3600, cast=int)
+
+# Cache for the dashboard, pipeline and feedback results below. The default
+# local-memory cache lives in each process, so with several workers a write
+# only invalidates the worker that handled it and the others serve stale
+# results until the TTL runs out. Use a shared backend whenever more than
+# one process serves the API: CACHE_BACKEND=
+# django.core.cache.backends.redis.RedisCache with CACHE_LOCATION=
+# redis://localhost:6379/2, or django.core.cache.backends.db.DatabaseCache
+# with CACHE_LOCATION set to a table name (manage.py createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Seconds cached dashboard KPIs are kept (apps.analytics.services); writes
+# to clients, sales and products invalidate them sooner.
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)
+
+# Seconds the cached pipeline stage summary is kept (apps.sales.services);
+# pipeline saves and deletes invalidate it sooner.
+PIPELINE_SUMMARY_CACHE_TTL = config('PIPELINE_SUMMARY_CACHE_TTL', default=300, cast=int)
+
+# Seconds cached feedback and survey statistics are kept
+# (apps.feedback.services); feedback, survey and submission writes
+# invalidate them sooner.
+FEEDBACK_STATS_CACHE_TTL = config('FEEDBACK_STATS_CACHE_TTL', default=300, cast=int)
+
+# Seconds cached survey results are kept (apps.feedback.services). They are
+# keyed by the survey's latest submission, so new answers show up at once.
+SURVEY_RESULTS_CACHE_TTL = config('SURVEY_RESULTS_CACHE_TTL', default=3600, cast=int)
+
+# Per-request metrics (core.metrics): requests over either budget are logged
+# as warnings; percentiles cover the last REQUEST_METRICS_SAMPLE_SIZE
+# requests of each route.
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=50, cast=int)
+REQUEST_LATENCY_BUDGET_MS = config('REQUEST_LATENCY_BUDGET_MS', default=1000, cast=int)
+REQUEST_METRICS_SAMPLE_SIZE = config('REQUEST_METRICS_SAMPLE_SIZE', default=1000, cast=int)
+
+# Server-push events (shared.events), streamed from /api/events/ when served
+# through core.asgi. Set EVENT_BROKER to shared.events.RedisBroker (needs the
+# redis package) when more than one process serves streams. Streams send a
+# keepalive comment every EVENT_STREAM_KEEPALIVE seconds and close after
+# EVENT_STREAM_MAX_AGE seconds, and the browser reconnects.
+EVENT_BROKER = config('EVENT_BROKER', default='shared.events.InProcessBroker')
+EVENT_BROKER_URL = config('EVENT_BROKER_URL', default='redis://localhost:6379/1')
+EVENT_QUEUE_SIZE = config('EVENT_QUEUE_SIZE', default=100, cast=int)
+EVENT_STREAM_KEEPALIVE = config('EVENT_STREAM_KEEPALIVE', default=15, cast=int)
+EVENT_STREAM_MAX_AGE = config('EVENT_STREAM_MAX_AGE', default=300, cast=int)
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Jewelry CRM API',
@@ -231,6 +291,13 @@ INTERNAL_IPS = [
 ]
 
 # Logging Configuration
+# LOG_FORMAT=json writes one JSON object per record. LOG_LEVELS sets levels
+# per module, e.g. "apps.clients=DEBUG,apps.users.views=WARNING"; debug
+# output of the views is off unless enabled there (or at runtime through
+# /api/metrics/log-levels/).
+LOG_FORMAT = config('LOG_FORMAT', default='text')
+LOG_LEVELS = parse_log_levels(config('LOG_LEVELS', default=''))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -243,18 +310,21 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'shared.logs.JsonFormatter',
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
         },
     },
     'root': {
@@ -267,6 +337,7 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        **{name: {'level': level} for name, level in LOG_LEVELS.items()},
     },
 }
 
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.announcements.models import Announcement
+from apps.stores.models import Store
+
+from apps.tenants.models import Tenant
+from apps.users.models import User
+
+from shared.events import InProcessBroker, get_broker, user_channels
+from shared.logs import lazy
+from telecalling.models import Notification
+
+from .metrics import percentile, registry
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.admin = User.objects.create_user(
+            username='platform', password='x', role=User.Role.PLATFORM_ADMIN
+        )
+        self.member = User.objects.create_user(
+            username='member', password='x', role=User.Role.BUSINESS_ADMIN, tenant=self.tenant
+        )
+        self.client = APIClient()
+
+    def test_records_queries_and_latency_per_route(self):
+        self.client.force_authenticate(self.member)
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/sales/pipeline/dashboard/').status_code, 200)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/metrics/requests/')
+        self.assertEqual(response.status_code, 200)
+        stats = response.data['routes']['sales:pipeline-dashboard']
+        self.assertEqual(stats['count'], 3)
+        self.assertGreater(stats['queries']['p50'], 0)
+        self.assertGreater(stats['serializer_ms']['max'], 0)
+        self.assertEqual(stats['latency_ms']['histogram']['+Inf'], 3)
+
+    @override_settings(REQUEST_QUERY_BUDGET=0)
+    def test_warns_over_budget(self):
+        self.client.force_authenticate(self.member)
+        with self.assertLogs('core.metrics', level='WARNING') as logs:
+            self.client.get('/api/sales/pipeline/dashboard/')
+        self.assertIn('sales:pipeline-dashboard', logs.output[0])
+        self.assertEqual(registry.snapshot()['routes']['sales:pipeline-dashboard']['over_budget'], 1)
+
+    def test_endpoint_is_platform_admin_only(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get('/api/metrics/requests/').status_code, 403)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+class LogLevelTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='platform', password='x', role=User.Role.PLATFORM_ADMIN
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.addCleanup(logging.getLogger('apps.clients.views').setLevel, logging.NOTSET)
+
+    def test_lazy_arguments_are_only_computed_when_emitted(self):
+        calls = []
+        logger = logging.getLogger('apps.clients.views')
+        logger.debug('%s', lazy(calls.append, 'computed'))
+        self.assertEqual(calls, [])
+
+        logger.setLevel(logging.DEBUG)
+        with self.assertLogs(logger, level='DEBUG') as logs:
+            logger.debug('%s', lazy(lambda: calls.append('computed') or len(calls)))
+        self.assertEqual(calls, ['computed'])
+        self.assertEqual(logs.records[0].getMessage(), '1')
+
+    def test_change_level_at_runtime(self):
+        response = self.client.post(
+            '/api/metrics/log-levels/', {'logger': 'apps.clients.views', 'level': 'debug'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['loggers']['apps.clients.views']['level'], 'DEBUG')
+        self.assertTrue(logging.getLogger('apps.clients.views').isEnabledFor(logging.DEBUG))
+
+        response = self.client.post('/api/metrics/log-levels/', {'logger': 'apps.clients.views', 'level': 'loud'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EVENT_STREAM_MAX_AGE=5, EVENT_STREAM_KEEPALIVE=1)
+class EventStreamTests(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant', slug='tenant')
+        self.store = Store.objects.create(
+            name='Store', code='S1', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.other_store = Store.objects.create(
+            name='Other', code='S2', address='-', city='-', state='-', tenant=self.tenant
+        )
+        self.user = User.objects.create_user(
+            username='member', password='x', role=User.Role.INHOUSE_SALES, tenant=self.tenant, store=self.store
+        )
+        self.author = User.objects.create_user(
+            username='author', password='x', role=User.Role.MANAGER, tenant=self.tenant, store=self.other_store
+        )
+
+    def committed(self, func):
+        # Run ``func`` and the publishes it defers to the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return func()
+
+    async def test_broker_delivers_across_threads(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(['user:1']) as subscription:
+            thread = threading.Thread(target=broker.publish, args=('user:1', {'type': 'ping', 'data': 1}))
+            thread.start()
+            thread.join()
+            broker.publish('user:2', {'type': 'ping', 'data': 2})
+            self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {'type': 'ping', 'data': 1})
+            self.assertTrue(subscription.queue.empty())
+
+    async def test_stream_pushes_notifications_and_unread_counts(self):
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.user)))()
+        response = await self.async_client.get(f'/api/events/?token={token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+
+        first = (await anext(stream)).decode()
+        self.assertIn('event: unread', first)
+        self.assertIn('"announcements": 0', first)
+
+        await sync_to_async(self.committed)(lambda: Notification.objects.create(
+            recipient=self.user, title='New lead', message='-', notification_type='assignment'
+        ))
+        self.assertIn('event: notification', (await asyncio.wait_for(anext(stream), 2)).decode())
+
+        await sync_to_async(self.committed)(lambda: Announcement.objects.create(
+            title='News', content='-', author=self.author, tenant=self.tenant
+        ))
+        events = [(await asyncio.wait_for(anext(stream), 2)).decode() for _ in range(2)]
+        self.assertEqual(
+            sorted(event.split('\n')[0] for event in events), ['event: announcement', 'event: unread']
+        )
+        self.assertIn('"announcements": 1', next(event for event in events if 'unread' in event))
+
+    async def test_announcements_reach_only_their_stores(self):
+        channels = await sync_to_async(user_channels)(self.user)
+        async with get_broker().subscribe(channels) as subscription:
+            def targeted():
+                announcement = Announcement.objects.create(
+                    title='Elsewhere', content='-', author=self.author, tenant=self.tenant
+                )
+                announcement.target_stores.add(self.other_store)
+            await sync_to_async(self.committed)(targeted)
+            await asyncio.sleep(0.1)
+            self.assertTrue(subscription.queue.empty())
+
+    async def test_requires_a_token(self):
+        response = await self.async_client.get('/api/events/?token=nope')
+        self.assertEqual(response.status_code, 401)
+
+    def test_wsgi_requests_are_refused(self):
+        # A WSGI worker would buffer the stream until it closes
+        token = str(AccessToken.for_user(self.user))
+        response = self.client.get(f'/api/events/?token={token}')
+        self.assertEqual(response.status_code, 501)
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from .views import EventStreamView, LogLevelView, RequestMetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -32,6 +34,14 @@ urlpatterns = [
     path('api/automation/', include('apps.automation.urls')),
     path('api/marketing/', include('apps.marketing.urls')),
     path('api/support/', include('apps.support.urls')),
+
+    # Server-sent notifications, unread counts and announcements (ASGI only)
+    path('api/events/', EventStreamView.as_view(), name='event-stream'),
+
+    # Per-route query count and latency metrics of the serving process
+    path('api/metrics/requests/', RequestMetricsView.as_view(), name='request-metrics'),
+    # Per-module log levels of the serving process
+    path('api/metrics/log-levels/', LogLevelView.as_view(), name='log-levels'),
 ]
 
 # Serve static and media files in development
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.announcements.unread import unread_counts
+from apps.users.permissions import IsRoleAllowed
+
+from shared.events import get_broker, sse_frame, user_channels
+
+from .metrics import LATENCY_BUCKETS_MS, PERCENTILES, QUERY_BUCKETS, registry
+
+
+class RequestMetricsView(APIView):
+    """Per-route query counts and latencies recorded by this worker process."""
+    permission_classes = [IsAuthenticated, IsRoleAllowed.for_roles(['platform_admin'])]
+
+    def get(self, request):
+        return Response({
+            **registry.snapshot(),
+            'percentiles': PERCENTILES,
+            'latency_buckets_ms': LATENCY_BUCKETS_MS,
+            'query_buckets': QUERY_BUCKETS,
+        })
+
+
+LOG_LEVEL_NAMES = ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET']
+
+
+class LogLevelView(APIView):
+    """
+    Read or change logger levels of this worker process, e.g. turn on
+    ``DEBUG`` for ``apps.clients.views`` while chasing a problem. Changes last
+    until the process restarts; ``LOG_LEVELS`` sets them at startup.
+    """
+    permission_classes = [IsAuthenticated, IsRoleAllowed.for_roles(['platform_admin'])]
+
+    @staticmethod
+    def _levels():
+        names = set(settings.LOG_LEVELS) | {
+            name for name, logger in logging.root.manager.loggerDict.items()
+            if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET
+        }
+        return {
+            name: {
+                'level': logging.getLevelName(logging.getLogger(name).level),
+                'effective_level': logging.getLevelName(logging.getLogger(name).getEffectiveLevel()),
+            }
+            for name in sorted(names)
+        }
+
+    def get(self, request):
+        return Response({'loggers': self._levels()})
+
+    def post(self, request):
+        name = request.data.get('logger')
+        level = str(request.data.get('level', '')).upper()
+        if not name or level not in LOG_LEVEL_NAMES:
+            return Response(
+                {'error': f"'logger' and 'level' (one of {', '.join(LOG_LEVEL_NAMES)}) are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        logging.getLogger(name).setLevel(level)
+        return Response({'loggers': self._levels()})
+
+
+class EventStreamView(View):
+    """
+    Server-sent events for the current user: notifications, messages,
+    unread counts and announcements (see ``shared.events``). The stream opens
+    with the current unread counts.
+
+    ``EventSource`` cannot set headers, so the access token may be passed as
+    ``?token=``. The stream needs the ASGI application (``core.asgi``); under
+    WSGI the response would be buffered until the stream closes, so it
+    answers 501 instead and the frontend keeps polling.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'Event streams need the ASGI server (core.asgi:application).'}, status=501
+            )
+        try:
+            user = await sync_to_async(self._authenticate)(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=401)
+
+        counts = await sync_to_async(unread_counts)(user)
+        response = StreamingHttpResponse(
+            self._stream(user_channels(user), {'type': 'unread', 'data': counts}),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies (nginx) from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def _authenticate(request):
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else request.GET.get('token')
+        if not raw_token:
+            raise AuthenticationFailed('Authentication credentials were not provided.')
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive.')
+        return user
+
+    @staticmethod
+    async def _stream(channels, first_event):
+        keepalive = settings.EVENT_STREAM_KEEPALIVE
+        closes_at = time.monotonic() + settings.EVENT_STREAM_MAX_AGE
+        async with get_broker().subscribe(channels) as subscription:
+            yield f'retry: {keepalive * 1000}\n' + sse_frame(first_event)
+            while (remaining := closes_at - time.monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), min(keepalive, remaining))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                else:
+                    yield sse_frame(event)
@@ -0,0 +1,45 @@
+"""
+Versioned cache entries.
+
+A ``VersionedCache`` keeps a version number per scope (usually a tenant id)
+in the cache and puts it in the key of every entry cached for that scope.
+Invalidating a scope bumps its version, so all of its entries stop being
+read at once, without knowing their keys; the stale ones expire with their
+TTL. Across several workers this relies on a shared cache (``CACHES`` in
+settings).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedCache:
+    def __init__(self, prefix, ttl_setting, default_ttl=300):
+        self.prefix = prefix
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+
+    def version_key(self, scope):
+        return f'{self.prefix}:{scope}:version'
+
+    def key(self, scope, *parts):
+        version = cache.get_or_set(self.version_key(scope), 1, None)
+        return ':'.join([self.prefix, str(scope), f'v{version}', *map(str, parts)])
+
+    def invalidate(self, scope):
+        """Stop serving every entry cached for ``scope``."""
+        key = self.version_key(scope)
+        cache.add(key, 1, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 2, None)
+
+    def get_or_compute(self, scope, parts, compute):
+        """The entry of ``scope`` and ``parts``, computed with ``compute()`` and stored when missing."""
+        key = self.key(scope, *parts)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, getattr(settings, self.ttl_setting, self.default_ttl))
+        return value
@@ -0,0 +1,209 @@
+"""
+Server-push events.
+
+Anything clients used to poll for is published as an event on one or more
+channels, and the event stream endpoint forwards them to the connected
+users as server-sent events. The channels are:
+
+- ``user:<id>``: notifications, messages and unread counts of one user
+- ``store:<id>``: announcements targeted at a store
+- ``tenant:<id>``: announcements for a whole tenant (``tenant:platform`` for
+  users without one)
+- ``tenant:<id>:stores``: every store-targeted announcement of a tenant, for
+  users who belong to no store and see them all
+
+``publish`` waits for the current transaction to commit, so clients never
+hear about rows they cannot read yet. The broker is ``EVENT_BROKER``.
+``InProcessBroker`` only reaches streams served by the same process.
+``RedisBroker`` relays events through Redis pub/sub so every node sees them.
+It needs the optional ``redis`` package and ``EVENT_BROKER_URL``.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PLATFORM = 'platform'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def store_channel(store_id):
+    return f'store:{store_id}'
+
+
+def tenant_channel(tenant_id):
+    return f'tenant:{tenant_id if tenant_id is not None else PLATFORM}'
+
+
+def tenant_stores_channel(tenant_id):
+    return f'{tenant_channel(tenant_id)}:stores'
+
+
+def user_channels(user):
+    """Every channel ``user`` listens to."""
+    channels = [user_channel(user.pk), tenant_channel(user.tenant_id)]
+    if user.store_id:
+        channels.append(store_channel(user.store_id))
+    else:
+        channels.append(tenant_stores_channel(user.tenant_id))
+    return channels
+
+
+class Subscription:
+    """Events of a set of channels, queued on the subscriber's event loop."""
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        """Queue ``event`` from any thread."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        # A stalled client loses its oldest events rather than growing the queue
+        if self.queue.full():
+            self.queue.get_nowait()
+            logger.warning('Event queue full, dropped the oldest event for %s', sorted(self.channels))
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def __aenter__(self):
+        self.broker.add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker.remove(self)
+
+
+class InProcessBroker:
+    """Delivers events to the subscriptions of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channels):
+        """``async with broker.subscribe(channels) as subscription: await subscription.get()``"""
+        return Subscription(self, channels, getattr(settings, 'EVENT_QUEUE_SIZE', 100))
+
+    def add(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+
+    def remove(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channel, event):
+        self.dispatch(channel, event)
+
+    def dispatch(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis and dispatches what every node published to the
+    subscriptions of this process. A single listener per process reads the
+    Redis channels. It starts with the first subscription.
+    """
+
+    prefix = 'events:'
+
+    def __init__(self, url=None):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker needs the redis package') from exc
+        self.url = url or getattr(settings, 'EVENT_BROKER_URL', 'redis://localhost:6379/1')
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def publish(self, channel, event):
+        self._client.publish(self.prefix + channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def add(self, subscription):
+        super().add(subscription)
+        if self._listener is None or self._listener.done():
+            self._listener = subscription.loop.create_task(self._listen())
+
+    async def _listen(self):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(self.prefix + '*')
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                channel = message['channel'].decode()[len(self.prefix):]
+                self.dispatch(channel, json.loads(message['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'EVENT_BROKER', 'shared.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(channels, event_type, data, using=DEFAULT_DB_ALIAS):
+    """Send ``{'type': event_type, 'data': data}`` to ``channels`` once the transaction commits."""
+    channels = list(channels)
+    if not channels:
+        return
+    # Copy now: ``data`` may be changed by the caller before the commit
+    event = {'type': event_type, 'data': json.loads(json.dumps(data, cls=DjangoJSONEncoder))}
+
+    def send():
+        broker = get_broker()
+        for channel in channels:
+            try:
+                broker.publish(channel, event)
+            except Exception:
+                # Clients catch up when they reconnect; never fail the write
+                logger.exception('Could not publish %s to %s', event_type, channel)
+
+    transaction.on_commit(send, using=using)
+
+
+def sse_frame(event):
+    """``event`` as one server-sent event."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], cls=DjangoJSONEncoder)}\n\n"
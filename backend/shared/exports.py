@@ -0,0 +1,64 @@
+"""
+Streaming export helpers.
+
+Each writer takes an iterable of rows (dicts) and yields encoded chunks, so a
+``StreamingHttpResponse`` can send the first bytes while the queryset is still
+being walked and memory stays flat however many rows are exported.
+
+The rows are only produced once the response is being sent, after the view
+returned, so an error there can only cut the file short. ``open_rows``
+fetches the first row inside the view instead: the query runs there, and a
+bad field or a database error still turns into an error response.
+"""
+import csv
+import itertools
+import json
+
+from django.http import StreamingHttpResponse
+
+# Rows fetched per database round trip when walking an export queryset.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def open_rows(rows):
+    """Start ``rows`` now, so that setup errors raise in the caller."""
+    rows = iter(rows)
+    try:
+        first = next(rows)
+    except StopIteration:
+        return iter(())
+    return itertools.chain([first], rows)
+
+
+def iter_csv(rows, fieldnames):
+    writer = csv.DictWriter(Echo(), fieldnames=fieldnames, extrasaction='ignore')
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_json_array(rows):
+    yield '['
+    first = True
+    for row in rows:
+        yield ('\n' if first else ',\n') + json.dumps(row, default=str)
+        first = False
+    yield '\n]\n'
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def streaming_export_response(chunks, content_type, filename):
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,80 @@
+"""
+Logging helpers.
+
+Modules log through ``logging.getLogger(__name__)`` with %-style arguments,
+so nothing is formatted unless a handler takes the record. Values that cost
+a query or a walk over a payload are wrapped in ``lazy`` and only computed
+when the record is actually emitted. Levels are set per module with
+``LOG_LEVELS`` (e.g. ``apps.clients=DEBUG,apps.users.views=WARNING``) and can
+be changed on a running process through the log-levels endpoint;
+``LOG_FORMAT=json`` switches the handlers to ``JsonFormatter``.
+"""
+import json
+import logging
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Request headers never written to the logs
+REDACTED_HEADERS = {'authorization', 'cookie', 'x-csrftoken'}
+
+
+class lazy:
+    """Log argument computed on first use, e.g. ``logger.debug('%s rows', lazy(qs.count))``."""
+
+    _unset = object()
+
+    def __init__(self, func, *args, **kwargs):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._value = self._unset
+
+    @property
+    def value(self):
+        # Every handler formats the record; compute once
+        if self._value is self._unset:
+            self._value = self._func(*self._args, **self._kwargs)
+        return self._value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def safe_headers(request):
+    """Request headers with credentials redacted."""
+    return {
+        name: '<redacted>' if name.lower() in REDACTED_HEADERS else value
+        for name, value in request.headers.items()
+    }
+
+
+def parse_log_levels(value):
+    """``'apps.clients=DEBUG,core=INFO'`` -> ``{'apps.clients': 'DEBUG', 'core': 'INFO'}``."""
+    levels = {}
+    for item in value.split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields as keys."""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
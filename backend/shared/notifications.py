@@ -0,0 +1,67 @@
+"""
+Notification fan-out.
+
+``fan_out`` writes one notification row per recipient with a single
+``bulk_create``, whatever the notification model is (``SupportNotification``,
+``telecalling.Notification``). ``bulk_create`` sends no ``post_save``, so
+``notifications_created`` is sent instead with every row written.
+
+``push_new_notifications`` connects a model to both signals, so its rows
+are pushed to their recipients however they were created; apps only say
+what each row's event carries.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+
+from .events import publish, user_channel
+
+BATCH_SIZE = 500
+
+# sender: the notification model; instances: the rows written; using: database alias
+notifications_created = Signal()
+
+
+def create_notifications(model, notifications, using=DEFAULT_DB_ALIAS):
+    """Write unsaved ``notifications`` of ``model`` at once and return them."""
+    notifications = model.objects.using(using).bulk_create(notifications, batch_size=BATCH_SIZE)
+    if notifications:
+        notifications_created.send(sender=model, instances=notifications, using=using)
+    return notifications
+
+
+def fan_out(model, recipients, using=DEFAULT_DB_ALIAS, **fields):
+    """
+    Create one ``model`` row with ``fields`` for each of ``recipients``
+    (users or user ids), e.g.
+    ``fan_out(SupportNotification, admin_ids, ticket=ticket, title=...)``.
+    """
+    return create_notifications(
+        model,
+        [model(recipient_id=getattr(recipient, 'pk', recipient), **fields) for recipient in recipients],
+        using=using,
+    )
+
+
+def push_new_notifications(model, payload):
+    """
+    Push every new ``model`` row to its recipient as a ``notification``
+    event carrying ``payload(row)``, whether it was saved alone or written
+    with ``create_notifications``. Returns the function that pushes a list
+    of rows.
+    """
+    def push(notifications, using=DEFAULT_DB_ALIAS):
+        for notification in notifications:
+            publish([user_channel(notification.recipient_id)], 'notification', payload(notification), using=using)
+
+    def push_saved(sender, instance, created, using, **kwargs):
+        if created:
+            push([instance], using=using)
+
+    def push_created(sender, instances, using, **kwargs):
+        push(instances, using=using)
+
+    uid = f'push_new_notifications:{model._meta.label}'
+    post_save.connect(push_saved, sender=model, weak=False, dispatch_uid=uid)
+    notifications_created.connect(push_created, sender=model, weak=False, dispatch_uid=uid)
+    return push
@@ -0,0 +1,24 @@
+"""
+Assertions for query-plan regression tests.
+
+The tests seed enough rows across several tenants that a sequential scan is
+clearly the worse plan, refresh the planner statistics and then check the
+``EXPLAIN`` output of the querysets the views build.
+"""
+from django.db import connection
+
+
+class QueryPlanAssertionsMixin:
+    """``TestCase`` mixin; PostgreSQL only."""
+
+    @staticmethod
+    def analyze(*models):
+        """Refresh the planner statistics of the models' tables."""
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+        return plan
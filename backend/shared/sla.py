@@ -0,0 +1,99 @@
+"""
+SLA deadlines.
+
+``SLAModelMixin`` stores a model's deadline in a column when the row is
+written, instead of deriving it on every read. Overdue rows are then a
+``status IN (...) AND deadline <= now`` range query on a
+``(status, deadline)`` index. The deadline is recomputed only when one of
+its inputs changed since the row was loaded (``shared.tracking``).
+
+``claim_overdue`` is the sweeper's query. It returns the rows that passed
+their deadline and were not reported yet, and stamps them
+``overdue_notified_at`` in the same transaction, so each row is reported
+once. Callers report the rows inside that transaction, so a failed report
+rolls the stamp back too. Moving a deadline clears the stamp.
+"""
+from django.core import checks
+from django.db import transaction
+from django.utils import timezone
+
+from .tracking import TrackedFieldsMixin
+
+
+class SLAModelMixin(TrackedFieldsMixin):
+    """
+    Mixin for models with a stored deadline. Subclasses set
+    ``sla_deadline_field``, ``sla_open_statuses`` (statuses in which the
+    deadline runs) and ``sla_deadline_inputs`` (fields the deadline depends
+    on). They must define ``compute_sla_deadline()``, returning the
+    deadline (a system check reports models that do not), and have a
+    nullable ``overdue_notified_at`` field.
+    """
+
+    sla_deadline_field = 'due_date'
+    sla_open_statuses = ()
+    sla_deadline_inputs = ()
+    tracked_fields = ('status',)
+    compute_sla_deadline = None
+
+    def get_tracked_fields(self):
+        return {*self.tracked_fields, *self.sla_deadline_inputs}
+
+    @classmethod
+    def check(cls, **kwargs):
+        errors = super().check(**kwargs)
+        if not callable(cls.compute_sla_deadline):
+            errors.append(checks.Error(
+                f'{cls.__name__} uses SLAModelMixin but does not define compute_sla_deadline().',
+                obj=cls,
+                id='shared.E001',
+            ))
+        return errors
+
+    @property
+    def sla_deadline(self):
+        return getattr(self, self.sla_deadline_field)
+
+    def is_past_deadline(self, now=None):
+        return (
+            self.sla_deadline is not None
+            and self.status in self.sla_open_statuses
+            and (now or timezone.now()) > self.sla_deadline
+        )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or any(self.has_changed(name) for name in self.sla_deadline_inputs):
+            deadline = self.compute_sla_deadline()
+            if deadline != self.sla_deadline:
+                setattr(self, self.sla_deadline_field, deadline)
+                self.overdue_notified_at = None
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {
+                        *update_fields, self.sla_deadline_field, 'overdue_notified_at'
+                    }
+        super().save(*args, **kwargs)
+
+
+def claim_overdue(queryset, now=None):
+    """
+    Rows of ``queryset`` (an ``SLAModelMixin`` model) past their deadline
+    and not reported yet. They are stamped as reported before returning;
+    call it in the transaction that reports them. Rows locked by a
+    concurrent sweep are skipped.
+    """
+    model = queryset.model
+    now = now or timezone.now()
+    with transaction.atomic(using=queryset.db):
+        overdue = list(
+            queryset.filter(
+                status__in=model.sla_open_statuses,
+                overdue_notified_at__isnull=True,
+                **{f'{model.sla_deadline_field}__lte': now},
+            ).select_for_update(skip_locked=True, of=('self',))
+        )
+        if overdue:
+            model.objects.using(queryset.db).filter(pk__in=[row.pk for row in overdue]).update(
+                overdue_notified_at=now
+            )
+    return overdue
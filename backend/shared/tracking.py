@@ -0,0 +1,62 @@
+"""
+Loaded-value tracking for models.
+
+``TrackedFieldsMixin`` remembers the values a row was loaded with (and
+refreshed or saved with since) in ``_loaded_values``, keyed by field
+attname. Saves can then tell which fields changed without reading the row
+again: the client audit log diffs against it, the SLA models recompute a
+deadline only when its inputs changed, and sales and purchases find the
+client they were moved away from.
+"""
+_UNKNOWN = object()
+
+
+class TrackedFieldsMixin:
+    """
+    Mixin for models that need their stored values. ``tracked_fields``
+    lists the attnames to remember; ``None`` remembers every concrete field.
+    Deferred fields are not known until they are loaded.
+    """
+
+    tracked_fields = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.remember_loaded(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Later saves are compared with what was just written
+        self.remember_loaded()
+
+    def get_tracked_fields(self):
+        return self.tracked_fields
+
+    def remember_loaded(self, fields=None):
+        """Take the current values as the stored ones (only of ``fields``, if given)."""
+        tracked = self.get_tracked_fields()
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {}) if fields is not None else {}
+        for field in self._meta.concrete_fields:
+            name = field.attname
+            if name in deferred or (tracked is not None and name not in tracked):
+                continue
+            if fields is None or field.name in fields or name in fields:
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+
+    def loaded_value(self, name):
+        """``name`` as last loaded or saved, or ``None`` for unsaved rows and deferred fields."""
+        value = getattr(self, '_loaded_values', {}).get(name, _UNKNOWN)
+        return None if value is _UNKNOWN else value
+
+    def has_changed(self, name):
+        """Whether ``name`` differs from its stored value (true when that is unknown)."""
+        value = getattr(self, '_loaded_values', {}).get(name, _UNKNOWN)
+        return value is _UNKNOWN or value != getattr(self, name)
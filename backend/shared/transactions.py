@@ -0,0 +1,80 @@
+"""
+Work batched until the current transaction commits.
+
+Signal handlers that would otherwise do the same work once per saved row
+(write an audit row, refresh a summary, recount unread items) collect it in
+a batch instead. ``CommitBatches.current`` hands out the open batch of the
+transaction, registering its ``flush`` with ``transaction.on_commit`` when it
+is opened, so the work runs once when the transaction commits and is dropped
+with it when it rolls back.
+
+Django discards the hooks of a rolled-back savepoint but keeps no public
+record of it, so a batch counts as open only while its hook is still among
+the connection's pending ones; batches whose hook has gone are forgotten
+when the next one is opened, and all of them outside a transaction, so they
+do not pile up on long-lived threads.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+def _pending_hooks(connection):
+    # run_on_commit holds (savepoint ids, callable, robust) for each hook
+    return {hook[1] for hook in connection.run_on_commit}
+
+
+class CommitHook:
+    """The ``on_commit`` callback of ``batch``; unregisters it and flushes it."""
+
+    def __init__(self, batches, key, batch):
+        self.batches = batches
+        self.key = key
+        self.batch = batch
+
+    def __call__(self):
+        if self.batches.get(self.key) is self:
+            del self.batches[self.key]
+        self.batch.flush()
+
+
+class CommitBatches(threading.local):
+    """
+    Per-thread registry of open batches, one per database alias, or one per
+    savepoint level with ``per_savepoint`` so that rolling back a savepoint
+    discards exactly what was queued in it.
+    """
+
+    def __init__(self, per_savepoint=False):
+        self.per_savepoint = per_savepoint
+        self.by_alias = {}
+
+    def current(self, factory, using=DEFAULT_DB_ALIAS):
+        """
+        The open batch of the current transaction, created with ``factory()``
+        if there is none. ``None`` outside a transaction, where callers do
+        the work straight away.
+        """
+        connection = transaction.get_connection(using)
+        hooks = self.by_alias.setdefault(using, {})
+        if not connection.in_atomic_block:
+            # Anything still registered was rolled back with its transaction
+            hooks.clear()
+            return None
+
+        key = tuple(connection.savepoint_ids) if self.per_savepoint else None
+        pending = _pending_hooks(connection)
+        hook = hooks.get(key)
+        if hook is not None and hook in pending:
+            return hook.batch
+
+        for stale_key, stale in list(hooks.items()):
+            if stale not in pending:
+                del hooks[stale_key]
+        hook = hooks[key] = CommitHook(hooks, key, factory())
+        transaction.on_commit(hook, using=using)
+        return hook.batch
+
+    def open_batches(self, using=DEFAULT_DB_ALIAS):
+        """The batches registered for ``using`` on this thread."""
+        return [hook.batch for hook in self.by_alias.get(using, {}).values()]
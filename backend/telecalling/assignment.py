@@ -0,0 +1,146 @@
+"""
+Bulk lead assignment.
+
+``bulk_assign`` validates every telecaller and visit id before writing
+anything. It then creates the assignments, flags the visits and notifies the
+telecallers with one ``bulk_create``/``update`` each, inside one transaction,
+so a batch of thousands of leads costs the same handful of queries as a
+batch of ten and either lands completely or not at all.
+
+Leads are dealt out by a strategy:
+
+- ``round_robin``: lead ``i`` goes to telecaller ``i % len(telecallers)``
+- ``least_loaded``: each lead goes to the telecaller with the fewest open
+  assignments at that point, counting the leads already dealt in the batch.
+  Ties go to the telecaller listed first.
+"""
+import heapq
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.users.models import User
+from shared.notifications import create_notifications
+
+from .models import Assignment, CustomerVisit, Notification
+
+ROUND_ROBIN = 'round_robin'
+LEAST_LOADED = 'least_loaded'
+STRATEGIES = [ROUND_ROBIN, LEAST_LOADED]
+
+# Assignments still on a telecaller's plate
+OPEN_STATUSES = ['assigned', 'in_progress', 'follow_up']
+
+BATCH_SIZE = 1000
+
+
+class BulkAssignmentError(Exception):
+    """Invalid ids; ``errors`` maps each field to its messages, like serializer errors."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def round_robin(visit_ids, telecaller_ids):
+    return [(visit_id, telecaller_ids[i % len(telecaller_ids)]) for i, visit_id in enumerate(visit_ids)]
+
+
+def least_loaded(visit_ids, telecaller_ids, loads):
+    """Deal ``visit_ids`` out by ``loads`` (telecaller id -> open assignments)."""
+    heap = [(loads.get(telecaller_id, 0), position, telecaller_id)
+            for position, telecaller_id in enumerate(telecaller_ids)]
+    heapq.heapify(heap)
+    pairs = []
+    for visit_id in visit_ids:
+        load, position, telecaller_id = heap[0]
+        pairs.append((visit_id, telecaller_id))
+        heapq.heapreplace(heap, (load + 1, position, telecaller_id))
+    return pairs
+
+
+def open_loads(telecaller_ids):
+    """Open assignments per telecaller."""
+    rows = (
+        Assignment.objects.filter(telecaller_id__in=telecaller_ids, status__in=OPEN_STATUSES)
+        .values('telecaller_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {row['telecaller_id']: row['total'] for row in rows}
+
+
+def _unique(ids):
+    return list(dict.fromkeys(ids))
+
+
+def bulk_assign(visit_ids, telecaller_ids, assigned_by, priority='medium', notes='', strategy=ROUND_ROBIN):
+    """
+    Assign ``visit_ids`` to ``telecaller_ids`` and return the assignments.
+    Raises ``BulkAssignmentError`` without writing anything if an id is
+    unknown or a visit is already assigned.
+    """
+    visit_ids = _unique(visit_ids)
+    telecaller_ids = _unique(telecaller_ids)
+    errors = {}
+    if not telecaller_ids:
+        errors['telecaller_ids'] = ['At least one telecaller is required.']
+    if not visit_ids:
+        errors['customer_visit_ids'] = ['At least one customer visit is required.']
+    if errors:
+        raise BulkAssignmentError(errors)
+
+    with transaction.atomic():
+        telecallers = set(
+            User.objects.filter(id__in=telecaller_ids, role=User.Role.TELE_CALLING, is_active=True)
+            .values_list('id', flat=True)
+        )
+        # Locked so that two managers cannot assign the same lead
+        visits = {
+            pk: (assigned, name)
+            for pk, assigned, name in CustomerVisit.objects.select_for_update()
+            .filter(id__in=visit_ids)
+            .values_list('id', 'assigned_to_telecaller', 'customer_name')
+        }
+        unknown_telecallers = [pk for pk in telecaller_ids if pk not in telecallers]
+        if unknown_telecallers:
+            errors['telecaller_ids'] = [f'Not active telecallers: {unknown_telecallers}']
+        unknown_visits = [pk for pk in visit_ids if pk not in visits]
+        if unknown_visits:
+            errors.setdefault('customer_visit_ids', []).append(f'Unknown customer visits: {unknown_visits}')
+        assigned = [pk for pk in visit_ids if pk in visits and visits[pk][0]]
+        if assigned:
+            errors.setdefault('customer_visit_ids', []).append(f'Already assigned: {assigned}')
+        if errors:
+            raise BulkAssignmentError(errors)
+
+        if strategy == LEAST_LOADED:
+            pairs = least_loaded(visit_ids, telecaller_ids, open_loads(telecaller_ids))
+        else:
+            pairs = round_robin(visit_ids, telecaller_ids)
+
+        assignments = Assignment.objects.bulk_create(
+            [
+                Assignment(
+                    telecaller_id=telecaller_id, customer_visit_id=visit_id,
+                    assigned_by=assigned_by, priority=priority, notes=notes,
+                )
+                for visit_id, telecaller_id in pairs
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        CustomerVisit.objects.filter(id__in=visit_ids).update(
+            assigned_to_telecaller=True, updated_at=timezone.now()
+        )
+        create_notifications(Notification, [
+            Notification(
+                recipient_id=assignment.telecaller_id,
+                title="New Assignment",
+                message=f"You have been assigned to call {visits[assignment.customer_visit_id][1]}",
+                notification_type='assignment',
+                related_assignment=assignment,
+            )
+            for assignment in assignments
+        ])
+    return assignments
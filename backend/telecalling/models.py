@@ -46,6 +46,13 @@ class Assignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Telecaller work queues and the manager's per-status counts
+            models.Index(fields=['telecaller', 'status'], name='tc_assign_caller_status_idx'),
+            models.Index(fields=['status'], name='tc_assign_status_idx'),
+        ]
+
     def __str__(self):
         return f"Assignment {self.id} - {self.customer_visit.customer_name} to {self.telecaller.get_full_name()}"
 
@@ -75,6 +82,15 @@ class CallLog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Outcome counts on the dashboards and per-assignment call history
+            models.Index(fields=['call_status', 'customer_sentiment'], name='tc_call_status_sentiment_idx'),
+            models.Index(fields=['assignment', 'call_status'], name='tc_call_assign_status_idx'),
+            # Recent calls on the manager and telecaller activity feeds
+            models.Index(fields=['-call_time'], name='tc_call_time_idx'),
+        ]
+
     def __str__(self):
         return f"CallLog {self.id} for Assignment {self.assignment_id}"
 
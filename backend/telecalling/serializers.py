@@ -113,6 +113,11 @@ class BulkAssignmentSerializer(serializers.Serializer):
         default='medium'
     )
     notes = serializers.CharField(required=False, allow_blank=True)
+    strategy = serializers.ChoiceField(
+        choices=[('round_robin', 'Round robin'), ('least_loaded', 'Fewest open assignments first')],
+        default='round_robin',
+        help_text="How leads are dealt out to the telecallers"
+    )
 
 # Assignment statistics serializer
 class AssignmentStatsSerializer(serializers.Serializer):
@@ -0,0 +1,18 @@
+from shared.notifications import push_new_notifications
+
+from .models import Notification
+
+
+def notification_event(notification):
+    return {
+        'source': 'telecalling',
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'assignment': notification.related_assignment_id,
+        'created_at': notification.created_at,
+    }
+
+
+push_notifications = push_new_notifications(Notification, notification_event)
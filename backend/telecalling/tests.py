@@ -1,3 +1,134 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from shared.query_plans import QueryPlanAssertionsMixin
+
+from .assignment import bulk_assign
+from .models import Assignment, CallLog, CustomerVisit, Notification
+
+TELECALLERS = 20
+ASSIGNMENTS_PER_TELECALLER = 1000
+ASSIGNMENT_STATUSES = ['assigned', 'in_progress', 'completed', 'follow_up', 'unreachable']
+CALL_STATUSES = ['connected', 'no_answer', 'busy', 'wrong_number', 'not_interested', 'call_back']
+SENTIMENTS = ['positive', 'neutral', 'negative']
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class TelecallingQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """Telecaller queues and call outcome counts must stay on their indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rep = User.objects.create_user(username='rep', password='x', role=User.Role.INHOUSE_SALES)
+        cls.telecallers = User.objects.bulk_create(
+            User(username=f'caller{i}', role=User.Role.TELE_CALLING) for i in range(TELECALLERS)
+        )
+        visits = CustomerVisit.objects.bulk_create(
+            CustomerVisit(sales_rep=rep, customer_name=f'Customer {i}', customer_phone=str(i))
+            for i in range(TELECALLERS * ASSIGNMENTS_PER_TELECALLER)
+        )
+        assignments = Assignment.objects.bulk_create(
+            Assignment(
+                telecaller=cls.telecallers[i % TELECALLERS], customer_visit=visit,
+                status=ASSIGNMENT_STATUSES[i % len(ASSIGNMENT_STATUSES)],
+            )
+            for i, visit in enumerate(visits)
+        )
+        CallLog.objects.bulk_create(
+            CallLog(
+                assignment=assignment, call_status=CALL_STATUSES[i % len(CALL_STATUSES)],
+                customer_sentiment=SENTIMENTS[i % len(SENTIMENTS)],
+            )
+            for i, assignment in enumerate(assignments)
+        )
+        cls.analyze(Assignment, CallLog)
+
+    def test_telecaller_queue_by_status(self):
+        assignments = Assignment.objects.filter(telecaller=self.telecallers[0], status='follow_up')
+        self.assertUsesIndex(assignments, 'tc_assign_caller_status_idx')
+
+    def test_call_outcome_count(self):
+        # Manager dashboard: connected calls with a positive customer
+        calls = CallLog.objects.filter(call_status='connected', customer_sentiment='positive')
+        self.assertUsesIndex(calls.values('id'), 'tc_call_status_sentiment_idx')
+
+
+class BulkAssignTests(TestCase):
+    """Bulk assignment is all-or-nothing and costs the same queries for any batch size."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='x', role=User.Role.MANAGER)
+        self.rep = User.objects.create_user(username='rep', password='x', role=User.Role.INHOUSE_SALES)
+        self.telecallers = [
+            User.objects.create_user(username=f'caller{i}', password='x', role=User.Role.TELE_CALLING)
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def visits(self, count):
+        return [
+            visit.id for visit in CustomerVisit.objects.bulk_create(
+                CustomerVisit(sales_rep=self.rep, customer_name=f'Customer {i}', customer_phone=str(i))
+                for i in range(count)
+            )
+        ]
+
+    def caller_ids(self):
+        return [telecaller.id for telecaller in self.telecallers]
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        small, large = self.visits(5), self.visits(500)
+        # Telecallers, locked visits, assignments, visit flags, notifications
+        with self.assertNumQueries(7):
+            bulk_assign(small, self.caller_ids(), self.manager)
+        with self.assertNumQueries(7):
+            bulk_assign(large, self.caller_ids(), self.manager)
+        self.assertEqual(Assignment.objects.count(), 505)
+        self.assertEqual(Notification.objects.count(), 505)
+        self.assertFalse(CustomerVisit.objects.filter(assigned_to_telecaller=False).exists())
+
+    def test_round_robin(self):
+        visits = self.visits(7)
+        assignments = bulk_assign(visits, self.caller_ids(), self.manager)
+        self.assertEqual(
+            [assignment.telecaller_id for assignment in assignments],
+            [self.caller_ids()[i % 3] for i in range(7)],
+        )
+
+    def test_least_loaded_fills_the_emptiest_queues_first(self):
+        busy, idle, new = self.telecallers
+        bulk_assign(self.visits(4), [busy.id], self.manager)
+        bulk_assign(self.visits(1), [idle.id], self.manager)
+
+        assignments = bulk_assign(self.visits(8), self.caller_ids(), self.manager, strategy='least_loaded')
+        dealt = [assignment.telecaller_id for assignment in assignments]
+        # Loads 4/1/0: the empty queues catch up, then ties go in list order
+        self.assertEqual(dealt, [new.id, idle.id, new.id, idle.id, new.id, idle.id, new.id, busy.id])
+
+    def test_invalid_ids_write_nothing(self):
+        visits = self.visits(3)
+        response = self.client.post('/api/telecalling/assignments/bulk_assign/', {
+            'telecaller_ids': self.caller_ids() + [self.rep.id],
+            'customer_visit_ids': visits + [0],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('telecaller_ids', response.data)
+        self.assertIn('customer_visit_ids', response.data)
+        self.assertFalse(Assignment.objects.exists())
+
+        response = self.client.post('/api/telecalling/assignments/bulk_assign/', {
+            'telecaller_ids': self.caller_ids(), 'customer_visit_ids': visits, 'strategy': 'least_loaded',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['assignments']), 3)
 
-# Create your tests here.
+        # The same leads cannot be handed out twice
+        response = self.client.post('/api/telecalling/assignments/bulk_assign/', {
+            'telecaller_ids': self.caller_ids(), 'customer_visit_ids': visits,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -8,6 +8,7 @@ from .models import (
     CustomerVisit, Assignment, CallLog, FollowUp, 
     CustomerProfile, Notification, Analytics
 )
+from .assignment import BulkAssignmentError, bulk_assign
 from .serializers import (
     CustomerVisitSerializer, AssignmentSerializer, CallLogSerializer, FollowUpSerializer,
     CustomerProfileSerializer, NotificationSerializer, AnalyticsSerializer,
@@ -96,44 +97,27 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         
         serializer = BulkAssignmentSerializer(data=request.data)
         if serializer.is_valid():
-            telecaller_ids = serializer.validated_data['telecaller_ids']
-            customer_visit_ids = serializer.validated_data['customer_visit_ids']
-            priority = serializer.validated_data['priority']
-            notes = serializer.validated_data.get('notes', '')
-            
-            assignments_created = []
-            for i, visit_id in enumerate(customer_visit_ids):
-                telecaller_id = telecaller_ids[i % len(telecaller_ids)]
-                try:
-                    assignment = Assignment.objects.create(
-                        telecaller_id=telecaller_id,
-                        customer_visit_id=visit_id,
-                        assigned_by=request.user,
-                        priority=priority,
-                        notes=notes
-                    )
-                    assignments_created.append(assignment)
-                    
-                    # Mark customer visit as assigned
-                    customer_visit = assignment.customer_visit
-                    customer_visit.assigned_to_telecaller = True
-                    customer_visit.save()
-                    
-                    # Create notification
-                    Notification.objects.create(
-                        recipient_id=telecaller_id,
-                        title="New Assignment",
-                        message=f"You have been assigned to call {customer_visit.customer_name}",
-                        notification_type='assignment',
-                        related_assignment=assignment
-                    )
-                except Exception as e:
-                    return Response({'error': f'Failed to create assignment: {str(e)}'}, 
-                                  status=status.HTTP_400_BAD_REQUEST)
-            
+            data = serializer.validated_data
+            try:
+                assignments = bulk_assign(
+                    data['customer_visit_ids'],
+                    data['telecaller_ids'],
+                    assigned_by=request.user,
+                    priority=data['priority'],
+                    notes=data.get('notes', ''),
+                    strategy=data['strategy'],
+                )
+            except BulkAssignmentError as e:
+                return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            assignments = Assignment.objects.filter(
+                id__in=[assignment.id for assignment in assignments]
+            ).select_related(
+                'telecaller', 'assigned_by', 'customer_visit__sales_rep'
+            ).prefetch_related('call_logs').order_by('id')
             return Response({
-                'message': f'Successfully created {len(assignments_created)} assignments',
-                'assignments': AssignmentSerializer(assignments_created, many=True).data
+                'message': f'Successfully created {len(assignments)} assignments',
+                'assignments': AssignmentSerializer(assignments, many=True).data
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
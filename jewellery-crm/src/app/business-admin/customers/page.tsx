@@ -64,6 +64,8 @@ export default function CustomersPage() {
   const [showEditModal, setShowEditModal] = useState(false);
   const [selectedCustomer, setSelectedCustomer] = useState<Client | null>(null);
   const [currentPage, setCurrentPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
+  const [hasNextPage, setHasNextPage] = useState(false);
 
   useEffect(() => {
     fetchClients();
@@ -79,8 +81,9 @@ export default function CustomersPage() {
       });
       
       if (response.success) {
-        const data = response.data as any;
-        setClients(Array.isArray(data) ? data : data.results || []);
+        setClients(response.data.results || []);
+        setTotalCount(response.data.count || 0);
+        setHasNextPage(Boolean(response.data.next));
       }
     } catch (error) {
       console.error('Failed to fetch clients:', error);
@@ -234,7 +237,7 @@ export default function CustomersPage() {
             <div className="flex items-center justify-between">
               <div>
                 <p className="text-sm font-medium text-text-secondary">Total Customers</p>
-                <p className="text-2xl font-bold text-text-primary">{clients.length || 0}</p>
+                <p className="text-2xl font-bold text-text-primary">{totalCount}</p>
               </div>
               <div className="w-8 h-8 bg-blue-100 rounded-full flex items-center justify-center">
                 <span className="text-blue-600 text-sm font-semibold">👥</span>
@@ -303,11 +306,11 @@ export default function CustomersPage() {
               <Input
                 placeholder="Search customers..."
                 value={searchTerm}
-                onChange={(e) => setSearchTerm(e.target.value)}
+                onChange={(e) => { setSearchTerm(e.target.value); setCurrentPage(1); }}
                 className="pl-10"
               />
             </div>
-            <Select value={statusFilter} onValueChange={setStatusFilter}>
+            <Select value={statusFilter} onValueChange={value => { setStatusFilter(value); setCurrentPage(1); }}>
               <SelectTrigger className="w-full md:w-48">
                 <SelectValue placeholder="Filter by status" />
               </SelectTrigger>
@@ -450,6 +453,17 @@ export default function CustomersPage() {
               </table>
             </div>
           )}
+          <div className="flex items-center justify-between text-sm text-text-secondary pt-4">
+            <span>Showing {clients.length} of {totalCount} customers</span>
+            <div className="flex gap-2">
+              <Button variant="outline" size="sm" disabled={currentPage === 1} onClick={() => setCurrentPage(p => p - 1)}>
+                Previous
+              </Button>
+              <Button variant="outline" size="sm" disabled={!hasNextPage} onClick={() => setCurrentPage(p => p + 1)}>
+                Next
+              </Button>
+            </div>
+          </div>
         </CardContent>
       </Card>
 
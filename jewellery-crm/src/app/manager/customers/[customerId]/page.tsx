@@ -20,13 +20,8 @@ export default function ManagerCustomerDetailPage() {
   const fetchCustomerDetails = async () => {
     try {
       setLoading(true);
-      // Note: This assumes there's a getClientById method in apiService
-      // If not available, you might need to implement it
-      const response = await apiService.getClients();
-      if (response.success && response.data && Array.isArray(response.data)) {
-        const foundCustomer = response.data.find(c => c.id.toString() === customerId);
-        setCustomer(foundCustomer || null);
-      }
+      const response = await apiService.getClient(String(customerId));
+      setCustomer(response.success && response.data ? response.data : null);
     } catch (error) {
       console.error('Error fetching customer details:', error);
     } finally {
@@ -12,42 +12,46 @@ export default function ManagerCustomersPage() {
   const [modalOpen, setModalOpen] = useState(false);
   const [customers, setCustomers] = useState<Client[]>([]);
   const [loading, setLoading] = useState(true);
+  const [hasLoaded, setHasLoaded] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
+  const [currentPage, setCurrentPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
+  const [hasNextPage, setHasNextPage] = useState(false);
 
   useEffect(() => {
     fetchCustomers();
-  }, []);
+  }, [currentPage, searchTerm, statusFilter]);
 
   const fetchCustomers = async () => {
     try {
       setLoading(true);
-      const response = await apiService.getClients();
-      if (response.success && response.data && Array.isArray(response.data)) {
-        setCustomers(response.data);
+      // Search and status are applied by the API so paging covers every match
+      const response = await apiService.getClients({
+        page: currentPage,
+        search: searchTerm || undefined,
+        status: statusFilter === 'all' ? undefined : statusFilter,
+      });
+      if (response.success && response.data) {
+        setCustomers(response.data.results || []);
+        setTotalCount(response.data.count || 0);
+        setHasNextPage(Boolean(response.data.next));
       } else {
-        console.warn('Customers response is not an array:', response.data);
         setCustomers([]);
+        setTotalCount(0);
+        setHasNextPage(false);
       }
     } catch (error) {
       console.error('Error fetching customers:', error);
       setCustomers([]);
     } finally {
       setLoading(false);
+      setHasLoaded(true);
     }
   };
 
-  const filteredCustomers = Array.isArray(customers) ? customers.filter(customer => {
-    const matchesSearch = customer.first_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         customer.last_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         customer.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         customer.phone?.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = statusFilter === 'all' || customer.status === statusFilter;
-    
-    return matchesSearch && matchesStatus;
-  }) : [];
-
-  if (loading) {
+  // Later fetches keep the table mounted so the search box keeps its focus
+  if (loading && !hasLoaded) {
     return (
       <div className="flex items-center justify-center h-64">
         <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div>
@@ -70,8 +74,13 @@ export default function ManagerCustomersPage() {
       </div>
       <Card className="p-4 flex flex-col gap-4">
         <div className="flex flex-col md:flex-row gap-2 md:items-center md:justify-between">
-          <Input placeholder="Search by name, email, or phone..." className="w-full md:w-80" />
-          <Select>
+          <Input
+            placeholder="Search by name, email, or phone..."
+            className="w-full md:w-80"
+            value={searchTerm}
+            onChange={e => { setSearchTerm(e.target.value); setCurrentPage(1); }}
+          />
+          <Select value={statusFilter} onValueChange={value => { setStatusFilter(value); setCurrentPage(1); }}>
             <SelectTrigger className="w-40">
               <SelectValue placeholder="All Status" />
             </SelectTrigger>
@@ -79,7 +88,8 @@ export default function ManagerCustomersPage() {
               <SelectItem value="all">All Status</SelectItem>
               <SelectItem value="lead">Lead</SelectItem>
               <SelectItem value="prospect">Prospect</SelectItem>
-              <SelectItem value="active">Active</SelectItem>
+              <SelectItem value="customer">Customer</SelectItem>
+              <SelectItem value="inactive">Inactive</SelectItem>
             </SelectContent>
           </Select>
         </div>
@@ -95,7 +105,7 @@ export default function ManagerCustomersPage() {
               </tr>
             </thead>
             <tbody>
-              {filteredCustomers.map((c, i) => (
+              {customers.map((c, i) => (
                 <tr key={i} className="border-t border-border hover:bg-gray-50">
                   <td className="px-4 py-2">
                     <div className="font-medium text-text-primary">{`${c.first_name} ${c.last_name}`}</div>
@@ -115,6 +125,17 @@ export default function ManagerCustomersPage() {
             </tbody>
           </table>
         </div>
+        <div className="flex items-center justify-between text-sm text-text-secondary">
+          <span>Showing {customers.length} of {totalCount} customers</span>
+          <div className="flex gap-2">
+            <Button variant="outline" size="sm" disabled={currentPage === 1} onClick={() => setCurrentPage(p => p - 1)}>
+              Previous
+            </Button>
+            <Button variant="outline" size="sm" disabled={!hasNextPage} onClick={() => setCurrentPage(p => p + 1)}>
+              Next
+            </Button>
+          </div>
+        </div>
       </Card>
     </div>
   );
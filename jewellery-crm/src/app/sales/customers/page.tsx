@@ -22,48 +22,34 @@ export default function SalesCustomersPage() {
   const [trashModalOpen, setTrashModalOpen] = useState(false);
   const [selectedCustomerId, setSelectedCustomerId] = useState<string | null>(null);
   const [selectedCustomer, setSelectedCustomer] = useState<Client | null>(null);
-  const [filteredCustomers, setFilteredCustomers] = useState<Client[]>([]);
+  const [currentPage, setCurrentPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
+  const [hasNextPage, setHasNextPage] = useState(false);
+  const [hasLoaded, setHasLoaded] = useState(false);
 
   useEffect(() => {
     fetchCustomers();
-  }, []);
-
-  useEffect(() => {
-    // Filter customers based on search term and status
-    let filtered = customers || [];
-    
-    if (searchTerm) {
-      filtered = filtered.filter(customer => 
-        customer.first_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        customer.last_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        customer.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        customer.phone?.includes(searchTerm)
-      );
-    }
-    
-    if (statusFilter) {
-      filtered = filtered.filter(customer => customer.status === statusFilter);
-    }
-    
-    setFilteredCustomers(filtered);
-  }, [customers, searchTerm, statusFilter]);
+  }, [currentPage, searchTerm, statusFilter]);
 
   const fetchCustomers = async () => {
     try {
       setLoading(true);
-      const response = await apiService.getClients();
-      console.log('Customers API response:', response);
-      
-      // Ensure we have an array of customers
-      const customersData = Array.isArray(response.data) ? response.data : [];
-      console.log('Processed customers data:', customersData);
-      
-      setCustomers(customersData);
+      // Search and status are applied by the API so paging covers every match
+      const response = await apiService.getClients({
+        page: currentPage,
+        search: searchTerm || undefined,
+        status: statusFilter || undefined,
+      });
+      const page = response.success && response.data ? response.data : null;
+      setCustomers(page?.results || []);
+      setTotalCount(page?.count || 0);
+      setHasNextPage(Boolean(page?.next));
     } catch (error) {
       console.error('Error fetching customers:', error);
       setCustomers([]); // Set empty array on error
     } finally {
       setLoading(false);
+      setHasLoaded(true);
     }
   };
 
@@ -152,7 +138,7 @@ export default function SalesCustomersPage() {
     }
   };
 
-  if (loading) {
+  if (loading && !hasLoaded) {
     return (
       <div className="flex flex-col gap-8">
         <div className="flex flex-col md:flex-row md:items-center md:justify-between gap-4 mb-2">
@@ -236,13 +222,13 @@ export default function SalesCustomersPage() {
                 placeholder="Search by name, email, or phone..." 
                 className="pl-10 w-full"
                 value={searchTerm}
-                onChange={(e) => setSearchTerm(e.target.value)}
+                onChange={(e) => { setSearchTerm(e.target.value); setCurrentPage(1); }}
               />
             </div>
             <select
               className="px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
               value={statusFilter}
-              onChange={(e) => setStatusFilter(e.target.value)}
+              onChange={(e) => { setStatusFilter(e.target.value); setCurrentPage(1); }}
             >
               <option value="">All Status</option>
               <option value="lead">Lead</option>
@@ -266,8 +252,8 @@ export default function SalesCustomersPage() {
               </tr>
             </thead>
             <tbody>
-              {filteredCustomers.length > 0 ? (
-                filteredCustomers.map((customer) => (
+              {customers.length > 0 ? (
+                customers.map((customer) => (
                   <tr key={customer.id} className="border-t border-border hover:bg-gray-50">
                     <td className="px-4 py-3 font-medium text-text-primary">
                       {customer.first_name} {customer.last_name}
@@ -330,9 +316,17 @@ export default function SalesCustomersPage() {
           </table>
         </div>
         
-        {filteredCustomers.length > 0 && (
-          <div className="text-sm text-text-secondary text-center py-2">
-            Showing {filteredCustomers.length} of {customers.length} customers
+        {customers.length > 0 && (
+          <div className="flex items-center justify-between text-sm text-text-secondary py-2">
+            <span>Showing {customers.length} of {totalCount} customers</span>
+            <div className="flex gap-2">
+              <Button variant="outline" size="sm" disabled={currentPage === 1} onClick={() => setCurrentPage(p => p - 1)}>
+                Previous
+              </Button>
+              <Button variant="outline" size="sm" disabled={!hasNextPage} onClick={() => setCurrentPage(p => p + 1)}>
+                Next
+              </Button>
+            </div>
           </div>
         )}
       </Card>
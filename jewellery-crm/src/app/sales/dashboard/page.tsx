@@ -66,19 +66,7 @@ export default function SalesDashboardPage() {
         const customersResponse = await apiService.getClients();
         console.log('Customers API response:', customersResponse);
         
-        // Handle different response structures
-        let customers: any[] = [];
-        if (customersResponse.data) {
-          if (Array.isArray(customersResponse.data)) {
-            customers = customersResponse.data;
-          } else if (typeof customersResponse.data === 'object' && 'results' in customersResponse.data) {
-            customers = (customersResponse.data as any).results;
-          } else if (typeof customersResponse.data === 'object' && 'data' in customersResponse.data) {
-            customers = (customersResponse.data as any).data;
-          } else {
-            customers = [customersResponse.data];
-          }
-        }
+        const customers: any[] = customersResponse.data?.results || [];
         console.log('Processed customers data:', customers);
         console.log('Customers count:', customers.length);
         
@@ -116,7 +104,7 @@ export default function SalesDashboardPage() {
         });
 
         const totalSales = Array.isArray(sales) ? sales.length : 0;
-        const totalCustomers = Array.isArray(customers) ? customers.length : 0;
+        const totalCustomers = customersResponse.data?.count || 0;
         
         let monthlyRevenue = 0;
         if (Array.isArray(sales)) {
@@ -269,8 +269,9 @@ export function StoreManagerDashboard() {
         customersResponse = await apiService.getClients();
         console.log('Customers response:', customersResponse);
         if (customersResponse.success && customersResponse.data) {
-          const customers = Array.isArray(customersResponse.data) ? customersResponse.data : [];
-          totalCustomers = customers.length;
+          // The list is paged, so the total comes from count; the newest customers are on page one
+          const customers = customersResponse.data.results || [];
+          totalCustomers = customersResponse.data.count || 0;
           console.log('Total customers found:', totalCustomers);
           // Calculate new customers today (simplified logic)
           const today = new Date().toISOString().split('T')[0];
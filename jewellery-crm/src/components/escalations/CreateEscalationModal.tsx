@@ -52,9 +52,9 @@ export default function CreateEscalationModal({ onSuccess }: CreateEscalationMod
 
   const fetchClients = async () => {
     try {
-      const response = await apiService.getClients();
+      const response = await apiService.getClients({ page_size: 200 });
       if (response.success) {
-        setClients(response.data || []);
+        setClients(response.data?.results || []);
       }
     } catch (error) {
       console.error('Error fetching clients:', error);
@@ -53,13 +53,10 @@ export function AddDealModal({ open, onClose, onDealCreated }: AddDealModalProps
   const fetchClients = async () => {
     try {
       setLoading(true);
-      const response = await apiService.getClients();
+      const response = await apiService.getClients({ page_size: 200 });
       
       if (response.success && response.data) {
-        const clientsData = Array.isArray(response.data) 
-          ? response.data 
-          : response.data.results || response.data.data || [];
-        setClients(clientsData);
+        setClients(response.data.results || []);
       }
     } catch (error) {
       console.error('Error fetching clients:', error);
@@ -7,6 +7,13 @@ interface ApiResponse<T> {
   success: boolean;
 }
 
+interface PaginatedResponse<T> {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 // Type definitions based on backend models
 interface User {
   id: number;
@@ -489,12 +496,14 @@ class ApiService {
   // Clients (Customers) API
   async getClients(params?: {
     page?: number;
+    page_size?: number;
     search?: string;
     status?: string;
     assigned_to?: string;
-  }): Promise<ApiResponse<Client[]>> {
+  }): Promise<ApiResponse<PaginatedResponse<Client>>> {
     const queryParams = new URLSearchParams();
     if (params?.page) queryParams.append('page', params.page.toString());
+    if (params?.page_size) queryParams.append('page_size', params.page_size.toString());
     if (params?.search) queryParams.append('search', params.search);
     if (params?.status) queryParams.append('status', params.status);
     if (params?.assigned_to) queryParams.append('assigned_to', params.assigned_to);
@@ -1227,4 +1236,4 @@ class ApiService {
 }
 
 export const apiService = new ApiService();
-export type { User, Client, Product, Sale, SalesPipeline, Appointment, Category, DashboardStats, Store, SupportTicket }; 
\ No newline at end of file
+export type { PaginatedResponse, User, Client, Product, Sale, SalesPipeline, Appointment, Category, DashboardStats, Store, SupportTicket }; 
\ No newline at end of file